@@ -1,9 +1,15 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from app.core.deps import get_db
+from app.core.deps import get_db, get_current_superuser
 from app.core.config import settings
+from app.core.database_performance import pool_monitor, query_monitor
+from app.core.cache import get_cache_stats
+from app.core.db_optimizations import read_replica_manager
+from app.core.rate_limiter import limiter
+from app.core.security import password_hasher, token_verifier
 from datetime import datetime
+from typing import Optional
 import psutil
 import os
 
@@ -30,18 +36,39 @@ async def detailed_health_check(db: Session = Depends(get_db)):
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
     
+    # Connection pool saturation and checkout wait times
+    pool_monitor.refresh()
+    pools_healthy = pool_monitor.is_pool_healthy()
+    
     # Get system information
     memory = psutil.virtual_memory()
     disk = psutil.disk_usage('/')
     
+    if db_status != "healthy":
+        overall_status = "unhealthy"
+    elif not pools_healthy:
+        overall_status = "degraded"
+    else:
+        overall_status = "healthy"
+    
     return {
-        "status": "healthy" if db_status == "healthy" else "unhealthy",
+        "status": overall_status,
         "timestamp": datetime.utcnow().isoformat(),
         "service": "Plan et al API",
         "version": "1.0.0",
         "environment": settings.ENVIRONMENT,
         "checks": {
             "database": db_status,
+            "database_pools": {
+                "healthy": pools_healthy,
+                "totals": pool_monitor.get_stats(),
+                "pools": pool_monitor.get_pool_report()
+            },
+            "read_replicas": read_replica_manager.get_report(),
+            "cache": get_cache_stats(),
+            "password_hashing": password_hasher.snapshot(),
+            "token_decode_cache": token_verifier.snapshot(),
+            "rate_limiter": limiter.snapshot(),
             "memory": {
                 "total": memory.total,
                 "available": memory.available,
@@ -57,6 +84,25 @@ async def detailed_health_check(db: Session = Depends(get_db)):
         "process_id": os.getpid()
     }
 
+@health_router.get("/db-stats", dependencies=[Depends(get_current_superuser)])
+async def database_stats(limit: int = 25, pattern: Optional[str] = None):
+    """Aggregated query statistics per statement fingerprint (superusers only)"""
+    limit = min(max(limit, 1), 200)
+    slow_queries = query_monitor.get_slow_queries(limit=limit)
+    if not settings.DEBUG:
+        # Sampled parameters may contain user data
+        slow_queries = [{**query, "params": None} for query in slow_queries]
+    
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "process_id": os.getpid(),
+        "slow_query_threshold_ms": query_monitor.slow_query_threshold * 1000,
+        "tracked_fingerprints": query_monitor.get_fingerprint_count(),
+        "max_fingerprints": query_monitor.max_fingerprints,
+        "queries": query_monitor.get_query_stats(query_pattern=pattern, limit=limit),
+        "slow_queries": slow_queries
+    }
+
 @health_router.get("/ready")
 async def readiness_check(db: Session = Depends(get_db)):
     """Readiness check for Kubernetes/Docker"""
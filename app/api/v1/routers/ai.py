@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from app.core.deps import get_db, get_current_active_user
@@ -49,25 +49,26 @@ class WeatherCheckRequest(BaseModel):
 @ai_router.post("/checklist")
 @rate_limit_ai_analysis
 async def generate_event_checklist(
-    request: ChecklistRequest,
+    request: Request,
+    checklist_request: ChecklistRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Generate AI-powered checklist for an event"""
     try:
         event_service = EventService(db)
-        event = event_service.get_event_by_id(request.event_id, current_user.id)
+        event = event_service.get_event_by_id(checklist_request.event_id, current_user.id)
         
         if not event:
             raise http_404_not_found("Event not found")
         
-        checklist = await ai_service.generate_event_checklist(event, request.budget)
+        checklist = await ai_service.generate_event_checklist(event, checklist_request.budget)
         
         return {
-            "event_id": request.event_id,
+            "event_id": checklist_request.event_id,
             "checklist": checklist,
             "generated_at": "2024-01-01T00:00:00Z",
-            "budget_considered": request.budget
+            "budget_considered": checklist_request.budget
         }
         
     except Exception as e:
@@ -79,24 +80,25 @@ async def generate_event_checklist(
 @ai_router.post("/vendors")
 @rate_limit_ai_analysis
 async def suggest_vendors(
-    request: VendorRequest,
+    request: Request,
+    vendor_request: VendorRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get AI-powered vendor suggestions"""
     try:
         event_service = EventService(db)
-        event = event_service.get_event_by_id(request.event_id, current_user.id)
+        event = event_service.get_event_by_id(vendor_request.event_id, current_user.id)
         
         if not event:
             raise http_404_not_found("Event not found")
         
-        vendors = await ai_service.suggest_vendors(event, request.category, request.location)
+        vendors = await ai_service.suggest_vendors(event, vendor_request.category, vendor_request.location)
         
         return {
-            "event_id": request.event_id,
-            "category": request.category,
-            "location": request.location,
+            "event_id": vendor_request.event_id,
+            "category": vendor_request.category,
+            "location": vendor_request.location,
             "vendors": vendors,
             "generated_at": "2024-01-01T00:00:00Z"
         }
@@ -110,29 +112,30 @@ async def suggest_vendors(
 @ai_router.post("/menu")
 @rate_limit_ai_analysis
 async def generate_menu_suggestions(
-    request: MenuRequest,
+    request: Request,
+    menu_request: MenuRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Generate AI-powered menu suggestions"""
     try:
         event_service = EventService(db)
-        event = event_service.get_event_by_id(request.event_id, current_user.id)
+        event = event_service.get_event_by_id(menu_request.event_id, current_user.id)
         
         if not event:
             raise http_404_not_found("Event not found")
         
         menu = await ai_service.generate_menu_suggestions(
             event, 
-            request.dietary_restrictions, 
-            request.budget_per_person
+            menu_request.dietary_restrictions, 
+            menu_request.budget_per_person
         )
         
         return {
-            "event_id": request.event_id,
+            "event_id": menu_request.event_id,
             "menu": menu,
-            "dietary_restrictions": request.dietary_restrictions,
-            "budget_per_person": request.budget_per_person,
+            "dietary_restrictions": menu_request.dietary_restrictions,
+            "budget_per_person": menu_request.budget_per_person,
             "generated_at": "2024-01-01T00:00:00Z"
         }
         
@@ -145,20 +148,21 @@ async def generate_menu_suggestions(
 @ai_router.post("/budget-optimization")
 @rate_limit_ai_analysis
 async def optimize_budget(
-    request: BudgetOptimizationRequest,
+    request: Request,
+    budget_request: BudgetOptimizationRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get AI-powered budget optimization suggestions"""
     try:
         event_service = EventService(db)
-        event = event_service.get_event_by_id(request.event_id, current_user.id)
+        event = event_service.get_event_by_id(budget_request.event_id, current_user.id)
         
         if not event:
             raise http_404_not_found("Event not found")
         
         # Get current expenses
-        expenses = event_service.get_event_expenses(request.event_id, current_user.id)
+        expenses = event_service.get_event_expenses(budget_request.event_id, current_user.id)
         expense_data = [
             {
                 "title": exp.title,
@@ -169,12 +173,12 @@ async def optimize_budget(
             for exp in expenses
         ]
         
-        optimization = await ai_service.optimize_budget(event, expense_data, request.target_budget)
+        optimization = await ai_service.optimize_budget(event, expense_data, budget_request.target_budget)
         
         return {
-            "event_id": request.event_id,
+            "event_id": budget_request.event_id,
             "optimization": optimization,
-            "target_budget": request.target_budget,
+            "target_budget": budget_request.target_budget,
             "generated_at": "2024-01-01T00:00:00Z"
         }
         
@@ -187,21 +191,22 @@ async def optimize_budget(
 @ai_router.post("/timeline")
 @rate_limit_ai_analysis
 async def generate_event_timeline(
-    request: TimelineRequest,
+    request: Request,
+    timeline_request: TimelineRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Generate AI-powered event timeline"""
     try:
         event_service = EventService(db)
-        event = event_service.get_event_by_id(request.event_id, current_user.id)
+        event = event_service.get_event_by_id(timeline_request.event_id, current_user.id)
         
         if not event:
             raise http_404_not_found("Event not found")
         
         tasks = None
-        if request.include_tasks:
-            event_tasks = event_service.get_event_tasks(request.event_id, current_user.id)
+        if timeline_request.include_tasks:
+            event_tasks = event_service.get_event_tasks(timeline_request.event_id, current_user.id)
             tasks = [
                 {
                     "title": task.title,
@@ -216,9 +221,9 @@ async def generate_event_timeline(
         timeline = await ai_service.generate_event_timeline(event, tasks)
         
         return {
-            "event_id": request.event_id,
+            "event_id": timeline_request.event_id,
             "timeline": timeline,
-            "includes_tasks": request.include_tasks,
+            "includes_tasks": timeline_request.include_tasks,
             "generated_at": "2024-01-01T00:00:00Z"
         }
         
@@ -231,29 +236,30 @@ async def generate_event_timeline(
 @ai_router.post("/gift-ideas")
 @rate_limit_ai_analysis
 async def suggest_gift_ideas(
-    request: GiftSuggestionRequest,
+    request: Request,
+    gift_request: GiftSuggestionRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Generate AI-powered gift suggestions"""
     try:
         event_service = EventService(db)
-        event = event_service.get_event_by_id(request.event_id, current_user.id)
+        event = event_service.get_event_by_id(gift_request.event_id, current_user.id)
         
         if not event:
             raise http_404_not_found("Event not found")
         
         gift_ideas = await ai_service.suggest_gift_ideas(
             event, 
-            request.recipient_info, 
-            request.budget_range
+            gift_request.recipient_info, 
+            gift_request.budget_range
         )
         
         return {
-            "event_id": request.event_id,
+            "event_id": gift_request.event_id,
             "gift_ideas": gift_ideas,
-            "recipient_info": request.recipient_info,
-            "budget_range": request.budget_range,
+            "recipient_info": gift_request.recipient_info,
+            "budget_range": gift_request.budget_range,
             "generated_at": "2024-01-01T00:00:00Z"
         }
         
@@ -266,26 +272,27 @@ async def suggest_gift_ideas(
 @ai_router.post("/weather-check")
 @rate_limit_ai_analysis
 async def check_weather_and_backup(
-    request: WeatherCheckRequest,
+    request: Request,
+    weather_request: WeatherCheckRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Check weather and get AI-powered backup suggestions"""
     try:
         event_service = EventService(db)
-        event = event_service.get_event_by_id(request.event_id, current_user.id)
+        event = event_service.get_event_by_id(weather_request.event_id, current_user.id)
         
         if not event:
             raise http_404_not_found("Event not found")
         
         weather_analysis = await ai_service.check_weather_and_suggest_backup(
             event, 
-            request.location
+            weather_request.location
         )
         
         return {
-            "event_id": request.event_id,
-            "location": request.location,
+            "event_id": weather_request.event_id,
+            "location": weather_request.location,
             "weather_analysis": weather_analysis,
             "generated_at": "2024-01-01T00:00:00Z"
         }
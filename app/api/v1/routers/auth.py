@@ -106,7 +106,7 @@ async def register(
     """Register a new user account"""
     try:
         auth_service = AuthService(db)
-        user = auth_service.register_user(user_data)
+        user = await auth_service.register_user_async(user_data)
         return user
     except Exception as e:
         import traceback
@@ -134,7 +134,7 @@ async def login(
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
         
-        token_response = auth_service.login(
+        token_response = await auth_service.login_async(
             login_data,
             ip_address=ip_address,
             user_agent=user_agent
@@ -169,7 +169,7 @@ async def oauth2_password_token(
         user_agent = request.headers.get("user-agent") if request else None
 
         login_payload = UserLogin(email=form_data.username, password=form_data.password)
-        token_response = auth_service.login(
+        token_response = await auth_service.login_async(
             login_payload,
             ip_address=ip_address,
             user_agent=user_agent
@@ -368,7 +368,7 @@ async def google_mobile_sign_in(
                     confirm_password=random_password,  # Match password for validation
                 )
                 # Skip verification OTP for Google users (they're pre-verified by Google)
-                user = auth_service.register_user(user_data, skip_verification=True)
+                user = await auth_service.register_user_async(user_data, skip_verification=True)
                 
                 # Mark as verified since Google verified the email
                 user.is_verified = True
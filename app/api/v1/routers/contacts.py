@@ -3,6 +3,7 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
+from starlette.concurrency import run_in_threadpool
 
 from app.core.database import get_db
 from app.core.deps import get_current_user
@@ -13,7 +14,7 @@ from app.services.contact_service import ContactService
 from app.schemas.contact_schemas import (
     ContactCreate, ContactUpdate, ContactResponse, ContactListResponse,
     ContactInvitationCreate, BulkContactInvitationCreate, BulkPhoneInvitationCreate,
-    BulkPhoneInvitationResponse, BulkEmailInvitationCreate, BulkEmailInvitationResponse,
+    BulkPhoneInvitationResponse, BulkPhoneInvitationProgress, BulkEmailInvitationCreate, BulkEmailInvitationResponse,
     ContactInvitationResponse,
     InvitationListResponse, InvitationResponseRequest,
     ContactGroupCreate, ContactGroupUpdate, ContactGroupResponse, ContactGroupListResponse,
@@ -235,7 +236,7 @@ async def send_bulk_invitations(
         message=invitation_data.message
     )
 
-@router.post("/invitations/bulk-phone", response_model=BulkPhoneInvitationResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/invitations/bulk-phone", response_model=BulkPhoneInvitationResponse, status_code=status.HTTP_202_ACCEPTED)
 @rate_limit_contact_invite_send
 async def send_bulk_phone_invitations(
     request: Request,
@@ -258,10 +259,13 @@ async def send_bulk_phone_invitations(
     - **message**: Optional - personal message to include in SMS
     - **auto_add_to_contacts**: Optional - save numbers to PlanEtAl contacts
     
-    **Returns:** Details about sent/failed invitations with SMS delivery status
+    **Returns:** A job id for the SMS delivery, the invitations queued on it and
+    numbers rejected as invalid. Poll `GET /invitations/bulk-phone/{job_id}` for delivery status.
     """
     contact_service = ContactService(db)
-    return contact_service.bulk_send_phone_invitations(
+    # Blocking: sends the SMS inline when the job cannot be queued
+    return await run_in_threadpool(
+        contact_service.bulk_send_phone_invitations,
         sender_id=current_user.id,
         phone_numbers=invitation_data.phone_numbers,
         event_id=invitation_data.event_id,
@@ -269,6 +273,16 @@ async def send_bulk_phone_invitations(
         auto_add_to_contacts=invitation_data.auto_add_to_contacts
     )
 
+@router.get("/invitations/bulk-phone/{job_id}", response_model=BulkPhoneInvitationProgress)
+async def get_bulk_phone_invitation_progress(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the delivery progress of a bulk phone invitation job"""
+    contact_service = ContactService(db)
+    return contact_service.get_phone_invitation_job(current_user.id, job_id)
+
 @router.post("/invitations/bulk-email", response_model=BulkEmailInvitationResponse, status_code=status.HTTP_201_CREATED)
 @rate_limit_contact_invite_send
 async def send_bulk_email_invitations(
@@ -288,7 +302,7 @@ async def send_bulk_email_invitations(
     **Returns:** Details about sent/failed invitations
     """
     contact_service = ContactService(db)
-    return contact_service.bulk_send_email_invitations(
+    return await contact_service.bulk_send_email_invitations(
         sender_id=current_user.id,
         emails=[str(e) for e in invitation_data.emails],
         event_id=invitation_data.event_id,
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Union
 from datetime import datetime,timedelta
 import json
-from app.core.deps import get_db, get_current_user, get_current_active_user
+from app.core.deps import (
+    get_db, get_current_user, get_current_active_user, get_read_path_db, get_read_path_user,
+    get_read_db, get_current_read_user
+)
 from app.core.errors import (
     http_400_bad_request, http_404_not_found, http_403_forbidden,
     AuthorizationError, NotFoundError, ValidationError
@@ -23,7 +27,11 @@ from app.schemas.event import (
     EventDuplicateRequest, CollaboratorAddRequest
 )
 from app.schemas.timeline import TimelineTemplateResponse
-from app.repositories.event_repo import EventRepository
+from app.repositories.event_repo import (
+    EventRepository, AsyncEventRepository, EVENT_LISTING_CATEGORIES, PUBLIC_EVENTS_CACHE_TAG
+)
+from app.repositories.timeline_repo import PUBLIC_TEMPLATES_CACHE_TAG
+from app.core.cache import ReadThroughCache
 from app.schemas.location import (
     LocationAutocompleteRequest, LocationSuggestion, NearbyPlacesRequest, LocationUpdateRequest
 )
@@ -39,6 +47,8 @@ from app.schemas.user import UserSummary
 
 events_router = APIRouter()
 
+discovery_cache = ReadThroughCache("discovery", ttl_seconds=120, response_type=DiscoveryResponse)
+
 # Event CRUD endpoints
 @events_router.post("/", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
 async def create_event(
@@ -193,10 +203,11 @@ async def delete_event_cover_image(
 async def get_events(
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor; takes precedence over offset"),
     category: Optional[str] = Query(None, description="Filter by category: upcoming, past, drafts, hosting, attending, public"),
     event_type: Optional[EventType] = Query(None),
-    current_user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_read_path_user),
+    db: Union[Session, AsyncSession] = Depends(get_read_path_db)
 ):
     """
     Get list of events.
@@ -211,124 +222,40 @@ async def get_events(
         - public: Public events (no login required)
     """
     try:
-        event_repo = EventRepository(db)
-        
-        # Base query
-        query = db.query(Event).filter(Event.is_deleted == False)
-        
-        # Apply category filters
         if category:
             category = category.lower()
-            
-            if category == "public":
-                # Public events - no authentication required
-                query = query.filter(Event.is_public == True, Event.status != EventStatus.DRAFT)
-                if current_user:
-                    query = query.filter(Event.creator_id != current_user.id)
-                query = query.order_by(Event.start_datetime.desc())
-                
-            elif not current_user:
+            if category not in EVENT_LISTING_CATEGORIES:
+                raise http_400_bad_request(f"Invalid category: {category}. Use: upcoming, past, drafts, hosting, attending, or public")
+            if category != "public" and not current_user:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Authentication required for this category"
                 )
-                
-            elif category == "upcoming":
-                # Future events (exclude drafts)
-                query = query.filter(
-                    Event.start_datetime >= datetime.utcnow(),
-                    Event.status != EventStatus.DRAFT
-                )
-                access_filter = or_(
-                    Event.creator_id == current_user.id,
-                    Event.collaborators.any(User.id == current_user.id),
-                    Event.invitations.any(EventInvitation.user_id == current_user.id)
-                )
-                query = query.filter(access_filter)
-                query = query.order_by(Event.start_datetime.asc())
-                
-            elif category == "past":
-                # Past events (exclude drafts)
-                query = query.filter(
-                    Event.end_datetime < datetime.utcnow(),
-                    Event.status != EventStatus.DRAFT
-                )
-                access_filter = or_(
-                    Event.creator_id == current_user.id,
-                    Event.collaborators.any(User.id == current_user.id),
-                    Event.invitations.any(EventInvitation.user_id == current_user.id)
-                )
-                query = query.filter(access_filter)
-                query = query.order_by(Event.start_datetime.desc())
-                
-            elif category == "drafts":
-                # Draft events only
-                query = query.filter(Event.status == EventStatus.DRAFT)
-                access_filter = or_(
-                    Event.creator_id == current_user.id,
-                    Event.collaborators.any(User.id == current_user.id),
-                    Event.invitations.any(EventInvitation.user_id == current_user.id)
-                )
-                query = query.filter(access_filter)
-                query = query.order_by(Event.start_datetime.desc())
-                
-            elif category == "hosting":
-                # Events created by user (all statuses)
-                query = query.filter(Event.creator_id == current_user.id)
-                query = query.order_by(Event.start_datetime.desc())
-                
-            elif category == "attending":
-                # Events user is invited to (not creator, exclude drafts)
-                query = query.filter(
-                    Event.creator_id != current_user.id,
-                    Event.invitations.any(EventInvitation.user_id == current_user.id),
-                    Event.status != EventStatus.DRAFT
-                )
-                query = query.order_by(Event.start_datetime.desc())
-            else:
-                raise http_400_bad_request(f"Invalid category: {category}. Use: upcoming, past, drafts, hosting, attending, or public")
         
+        user_id = current_user.id if current_user else None
+        if isinstance(db, AsyncSession):
+            page = await AsyncEventRepository(db).get_listing(
+                category, user_id, limit, offset, event_type, cursor
+            )
         else:
-            # No category specified
-            if current_user:
-                # Return all events user has access to (exclude drafts unless they're the creator)
-                access_filter = or_(
-                    Event.creator_id == current_user.id,
-                    and_(
-                        Event.status != EventStatus.DRAFT,
-                        or_(
-                            Event.collaborators.any(User.id == current_user.id),
-                            Event.invitations.any(EventInvitation.user_id == current_user.id)
-                        )
-                    )
-                )
-                query = query.filter(access_filter)
-            else:
-                # Return public events only
-                query = query.filter(Event.is_public == True, Event.status != EventStatus.DRAFT)
-            
-            query = query.order_by(Event.start_datetime.desc())
-        
-        # Apply event_type filter if provided
-        if event_type:
-            query = query.filter(Event.event_type == event_type)
-        
-        # Get total count
-        total_events = query.count()
-        
-        # Apply pagination
-        events = query.offset(offset).limit(limit).all()
+            page = EventRepository(db).get_listing(
+                category, user_id, limit, offset, event_type, cursor
+            )
         
-        event_summaries = [EventSummary.model_validate(event) for event in events]
+        event_summaries = [EventSummary.model_validate(event) for event in page.items]
         
         return EventListResponse(
             events=event_summaries,
-            total=total_events,
+            total=page.total,
             limit=limit,
-            offset=offset
+            offset=offset,
+            next_cursor=page.next_cursor,
+            total_is_estimate=page.total_is_estimate
         )
     except HTTPException:
         raise
+    except ValidationError as e:
+        raise http_400_bad_request(str(e))
     except Exception as e:
         raise http_400_bad_request(f"Failed to retrieve events: {str(e)}")
 
@@ -337,27 +264,30 @@ async def search_events(
     q: str = Query(..., min_length=1, max_length=100, description="Search query"),
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
-    current_user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor; takes precedence over offset"),
+    current_user: Optional[User] = Depends(get_read_path_user),
+    db: Union[Session, AsyncSession] = Depends(get_read_path_db)
 ):
     """Search events by title, description, or venue"""
     try:
-        event_service = EventService(db)
-        events = event_service.search_events(
-            query=q,
-            user_id=current_user.id if current_user else None,
-            skip=offset,
-            limit=limit
-        )
+        user_id = current_user.id if current_user else None
+        if isinstance(db, AsyncSession):
+            page = await AsyncEventRepository(db).search_page(q, user_id, limit, offset, cursor)
+        else:
+            page = EventRepository(db).search_page(q, user_id, limit, offset, cursor)
         
-        event_summaries = [EventSummary.model_validate(event) for event in events]
+        event_summaries = [EventSummary.model_validate(event) for event in page.items]
         
         return EventListResponse(
             events=event_summaries,
-            total=len(event_summaries),
+            total=page.total,
             limit=limit,
-            offset=offset
+            offset=offset,
+            next_cursor=page.next_cursor,
+            total_is_estimate=page.total_is_estimate
         )
+    except ValidationError as e:
+        raise http_400_bad_request(str(e))
     except Exception:
         raise http_400_bad_request("Search failed")
 
@@ -482,67 +412,92 @@ async def get_my_events(
     except Exception as e:
         raise http_400_bad_request(f"Failed to retrieve user events: {str(e)}")
 
+def _build_discovery_response(
+    db: Session,
+    user_id: int,
+    template_event_type: Optional[str],
+    template_page: int,
+    template_per_page: int,
+    events_page: int,
+    events_per_page: int
+) -> DiscoveryResponse:
+    timeline_service = TimelineService(db)
+    templates, templates_total = timeline_service.get_templates({
+        "event_type": template_event_type,
+        "is_public": True,
+        "exclude_creator_id": user_id,
+        "page": template_page,
+        "per_page": template_per_page
+    })
+    template_responses = []
+    for template in templates:
+        response = TimelineTemplateResponse.model_validate(template)
+        response.template_id = response.id
+        try:
+            template_data = json.loads(template.template_data) if template.template_data else {}
+        except json.JSONDecodeError:
+            template_data = {}
+        response.cover_image_url = template_data.get("cover_image_url")
+        template_responses.append(response)
+    template_meta = PaginationMeta.create(
+        page=template_page,
+        size=template_per_page,
+        total=templates_total
+    )
+
+    event_repo = EventRepository(db)
+    events_pagination = PaginationParams(page=events_page, size=events_per_page)
+    events, events_total = event_repo.get_public_events(
+        events_pagination,
+        filters={"exclude_creator_id": user_id}
+    )
+    event_responses = []
+    for event in events:
+        response = DiscoveryEventSummary.model_validate(event)
+        response.event_id = response.id
+        event_responses.append(response)
+    events_meta = PaginationMeta.create(
+        page=events_page,
+        size=events_per_page,
+        total=events_total
+    )
+
+    return DiscoveryResponse(
+        templates={
+            "templates": template_responses,
+            "meta": template_meta
+        },
+        events={
+            "events": event_responses,
+            "meta": events_meta
+        }
+    )
+
 @events_router.get("/discovery", response_model=DiscoveryResponse)
-async def get_discovery(
+def get_discovery(
     template_event_type: Optional[str] = Query(None, description="Filter templates by event type"),
     template_page: int = Query(1, ge=1, description="Template page number"),
     template_per_page: int = Query(12, ge=1, le=100, description="Templates per page"),
     events_page: int = Query(1, ge=1, description="Events page number"),
     events_per_page: int = Query(6, ge=1, le=100, description="Events per page"),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
+    # Plain def: the replica queries and cache round trips are blocking, so
+    # FastAPI runs this in its threadpool
     try:
-        timeline_service = TimelineService(db)
-        templates, templates_total = timeline_service.get_templates({
-            "event_type": template_event_type,
-            "is_public": True,
-            "exclude_creator_id": current_user.id,
-            "page": template_page,
-            "per_page": template_per_page
-        })
-        template_responses = []
-        for template in templates:
-            response = TimelineTemplateResponse.model_validate(template)
-            response.template_id = response.id
-            try:
-                template_data = json.loads(template.template_data) if template.template_data else {}
-            except json.JSONDecodeError:
-                template_data = {}
-            response.cover_image_url = template_data.get("cover_image_url")
-            template_responses.append(response)
-        template_meta = PaginationMeta.create(
-            page=template_page,
-            size=template_per_page,
-            total=templates_total
-        )
-
-        event_repo = EventRepository(db)
-        events_pagination = PaginationParams(page=events_page, size=events_per_page)
-        events, events_total = event_repo.get_public_events(
-            events_pagination,
-            filters={"exclude_creator_id": current_user.id}
-        )
-        event_responses = []
-        for event in events:
-            response = DiscoveryEventSummary.model_validate(event)
-            response.event_id = response.id
-            event_responses.append(response)
-        events_meta = PaginationMeta.create(
-            page=events_page,
-            size=events_per_page,
-            total=events_total
-        )
-
-        return DiscoveryResponse(
-            templates={
-                "templates": template_responses,
-                "meta": template_meta
-            },
-            events={
-                "events": event_responses,
-                "meta": events_meta
-            }
+        params = {
+            "user_id": current_user.id,
+            "template_event_type": template_event_type,
+            "template_page": template_page,
+            "template_per_page": template_per_page,
+            "events_page": events_page,
+            "events_per_page": events_per_page
+        }
+        return discovery_cache.get_or_load(
+            params,
+            lambda: _build_discovery_response(db, **params),
+            tags=[PUBLIC_EVENTS_CACHE_TAG, PUBLIC_TEMPLATES_CACHE_TAG]
         )
     except Exception as e:
         raise http_400_bad_request(f"Failed to load discovery data: {str(e)}")
@@ -551,16 +506,22 @@ async def get_discovery(
 @events_router.get("/{event_id}", response_model=EventResponse)
 async def get_event(
     event_id: int,
-    current_user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_read_path_user),
+    db: Union[Session, AsyncSession] = Depends(get_read_path_db)
 ):
     """Get event by ID"""
     try:
-        event_service = EventService(db)
-        event = event_service.get_event_by_id(
-            event_id, 
-            user_id=current_user.id if current_user else None
-        )
+        if isinstance(db, AsyncSession):
+            event_repo = AsyncEventRepository(db)
+            event = await event_repo.get_by_id(event_id, include_relations=True)
+            if event and current_user and not await event_repo.user_can_access(event, current_user.id):
+                raise AuthorizationError("Access denied to this event")
+        else:
+            event_service = EventService(db)
+            event = event_service.get_event_by_id(
+                event_id, 
+                user_id=current_user.id if current_user else None
+            )
         
         if not event:
             raise http_404_not_found("Event not found")
@@ -1579,6 +1540,7 @@ async def join_event_via_invite_link(
             rsvp_status=RSVPStatus.ACCEPTED,
         )
         db.add(invitation)
+        EventRepository(db).grant_invitation_access(invitation)
         db.commit()
         db.refresh(event)
 
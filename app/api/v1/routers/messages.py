@@ -1,11 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from fastapi.responses import JSONResponse
 from sqlalchemy import func, distinct
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.core.deps import get_db, get_current_active_user
-from app.core.errors import http_400_bad_request, http_404_not_found, http_403_forbidden
+from typing import List, Optional, Union
+from app.core.deps import get_db, get_current_active_user, get_read_path_db, get_read_path_user
+from app.core.db_optimizations import write_session_for, async_write_session_for
+from app.core.errors import http_400_bad_request, http_404_not_found, http_403_forbidden, ValidationError
 from app.services.message_service import MessageService
+from app.repositories.message_repo import AsyncMessageRepository
+from app.services.chat_realtime import chat_broadcaster, READ_WATERMARK
+from app.schemas.pagination import CursorParams
 from app.schemas.message import (
     MessageCreate, MessageUpdate, MessageResponse, MessageListResponse,
     MessageReactionCreate, MessageReactionResponse, EventChatSettingsResponse,
@@ -111,15 +116,62 @@ async def get_messages(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=50, ge=1, le=100),
     before_message_id: Optional[int] = Query(default=None),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(default=None, description="Cursor from the previous page's next_cursor for older messages"),
+    current_user: User = Depends(get_read_path_user),
+    db: Union[Session, AsyncSession] = Depends(get_read_path_db)
 ):
     """Get paginated messages for an event"""
     try:
-        message_service = MessageService(db)
-        messages, total = message_service.get_messages(
-            event_id, current_user.id, page, per_page, before_message_id
-        )
+        next_cursor = None
+        total_is_estimate = False
+        # Without page/before_message_id, history is served by cursor so deep
+        # scrollback costs the same as the first screen
+        use_cursor = cursor is not None or (page == 1 and before_message_id is None)
+        
+        if isinstance(db, AsyncSession):
+            message_repo = AsyncMessageRepository(db)
+            await message_repo.get_event_with_access(event_id, current_user.id)
+            if use_cursor:
+                result = await message_repo.get_messages_page(
+                    event_id, CursorParams(cursor=cursor, size=per_page)
+                )
+                messages, total = result.items, result.total
+                next_cursor, total_is_estimate = result.next_cursor, result.total_is_estimate
+            else:
+                messages, total = await message_repo.get_messages(
+                    event_id, page, per_page, before_message_id
+                )
+            # Read receipts are writes, so they go to the primary even when
+            # the history itself was read from a replica
+            if messages:
+                last_id = max(msg.id for msg in messages)
+                async with async_write_session_for(db) as write_db:
+                    moved = await AsyncMessageRepository(write_db).mark_read_up_to(
+                        event_id, current_user.id, last_id
+                    )
+                if moved:
+                    chat_broadcaster.publish(event_id, READ_WATERMARK, {
+                        "user_id": current_user.id,
+                        "last_read_message_id": last_id
+                    })
+        else:
+            message_service = MessageService(db)
+            if use_cursor:
+                result = message_service.get_messages_page(
+                    event_id, current_user.id, CursorParams(cursor=cursor, size=per_page),
+                    mark_as_read=False
+                )
+                messages, total = result.items, result.total
+                next_cursor, total_is_estimate = result.next_cursor, result.total_is_estimate
+            else:
+                messages, total = message_service.get_messages(
+                    event_id, current_user.id, page, per_page, before_message_id, mark_as_read=False
+                )
+            if messages:
+                with write_session_for(db) as write_db:
+                    MessageService(write_db).mark_read_up_to(
+                        event_id, current_user.id, max(msg.id for msg in messages)
+                    )
         
         message_responses = [MessageResponse.model_validate(msg) for msg in messages]
         
@@ -128,10 +180,14 @@ async def get_messages(
             total=total,
             page=page,
             per_page=per_page,
-            has_next=(page * per_page) < total,
-            has_prev=page > 1
+            has_next=next_cursor is not None if use_cursor else (page * per_page) < total,
+            has_prev=page > 1 or cursor is not None,
+            next_cursor=next_cursor,
+            total_is_estimate=total_is_estimate
         )
         
+    except ValidationError as e:
+        raise http_400_bad_request(str(e))
     except Exception as e:
         if "not found" in str(e).lower():
             raise http_404_not_found(str(e))
@@ -424,11 +480,13 @@ async def mark_messages_read(
         message_service._get_event_with_access(event_id, current_user.id)
         
         # Mark messages as read
-        message_service._mark_messages_as_read(event_id, current_user.id, read_data.message_ids)
+        marked_count = message_service.mark_messages_as_read(
+            event_id, current_user.id, read_data.message_ids
+        )
         
         return {
             "message": "Messages marked as read",
-            "marked_count": len(read_data.message_ids)
+            "marked_count": marked_count
         }
         
     except Exception as e:
@@ -521,19 +579,15 @@ async def send_typing_indicator(
     try:
         message_service = MessageService(db)
         
-        # Verify access
-        message_service._get_event_with_access(event_id, current_user.id)
-        
-        # Update participant's last seen
-        if is_typing:
-            message_service._update_participant_last_seen(event_id, current_user.id)
+        # Broadcast to the event's chat subscribers; repeats are coalesced
+        broadcast = message_service.send_typing_indicator(event_id, current_user.id, is_typing)
         
-        # In a real implementation, this would broadcast via WebSocket
         return {
             "message": "Typing indicator sent",
             "event_id": event_id,
             "user_id": current_user.id,
-            "is_typing": is_typing
+            "is_typing": is_typing,
+            "broadcast": broadcast
         }
         
     except Exception as e:
@@ -586,34 +640,8 @@ async def get_unread_count(
     try:
         message_service = MessageService(db)
         
-        # Verify access
-        message_service._get_event_with_access(event_id, current_user.id)
-        
-        # Get participant's last read message
-        from app.models.message_models import ChatParticipant, Message
-        participant = db.query(ChatParticipant).filter(
-            ChatParticipant.event_id == event_id,
-            ChatParticipant.user_id == current_user.id
-        ).first()
-        
-        if not participant or not participant.last_read_message_id:
-            # Count all messages if no read history
-            unread_count = db.query(func.count(Message.id)).filter(
-                Message.event_id == event_id
-            ).scalar() or 0
-        else:
-            # Count messages after last read
-            last_read_message = db.query(Message).filter(
-                Message.id == participant.last_read_message_id
-            ).first()
-            
-            if last_read_message:
-                unread_count = db.query(func.count(Message.id)).filter(
-                    Message.event_id == event_id,
-                    Message.created_at > last_read_message.created_at
-                ).scalar() or 0
-            else:
-                unread_count = 0
+        # Everything after the read watermark, excluding the user's own messages
+        unread_count = message_service.get_unread_count(event_id, current_user.id)
         
         return {
             "event_id": event_id,
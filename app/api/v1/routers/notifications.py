@@ -1,17 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
 from fastapi.responses import JSONResponse
 from sqlalchemy import true
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.core.deps import get_db, get_current_active_user
+from typing import List, Optional, Union
+from app.core.deps import (
+    get_db, get_current_active_user, get_read_path_db, get_read_path_user,
+    get_read_db, get_current_read_user
+)
 from app.core.errors import http_400_bad_request, http_404_not_found, http_403_forbidden
 from app.services.notification_service import NotificationService
+from app.services.notification_scheduler import get_scheduler_stats
 from app.services.email_service import email_service
 from app.services.sms_service import sms_service
 from app.services.push_service import push_service
 from app.models.user_models import User
 from app.models.notification_models import NotificationType, NotificationChannel, AutomationRule, NotificationLog, NotificationQueue
 from app.services.websocket_manager import websocket_manager
+from app.repositories.notification_repo import NotificationRepository, AsyncNotificationRepository
+from app.schemas.pagination import PaginationParams, CursorParams
 from datetime import datetime, timedelta
 from sqlalchemy.orm import joinedload
 from app.schemas.notification import (
@@ -48,8 +55,8 @@ notifications_router = APIRouter()
 async def get_user_notifications(
     limit: int = Query(50, ge=1, le=100, description="Maximum notifications to return"),
     unread_only: bool = Query(False, description="Return only unread notifications"),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """Get notifications for the current user"""
     try:
@@ -342,7 +349,8 @@ async def get_queue_status(
             sent_count=sent_count,
             failed_count=failed_count,
             next_scheduled=next_notification.scheduled_for if next_notification else None,
-            last_processed=last_processed.last_attempt_at if last_processed else None
+            last_processed=last_processed.last_attempt_at if last_processed else None,
+            scheduler=get_scheduler_stats()
         )
         
     except Exception as e:
@@ -377,8 +385,8 @@ async def get_notification_logs(
     channel: Optional[NotificationChannel] = Query(None, description="Filter by channel"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """Get notification logs"""
     try:
@@ -537,7 +545,7 @@ async def get_notification_channels(
                 user_devices_count = 0
         
         # Get WebSocket connection status
-        websocket_connected = websocket_manager.is_user_connected(current_user.id)
+        websocket_connected = await websocket_manager.is_user_online_anywhere(current_user.id)
         
         return {
             "channels": [
@@ -610,36 +618,39 @@ async def get_notification_channels(
 async def get_in_app_notifications(
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor; takes precedence over page"),
     unread_only: bool = Query(False, description="Show only unread notifications"),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_read_path_user),
+    db: Union[Session, AsyncSession] = Depends(get_read_path_db)
 ):
     """Get in-app notifications for the current user"""
     try:
-        
-        # Build query for user's notifications
-        query = db.query(NotificationLog).filter(
-            NotificationLog.recipient_id == current_user.id,
-            NotificationLog.channel == NotificationChannel.IN_APP
-        )
-        
-        if unread_only:
-            query = query.filter(NotificationLog.read_at.is_(None))
-        
-        # Get total count
-        total = query.count()
-        
-        # Get unread count
-        unread_count = db.query(NotificationLog).filter(
-            NotificationLog.recipient_id == current_user.id,
-            NotificationLog.channel == NotificationChannel.IN_APP,
-            NotificationLog.read_at.is_(None)
-        ).count()
-        
-        # Apply pagination and ordering
-        notifications = query.order_by(NotificationLog.sent_at.desc()).offset(
-            (page - 1) * per_page
-        ).limit(per_page).all()
+        next_cursor = None
+        total_is_estimate = False
+        use_cursor = cursor is not None or page == 1
+        
+        if use_cursor:
+            pagination = CursorParams(cursor=cursor, size=per_page)
+            if isinstance(db, AsyncSession):
+                result, unread_count = await AsyncNotificationRepository(
+                    db
+                ).get_in_app_notifications_page(current_user.id, pagination, unread_only)
+            else:
+                result, unread_count = NotificationRepository(
+                    db
+                ).get_in_app_notifications_page(current_user.id, pagination, unread_only)
+            notifications, total = result.items, result.total
+            next_cursor, total_is_estimate = result.next_cursor, result.total_is_estimate
+        else:
+            pagination = PaginationParams(page=page, size=per_page)
+            if isinstance(db, AsyncSession):
+                notifications, total, unread_count = await AsyncNotificationRepository(
+                    db
+                ).get_in_app_notifications(current_user.id, pagination, unread_only)
+            else:
+                notifications, total, unread_count = NotificationRepository(
+                    db
+                ).get_in_app_notifications(current_user.id, pagination, unread_only)
         
         # Convert to response format
         notification_responses = []
@@ -661,9 +672,11 @@ async def get_in_app_notifications(
             total=total,
             page=page,
             per_page=per_page,
-            has_next=(page * per_page) < total,
-            has_prev=page > 1,
-            unread_count=unread_count
+            has_next=next_cursor is not None if use_cursor else (page * per_page) < total,
+            has_prev=page > 1 or cursor is not None,
+            unread_count=unread_count,
+            next_cursor=next_cursor,
+            total_is_estimate=total_is_estimate
         )
         
     except Exception as e:
@@ -764,14 +777,15 @@ async def get_websocket_stats(
 ):
     """Get WebSocket connection statistics"""
     try:
-        stats = websocket_manager.get_connection_stats()
+        stats = await websocket_manager.get_fleet_stats()
         
         return WebSocketStatsResponse(
             total_connections=stats.get("total_connections", 0),
             active_connections=stats.get("active_connections", 0),
             connections_by_user=stats.get("connections_by_user", {}),
             total_messages_sent=stats.get("total_messages_sent", 0),
-            uptime_seconds=stats.get("uptime_seconds", 0)
+            uptime_seconds=stats.get("uptime_seconds", 0),
+            workers=stats.get("workers", 1)
         )
         
     except Exception as e:
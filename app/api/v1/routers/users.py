@@ -128,7 +128,7 @@ async def update_current_user_password(
     """Update current user's password"""
     try:
         user_service = UserService(db)
-        success = user_service.update_user_password(current_user.id, password_data)
+        success = await user_service.update_user_password_async(current_user.id, password_data)
         return {
             "message": "Password updated successfully",
             "success": success
@@ -2,9 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.core.deps import get_db, get_current_active_user
+from app.core.deps import get_db, get_current_active_user, get_read_db, get_current_read_user
 from app.core.errors import http_400_bad_request, http_404_not_found, http_403_forbidden, ValidationError
 from app.services.vendor_service import VendorService
+from app.repositories.vendor_repo import VENDOR_SEARCH_CACHE_TAG
+from app.core.cache import ReadThroughCache
 from app.models.vendor_models import VendorBooking
 from sqlalchemy.orm import joinedload
 import uuid
@@ -52,6 +54,8 @@ from app.services.gcp_storage_service import gcp_storage_service
 
 vendors_router = APIRouter()
 
+vendor_search_cache = ReadThroughCache("vendor_search", ttl_seconds=300, response_type=VendorListResponse)
+
 # Vendor profile endpoints
 @vendors_router.post("/profile", response_model=VendorResponse)
 async def create_vendor_profile(
@@ -126,23 +130,31 @@ async def update_vendor_profile(
 @vendors_router.get("/search", response_model=VendorListResponse)
 async def search_vendors(
     search_params: VendorSearchParams = Depends(),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """Search for vendors with filters"""
     try:
-        vendor_service = VendorService(db)
-        vendors, total = vendor_service.search_vendors(search_params.model_dump())
-        
-        vendor_responses = [VendorResponse.model_validate(vendor) for vendor in vendors]
+        def load_vendors() -> VendorListResponse:
+            vendor_service = VendorService(db)
+            vendors, total = vendor_service.search_vendors(search_params.model_dump())
+            
+            vendor_responses = [VendorResponse.model_validate(vendor) for vendor in vendors]
+            
+            return VendorListResponse(
+                vendors=vendor_responses,
+                total=total,
+                page=search_params.page,
+                per_page=search_params.per_page,
+                has_next=(search_params.page * search_params.per_page) < total,
+                has_prev=search_params.page > 1
+            )
         
-        return VendorListResponse(
-            vendors=vendor_responses,
-            total=total,
-            page=search_params.page,
-            per_page=search_params.per_page,
-            has_next=(search_params.page * search_params.per_page) < total,
-            has_prev=search_params.page > 1
+        # Results do not depend on the caller, so all users share entries
+        return vendor_search_cache.get_or_load(
+            search_params.model_dump(mode="json"),
+            load_vendors,
+            tags=[VENDOR_SEARCH_CACHE_TAG]
         )
         
     except Exception as e:
@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 
 from app.core.deps import get_db, get_current_user_websocket, get_current_user
 from app.services.websocket_manager import websocket_manager
+from app.services.chat_realtime import chat_broadcaster
+from app.services.message_service import MessageService
 from app.models.user_models import User
 from app.core.logger import get_logger
 
@@ -119,6 +121,45 @@ async def handle_client_message(websocket: WebSocket, user_id: int, message: Dic
                 'notification_id': notification_id
             }, websocket)
     
+    elif message_type == 'subscribe_chat':
+        # Start receiving an event's chat updates (messages, reactions, typing, reads)
+        event_id = message.get('event_id')
+        try:
+            MessageService(db)._get_event_with_access(int(event_id), user_id)
+        except Exception as e:
+            await websocket_manager.send_personal_message({
+                'type': 'error',
+                'message': f'Cannot subscribe to chat: {str(e)}'
+            }, websocket)
+            return
+        
+        websocket_manager.subscribe_to_event(websocket, int(event_id))
+        await websocket_manager.send_personal_message({
+            'type': 'chat_subscribed',
+            'event_id': int(event_id)
+        }, websocket)
+    
+    elif message_type == 'unsubscribe_chat':
+        event_id = message.get('event_id')
+        if event_id is not None:
+            websocket_manager.unsubscribe_from_event(websocket, int(event_id))
+        await websocket_manager.send_personal_message({
+            'type': 'chat_unsubscribed',
+            'event_id': event_id
+        }, websocket)
+    
+    elif message_type == 'typing':
+        # Only subscribers of the chat (access already checked) may signal typing
+        event_id = message.get('event_id')
+        subscribed = websocket_manager.connection_metadata.get(websocket, {}).get('event_ids', set())
+        if event_id in subscribed:
+            chat_broadcaster.publish_typing(event_id, user_id, bool(message.get('is_typing', True)))
+        else:
+            await websocket_manager.send_personal_message({
+                'type': 'error',
+                'message': 'Subscribe to the chat before sending typing indicators'
+            }, websocket)
+    
     elif message_type == 'get_connection_info':
         # Send connection information
         stats = websocket_manager.get_connection_stats()
@@ -155,7 +196,7 @@ async def get_websocket_stats(current_user: User = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only administrators can access WebSocket statistics"
         )
-    return websocket_manager.get_connection_stats()
+    return await websocket_manager.get_fleet_stats()
 
 
 @websocket_router.post("/websocket/broadcast")
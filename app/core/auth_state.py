@@ -0,0 +1,281 @@
+"""
+Short-lived authentication state in Redis.
+
+Pending OTPs and the refresh state of login sessions change on every
+verification attempt and token refresh. Keeping them in Redis instead of
+rewriting rows keeps those writes off the users and user_sessions tables:
+
+    auth:otp:{user_id}          hash of code digest, attempts and expiry,
+                                expiring with the code
+    auth:session:{session_id}   hash of user id, refresh token digest and
+                                the expiry last written to the session row,
+                                expiring with the session
+
+Codes and refresh tokens are stored as SHA-256 digests. Attempt counting
+and refresh token rotation run as Lua scripts, so concurrent requests
+cannot both use one code or one refresh token.
+
+The database keeps the durable record: the UserSession row written at login
+and its is_active flag, and account state such as is_verified. When Redis
+is unreachable every method returns None and callers fall back to the
+user-row columns and session rows they used before.
+"""
+import hashlib
+import time
+from typing import Iterable, NamedTuple, Optional
+
+import redis
+
+from app.core.cache import REDIS_RETRY_INTERVAL
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def otp_key(user_id: int) -> str:
+    return f"auth:otp:{user_id}"
+
+
+def session_key(session_id: int) -> str:
+    return f"auth:session:{session_id}"
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+# KEYS[1] otp key; ARGV code digest, max attempts, now, consume on match (1/0).
+# Returns {status, attempts}: ok, invalid, locked, expired or missing.
+VERIFY_OTP_SCRIPT = """
+local entry = redis.call('HMGET', KEYS[1], 'code', 'attempts', 'expires_at')
+if not entry[1] then
+    return {'missing', 0}
+end
+if tonumber(entry[3]) <= tonumber(ARGV[3]) then
+    redis.call('DEL', KEYS[1])
+    return {'expired', 0}
+end
+if tonumber(entry[2]) >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return {'locked', tonumber(entry[2])}
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if entry[1] == ARGV[1] then
+    if ARGV[4] == '1' then
+        redis.call('DEL', KEYS[1])
+    end
+    return {'ok', attempts}
+end
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return {'locked', attempts}
+end
+return {'invalid', attempts}
+"""
+
+# KEYS[1] session key; ARGV presented refresh digest, new refresh digest, new expiry (epoch seconds).
+# Returns {status, user id, expiry recorded on the row}: ok, missing or mismatch.
+ROTATE_REFRESH_SCRIPT = """
+local entry = redis.call('HMGET', KEYS[1], 'user_id', 'refresh', 'expires_at')
+if not entry[1] then
+    return {'missing', 0, 0}
+end
+if entry[2] ~= ARGV[1] then
+    return {'mismatch', 0, 0}
+end
+redis.call('HSET', KEYS[1], 'refresh', ARGV[2])
+redis.call('EXPIREAT', KEYS[1], ARGV[3])
+return {'ok', entry[1], entry[3]}
+"""
+
+
+class OTPStatus(NamedTuple):
+    """A pending OTP as stored in Redis"""
+    attempts: int
+    expires_at: float
+
+
+class OTPCheck(NamedTuple):
+    """Outcome of one verification attempt"""
+    status: str  # ok, invalid, locked, expired or missing
+    attempts: int
+
+
+class RefreshRotation(NamedTuple):
+    """Outcome of one refresh token rotation"""
+    status: str  # ok, missing or mismatch
+    user_id: int
+    recorded_expires_at: float  # session expiry last written to the database
+
+
+class AuthStateStore:
+    """Redis-backed OTP and session refresh state"""
+
+    def __init__(self):
+        self._client: Optional[redis.Redis] = None
+        self._retry_at = 0.0
+        self._verify_otp = None
+        self._rotate_refresh = None
+
+    def _redis(self) -> Optional[redis.Redis]:
+        """Redis client, or None while Redis is known to be unreachable"""
+        if time.monotonic() < self._retry_at:
+            return None
+        if self._client is None:
+            self._client = redis.Redis.from_url(
+                settings.REDIS_URL, decode_responses=True, socket_timeout=1, socket_connect_timeout=1
+            )
+            self._verify_otp = self._client.register_script(VERIFY_OTP_SCRIPT)
+            self._rotate_refresh = self._client.register_script(ROTATE_REFRESH_SCRIPT)
+        return self._client
+
+    def _mark_down(self, error: Exception):
+        logger.warning(f"Auth state Redis unavailable, using database columns: {error}")
+        self._retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    # OTPs
+
+    def issue_otp(self, user_id: int, code: str, ttl_seconds: int, attempts: int = 0) -> Optional[bool]:
+        """Replace the user's pending OTP; None when Redis is unavailable"""
+        client = self._redis()
+        if client is None:
+            return None
+        key = otp_key(user_id)
+        try:
+            pipeline = client.pipeline()
+            pipeline.delete(key)
+            pipeline.hset(key, mapping={
+                "code": _digest(f"{user_id}:{code}"),
+                "attempts": attempts,
+                "expires_at": int(time.time()) + ttl_seconds
+            })
+            pipeline.expire(key, ttl_seconds)
+            pipeline.execute()
+            return True
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return None
+
+    def check_otp(self, user_id: int, code: str, max_attempts: int, consume: bool) -> Optional[OTPCheck]:
+        """
+        Count an attempt against the user's pending OTP and compare it.
+
+        A matching code is deleted when consume is set; a code reaching
+        max_attempts or its expiry is deleted either way.
+        """
+        if self._redis() is None:
+            return None
+        try:
+            status, attempts = self._verify_otp(
+                keys=[otp_key(user_id)],
+                args=[_digest(f"{user_id}:{code}"), max_attempts, int(time.time()), 1 if consume else 0]
+            )
+            return OTPCheck(status, int(attempts))
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return None
+
+    def get_otp(self, user_id: int) -> Optional[OTPStatus]:
+        """The user's pending OTP, or None when there is none or Redis is unavailable"""
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            attempts, expires_at = client.hmget(otp_key(user_id), "attempts", "expires_at")
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return None
+        if expires_at is None:
+            return None
+        return OTPStatus(int(attempts or 0), float(expires_at))
+
+    def clear_otp(self, user_id: int) -> Optional[bool]:
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            client.delete(otp_key(user_id))
+            return True
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return None
+
+    # Sessions
+
+    def store_session(self, session_id: int, user_id: int, refresh_token: str, expires_at: float) -> Optional[bool]:
+        """
+        Record a session's current refresh token until the session expires.
+
+        expires_at is also kept as the expiry written to the session row, so
+        rotations can tell when the row is due an update.
+        """
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            pipeline = client.pipeline()
+            pipeline.hset(session_key(session_id), mapping={
+                "user_id": user_id,
+                "refresh": _digest(refresh_token),
+                "expires_at": int(expires_at)
+            })
+            pipeline.expireat(session_key(session_id), int(expires_at))
+            pipeline.execute()
+            return True
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return None
+
+    def rotate_refresh_token(
+        self, session_id: int, refresh_token: str, new_refresh_token: str, expires_at: float
+    ) -> Optional[RefreshRotation]:
+        """
+        Swap a session's refresh token if the presented one is current.
+
+        The status is 'missing' when Redis has no such session (logged out,
+        expired or never stored) and 'mismatch' when the token was already
+        rotated.
+        """
+        if self._redis() is None:
+            return None
+        try:
+            status, user_id, recorded_expires_at = self._rotate_refresh(
+                keys=[session_key(session_id)],
+                args=[_digest(refresh_token), _digest(new_refresh_token), int(expires_at)]
+            )
+            return RefreshRotation(status, int(user_id), float(recorded_expires_at or 0))
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return None
+
+    def record_session_expiry(self, session_id: int, expires_at: float) -> Optional[bool]:
+        """Note that the session row now carries expires_at"""
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            pipeline = client.pipeline()
+            pipeline.hset(session_key(session_id), "expires_at", int(expires_at))
+            pipeline.expireat(session_key(session_id), int(expires_at))
+            pipeline.execute()
+            return True
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return None
+
+    def revoke_sessions(self, session_ids: Iterable[int]) -> Optional[bool]:
+        """Forget logged-out sessions so their refresh tokens stop working"""
+        session_ids = list(session_ids)
+        client = self._redis()
+        if client is None or not session_ids:
+            return None
+        try:
+            client.delete(*[session_key(session_id) for session_id in session_ids])
+            return True
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return None
+
+
+auth_state = AuthStateStore()
@@ -0,0 +1,556 @@
+"""
+Read-through cache for expensive read queries.
+
+Two tiers sit in front of the database: a small in-process LRU with a short
+TTL, then Redis. Values are serialized as JSON (Pydantic schemas through a
+TypeAdapter), keys are derived from explicitly named arguments, and entries
+carry tags such as "event:42" so writes can invalidate everything derived
+from a row without scanning the keyspace.
+
+Invalidation clears Redis and the local tier of the worker doing the write;
+other workers' local copies expire after CACHE_LOCAL_TTL_SECONDS, which
+bounds how stale a read can be after a write.
+
+A value loaded just before a write commits can reach the cache just after
+that write's invalidation. Caches created with versioned=True guard against
+this: invalidation bumps a per-tag generation in Redis, and a fill is only
+stored if the generations it read before loading are still current.
+"""
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import redis
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "cache"
+TAG_PREFIX = "cache:tag"
+GENERATION_PREFIX = "cache:gen"
+
+# Seconds to skip Redis after a connection error instead of pinging per call
+REDIS_RETRY_INTERVAL = 30
+
+# Tag sets must outlive every entry they index; entry TTLs are far shorter
+TAG_TTL_SECONDS = 24 * 3600
+
+
+class CacheStats:
+    """Hit/miss counters for the cache layer"""
+
+    FIELDS = ("local_hits", "redis_hits", "misses", "sets", "invalidations", "errors")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def incr(self, namespace: str, field: str, amount: int = 1):
+        with self._lock:
+            counters = self._counters.setdefault(namespace, dict.fromkeys(self.FIELDS, 0))
+            counters[field] += amount
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            report = {}
+            for namespace, counters in self._counters.items():
+                lookups = counters["local_hits"] + counters["redis_hits"] + counters["misses"]
+                hits = counters["local_hits"] + counters["redis_hits"]
+                report[namespace] = {
+                    **counters,
+                    "hit_ratio": hits / lookups if lookups else 0.0
+                }
+            return report
+
+
+class TagGenerations(NamedTuple):
+    """Invalidation state read before loading a versioned cache entry"""
+    local: int  # invalidations seen by this worker's local tier
+    redis: Optional[List[Optional[str]]]  # per-tag generations, None if Redis was not read
+
+
+class LocalLRUCache:
+    """Thread-safe in-process LRU with per-entry expiry and tag index"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a guarded set is dropped if it moved
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(
+        self,
+        key: str,
+        value: str,
+        ttl_seconds: float,
+        tags: Sequence[str] = (),
+        since: Optional[int] = None
+    ):
+        """Store a value; with since, only if nothing was invalidated after that count"""
+        if self.max_entries <= 0 or ttl_seconds <= 0:
+            return
+        with self._lock:
+            if since is not None and since != self.invalidations:
+                return
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl_seconds, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags: Iterable[str]):
+        with self._lock:
+            self.invalidations += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class CacheBackend:
+    """Shared Redis connection plus the process-local tier"""
+
+    def __init__(self):
+        self.local = LocalLRUCache(settings.CACHE_LOCAL_MAX_ENTRIES)
+        self.stats = CacheStats()
+        self._redis: Optional[redis.Redis] = None
+        self._redis_retry_at = 0.0
+
+    @property
+    def redis(self) -> Optional[redis.Redis]:
+        """Redis client, or None while Redis is known to be unreachable"""
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=1,
+                socket_connect_timeout=1
+            )
+        return self._redis
+
+    def mark_redis_down(self, error: Exception):
+        logger.warning(f"Cache Redis unavailable, using local tier only: {error}")
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    def invalidate_tags(self, *tags: str):
+        """Drop every cached entry carrying any of the given tags"""
+        tags = [tag for tag in tags if tag]
+        if not tags or not settings.CACHE_ENABLED:
+            return
+
+        self.local.invalidate_tags(tags)
+        self.stats.incr("_tags", "invalidations", len(tags))
+
+        client = self.redis
+        if client is None:
+            return
+        try:
+            # Generations move before the members are read, so a guarded fill
+            # either lands in the tag set read here or sees the new generation
+            tag_keys = [f"{TAG_PREFIX}:{tag}" for tag in tags]
+            pipeline = client.pipeline()
+            for tag in tags:
+                pipeline.incr(f"{GENERATION_PREFIX}:{tag}")
+                pipeline.expire(f"{GENERATION_PREFIX}:{tag}", TAG_TTL_SECONDS)
+            for tag_key in tag_keys:
+                pipeline.smembers(tag_key)
+            members = set().union(*pipeline.execute()[2 * len(tags):])
+            client.delete(*members, *tag_keys)
+        except redis.RedisError as e:
+            self.mark_redis_down(e)
+
+    def tag_generations(self, tags: Sequence[str]) -> TagGenerations:
+        """Invalidation state of the given tags, read before loading a value"""
+        local = self.local.invalidations
+        client = self.redis
+        if client is None or not tags:
+            return TagGenerations(local, None)
+        try:
+            return TagGenerations(local, client.mget([f"{GENERATION_PREFIX}:{tag}" for tag in tags]))
+        except redis.RedisError as e:
+            self.mark_redis_down(e)
+            return TagGenerations(local, None)
+
+
+cache_backend = CacheBackend()
+
+
+def invalidate_tags(*tags: str):
+    """Invalidate cached entries by tag, e.g. invalidate_tags(f"event:{event_id}")"""
+    cache_backend.invalidate_tags(*tags)
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters per cache namespace"""
+    return cache_backend.stats.snapshot()
+
+
+def build_cache_key(namespace: str, params: Dict[str, Any]) -> str:
+    """Stable key from a namespace and explicit, JSON-serializable parameters"""
+    payload = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    digest = hashlib.sha1(payload.encode()).hexdigest()
+    return f"{KEY_PREFIX}:{namespace}:{digest}"
+
+
+class ReadThroughCache:
+    """
+    Cache for one kind of result.
+
+    Args:
+        namespace: Key prefix and stats bucket
+        ttl_seconds: Redis time-to-live
+        response_type: Type of the cached value (a Pydantic schema, List[...],
+            Dict[...] etc.) used to serialize and restore it. Defaults to Any,
+            which only round-trips JSON-native values.
+        local_ttl_seconds: Lifetime in the in-process tier, 0 disables it
+        versioned: Drop a loaded value instead of storing it when one of its
+            tags was invalidated while it was being loaded
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: int = 300,
+        response_type: Any = Any,
+        local_ttl_seconds: Optional[int] = None,
+        versioned: bool = False
+    ):
+        self.namespace = namespace
+        self.versioned = versioned
+        self.ttl_seconds = ttl_seconds
+        self.adapter = TypeAdapter(response_type)
+        self.local_ttl_seconds = (
+            settings.CACHE_LOCAL_TTL_SECONDS if local_ttl_seconds is None else local_ttl_seconds
+        )
+
+    def get_or_load(
+        self,
+        params: Dict[str, Any],
+        loader: Callable[[], Any],
+        tags: Sequence[str] = ()
+    ) -> Any:
+        """Return the cached value for params, calling loader on a miss"""
+        if not settings.CACHE_ENABLED:
+            return loader()
+
+        key = build_cache_key(self.namespace, params)
+        cached = self._read(key)
+        if cached is not None:
+            try:
+                return self.adapter.validate_json(cached)
+            except ValueError as e:
+                logger.warning(f"Discarding undecodable cache entry {key}: {e}")
+
+        cache_backend.stats.incr(self.namespace, "misses")
+        generations = self.tag_generations(tags)
+        value = loader()
+        self._write(key, value, tags, generations)
+        return value
+
+    def get(self, params: Dict[str, Any]) -> Tuple[bool, Any]:
+        """
+        Cached value for params without loading it on a miss.
+
+        Returns (found, value), since None is a cacheable value. Lets async
+        callers do the load themselves and store it with set().
+        """
+        if not settings.CACHE_ENABLED:
+            return False, None
+
+        key = build_cache_key(self.namespace, params)
+        cached = self._read(key)
+        if cached is not None:
+            try:
+                return True, self.adapter.validate_json(cached)
+            except ValueError as e:
+                logger.warning(f"Discarding undecodable cache entry {key}: {e}")
+        cache_backend.stats.incr(self.namespace, "misses")
+        return False, None
+
+    def tag_generations(self, tags: Sequence[str]) -> Optional[TagGenerations]:
+        """
+        For versioned caches, the state to pass to set() for a value about
+        to be loaded. Read it after the get() miss and before the load.
+        """
+        if not self.versioned or not settings.CACHE_ENABLED:
+            return None
+        return cache_backend.tag_generations(tags)
+
+    def set(
+        self,
+        params: Dict[str, Any],
+        value: Any,
+        tags: Sequence[str] = (),
+        generations: Optional[TagGenerations] = None
+    ):
+        """Store a value loaded by the caller after a get() miss"""
+        if settings.CACHE_ENABLED:
+            self._write(build_cache_key(self.namespace, params), value, tags, generations)
+
+    def get_many_or_load(
+        self,
+        params_by_id: Dict[Hashable, Dict[str, Any]],
+        loader: Callable[[List[Hashable]], Dict[Hashable, Any]],
+        tags: Optional[Callable[[Hashable], Sequence[str]]] = None
+    ) -> Dict[Hashable, Any]:
+        """
+        Batch form of get_or_load for many entries of this namespace.
+
+        params_by_id maps a caller id (e.g. a user id) to the entry's key
+        params. Hits come from the local tier, then one Redis MGET; loader
+        receives the ids that missed and must return a value for each, so a
+        whole batch costs at most one database query.
+        """
+        if not params_by_id:
+            return {}
+        if not settings.CACHE_ENABLED:
+            return loader(list(params_by_id))
+
+        keys = {item_id: build_cache_key(self.namespace, params) for item_id, params in params_by_id.items()}
+        raw = self._read_many(keys)
+
+        values: Dict[Hashable, Any] = {}
+        for item_id, cached in raw.items():
+            try:
+                values[item_id] = self.adapter.validate_json(cached)
+            except ValueError as e:
+                logger.warning(f"Discarding undecodable cache entry {keys[item_id]}: {e}")
+
+        missing = [item_id for item_id in keys if item_id not in values]
+        if missing:
+            cache_backend.stats.incr(self.namespace, "misses", len(missing))
+            loaded = loader(missing)
+            self._write_many([
+                (keys[item_id], loaded.get(item_id), list(tags(item_id)) if tags else [])
+                for item_id in missing
+            ])
+            values.update({item_id: loaded.get(item_id) for item_id in missing})
+        return values
+
+    def _read_many(self, keys: Dict[Hashable, str]) -> Dict[Hashable, str]:
+        stats = cache_backend.stats
+        found: Dict[Hashable, str] = {}
+        for item_id, key in keys.items():
+            value = cache_backend.local.get(key)
+            if value is not None:
+                found[item_id] = value
+        if found:
+            stats.incr(self.namespace, "local_hits", len(found))
+
+        remaining = [item_id for item_id in keys if item_id not in found]
+        client = cache_backend.redis
+        if not remaining or client is None:
+            return found
+        try:
+            results = client.mget([keys[item_id] for item_id in remaining])
+        except redis.RedisError as e:
+            stats.incr(self.namespace, "errors")
+            cache_backend.mark_redis_down(e)
+            return found
+
+        for item_id, value in zip(remaining, results):
+            if value is None:
+                continue
+            tag_line, _, value = value.partition("\n")
+            stats.incr(self.namespace, "redis_hits")
+            cache_backend.local.set(
+                keys[item_id], value, self.local_ttl_seconds, [tag for tag in tag_line.split(",") if tag]
+            )
+            found[item_id] = value
+        return found
+
+    def _read(self, key: str) -> Optional[str]:
+        stats = cache_backend.stats
+
+        value = cache_backend.local.get(key)
+        if value is not None:
+            stats.incr(self.namespace, "local_hits")
+            return value
+
+        client = cache_backend.redis
+        if client is None:
+            return None
+        since = cache_backend.local.invalidations if self.versioned else None
+        try:
+            value = client.get(key)
+        except redis.RedisError as e:
+            stats.incr(self.namespace, "errors")
+            cache_backend.mark_redis_down(e)
+            return None
+
+        if value is None:
+            return None
+
+        # Redis entries are stored as "<comma separated tags>\n<json>"
+        tag_line, _, value = value.partition("\n")
+        stats.incr(self.namespace, "redis_hits")
+        cache_backend.local.set(
+            key, value, self.local_ttl_seconds, [tag for tag in tag_line.split(",") if tag], since
+        )
+        return value
+
+    def _write(
+        self,
+        key: str,
+        value: Any,
+        tags: Sequence[str],
+        generations: Optional[TagGenerations] = None
+    ):
+        if generations is None or not tags:
+            self._write_many([(key, value, tags)])
+            return
+
+        stats = cache_backend.stats
+        try:
+            payload = self.adapter.dump_json(value).decode()
+        except Exception as e:
+            stats.incr(self.namespace, "errors")
+            logger.warning(f"Cannot serialize value for cache namespace '{self.namespace}': {e}")
+            return
+
+        client = cache_backend.redis
+        if client is not None:
+            if generations.redis is None:
+                # Generations were not read, so Redis cannot be written safely
+                client = None
+            elif not self._write_if_current(client, key, payload, tags, generations.redis):
+                return
+        cache_backend.local.set(key, payload, self.local_ttl_seconds, tags, generations.local)
+        stats.incr(self.namespace, "sets")
+
+    def _write_if_current(
+        self,
+        client: redis.Redis,
+        key: str,
+        payload: str,
+        tags: Sequence[str],
+        expected: List[Optional[str]]
+    ) -> bool:
+        """Store an entry in Redis unless its tags were invalidated since expected was read"""
+        generation_keys = [f"{GENERATION_PREFIX}:{tag}" for tag in tags]
+        try:
+            with client.pipeline() as pipeline:
+                pipeline.watch(*generation_keys)
+                if pipeline.mget(generation_keys) != expected:
+                    return False
+                pipeline.multi()
+                self._queue_entry(pipeline, key, payload, tags)
+                pipeline.execute()
+        except redis.WatchError:
+            return False
+        except redis.RedisError as e:
+            cache_backend.stats.incr(self.namespace, "errors")
+            cache_backend.mark_redis_down(e)
+        return True
+
+    def _queue_entry(self, pipeline, key: str, payload: str, tags: Sequence[str]):
+        pipeline.set(key, f"{','.join(tags)}\n{payload}", ex=self.ttl_seconds)
+        for tag in tags:
+            tag_key = f"{TAG_PREFIX}:{tag}"
+            pipeline.sadd(tag_key, key)
+            pipeline.expire(tag_key, TAG_TTL_SECONDS)
+
+    def _write_many(self, entries: Sequence[Tuple[str, Any, Sequence[str]]]):
+        stats = cache_backend.stats
+        payloads = []
+        for key, value, tags in entries:
+            try:
+                payload = self.adapter.dump_json(value).decode()
+            except Exception as e:
+                stats.incr(self.namespace, "errors")
+                logger.warning(f"Cannot serialize value for cache namespace '{self.namespace}': {e}")
+                continue
+            cache_backend.local.set(key, payload, self.local_ttl_seconds, tags)
+            stats.incr(self.namespace, "sets")
+            payloads.append((key, payload, tags))
+
+        client = cache_backend.redis
+        if not payloads or client is None:
+            return
+        try:
+            pipeline = client.pipeline()
+            for key, payload, tags in payloads:
+                self._queue_entry(pipeline, key, payload, tags)
+            pipeline.execute()
+        except redis.RedisError as e:
+            stats.incr(self.namespace, "errors")
+            cache_backend.mark_redis_down(e)
+
+
+def cached(
+    namespace: str,
+    key_args: Sequence[str],
+    ttl_seconds: int = 300,
+    response_type: Any = Any,
+    tags: Optional[Callable[..., Iterable[str]]] = None,
+    local_ttl_seconds: Optional[int] = None
+):
+    """
+    Decorator form of ReadThroughCache.
+
+    Only the arguments named in key_args contribute to the key, so objects
+    like `self` or a database session never leak into it. `tags` receives
+    the same named arguments and returns the tags for the entry.
+
+    Example:
+        @cached("event_statistics", key_args=("event_id",),
+                tags=lambda event_id: [f"event:{event_id}"])
+        def get_event_statistics(self, event_id: int) -> Dict[str, Any]:
+            ...
+    """
+    cache = ReadThroughCache(namespace, ttl_seconds, response_type, local_ttl_seconds)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {name: bound.arguments[name] for name in key_args}
+            entry_tags = list(tags(**params)) if tags else []
+            return cache.get_or_load(params, lambda: func(*args, **kwargs), entry_tags)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -237,6 +237,11 @@ async def email_fallback(*args, **kwargs):
         'message': 'Email service temporarily unavailable, will retry automatically'
     }
 
+async def email_batch_fallback(service, messages, *args, **kwargs):
+    """Fallback for batch email sends when circuit is open: nothing was sent."""
+    logger.warning(f"Email service unavailable, {len(messages)} batched emails not sent")
+    return [False] * len(messages)
+
 async def sms_fallback(*args, **kwargs):
     """Fallback for SMS operations when circuit is open."""
     logger.warning("SMS service unavailable, message will be queued for retry")
@@ -1,4 +1,4 @@
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
 import os
@@ -51,18 +51,38 @@ class Settings(BaseSettings):
             return v
         return []
     
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: int = 10
+    REPLICA_MAX_LAG_SECONDS: float = 5.0  # Replicas lagging more than this stop serving reads
+    REPLICA_LAG_GUARD_MARGIN_SECONDS: float = 1.0  # Extra wait after a user's write before reading from a replica
+    
+    # Totals for cursor-paginated listings: "exact" (COUNT(*) per page), "cached"
+    # (COUNT(*) reused for PAGINATION_TOTAL_CACHE_SECONDS) or "estimated" (planner estimate)
+    PAGINATION_TOTAL_MODE: str = "cached"
+    PAGINATION_TOTAL_CACHE_SECONDS: int = 60
+    
     # Database Performance Settings
-    DB_CONNECTION_POOL_SIZE: int = 20
+    DB_CONNECTION_POOL_SIZE: int = 20  # Per worker and database server across its engines, used when no budget is set
     DB_MAX_OVERFLOW: int = 40
+    DB_MAX_CONNECTIONS: Optional[int] = None  # Primary's connection budget shared by all workers of a deployment
+    DB_REPLICA_MAX_CONNECTIONS: Optional[int] = None  # Budget of each read replica, likewise shared; defaults to DB_MAX_CONNECTIONS
+    WEB_CONCURRENCY: int = 1  # Number of gunicorn workers (also read by gunicorn itself)
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 3600  # 1 hour
     DB_SLOW_QUERY_THRESHOLD_MS: int = 500  # Log queries taking longer than this
+    DB_SLOW_QUERY_PARAM_SAMPLE_RATE: float = 0.1  # Fraction of slow queries whose parameters are kept
+    DB_QUERY_STATS_MAX_FINGERPRINTS: int = 1000  # Distinct statements tracked before folding into "<other>"
+    DB_ASYNC_READ_PATH_ENABLED: bool = False  # Serve hot list/search/detail reads through asyncpg
     
     # Security Configuration
     SECRET_KEY: str 
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    JWT_DECODE_CACHE_SIZE: int = 10000  # Verified bearer tokens kept decoded per worker until they expire
+    AUTH_REVOCATION_CACHE_SECONDS: int = 300  # Cached revoked sessions per user, invalidated on logout
+    AUTH_SESSION_SYNC_HOURS: int = 24  # Refreshes served from Redis extend the session row at most this often
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # Raising this rehashes each password on its next login
+    PASSWORD_HASH_THREADS: int = 4  # Thread pool running bcrypt off the event loop
     
     # Subscription & Billing Configuration
     FREE_PLAN_EVENT_LIMIT: int  # Monthly event creation limit for free tier users
@@ -70,6 +90,42 @@ class Settings(BaseSettings):
     # Rate Limiting Configuration
     REDIS_URL: str
     RATE_LIMIT_ENABLED: bool
+    RATE_LIMIT_SYNC_SECONDS: float = 1.0  # Longest a worker admits requests on its own buckets before reporting them to Redis
+    RATE_LIMIT_LOCAL_SHARE: float = 0.1  # Fraction of a limit a worker may admit between syncs; tight limits sync every request
+    RATE_LIMIT_LOCAL_KEYS: int = 100000  # In-memory buckets kept per worker
+    RATE_LIMIT_AI_COST: int = 10  # Units of the API-wide limit one AI request uses
+    RATE_LIMIT_UPLOAD_COST: int = 5  # Units of the API-wide limit one upload uses
+    
+    # Read-through cache Configuration
+    CACHE_ENABLED: bool = True
+    CACHE_LOCAL_MAX_ENTRIES: int = 2048  # In-process LRU entries per worker
+    CACHE_LOCAL_TTL_SECONDS: int = 10  # Bounds cross-worker staleness after invalidation
+    AUTH_PRINCIPAL_CACHE_SECONDS: int = 60  # Cached account flags checked on every authenticated request
+    
+    # Real-time chat Configuration
+    CHAT_TYPING_COALESCE_SECONDS: float = 3.0  # Repeated "typing" from one user is broadcast at most this often
+    
+    # WebSocket presence Configuration
+    WEBSOCKET_PRESENCE_TTL_SECONDS: int = 45  # A worker's lease on a user's sockets lapses after this
+    WEBSOCKET_PRESENCE_HEARTBEAT_SECONDS: int = 15  # How often each worker renews its leases
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 256  # Outbound messages buffered per socket before it is evicted
+    WEBSOCKET_SEND_TIMEOUT_SECONDS: float = 10.0  # A socket write taking longer evicts the client
+    
+    # Notification dispatch Configuration
+    NOTIFICATION_DISPATCH_BATCH_SIZE: int = 200  # Queue rows claimed per batch
+    NOTIFICATION_CLAIM_LEASE_SECONDS: int = 300  # 'processing' rows older than this are reclaimed
+    NOTIFICATION_CHANNEL_CONCURRENCY: Dict[str, int] = {
+        "email": 20,
+        "sms": 5,
+        "push": 50,
+        "in_app": 100
+    }  # Concurrent in-flight sends per channel and worker
+    NOTIFICATION_FANOUT_IN_BACKGROUND: bool = True  # Queue reminder notifications from a Celery task
+    NOTIFICATION_SETTINGS_CACHE_SECONDS: int = 300  # Cached preferences and active devices per user
+    NOTIFICATION_SCHEDULER_MIN_BATCH: int = 50  # First claim of a drain; doubles while claims come back full
+    NOTIFICATION_SCHEDULER_MAX_BATCH: int = 1000
+    NOTIFICATION_SCHEDULER_MAX_IDLE_SECONDS: float = 30.0  # Longest sleep between queue checks
+    NOTIFICATION_SCHEDULER_RESYNC_SECONDS: float = 60.0  # Re-seed the Redis due index from the table
     
     # Logging Configuration
     LOG_LEVEL: str = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
@@ -96,6 +152,12 @@ class Settings(BaseSettings):
     EMAILS_FROM_EMAIL: str
     EMAILS_FROM_NAME: str
     SUPPORT_EMAIL: str
+    RESEND_API_URL: str = "https://api.resend.com"
+    EMAIL_BATCH_SIZE: int = 100  # Messages per Resend batch call (provider maximum)
+    EMAIL_SEND_CONCURRENCY: int = 4  # Resend requests in flight per worker
+    EMAIL_MAX_RETRIES: int = 3  # Retries on 429, 5xx and transport errors
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 0.5  # Doubled on every retry, with jitter
+    EMAIL_FRAGMENT_CACHE_SIZE: int = 512  # Rendered recipient-independent template fragments kept
     
     # Frontend URL for email links
     FRONTEND_URL: str  # Web frontend URL
@@ -170,11 +232,15 @@ class Settings(BaseSettings):
     TERMII_API_KEY: Optional[str] = None
     TERMII_SENDER_ID: Optional[str] = None
     TERMII_BASE_URL: str
+    TERMII_RATE_LIMIT_PER_SECOND: float = 10.0  # Messages per second sent to Termii across all workers
+    SMS_SEND_CONCURRENCY: int = 8  # Pooled Termii connections / concurrent sends per worker
+    SMS_INVITES_IN_BACKGROUND: bool = True  # Deliver bulk phone invitations from a Celery job
     
     # Push Notifications - Firebase Cloud Messaging
     FIREBASE_CREDENTIALS_PATH: Optional[str] = None
     FIREBASE_CREDENTIALS_JSON: Optional[str] = None
     FIREBASE_CREDENTIALS_BASE64: Optional[str] = None
+    PUSH_SEND_THREADS: int = 8  # Thread pool running blocking FCM calls off the event loop
     
     # File Storage - GCP Storage
     GCP_PROJECT_ID: Optional[str] = None
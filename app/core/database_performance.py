@@ -5,8 +5,11 @@ This module provides utilities for monitoring and optimizing database performanc
 including query analysis, connection pool monitoring, and performance metrics.
 """
 
+import math
+import random
+import re
 import time
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Dict, List, Any, Optional, Callable
 from sqlalchemy import event, text
 from sqlalchemy.engine import Engine
@@ -14,74 +17,246 @@ from sqlalchemy.orm import Session, Query
 from sqlalchemy.pool import Pool
 from contextlib import contextmanager
 import threading
-from collections import defaultdict, deque
+from collections import deque
 from datetime import datetime, timedelta
+from app.core.config import settings
 from app.core.logger import get_perf_logger
 
 # Performance monitoring logger
 perf_logger = get_perf_logger()
 
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?|(?<!:):\w+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def fingerprint_statement(statement: str) -> str:
+    """
+    Normalize a SQL statement so executions with different literals,
+    bind parameters or IN-list lengths aggregate under one key.
+    """
+    fingerprint = _STRING_LITERAL.sub("?", statement)
+    fingerprint = _BIND_PARAMETER.sub("?", fingerprint)
+    fingerprint = _NUMBER_LITERAL.sub("?", fingerprint)
+    fingerprint = _IN_LIST.sub("(?...)", fingerprint)
+    return _WHITESPACE.sub(" ", fingerprint).strip()
+
+class DurationSketch:
+    """
+    Streaming percentile sketch over log-spaced buckets.
+    
+    Memory is bounded by the bucket range, and quantiles are accurate to
+    within `relative_accuracy` of the true value.
+    """
+    
+    MIN_DURATION = 1e-5  # 10 microseconds
+    
+    def __init__(self, relative_accuracy: float = 0.02):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+    
+    def add(self, duration: float):
+        index = math.ceil(math.log(max(duration, self.MIN_DURATION)) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+    
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i]
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+    
+    def copy(self) -> "DurationSketch":
+        clone = DurationSketch.__new__(DurationSketch)
+        clone.gamma = self.gamma
+        clone._log_gamma = self._log_gamma
+        clone.buckets = dict(self.buckets)
+        clone.count = self.count
+        return clone
+
+class _QueryAggregate:
+    """Fixed-size running statistics for one statement fingerprint"""
+    
+    __slots__ = ('count', 'total', 'min', 'max', 'sketch')
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.sketch = DurationSketch()
+    
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        self.sketch.add(duration)
+    
+    def quantile(self, q: float) -> float:
+        # The sketch returns bucket midpoints, keep them within observed bounds
+        return min(max(self.sketch.quantile(q), self.min), self.max)
+    
+    def snapshot(self) -> "_QueryAggregate":
+        clone = _QueryAggregate()
+        clone.count = self.count
+        clone.total = self.total
+        clone.min = self.min
+        clone.max = self.max
+        clone.sketch = self.sketch.copy()
+        return clone
+
 class QueryPerformanceMonitor:
-    """Monitor and log slow database queries"""
+    """
+    Monitor and log slow database queries.
+    
+    Executions are aggregated per statement fingerprint in fixed memory.
+    Fingerprints are spread over independently locked shards so concurrent
+    queries rarely contend, and readers copy one shard at a time so a stats
+    request never stalls the hot path. Once `max_fingerprints` distinct
+    statements have been seen, new ones are folded into OVERFLOW_FINGERPRINT.
+    """
+    
+    OVERFLOW_FINGERPRINT = "<other>"
+    SHARD_COUNT = 16
     
-    def __init__(self, slow_query_threshold: float = 1.0):
+    def __init__(
+        self,
+        slow_query_threshold: float = 1.0,
+        max_fingerprints: int = 1000,
+        param_sample_rate: float = 0.1
+    ):
         self.slow_query_threshold = slow_query_threshold
-        self.query_stats = defaultdict(list)
+        self.max_fingerprints = max_fingerprints
+        self.param_sample_rate = param_sample_rate
+        self._shards = [{} for _ in range(self.SHARD_COUNT)]
+        self._shard_locks = [threading.Lock() for _ in range(self.SHARD_COUNT)]
+        # Guards the count across shards; only taken when a fingerprint is new
+        self._count_lock = threading.Lock()
+        self._fingerprint_count = 0
         self.slow_queries = deque(maxlen=100)  # Keep last 100 slow queries
-        self._lock = threading.Lock()
     
     def log_query(self, query: str, duration: float, params: Dict = None):
         """Log query performance metrics"""
-        with self._lock:
-            self.query_stats[query].append({
+        fingerprint = fingerprint_statement(query)
+        shard_index = hash(fingerprint) % self.SHARD_COUNT
+        
+        with self._shard_locks[shard_index]:
+            shard = self._shards[shard_index]
+            aggregate = shard.get(fingerprint)
+            if aggregate is None and self._reserve_fingerprint():
+                aggregate = shard[fingerprint] = _QueryAggregate()
+            if aggregate is not None:
+                aggregate.add(duration)
+        
+        if aggregate is None:
+            fingerprint = self.OVERFLOW_FINGERPRINT
+            shard_index = hash(fingerprint) % self.SHARD_COUNT
+            with self._shard_locks[shard_index]:
+                shard = self._shards[shard_index]
+                if fingerprint not in shard:
+                    shard[fingerprint] = _QueryAggregate()
+                shard[fingerprint].add(duration)
+        
+        if duration > self.slow_query_threshold:
+            # Parameters can be large or sensitive, so only a sample is kept
+            sampled_params = None
+            if params is not None and random.random() < self.param_sample_rate:
+                sampled_params = repr(params)[:500]
+            
+            # deque.append is atomic, no lock needed
+            self.slow_queries.append({
+                'query': query[:2000],
+                'fingerprint': fingerprint,
                 'duration': duration,
                 'timestamp': datetime.utcnow(),
-                'params': params
+                'params': sampled_params
             })
             
-            if duration > self.slow_query_threshold:
-                self.slow_queries.append({
-                    'query': query,
-                    'duration': duration,
-                    'timestamp': datetime.utcnow(),
-                    'params': params
-                })
-                
-                perf_logger.warning(
-                    f"Slow query detected: {duration:.3f}s - {query[:200]}..."
-                )
+            perf_logger.warning(
+                f"Slow query detected: {duration:.3f}s - {query[:200]}..."
+            )
+    
+    def _reserve_fingerprint(self) -> bool:
+        """Count a new fingerprint if the bound allows it"""
+        with self._count_lock:
+            if self._fingerprint_count >= self.max_fingerprints:
+                return False
+            self._fingerprint_count += 1
+            return True
     
     def get_slow_queries(self, limit: int = 10) -> List[Dict]:
         """Get recent slow queries"""
-        with self._lock:
-            return list(self.slow_queries)[-limit:]
+        return list(self.slow_queries)[-limit:]
     
-    def get_query_stats(self, query_pattern: str = None) -> Dict:
-        """Get aggregated query statistics"""
-        with self._lock:
-            if query_pattern:
-                matching_queries = {
-                    k: v for k, v in self.query_stats.items() 
-                    if query_pattern.lower() in k.lower()
-                }
-            else:
-                matching_queries = dict(self.query_stats)
-            
-            stats = {}
-            for query, executions in matching_queries.items():
-                durations = [e['duration'] for e in executions]
-                stats[query] = {
-                    'count': len(durations),
-                    'avg_duration': sum(durations) / len(durations),
-                    'max_duration': max(durations),
-                    'min_duration': min(durations),
-                    'total_duration': sum(durations)
-                }
-            
-            return stats
+    def get_query_stats(self, query_pattern: str = None, limit: Optional[int] = None) -> Dict:
+        """Get aggregated query statistics, most expensive fingerprints first"""
+        snapshot = []
+        for shard, lock in zip(self._shards, self._shard_locks):
+            with lock:
+                snapshot.extend(
+                    (fingerprint, aggregate.snapshot())
+                    for fingerprint, aggregate in shard.items()
+                )
+        
+        if query_pattern:
+            snapshot = [
+                (fingerprint, aggregate) for fingerprint, aggregate in snapshot
+                if query_pattern.lower() in fingerprint.lower()
+            ]
+        
+        snapshot.sort(key=lambda item: item[1].total, reverse=True)
+        if limit:
+            snapshot = snapshot[:limit]
+        
+        stats = {}
+        for fingerprint, aggregate in snapshot:
+            stats[fingerprint] = {
+                'count': aggregate.count,
+                'avg_duration': aggregate.total / aggregate.count,
+                'max_duration': aggregate.max,
+                'min_duration': aggregate.min,
+                'total_duration': aggregate.total,
+                'p50_duration': aggregate.quantile(0.5),
+                'p95_duration': aggregate.quantile(0.95),
+                'p99_duration': aggregate.quantile(0.99)
+            }
+        
+        return stats
+    
+    def get_fingerprint_count(self) -> int:
+        """Number of distinct statement fingerprints being tracked"""
+        return self._fingerprint_count
+    
+    def reset(self):
+        """Clear all aggregated statistics"""
+        for shard, lock in zip(self._shards, self._shard_locks):
+            with lock:
+                shard.clear()
+        with self._count_lock:
+            self._fingerprint_count = 0
+        self.slow_queries.clear()
 
 # Global query monitor instance
-query_monitor = QueryPerformanceMonitor()
+query_monitor = QueryPerformanceMonitor(
+    slow_query_threshold=settings.DB_SLOW_QUERY_THRESHOLD_MS / 1000,
+    max_fingerprints=settings.DB_QUERY_STATS_MAX_FINGERPRINTS,
+    param_sample_rate=settings.DB_SLOW_QUERY_PARAM_SAMPLE_RATE
+)
+
+# Upper bounds (ms) of the connection checkout wait histogram buckets
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
 
 class ConnectionPoolMonitor:
     """Monitor database connection pool health"""
@@ -95,26 +270,121 @@ class ConnectionPoolMonitor:
             'overflow_connections': 0,
             'invalid_connections': 0
         }
+        self.pools: Dict[str, Pool] = {}
+        self.per_pool_stats: Dict[str, Dict] = {}
+        self.checkout_waits: Dict[str, Dict] = {}
         self._lock = threading.Lock()
     
-    def update_stats(self, pool: Pool):
+    def register_pool(self, name: str, pool: Pool):
+        """Register a pool so health checks report on it"""
+        with self._lock:
+            self.pools[name] = pool
+            self.per_pool_stats.setdefault(name, {'invalid_connections': 0})
+            self.checkout_waits.setdefault(name, self._empty_histogram())
+        
+        event.listen(
+            pool, "invalidate",
+            lambda dbapi_connection, connection_record, exception: self.record_invalidation(name)
+        )
+    
+    def record_checkout_wait(self, name: str, wait_seconds: float, timed_out: bool = False):
+        """Record how long a request waited for a pooled connection"""
+        wait_ms = wait_seconds * 1000
+        with self._lock:
+            histogram = self.checkout_waits.setdefault(name, self._empty_histogram())
+            histogram['count'] += 1
+            histogram['sum_ms'] += wait_ms
+            histogram['max_ms'] = max(histogram['max_ms'], wait_ms)
+            if timed_out:
+                histogram['timeouts'] += 1
+            
+            for index, bound in enumerate(CHECKOUT_WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    histogram['buckets'][index] += 1
+                    break
+            else:
+                histogram['buckets'][-1] += 1
+    
+    def record_invalidation(self, name: str):
+        """Count a connection invalidated by the pool"""
+        with self._lock:
+            stats = self.per_pool_stats.setdefault(name, {'invalid_connections': 0})
+            stats['invalid_connections'] = stats.get('invalid_connections', 0) + 1
+    
+    def update_stats(self, pool: Pool, name: str = "primary"):
         """Update pool statistics"""
+        capacity = pool.size() + max(getattr(pool, '_max_overflow', 0), 0)
+        
         with self._lock:
-            self.pool_stats.update({
+            stats = self.per_pool_stats.setdefault(name, {'invalid_connections': 0})
+            stats.update({
                 'pool_size': pool.size(),
+                'capacity': capacity,
                 'checked_out_connections': pool.checkedout(),
-                'overflow_connections': pool.overflow(),
-                'invalid_connections': pool.invalidated()
+                'overflow_connections': max(pool.overflow(), 0),
+                'utilization': pool.checkedout() / capacity if capacity else 0.0
             })
+            
+            self.pool_stats.update({
+                'pool_size': sum(s.get('pool_size', 0) for s in self.per_pool_stats.values()),
+                'checked_out_connections': sum(
+                    s.get('checked_out_connections', 0) for s in self.per_pool_stats.values()
+                ),
+                'overflow_connections': sum(
+                    s.get('overflow_connections', 0) for s in self.per_pool_stats.values()
+                ),
+                'invalid_connections': sum(
+                    s.get('invalid_connections', 0) for s in self.per_pool_stats.values()
+                )
+            })
+    
+    def refresh(self):
+        """Update statistics for every registered pool"""
+        with self._lock:
+            pools = list(self.pools.items())
+        
+        for name, pool in pools:
+            self.update_stats(pool, name)
     
     def get_stats(self) -> Dict:
         """Get current pool statistics"""
         with self._lock:
             return self.pool_stats.copy()
     
+    def get_pool_report(self) -> Dict[str, Dict]:
+        """Get per-pool statistics with checkout wait histograms"""
+        with self._lock:
+            report = {}
+            for name in set(self.per_pool_stats) | set(self.checkout_waits):
+                stats = self.per_pool_stats.get(name, {})
+                histogram = self.checkout_waits.get(name, self._empty_histogram())
+                report[name] = {
+                    **stats,
+                    'checkout_wait_ms': {
+                        'count': histogram['count'],
+                        'timeouts': histogram['timeouts'],
+                        'avg': histogram['sum_ms'] / histogram['count'] if histogram['count'] else 0.0,
+                        'max': histogram['max_ms'],
+                        'buckets': {
+                            **{
+                                f"le_{bound}": histogram['buckets'][index]
+                                for index, bound in enumerate(CHECKOUT_WAIT_BUCKETS_MS)
+                            },
+                            'le_inf': histogram['buckets'][-1]
+                        }
+                    }
+                }
+            return report
+    
     def is_pool_healthy(self, warning_threshold: float = 0.8) -> bool:
         """Check if connection pool is healthy"""
         with self._lock:
+            if self.per_pool_stats:
+                return all(
+                    stats.get('utilization', 0.0) < warning_threshold
+                    for stats in self.per_pool_stats.values()
+                )
+            
             if self.pool_stats['pool_size'] == 0:
                 return True
             
@@ -124,6 +394,16 @@ class ConnectionPoolMonitor:
             )
             
             return utilization < warning_threshold
+    
+    @staticmethod
+    def _empty_histogram() -> Dict:
+        return {
+            'count': 0,
+            'timeouts': 0,
+            'sum_ms': 0.0,
+            'max_ms': 0.0,
+            'buckets': [0] * (len(CHECKOUT_WAIT_BUCKETS_MS) + 1)
+        }
 
 # Global pool monitor instance
 pool_monitor = ConnectionPoolMonitor()
@@ -261,9 +541,10 @@ def receive_checkin(dbapi_connection, connection_record):
 def get_performance_report() -> Dict:
     """Generate comprehensive performance report"""
     return {
-        'query_stats': query_monitor.get_query_stats(),
+        'query_stats': query_monitor.get_query_stats(limit=50),
         'slow_queries': query_monitor.get_slow_queries(),
         'pool_stats': pool_monitor.get_stats(),
+        'pools': pool_monitor.get_pool_report(),
         'pool_healthy': pool_monitor.is_pool_healthy(),
         'timestamp': datetime.utcnow().isoformat()
     }
@@ -3,37 +3,35 @@ Database Optimizations Module
 
 This module implements advanced database optimizations including:
 1. Composite indexes for frequently queried fields
-2. Query result caching for frequently accessed data
-3. Read replica configuration
+2. Read replica configuration
+
+Query result caching lives in app/core/cache.py.
 """
 
-from sqlalchemy import text, Index, Table, MetaData
-from sqlalchemy.orm import Session
-from functools import wraps
+from sqlalchemy import text, event, Index, Table, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from contextlib import asynccontextmanager, contextmanager
 from typing import Dict, Any, Callable, List, Optional, Union
+import asyncio
+import random
+import threading
 import time
+from datetime import datetime, timedelta
 import redis
-import json
-import hashlib
-import pickle
-from datetime import timedelta
 
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.db.session import SessionLocal
+from app.core.cache import cache_backend
+from app.core.database_performance import DurationSketch
+from app.db.session import (
+    engine, SessionLocal, AsyncSessionLocal, create_pooled_engine, create_pooled_async_engine
+)
 from app.core.logger import get_logger
 
 # Setup logging
 logger = get_logger(__name__)
 
-# Redis client for caching
-redis_client = redis.Redis.from_url(
-    settings.REDIS_URL,
-    decode_responses=False,  # Keep binary data for pickle
-    socket_timeout=5,
-    socket_connect_timeout=5
-)
-
 
 def create_composite_indexes():
     """
@@ -93,99 +91,150 @@ def create_composite_indexes():
         logger.info("Created composite indexes for frequently queried fields")
 
 
-def cache_result(ttl_seconds: int = 300, prefix: str = "cache"):
+class WriteTracker:
     """
-    Decorator to cache function results in Redis.
+    Remembers when each user last committed a write.
     
-    Args:
-        ttl_seconds: Time-to-live in seconds for cached results
-        prefix: Cache key prefix
-    """
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Skip caching if Redis is not available
-            if not is_redis_available():
-                return func(*args, **kwargs)
-            
-            # Generate cache key
-            cache_key = _generate_cache_key(func, args, kwargs, prefix)
-            
-            # Try to get from cache
-            cached_result = redis_client.get(cache_key)
-            if cached_result:
-                try:
-                    return pickle.loads(cached_result)
-                except Exception as e:
-                    logger.warning(f"Failed to load cached result: {e}")
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            try:
-                redis_client.setex(
-                    cache_key,
-                    ttl_seconds,
-                    pickle.dumps(result)
-                )
-            except Exception as e:
-                logger.warning(f"Failed to cache result: {e}")
-            
-            return result
-        return wrapper
-    return decorator
-
-def invalidate_cache(prefix: str, pattern: Optional[str] = None):
+    Reads issued shortly after a user's own mutation are routed to the
+    primary so they never observe a replica that has not replayed it yet.
+    Timestamps are kept locally and in Redis so every worker sees them.
     """
-    Invalidate cache entries by prefix and optional pattern.
     
-    Args:
-        prefix: Cache key prefix
-        pattern: Optional pattern to match keys
-    """
-    if not is_redis_available():
-        return
+    KEY_PREFIX = "replica:last_write"
+    MAX_LOCAL_ENTRIES = 10000
     
-    try:
-        if pattern:
-            keys = redis_client.keys(f"{prefix}:{pattern}*")
-        else:
-            keys = redis_client.keys(f"{prefix}:*")
+    def __init__(self):
+        self._local: Dict[int, float] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def window_seconds(self) -> float:
+        """How long a write can influence routing; replicas lagging more are unhealthy"""
+        return settings.REPLICA_MAX_LAG_SECONDS + settings.REPLICA_LAG_GUARD_MARGIN_SECONDS
+    
+    def record_write(self, user_id: int):
+        now = time.time()
+        with self._lock:
+            if len(self._local) >= self.MAX_LOCAL_ENTRIES:
+                cutoff = now - self.window_seconds
+                self._local = {uid: ts for uid, ts in self._local.items() if ts > cutoff}
+            self._local[user_id] = now
+        
+        client = cache_backend.redis
+        if client is None:
+            return
+        try:
+            client.set(f"{self.KEY_PREFIX}:{user_id}", now, px=int(self.window_seconds * 1000))
+        except redis.RedisError as e:
+            cache_backend.mark_redis_down(e)
+    
+    def last_write_at(self, user_id: int) -> Optional[float]:
+        with self._lock:
+            local = self._local.get(user_id)
+        if local is not None and time.time() - local < self.window_seconds:
+            return local
         
-        if keys:
-            redis_client.delete(*keys)
-            logger.info(f"Invalidated {len(keys)} cache entries with prefix '{prefix}'")
-    except Exception as e:
-        logger.warning(f"Failed to invalidate cache: {e}")
+        client = cache_backend.redis
+        if client is None:
+            return local
+        try:
+            value = client.get(f"{self.KEY_PREFIX}:{user_id}")
+        except redis.RedisError as e:
+            cache_backend.mark_redis_down(e)
+            return local
+        return float(value) if value else local
+
+
+write_tracker = WriteTracker()
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_session_writes(session, flush_context):
+    """Flush implies the unit of work contained inserts, updates or deletes"""
+    session.info["has_writes"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(Session, "after_commit")
+def _record_user_write(session):
+    """Feed the read-your-writes guard after an authenticated user's commit"""
+    if session.info.pop("has_writes", False) and session.info.get("user_id"):
+        write_tracker.record_write(session.info["user_id"])
 
-def _generate_cache_key(func: Callable, args: tuple, kwargs: Dict[str, Any], prefix: str) -> str:
-    """Generate a unique cache key for a function call"""
-    # Create a string representation of the function and its arguments
-    key_parts = [func.__module__, func.__name__]
+
+class ReplicaState:
+    """Engines, health and latency metrics for one read replica"""
     
-    # Add args and kwargs to key parts
-    for arg in args:
-        if hasattr(arg, '__dict__'):
-            # For objects, use their class name and id
-            key_parts.append(f"{arg.__class__.__name__}:{id(arg)}")
-        else:
-            key_parts.append(str(arg))
+    # Smoothing factor of the latency moving average used for weighting
+    LATENCY_EWMA_ALPHA = 0.2
     
-    # Sort kwargs for consistent keys
-    for k, v in sorted(kwargs.items()):
-        key_parts.append(f"{k}:{v}")
+    def __init__(self, name: str, engine, async_engine=None):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.async_session_factory = sessionmaker(
+            async_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        ) if async_engine is not None else None
+        
+        self.healthy = True
+        self.lag_seconds = 0.0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_checked_at: Optional[datetime] = None
+        self.latency_ewma: Optional[float] = None
+        self.latency = DurationSketch()
+        self.query_count = 0
+        self._lock = threading.Lock()
+        
+        for target in filter(None, (engine, async_engine.sync_engine if async_engine else None)):
+            event.listen(target, "before_cursor_execute", self._before_execute)
+            event.listen(target, "after_cursor_execute", self._after_execute)
     
-    # Join parts and hash
-    key_str = ":".join(key_parts)
-    hashed = hashlib.md5(key_str.encode()).hexdigest()
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._replica_start_time = time.perf_counter()
     
-    return f"{prefix}:{hashed}"
-
-def is_redis_available() -> bool:
-    """Check if Redis is available"""
-    try:
-        return redis_client.ping()
-    except:
-        return False
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_replica_start_time", None)
+        if start is not None:
+            self.record_latency(time.perf_counter() - start)
+    
+    def record_latency(self, seconds: float):
+        with self._lock:
+            self.query_count += 1
+            self.latency.add(seconds)
+            if self.latency_ewma is None:
+                self.latency_ewma = seconds
+            else:
+                self.latency_ewma += self.LATENCY_EWMA_ALPHA * (seconds - self.latency_ewma)
+    
+    @property
+    def weight(self) -> float:
+        """Selection weight, inversely proportional to recent query latency"""
+        return 1.0 / max(self.latency_ewma or 0.005, 0.001)
+    
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "healthy": self.healthy,
+                "lag_seconds": self.lag_seconds,
+                "consecutive_failures": self.consecutive_failures,
+                "last_error": self.last_error,
+                "last_checked_at": self.last_checked_at.isoformat() if self.last_checked_at else None,
+                "query_count": self.query_count,
+                "latency_ms": {
+                    "ewma": (self.latency_ewma or 0.0) * 1000,
+                    "p50": self.latency.quantile(0.5) * 1000,
+                    "p95": self.latency.quantile(0.95) * 1000,
+                    "p99": self.latency.quantile(0.99) * 1000
+                },
+                "weight": self.weight
+            }
 
 
 class ReadReplicaManager:
@@ -194,15 +243,28 @@ class ReadReplicaManager:
     
     This class provides:
     1. Connection management for read replicas
-    2. Load balancing across replicas
-    3. Fallback to primary when replicas are unavailable
+    2. Latency-weighted selection across healthy replicas
+    3. Periodic health and replication lag checks
+    4. Fallback to primary when replicas are unavailable, lagging, or the
+       user has just written data the replica may not have yet
     """
     
+    LAG_QUERY = text("""
+        SELECT CASE
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """)
+    
     def __init__(self):
         """Initialize the read replica manager"""
-        self.replica_engines = []
-        self.current_replica = 0
+        self.replicas: List[ReplicaState] = []
         self.initialized = False
+        self._health_task: Optional[asyncio.Task] = None
+    
+    @property
+    def replica_engines(self) -> list:
+        return [replica.engine for replica in self.replicas]
     
     def initialize(self, replica_urls: List[str]):
         """
@@ -215,69 +277,181 @@ class ReadReplicaManager:
             return
         
         for url in replica_urls:
+            name = f"replica_{len(self.replicas)}"
             try:
-                replica_engine = create_engine(
+                replica_engine = create_pooled_engine(
                     url,
+                    name=name,
                     connect_args={
-                        "options": "-c default_transaction_isolation=read_committed",
+                        "options": "-c default_transaction_isolation=read_committed -c statement_timeout=30000",
                         "application_name": "ultimateco_planner_replica",
                         "connect_timeout": 10,
-                        "command_timeout": 30,
                     } if "sqlite" not in url else {"check_same_thread": False},
-                    echo=settings.DEBUG,
-                    pool_size=10,
-                    max_overflow=20,
-                    pool_timeout=30,
-                    pool_recycle=3600,
-                    pool_pre_ping=True
+                    max_connections=settings.DB_REPLICA_MAX_CONNECTIONS
                 )
                 
                 # Test connection
                 with replica_engine.connect() as conn:
                     conn.execute(text("SELECT 1"))
                 
-                self.replica_engines.append(replica_engine)
-                logger.info(f"Initialized read replica: {url}")
+                self.replicas.append(
+                    ReplicaState(name, replica_engine, self._create_async_engine(url, name))
+                )
+                logger.info(f"Initialized read replica: {name}")
             except Exception as e:
-                logger.error(f"Failed to initialize read replica {url}: {e}")
+                logger.error(f"Failed to initialize read replica {name}: {e}")
         
         self.initialized = True
-        logger.info(f"Initialized {len(self.replica_engines)} read replicas")
+        logger.info(f"Initialized {len(self.replicas)} read replicas")
+    
+    def _create_async_engine(self, url: str, name: str):
+        """asyncpg engine for the async read path, when it is enabled"""
+        if not settings.DB_ASYNC_READ_PATH_ENABLED or "sqlite" in url:
+            return None
+        
+        async_url = make_url(url).set(drivername="postgresql+asyncpg")
+        return create_pooled_async_engine(
+            async_url,
+            name=f"{name}_async",
+            connect_args={
+                "server_settings": {
+                    "application_name": "ultimateco_planner_replica",
+                    "default_transaction_isolation": "read committed",
+                    "statement_timeout": "30000",
+                },
+                "timeout": 10,
+            },
+            max_connections=settings.DB_REPLICA_MAX_CONNECTIONS
+        )
+    
+    def check_health(self):
+        """Probe every replica and update its health and replication lag"""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    if replica.engine.dialect.name == "postgresql":
+                        lag = float(conn.execute(self.LAG_QUERY).scalar() or 0)
+                    else:
+                        conn.execute(text("SELECT 1"))
+                        lag = 0.0
+                
+                healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+                with replica._lock:
+                    replica.lag_seconds = lag
+                    replica.consecutive_failures = 0
+                    replica.last_error = None if healthy else f"Replication lag {lag:.1f}s"
+                
+                if healthy != replica.healthy:
+                    logger.warning(
+                        f"Read replica {replica.name} is now {'healthy' if healthy else 'lagging'} "
+                        f"(lag {lag:.1f}s)"
+                    )
+                replica.healthy = healthy
+            except Exception as e:
+                with replica._lock:
+                    replica.consecutive_failures += 1
+                    replica.last_error = str(e)
+                if replica.healthy:
+                    logger.error(f"Read replica {replica.name} failed health check: {e}")
+                replica.healthy = False
+            finally:
+                replica.last_checked_at = datetime.utcnow()
+    
+    async def run_health_checks(self):
+        """Check replica health periodically without blocking the event loop"""
+        while True:
+            await asyncio.to_thread(self.check_health)
+            await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS)
     
-    def get_read_session(self):
+    def start_health_checks(self):
+        if self.replicas and self._health_task is None:
+            self._health_task = asyncio.create_task(self.run_health_checks())
+    
+    async def stop_health_checks(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+    
+    def choose_replica(self, user_id: Optional[int] = None, is_async: bool = False) -> Optional[ReplicaState]:
+        """
+        Pick a replica for a read, or None to use the primary.
+        
+        Healthy replicas are weighted by recent latency. A replica is skipped
+        for a user whose last write is more recent than its lag plus a margin.
+        """
+        candidates = [
+            replica for replica in self.replicas
+            if replica.healthy and (not is_async or replica.async_session_factory is not None)
+        ]
+        if not candidates:
+            return None
+        
+        if user_id is not None:
+            last_write = write_tracker.last_write_at(user_id)
+            if last_write is not None:
+                elapsed = time.time() - last_write
+                candidates = [
+                    replica for replica in candidates
+                    if elapsed > replica.lag_seconds + settings.REPLICA_LAG_GUARD_MARGIN_SECONDS
+                ]
+                if not candidates:
+                    return None
+        
+        return random.choices(candidates, weights=[replica.weight for replica in candidates])[0]
+    
+    def get_read_session(self, user_id: Optional[int] = None) -> Session:
         """
         Get a session connected to a read replica.
-        Uses round-robin to distribute load across replicas.
-        Falls back to primary if no replicas are available.
+        Falls back to primary if no replica is suitable.
         """
-        if not self.replica_engines:
-            # Fallback to primary
+        replica = self.choose_replica(user_id)
+        if replica is None:
             return SessionLocal()
         
-        # Round-robin selection
-        replica_engine = self.replica_engines[self.current_replica]
-        self.current_replica = (self.current_replica + 1) % len(self.replica_engines)
-        
-        # Create session
-        ReplicaSession = sessionmaker(
-            autocommit=False,
-            autoflush=False,
-            bind=replica_engine
-        )
+        session = replica.session_factory()
+        session.info["replica"] = replica.name
+        return session
+    
+    def get_async_read_session(self, user_id: Optional[int] = None) -> AsyncSession:
+        """Async equivalent of get_read_session"""
+        replica = self.choose_replica(user_id, is_async=True)
+        if replica is None:
+            return AsyncSessionLocal()
         
-        return ReplicaSession()
+        session = replica.async_session_factory()
+        session.info["replica"] = replica.name
+        return session
+    
+    def get_report(self) -> Dict[str, Dict[str, Any]]:
+        """Health, lag and latency per replica"""
+        return {replica.name: replica.report() for replica in self.replicas}
 
 # Global instance
 read_replica_manager = ReadReplicaManager()
 
-def get_read_db():
-    """
-    Database dependency for read operations.
-    Uses read replicas when available.
-    """
-    db = read_replica_manager.get_read_session()
+@contextmanager
+def write_session_for(read_session: Session):
+    """Primary session for writes made while serving a read-routed request"""
+    if not read_session.info.get("replica"):
+        yield read_session
+        return
+    
+    session = SessionLocal()
     try:
-        yield db
+        yield session
     finally:
-        db.close()
+        session.close()
 
+@asynccontextmanager
+async def async_write_session_for(read_session: AsyncSession):
+    """Async equivalent of write_session_for"""
+    if not read_session.info.get("replica"):
+        yield read_session
+        return
+    
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -1,11 +1,16 @@
-from typing import Generator, Optional
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.core.security import verify_token
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.core.db_optimizations import read_replica_manager
+from app.core.security import verify_token, verify_token_claims
 from app.core.errors import http_401_unauthorized, http_403_forbidden
 from app.services.user_service import UserService
+from app.repositories.user_repo import (
+    get_cached_principal, get_cached_principal_async, is_token_revoked, is_token_revoked_async
+)
 from app.models.user_models import User
 from app.core.config import settings
 
@@ -20,24 +25,201 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator:
+    """Async database dependency (asyncpg)"""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+def get_token_user_id(
+    token: Optional[str] = Depends(oauth2_scheme)
+) -> Optional[int]:
+    """User id from the bearer token if present and valid, without raising"""
+    if not token:
+        return None
+    try:
+        user_id = verify_token(token)
+        return int(user_id) if user_id is not None else None
+    except Exception:
+        return None
+
+def get_read_db(
+    user_id: Optional[int] = Depends(get_token_user_id)
+) -> Generator:
+    """
+    Database dependency for read-only endpoints.
+    Uses a healthy read replica when available, falling back to the primary
+    when none is, or when the caller has written too recently for replicas
+    to have caught up.
+    """
+    db = read_replica_manager.get_read_session(user_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(
+    user_id: Optional[int] = Depends(get_token_user_id)
+) -> AsyncGenerator:
+    """Async equivalent of get_read_db"""
+    async with read_replica_manager.get_async_read_session(user_id) as session:
+        yield session
+
+def _verified_user_id(token: str, db: Session) -> Optional[str]:
+    """Subject of a valid token whose session has not been logged out"""
+    claims = verify_token_claims(token)
+    if claims is None or is_token_revoked(db, claims):
+        return None
+    return claims.subject
+
 def get_current_user_token(
-    token: str = Depends(oauth2_scheme)
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
 ) -> str:
     """Extract and verify JWT token from OAuth2 scheme"""
     if not token:
         raise http_401_unauthorized("Authentication credentials were not provided")
-    user_id = verify_token(token)
+    user_id = _verified_user_id(token, db)
+    if user_id is None:
+        raise http_401_unauthorized("Invalid authentication credentials")
+    return user_id
+
+async def _verified_user_id_async(token: str, db: AsyncSession) -> Optional[str]:
+    """Async equivalent of _verified_user_id"""
+    claims = verify_token_claims(token)
+    if claims is None or await is_token_revoked_async(db, claims):
+        return None
+    return claims.subject
+
+async def get_current_user_token_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> str:
+    """
+    Async equivalent of get_current_user_token.
+    Revocations are read from the primary, as replicas may not have seen a
+    logout yet.
+    """
+    if not token:
+        raise http_401_unauthorized("Authentication credentials were not provided")
+    user_id = await _verified_user_id_async(token, db)
     if user_id is None:
         raise http_401_unauthorized("Invalid authentication credentials")
     return user_id
 
+class CurrentUser:
+    """
+    The authenticated user, resolved from the cached principal.
+    
+    id and the account flags in PRINCIPAL_FIELDS come from the cache; reading
+    or setting any other attribute first loads the User row through the
+    request's session, so handlers that only need current_user.id cost no
+    query. On async sessions the row has to be loaded with
+    `await current_user.get_user_async()` before other attributes are used.
+    Compares equal to the User it stands for.
+    """
+    
+    def __init__(
+        self,
+        principal: Dict[str, Any],
+        load: Optional[Callable[[], Optional[User]]] = None,
+        load_async: Optional[Callable[[], Awaitable[Optional[User]]]] = None
+    ):
+        object.__setattr__(self, "_principal", principal)
+        object.__setattr__(self, "_load", load)
+        object.__setattr__(self, "_load_async", load_async)
+        object.__setattr__(self, "_user", None)
+    
+    def get_user(self) -> User:
+        """The full User row, loaded on first use"""
+        if self._user is None:
+            if self._load is None:
+                raise RuntimeError("Use await current_user.get_user_async() to load the user on an async session")
+            self._set_user(self._load())
+        return self._user
+    
+    async def get_user_async(self) -> User:
+        """Async equivalent of get_user"""
+        if self._user is None:
+            self._set_user(await self._load_async() if self._load_async else self._load())
+        return self._user
+    
+    def _set_user(self, user: Optional[User]):
+        if user is None:
+            # Deleted since the principal was cached
+            raise http_401_unauthorized("User not found")
+        object.__setattr__(self, "_user", user)
+    
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for names not set on the proxy itself
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if self._user is None and name in self._principal:
+            return self._principal[name]
+        return getattr(self.get_user(), name)
+    
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.get_user(), name, value)
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (User, CurrentUser)):
+            return other.id == self.id
+        return NotImplemented
+    
+    def __hash__(self) -> int:
+        return hash((User, self.id))
+    
+    def __repr__(self) -> str:
+        return f"<CurrentUser id={self.id} loaded={self._user is not None}>"
+
+def _current_user(db: Session, user_id: int) -> Optional[CurrentUser]:
+    """Lazy current user backed by a sync session, None if the user does not exist"""
+    principal = get_cached_principal(db, user_id)
+    if principal is None:
+        return None
+    return CurrentUser(principal, load=lambda: UserService(db).get_user_by_id(user_id))
+
+async def _current_user_async(db: AsyncSession, user_id: int) -> Optional[CurrentUser]:
+    """Lazy current user backed by an async session, None if the user does not exist"""
+    principal = await get_cached_principal_async(db, user_id)
+    if principal is None:
+        return None
+    return CurrentUser(principal, load_async=lambda: db.get(User, user_id))
+
 def get_current_user(
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_token)
 ) -> User:
     """Get current authenticated user"""
-    user_service = UserService(db)
-    user = user_service.get_user_by_id(int(user_id))
+    user = _current_user(db, int(user_id))
+    # Lets commits on this session feed the replica read-your-writes guard
+    db.info["user_id"] = int(user_id)
+    return _validate_current_user(user)
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user_token_async)
+) -> User:
+    """Get current authenticated user without blocking the event loop"""
+    user = await _current_user_async(db, int(user_id))
+    db.sync_session.info["user_id"] = int(user_id)
+    return _validate_current_user(user)
+
+def get_current_read_user(
+    db: Session = Depends(get_read_db),
+    user_id: str = Depends(get_current_user_token)
+) -> User:
+    """Get current authenticated user through the read-replica session"""
+    return _validate_current_user(_current_user(db, int(user_id)))
+
+async def get_current_read_user_async(
+    db: AsyncSession = Depends(get_async_read_db),
+    user_id: str = Depends(get_current_user_token_async)
+) -> User:
+    """Async equivalent of get_current_read_user"""
+    return _validate_current_user(await _current_user_async(db, int(user_id)))
+
+def _validate_current_user(user: Optional[User]) -> User:
+    """Apply the account state checks shared by the sync and async user dependencies"""
     if not user:
         raise http_401_unauthorized("User not found")
     if not user.is_active:
@@ -49,6 +231,15 @@ def get_current_user(
         )
     return user
 
+# Hot read endpoints (event list/search/detail, chat history, in-app notifications)
+# resolve their session and user through these, so DB_ASYNC_READ_PATH_ENABLED moves
+# them onto the asyncpg engine instead of running psycopg2 calls on the event loop,
+# and READ_REPLICA_URLS moves them off the primary.
+get_read_path_db = get_async_read_db if settings.DB_ASYNC_READ_PATH_ENABLED else get_read_db
+get_read_path_user = (
+    get_current_read_user_async if settings.DB_ASYNC_READ_PATH_ENABLED else get_current_read_user
+)
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -82,12 +273,11 @@ def get_optional_current_user(
         return None
     
     try:
-        user_id = verify_token(token)
+        user_id = _verified_user_id(token, db)
         if user_id is None:
             return None
         
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(int(user_id))
+        user = _current_user(db, int(user_id))
         return user if user and user.is_active and user.is_verified else None
     except Exception:
         return None
@@ -96,12 +286,11 @@ def get_optional_current_user(
 async def get_current_user_websocket(token: str, db: Session) -> Optional[User]:
     """Get current user for WebSocket connections using token string."""
     try:
-        user_id = verify_token(token)
+        user_id = _verified_user_id(token, db)
         if user_id is None:
             return None
         
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(int(user_id))
+        user = _current_user(db, int(user_id))
         return user if user and user.is_active else None
     except Exception:
         return None
\ No newline at end of file
@@ -0,0 +1,236 @@
+"""
+Keyset (cursor) pagination.
+
+Listings ordered by a timestamp are paged by remembering the sort key of
+the last row served, e.g. (start_datetime, id), and asking for rows
+strictly beyond it. Unlike OFFSET this costs the same on page 1 and page
+1000 when a composite index covers the filter and sort columns.
+
+Cursors are opaque to clients: a URL-safe base64 encoding of the key
+values. Totals come from count_rows, which can return a briefly cached or
+planner-estimated count instead of running COUNT(*) on every page.
+
+The *_async variants serve AsyncSession read paths: queries are awaited on
+the session and the Redis-backed total cache is consulted on a worker
+thread, so neither blocks the event loop.
+"""
+import asyncio
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.core.cache import ReadThroughCache
+from app.core.config import settings
+from app.core.errors import ValidationError
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+class KeysetPage(NamedTuple):
+    """One page of a keyset-paginated listing"""
+    items: List[Any]
+    next_cursor: Optional[str]
+    total: int
+    total_is_estimate: bool = False
+
+
+_total_cache = ReadThroughCache(
+    "listing_totals",
+    ttl_seconds=settings.PAGINATION_TOTAL_CACHE_SECONDS,
+    response_type=int
+)
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode sort key values as an opaque cursor"""
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 2) -> Tuple[Any, ...]:
+    """Decode a cursor produced by encode_cursor, validating its shape"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != size:
+            raise ValueError("unexpected cursor shape")
+        return tuple(
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in payload
+        )
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValidationError(f"Invalid pagination cursor: {e}")
+
+
+def apply_keyset(
+    stmt: Select,
+    columns: Sequence[Any],
+    cursor: Optional[str],
+    descending: bool = True
+) -> Select:
+    """
+    Order a statement by the key columns and continue after the cursor.
+
+    Any existing ORDER BY is replaced. The last column must be unique (the
+    primary key) so rows sharing a timestamp are neither skipped nor repeated.
+    """
+    stmt = stmt.order_by(None).order_by(
+        *[column.desc() if descending else column.asc() for column in columns]
+    )
+    if cursor:
+        values = decode_cursor(cursor, len(columns))
+        key = tuple_(*columns)
+        stmt = stmt.where(key < tuple_(*values) if descending else key > tuple_(*values))
+    return stmt
+
+
+def split_page(rows: List[Any], size: int, key_attrs: Sequence[str]) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim a page fetched with limit size + 1 and build the next cursor.
+
+    The extra row only signals that another page exists; it is not returned.
+    """
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor(*[getattr(last, attr) for attr in key_attrs])
+
+
+def count_rows(
+    db: Session,
+    stmt: Select,
+    cache_params: Optional[Dict[str, Any]] = None,
+    mode: Optional[str] = None
+) -> Tuple[int, bool]:
+    """
+    Count the rows a listing statement matches.
+
+    Returns (total, is_estimate). "exact" runs COUNT(*); "cached" reuses a
+    count for PAGINATION_TOTAL_CACHE_SECONDS, keyed by cache_params;
+    "estimated" reads the planner's row estimate on PostgreSQL. Modes fall
+    back to an exact count when they cannot apply.
+    """
+    mode = mode or settings.PAGINATION_TOTAL_MODE
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+
+    def exact() -> int:
+        return db.execute(count_stmt).scalar() or 0
+
+    if mode == "estimated" and db.get_bind().dialect.name == "postgresql":
+        estimate = _planner_estimate(db, stmt)
+        if estimate is not None:
+            return estimate, True
+
+    if mode == "cached" and cache_params is not None:
+        return _total_cache.get_or_load(cache_params, exact), True
+
+    return exact(), False
+
+
+async def count_rows_async(
+    db: AsyncSession,
+    stmt: Select,
+    cache_params: Optional[Dict[str, Any]] = None,
+    mode: Optional[str] = None
+) -> Tuple[int, bool]:
+    """Async equivalent of count_rows"""
+    mode = mode or settings.PAGINATION_TOTAL_MODE
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+
+    async def exact() -> int:
+        return (await db.execute(count_stmt)).scalar() or 0
+
+    if mode == "estimated" and db.get_bind().dialect.name == "postgresql":
+        estimate = await db.run_sync(lambda session: _planner_estimate(session, stmt))
+        if estimate is not None:
+            return estimate, True
+
+    if mode == "cached" and cache_params is not None:
+        found, total = await asyncio.to_thread(_total_cache.get, cache_params)
+        if not found:
+            total = await exact()
+            await asyncio.to_thread(_total_cache.set, cache_params, total)
+        return total, True
+
+    return await exact(), False
+
+
+def _planner_estimate(db: Session, stmt: Select) -> Optional[int]:
+    """Row estimate from EXPLAIN, without executing the statement"""
+    try:
+        compiled = stmt.order_by(None).compile(
+            dialect=db.get_bind().dialect,
+            compile_kwargs={"literal_binds": True}
+        )
+        # Savepoint so a failed EXPLAIN does not abort the request's transaction
+        with db.begin_nested():
+            plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.debug(f"Falling back to exact count, estimate unavailable: {e}")
+        return None
+
+
+def fetch_keyset_page(
+    db: Session,
+    stmt: Select,
+    columns: Sequence[Any],
+    size: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    descending: bool = True,
+    cache_params: Optional[Dict[str, Any]] = None
+) -> KeysetPage:
+    """
+    Fetch one page of stmt ordered by the key columns.
+
+    Without a cursor the page starts at offset, so existing offset clients
+    keep working and still receive a cursor for the following page. Every
+    page, the first included, counts with count_rows' configured mode,
+    keyed by cache_params.
+    """
+    total, is_estimate = count_rows(db, stmt, cache_params)
+
+    page_stmt = apply_keyset(stmt, columns, cursor, descending)
+    if not cursor and offset:
+        page_stmt = page_stmt.offset(offset)
+    rows = list(db.execute(page_stmt.limit(size + 1)).scalars().unique().all())
+
+    items, next_cursor = split_page(rows, size, [column.key for column in columns])
+    return KeysetPage(items, next_cursor, total, is_estimate)
+
+
+async def fetch_keyset_page_async(
+    db: AsyncSession,
+    stmt: Select,
+    columns: Sequence[Any],
+    size: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    descending: bool = True,
+    cache_params: Optional[Dict[str, Any]] = None
+) -> KeysetPage:
+    """Async equivalent of fetch_keyset_page"""
+    total, is_estimate = await count_rows_async(db, stmt, cache_params)
+
+    page_stmt = apply_keyset(stmt, columns, cursor, descending)
+    if not cursor and offset:
+        page_stmt = page_stmt.offset(offset)
+    result = await db.execute(page_stmt.limit(size + 1))
+    rows = list(result.scalars().unique().all())
+
+    items, next_cursor = split_page(rows, size, [column.key for column in columns])
+    return KeysetPage(items, next_cursor, total, is_estimate)
@@ -1,64 +1,65 @@
 """
 Rate limiting middleware and utilities for the Ultimate Co-planner backend.
 Provides configurable rate limiting for different endpoint types.
+
+Limits are enforced with GCRA (the generic cell rate algorithm: a token
+bucket stored as a single "theoretical arrival time" per key). Each worker
+admits requests on in-memory buckets and reports what it admitted to Redis,
+where one Lua script merges it into the shared bucket and returns the
+shared state. A bucket syncs when RATE_LIMIT_SYNC_SECONDS have passed or
+when the worker has admitted RATE_LIMIT_LOCAL_SHARE of the limit since the
+last sync, so tight limits such as 5/minute still consult Redis on every
+request while the API-wide limit costs one round trip per client per
+second. Across N workers a limit can be overshot by at most N local shares
+between syncs.
+
+Requests are identified by the user id of a valid bearer token, otherwise
+by client address. Every HTTP request is charged against the API-wide
+limit at its route's cost (AI requests cost RATE_LIMIT_AI_COST units);
+routes can add their own limits with create_rate_limit_decorator.
 """
 
-from typing import Callable, Optional
+import asyncio
+import functools
+import inspect
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import redis
+import redis.asyncio as aioredis
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-import redis.asyncio as redis
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import REDIS_RETRY_INTERVAL
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.security import verify_token_claims
 
 logger = get_logger(__name__)
 
-# Redis connection for rate limiting
-redis_client: Optional[redis.Redis] = None
-
-async def get_redis_client() -> redis.Redis:
-    """Get or create Redis client for rate limiting."""
-    global redis_client
-    if redis_client is None:
-        try:
-            redis_client = redis.from_url(
-                settings.REDIS_URL,
-                encoding="utf-8",
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-                retry_on_timeout=True
-            )
-            # Test connection
-            await redis_client.ping()
-            logger.info("Redis connection established for rate limiting")
-        except Exception as e:
-            logger.warning(f"Redis connection failed, falling back to in-memory: {e}")
-            # Fallback to in-memory storage
-            redis_client = None
-    return redis_client
 
 class RateLimitConfig:
     """Rate limit configurations for different endpoint types."""
-    
+
     # Authentication endpoints (more restrictive)
     AUTH = settings.RATE_LIMIT_AUTH
-    
+
     # General API endpoints
     API = settings.RATE_LIMIT_API
-    
+
     # AI/ML endpoints (expensive operations)
     AI = settings.RATE_LIMIT_AI
-    
+
     # Payment endpoints (critical operations)
     PAYMENTS = settings.RATE_LIMIT_PAYMENTS
-    
+
     # File upload endpoints
     UPLOADS = settings.RATE_LIMIT_UPLOADS
-    
+
     # Specific endpoint limits
     LOGIN = "5/minute"
     REGISTER = "3/minute"
@@ -67,60 +68,234 @@ class RateLimitConfig:
     OTP_REQUEST = "3/minute"
     TERMII_OTP_SEND = "3/hour"
     CONTACT_INVITE_SEND = "10/hour"
-    
+
     # AI specific limits
     AI_CHAT = "10/minute"
     AI_ANALYSIS = "5/minute"
-    
+
     # Payment specific limits
     PAYMENT_CREATE = "10/minute"
     SUBSCRIPTION_MANAGE = "20/minute"
 
+    # Units of the API-wide limit a request uses, by path prefix (longest
+    # match wins); other requests cost 1
+    ROUTE_COSTS = {
+        f"{settings.API_V1_STR}/ai": settings.RATE_LIMIT_AI_COST,  # also /ai-chat
+        f"{settings.API_V1_STR}/tool-chat-dev": settings.RATE_LIMIT_AI_COST,
+        f"{settings.API_V1_STR}/upload": settings.RATE_LIMIT_UPLOAD_COST,
+    }
+
+
+class Rate(NamedTuple):
+    """limit requests per period seconds"""
+    limit: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        """Seconds one unit of cost takes to refill"""
+        return self.period / self.limit
+
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RATE_PATTERN = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$", re.IGNORECASE)
+
+
+def parse_rates(limit: str) -> List[Rate]:
+    """Parse a limit string such as "5/minute" or "100/minute;1000/hour"."""
+    rates = []
+    for part in re.split(r"[;,]", limit):
+        if not part.strip():
+            continue
+        match = _RATE_PATTERN.match(part)
+        if match is None or int(match.group(1)) <= 0:
+            raise ValueError(f"Invalid rate limit: {part!r}")
+        count, multiple, unit = match.groups()
+        rates.append(Rate(int(count), int(multiple or 1) * _PERIODS[unit.lower()]))
+    return rates
+
+
+class RateLimitExceeded(Exception):
+    """A request was over one of its limits"""
+
+    def __init__(self, limit: str, retry_after: float):
+        self.detail = f"Rate limit exceeded: {limit}"
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(self.detail)
+
+
+# KEYS[1] bucket; ARGV emission interval and period in seconds, cost the worker
+# admitted since its last sync, cost of this request. Uses Redis' clock so
+# workers' clocks need not agree. Returns {allowed (1/0), seconds until the
+# bucket's theoretical arrival time}.
+GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or 0)
+if tat < now then
+    tat = now
+end
+tat = math.min(tat + tonumber(ARGV[3]) * interval, now + period)
+local allowed = 0
+local requested = tat + tonumber(ARGV[4]) * interval
+if requested - now <= period then
+    tat = requested
+    allowed = 1
+end
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil((tat - now) * 1000) + 1)
+return {allowed, tostring(tat - now)}
+"""
+
+
+class _Bucket:
+    """A worker's view of one shared bucket"""
+    __slots__ = ("tat", "pending", "synced_at")
+
+    def __init__(self, now: float):
+        self.tat = now
+        self.pending = 0  # cost admitted here and not yet reported to Redis
+        self.synced_at = -math.inf
+
+
+class RateLimiter:
+    """GCRA buckets kept per worker and merged through Redis"""
+
+    def __init__(
+        self,
+        use_redis: bool = True,
+        sync_interval: Optional[float] = None,
+        local_share: Optional[float] = None,
+        max_keys: Optional[int] = None
+    ):
+        self.use_redis = use_redis
+        self.sync_interval = settings.RATE_LIMIT_SYNC_SECONDS if sync_interval is None else sync_interval
+        self.local_share = settings.RATE_LIMIT_LOCAL_SHARE if local_share is None else local_share
+        self.max_keys = max_keys or settings.RATE_LIMIT_LOCAL_KEYS
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+        self._client: Optional[aioredis.Redis] = None
+        self._script = None
+        self._retry_at = 0.0
+        self.allowed = 0
+        self.limited = 0
+        self.syncs = 0
+
+    def _redis(self) -> Optional[aioredis.Redis]:
+        """Async Redis client, or None while Redis is unused or known to be unreachable"""
+        if not self.use_redis or time.monotonic() < self._retry_at:
+            return None
+        if self._client is None:
+            self._client = aioredis.from_url(
+                settings.REDIS_URL, decode_responses=True, socket_timeout=1, socket_connect_timeout=1
+            )
+            self._script = self._client.register_script(GCRA_SCRIPT)
+        return self._client
+
+    def _mark_down(self, error: Exception):
+        logger.warning(f"Rate limit Redis unavailable, limiting per worker: {error}")
+        self._retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    def _bucket(self, key: str, now: float) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    async def hit(self, key: str, rate: Rate, cost: int = 1) -> Optional[float]:
+        """
+        Charge cost units to the key's bucket.
+
+        Returns None when the request is admitted, otherwise the seconds
+        until it would be. Denials are decided locally: the shared bucket is
+        at least as full as this worker's view of it.
+        """
+        cost = min(cost, rate.limit)
+        now = time.monotonic()
+        bucket = self._bucket(key, now)
+        requested = max(bucket.tat, now) + cost * rate.interval
+        if requested - now > rate.period:
+            self.limited += 1
+            return requested - rate.period - now
+
+        client = self._redis()
+        if client is not None and (
+            now - bucket.synced_at >= self.sync_interval
+            or bucket.pending + cost > rate.limit * self.local_share
+        ):
+            pending, bucket.pending, bucket.synced_at = bucket.pending, 0, now
+            try:
+                allowed, remaining = await self._script(
+                    keys=[f"rate_limit:{key}"], args=[rate.interval, rate.period, pending, cost]
+                )
+            except (redis.RedisError, OSError) as e:
+                self._mark_down(e)
+                bucket.pending += pending
+            else:
+                self.syncs += 1
+                remaining = float(remaining)
+                # Requests admitted locally while the script ran stay pending
+                bucket.tat = time.monotonic() + remaining + bucket.pending * rate.interval
+                if not int(allowed):
+                    self.limited += 1
+                    return remaining + cost * rate.interval - rate.period
+                self.allowed += 1
+                return None
+
+        bucket.tat = requested
+        bucket.pending += cost
+        self.allowed += 1
+        return None
+
+    async def check(self, scope: str, rates: List[Rate], identifier: str, cost: int = 1) -> Optional[float]:
+        """Charge a request to each of scope's rates; seconds to wait if one is exhausted"""
+        for rate in rates:
+            retry_after = await self.hit(f"{scope}:{rate.limit}/{rate.period:g}:{identifier}", rate, cost)
+            if retry_after is not None:
+                return retry_after
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'redis': self._client is not None and time.monotonic() >= self._retry_at,
+            'buckets': len(self._buckets),
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'syncs': self.syncs,
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
 
 def get_identifier(request: Request) -> str:
     """
     Get unique identifier for rate limiting.
-    Uses user ID if authenticated, otherwise IP address.
+    Uses the user ID of a valid bearer token, otherwise the client address.
     """
-    # Try to get user ID from request state (set by auth middleware)
-    user_id = getattr(request.state, 'user_id', None)
-    if user_id:
-        return f"user:{user_id}"
-    
-    # Fallback to IP address
-    return get_remote_address(request)
+    authorization = request.headers.get("authorization")
+    if authorization:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            # Decoded tokens are cached, so this rarely verifies a signature
+            claims = verify_token_claims(token)
+            if claims is not None:
+                return f"user:{claims.subject}"
 
+    return request.client.host if request.client else "unknown"
 
-def _get_storage_uri() -> Optional[str]:
-    if not settings.RATE_LIMIT_ENABLED:
-        return None
+
+def _use_redis() -> bool:
     environment = (settings.ENVIRONMENT or "").lower()
-    if environment in {"development", "local", "dev"}:
-        return "memory://"
-    return settings.REDIS_URL
-
-# Create limiter instance with a sane default API-wide limit
-limiter = Limiter(
-    key_func=get_identifier,
-    storage_uri=_get_storage_uri(),
-    default_limits=[RateLimitConfig.API] if settings.RATE_LIMIT_ENABLED else []
-)
-
-def safe_rate_limit_exceeded_handler(request: Request, exc: Exception):
-    detail = getattr(exc, "detail", str(exc))
-    retry_after = getattr(exc, "retry_after", 60)
-    status_code = status.HTTP_429_TOO_MANY_REQUESTS if isinstance(exc, RateLimitExceeded) else status.HTTP_503_SERVICE_UNAVAILABLE
-    return JSONResponse(
-        status_code=status_code,
-        content={
-            "error": "Rate limit error" if status_code == status.HTTP_429_TOO_MANY_REQUESTS else "Rate limiter unavailable",
-            "message": detail,
-            "retry_after": retry_after
-        },
-        headers={"Retry-After": str(retry_after)}
-    )
+    return environment not in {"development", "local", "dev"}
 
-limiter._rate_limit_exceeded_handler = safe_rate_limit_exceeded_handler
+limiter = RateLimiter(use_redis=_use_redis())
 
 
 # Custom rate limit exceeded handler
@@ -142,18 +317,76 @@ async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
         headers={"Retry-After": str(retry_after)}
     )
 
+
+_ROUTE_COSTS = sorted(RateLimitConfig.ROUTE_COSTS.items(), key=lambda item: len(item[0]), reverse=True)
+
+def route_cost(path: str) -> int:
+    """Units of the API-wide limit a request to path uses"""
+    for prefix, cost in _ROUTE_COSTS:
+        if path.startswith(prefix):
+            return cost
+    return 1
+
+
+class RateLimitMiddleware:
+    """Charges every HTTP request against the API-wide limit at its route's cost"""
+
+    def __init__(self, app, limit: str = RateLimitConfig.API):
+        self.app = app
+        self.limit = limit
+        self.rates = parse_rates(limit)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        retry_after = await limiter.check("api", self.rates, get_identifier(request), route_cost(scope["path"]))
+        if retry_after is not None:
+            response = await rate_limit_exceeded_handler(request, RateLimitExceeded(self.limit, retry_after))
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
 def create_rate_limit_decorator(limit: str, per_method: bool = False):
     """
     Create a rate limit decorator with the specified limit.
-    
+
+    The endpoint must take a parameter annotated as starlette's Request;
+    decorating one without it raises TypeError.
+
     Args:
         limit: Rate limit string (e.g., "5/minute")
         per_method: If True, apply limit per HTTP method
     """
+    rates = parse_rates(limit)
+
     def decorator(func: Callable):
-        if settings.RATE_LIMIT_ENABLED:
-            return limiter.limit(limit, per_method=per_method)(func)
-        return func
+        endpoint = f"{func.__module__}.{func.__name__}"
+        signature = inspect.signature(func)
+        parameter = next((
+            name for name, param in signature.parameters.items()
+            if param.annotation in (Request, "Request")
+        ), None)
+        if parameter is None:
+            raise TypeError(f"{endpoint} needs a Request parameter to be rate limited")
+        if not settings.RATE_LIMIT_ENABLED:
+            return func
+        is_async = asyncio.iscoroutinefunction(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = signature.bind_partial(*args, **kwargs).arguments[parameter]
+            scope = f"{endpoint}:{request.method}" if per_method else endpoint
+            retry_after = await limiter.check(scope, rates, get_identifier(request))
+            if retry_after is not None:
+                raise RateLimitExceeded(limit, retry_after)
+            if is_async:
+                return await func(*args, **kwargs)
+            return await run_in_threadpool(func, *args, **kwargs)
+        return wrapper
     return decorator
 
 # Convenience decorators for common rate limits
@@ -182,8 +415,5 @@ subscription_rate_limit = create_rate_limit_decorator(RateLimitConfig.SUBSCRIPTI
 
 async def cleanup_redis():
     """Cleanup Redis connection on shutdown."""
-    global redis_client
-    if redis_client:
-        await redis_client.close()
-        redis_client = None
-        logger.info("Redis connection closed")
+    await limiter.close()
+    logger.info("Rate limit Redis connection closed")
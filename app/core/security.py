@@ -1,16 +1,32 @@
+import asyncio
+import hashlib
+import secrets
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from threading import Lock
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-# Password hashing context; bcrypt_sha256 removes 72-byte limit
-pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+# Password hashing context; bcrypt_sha256 removes 72-byte limit. Hashes made
+# with fewer rounds than PASSWORD_BCRYPT_ROUNDS report needs_update, so raising
+# the cost upgrades each account on its next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256"],
+    deprecated="auto",
+    bcrypt_sha256__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt_sha256__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS
+)
 
 def create_access_token(
-    subject: Union[str, int], expires_delta: Optional[timedelta] = None
+    subject: Union[str, int],
+    expires_delta: Optional[timedelta] = None,
+    session_id: Optional[int] = None
 ) -> str:
-    """Create JWT access token"""
+    """Create JWT access token, bound to a UserSession when session_id is given"""
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -19,34 +35,127 @@ def create_access_token(
         )
     
     to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
+    if session_id is not None:
+        # Lets revoking the session revoke every access token refreshed from it
+        to_encode["sid"] = session_id
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 def create_refresh_token(
-    subject: Union[str, int], expires_delta: Optional[timedelta] = None
+    subject: Union[str, int],
+    expires_delta: Optional[timedelta] = None,
+    session_id: Optional[int] = None,
+    token_id: Optional[str] = None
 ) -> str:
-    """Create JWT refresh token"""
+    """
+    Create JWT refresh token, bound to a UserSession when session_id is given.
+    token_id sets the jti claim, so the session row can record which refresh
+    token is current without storing the token itself.
+    """
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    # jti keeps tokens rotated within the same second distinct
+    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh", "jti": token_id or secrets.token_hex(8)}
+    if session_id is not None:
+        # Lets refresh find the session in the auth state store by id
+        to_encode["sid"] = session_id
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def token_digest(token: str) -> str:
+    """Stable identifier of a token that does not reveal the token itself"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class TokenClaims(NamedTuple):
+    """The claims of a verified token that request handling needs"""
+    subject: str
+    session_id: Optional[int]
+    expires_at: float
+    digest: str
+    token_id: Optional[str] = None
+
+class TokenVerifier:
+    """
+    JWT verification with an LRU of successful decodes.
+    
+    A session presents the same bearer token on every request; after the
+    first decode its claims are served from memory, keyed by the token's
+    SHA-256 digest, until the token's own exp. Failed decodes are not
+    cached. Revocation is checked separately by the caller, since it can
+    change while a token stays cached here.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, TokenClaims]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def verify(self, token: str) -> Optional[TokenClaims]:
+        """Claims of a valid, unexpired token, or None"""
+        digest = token_digest(token)
+        with self._lock:
+            claims = self._entries.get(digest)
+            if claims is not None:
+                if claims.expires_at > time.time():
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return claims
+                del self._entries[digest]
+            self.misses += 1
+        
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+        except JWTError:
+            return None
+        subject = payload.get("sub")
+        if subject is None:
+            return None
+        
+        session_id = payload.get("sid")
+        claims = TokenClaims(
+            subject=str(subject),
+            session_id=int(session_id) if session_id is not None else None,
+            expires_at=float(payload.get("exp", 0)),
+            digest=digest
+        )
+        if self.max_entries > 0 and claims.expires_at:
+            with self._lock:
+                self._entries[digest] = claims
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return claims
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+token_verifier = TokenVerifier(settings.JWT_DECODE_CACHE_SIZE)
+
+def verify_token_claims(token: str) -> Optional[TokenClaims]:
+    """Verify a JWT and return its claims, served from the decode cache when possible"""
+    return token_verifier.verify(token)
+
 def verify_token(token: str) -> Optional[str]:
     """Verify JWT token and return subject"""
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = payload.get("sub")
-        if token_data is None:
-            return None
-        return str(token_data)
-    except JWTError:
-        return None
+    claims = token_verifier.verify(token)
+    return claims.subject if claims else None
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -56,8 +165,93 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
-def verify_refresh_token(token: str) -> Optional[str]:
-    """Verify refresh token and return subject"""
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a bounded thread pool.
+    
+    A hash or verify is 100-300 ms of CPU; on the loop it stalls every request
+    the worker is serving. bcrypt releases the GIL while hashing, so up to
+    PASSWORD_HASH_THREADS of them run in parallel and the rest wait in the
+    pool's queue, whose depth and wait times snapshot() reports.
+    """
+    
+    def __init__(self, context: CryptContext, max_workers: int, window: int = 500):
+        self.context = context
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self.max_workers = max_workers
+        self._lock = Lock()
+        self._waits = deque(maxlen=window)
+        self._durations = deque(maxlen=window)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rehashed = 0
+    
+    async def _run(self, func, *args):
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+        
+        def timed():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self._waits.append(started - submitted)
+                    self._durations.append(finished - started)
+        
+        return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+    
+    async def hash(self, password: str) -> str:
+        """Hash a password"""
+        return await self._run(self.context.hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash"""
+        return await self._run(self.context.verify, plain_password, hashed_password)
+    
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and, when its hash uses outdated parameters, rehash it.
+        
+        Returns (valid, new_hash); new_hash is None unless the caller should
+        store it in place of hashed_password.
+        """
+        valid, new_hash = await self._run(self.context.verify_and_update, plain_password, hashed_password)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits, durations = sorted(self._waits), sorted(self._durations)
+            snapshot = {
+                'threads': self.max_workers,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'rehashed': self.rehashed,
+            }
+        
+        def percentile(samples, p: float) -> float:
+            return round(samples[min(int(p * len(samples)), len(samples) - 1)], 3) if samples else 0.0
+        
+        snapshot['queue_wait_seconds'] = {'p50': percentile(waits, 0.5), 'p95': percentile(waits, 0.95)}
+        snapshot['hash_seconds'] = {'p50': percentile(durations, 0.5), 'p95': percentile(durations, 0.95)}
+        return snapshot
+
+password_hasher = PasswordHasher(pwd_context, settings.PASSWORD_HASH_THREADS)
+
+def verify_refresh_token_claims(token: str) -> Optional[TokenClaims]:
+    """Verify refresh token and return its claims"""
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -68,6 +262,18 @@ def verify_refresh_token(token: str) -> Optional[str]:
         token_data = payload.get("sub")
         if token_data is None:
             return None
-        return str(token_data)
+        session_id = payload.get("sid")
+        return TokenClaims(
+            subject=str(token_data),
+            session_id=int(session_id) if session_id is not None else None,
+            expires_at=float(payload.get("exp", 0)),
+            digest=token_digest(token),
+            token_id=payload.get("jti")
+        )
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def verify_refresh_token(token: str) -> Optional[str]:
+    """Verify refresh token and return subject"""
+    claims = verify_refresh_token_claims(token)
+    return claims.subject if claims else None
\ No newline at end of file
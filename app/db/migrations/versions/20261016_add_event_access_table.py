@@ -0,0 +1,66 @@
+"""add event_access table of materialized access grants
+
+Revision ID: 20261016_event_access
+Revises: 20261016_keyset_indexes
+Create Date: 2026-10-16 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261016_event_access"
+down_revision = "20261016_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_access",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(length=20), nullable=False),
+        sa.Column("status", sa.String(length=50), nullable=False),
+        sa.Column("rsvp_status", sa.String(length=20), nullable=True),
+        sa.Column("start_datetime", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["event_id"], ["events.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "event_id", "role"),
+    )
+    op.create_index("idx_event_access_user_start", "event_access", ["user_id", "start_datetime", "event_id"])
+    op.create_index("idx_event_access_event_id", "event_access", ["event_id"])
+
+    # Initial fill; large databases can run scripts/backfill_event_access.py
+    # instead, which rebuilds in batches of event IDs.
+    op.execute(
+        """
+        INSERT INTO event_access (user_id, event_id, role, status, rsvp_status, start_datetime)
+        SELECT creator_id, id, 'creator', status, NULL, start_datetime
+        FROM events WHERE is_deleted = false
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO event_access (user_id, event_id, role, status, rsvp_status, start_datetime)
+        SELECT ec.user_id, e.id, 'collaborator', e.status, NULL, e.start_datetime
+        FROM event_collaborators ec JOIN events e ON e.id = ec.event_id
+        WHERE e.is_deleted = false AND ec.user_id != e.creator_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO event_access (user_id, event_id, role, status, rsvp_status, start_datetime)
+        SELECT i.user_id, e.id, 'invitee', e.status, MAX(i.rsvp_status), e.start_datetime
+        FROM event_invitations i JOIN events e ON e.id = i.event_id
+        WHERE e.is_deleted = false AND i.is_deleted = false
+        GROUP BY i.user_id, e.id, e.status, e.start_datetime
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_event_access_event_id", table_name="event_access")
+    op.drop_index("idx_event_access_user_start", table_name="event_access")
+    op.drop_table("event_access")
@@ -0,0 +1,33 @@
+"""add composite indexes for keyset pagination
+
+Revision ID: 20261016_keyset_indexes
+Revises: 20260413_event_invite_token
+Create Date: 2026-10-16 10:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261016_keyset_indexes"
+down_revision = "20260413_event_invite_token"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_event_start_id", "events", ["start_datetime", "id"])
+    op.create_index("idx_event_creator_start_id", "events", ["creator_id", "start_datetime", "id"])
+    op.create_index("idx_message_event_created_id", "messages", ["event_id", "created_at", "id"])
+    op.create_index(
+        "idx_notificationlog_recipient_channel_created",
+        "notification_logs",
+        ["recipient_id", "channel", "created_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_notificationlog_recipient_channel_created", table_name="notification_logs")
+    op.drop_index("idx_message_event_created_id", table_name="messages")
+    op.drop_index("idx_event_creator_start_id", table_name="events")
+    op.drop_index("idx_event_start_id", table_name="events")
@@ -0,0 +1,33 @@
+"""track bulk delivery jobs on contact invitations
+
+Revision ID: 20261016_invitation_job
+Revises: 20261016_notification_claim
+Create Date: 2026-10-16 20:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261016_invitation_job"
+down_revision = "20261016_notification_claim"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "contact_invitations",
+        sa.Column("delivery_job_id", sa.String(length=36), nullable=True)
+    )
+    op.create_index(
+        "idx_contact_invitation_job_status",
+        "contact_invitations",
+        ["delivery_job_id", "status"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_contact_invitation_job_status", table_name="contact_invitations")
+    op.drop_column("contact_invitations", "delivery_job_id")
@@ -0,0 +1,27 @@
+"""index notification queue for dispatcher claims
+
+Revision ID: 20261016_notification_claim
+Revises: 20261016_unique_read_receipts
+Create Date: 2026-10-16 15:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261016_notification_claim"
+down_revision = "20261016_unique_read_receipts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_notificationqueue_status_scheduled",
+        "notification_queue",
+        ["status", "scheduled_for"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_notificationqueue_status_scheduled", table_name="notification_queue")
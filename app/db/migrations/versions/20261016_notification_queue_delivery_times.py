@@ -0,0 +1,26 @@
+"""record when queued notifications were sent or failed
+
+Revision ID: 20261016_queue_delivery_times
+Revises: 20261016_invitation_job
+Create Date: 2026-10-16 23:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261016_queue_delivery_times"
+down_revision = "20261016_invitation_job"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("notification_queue", sa.Column("sent_at", sa.DateTime(), nullable=True))
+    op.add_column("notification_queue", sa.Column("failed_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("notification_queue", "failed_at")
+    op.drop_column("notification_queue", "sent_at")
@@ -0,0 +1,86 @@
+"""make read receipts and chat participants unique per message/event and user
+
+Revision ID: 20261016_unique_read_receipts
+Revises: 20261016_event_access
+Create Date: 2026-10-16 14:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261016_unique_read_receipts"
+down_revision = "20261016_event_access"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the earliest receipt of any duplicates left by the old
+    # check-then-insert path before the unique index can be built
+    op.execute(
+        """
+        DELETE FROM message_read_receipts r
+        USING message_read_receipts earlier
+        WHERE r.message_id = earlier.message_id
+          AND r.user_id = earlier.user_id
+          AND r.id > earlier.id
+        """
+    )
+    op.drop_index("idx_messagereadreceipt_message_user", table_name="message_read_receipts")
+    op.create_index(
+        "idx_messagereadreceipt_message_user",
+        "message_read_receipts",
+        ["message_id", "user_id"],
+        unique=True
+    )
+
+    # Same for chat participants, which advance_read_watermark upserts.
+    # The surviving row takes the furthest watermark of its duplicates.
+    op.execute(
+        """
+        UPDATE chat_participants p
+        SET last_read_message_id = agg.last_read_message_id,
+            last_seen_at = agg.last_seen_at
+        FROM (
+            SELECT MIN(id) AS keep_id,
+                   MAX(last_read_message_id) AS last_read_message_id,
+                   MAX(last_seen_at) AS last_seen_at
+            FROM chat_participants
+            GROUP BY event_id, user_id
+            HAVING COUNT(*) > 1
+        ) agg
+        WHERE p.id = agg.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM chat_participants p
+        USING chat_participants earlier
+        WHERE p.event_id = earlier.event_id
+          AND p.user_id = earlier.user_id
+          AND p.id > earlier.id
+        """
+    )
+    op.drop_index("idx_chatparticipant_event_user", table_name="chat_participants")
+    op.create_index(
+        "idx_chatparticipant_event_user",
+        "chat_participants",
+        ["event_id", "user_id"],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_chatparticipant_event_user", table_name="chat_participants")
+    op.create_index(
+        "idx_chatparticipant_event_user",
+        "chat_participants",
+        ["event_id", "user_id"]
+    )
+    op.drop_index("idx_messagereadreceipt_message_user", table_name="message_read_receipts")
+    op.create_index(
+        "idx_messagereadreceipt_message_user",
+        "message_read_receipts",
+        ["message_id", "user_id"]
+    )
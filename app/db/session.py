@@ -1,29 +1,145 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+"""
+Database engine registry.
+
+Every engine in a worker process is created here so the total number of
+Postgres connections stays predictable: the primary sync engine, the async
+engine used by the async read path, and a sync and an async engine per read
+replica. Pool sizes are derived from the connection budget of the server an
+engine talks to (DB_MAX_CONNECTIONS for the primary, DB_REPLICA_MAX_CONNECTIONS
+for each replica) and the number of gunicorn workers; the sync and async
+engines of one server split its budget. Every pool is registered with the
+pool monitor so /health/detailed can report saturation and checkout wait times.
+"""
+import time
+from typing import Dict, Optional, Tuple
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.database_performance import pool_monitor
+
+# Fraction of a server's per-worker connection budget given to each engine
+SYNC_POOL_SHARE = 0.5 if settings.DB_ASYNC_READ_PATH_ENABLED else 0.9
+ASYNC_POOL_SHARE = 1 - SYNC_POOL_SHARE
+
+
+def _record_checkout(pool, connect):
+    """Time a pool checkout and report it to the pool monitor"""
+    start = time.perf_counter()
+    try:
+        connection = connect()
+    except exc.TimeoutError:
+        pool_monitor.record_checkout_wait(pool.logging_name, time.perf_counter() - start, timed_out=True)
+        raise
+    pool_monitor.record_checkout_wait(pool.logging_name, time.perf_counter() - start)
+    return connection
+
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection"""
+
+    def connect(self):
+        return _record_checkout(self, super().connect)
+
+
+class MonitoredAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long callers wait for a connection"""
+
+    def connect(self):
+        return _record_checkout(self, super().connect)
+
+
+def get_pool_limits(share: float = 1.0, max_connections: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Get (pool_size, max_overflow) for one engine in one worker process.
+
+    max_connections is the connection budget of the engine's database server
+    for the whole deployment, DB_MAX_CONNECTIONS (the primary's) by default.
+    When set it is divided across WEB_CONCURRENCY workers, then by the
+    engine's share. Otherwise the per-worker DB_CONNECTION_POOL_SIZE and
+    DB_MAX_OVERFLOW settings are used as-is.
+    """
+    max_connections = max_connections or settings.DB_MAX_CONNECTIONS
+    if not max_connections:
+        return (
+            max(int(settings.DB_CONNECTION_POOL_SIZE * share), 1),
+            max(int(settings.DB_MAX_OVERFLOW * share), 0)
+        )
+
+    per_worker = max_connections // max(settings.WEB_CONCURRENCY, 1)
+    budget = max(int(per_worker * share), 2)
+    pool_size = max(budget // 2, 1)
+    return pool_size, budget - pool_size
+
+
+def _connect_args(url: str, application_name: str) -> Dict:
+    """Driver connect arguments for a database URL"""
+    if "sqlite" in url:
+        return {"check_same_thread": False}
 
-# Synchronous database setup
-# Configure connect_args based on database type
-if "sqlite" in settings.DATABASE_URL:
-    connect_args = {"check_same_thread": False}
-else:
     # PostgreSQL-specific connection arguments
-    connect_args = {
-        "application_name": "ultimateco_planner",
+    return {
+        "application_name": application_name,
         "connect_timeout": 10,
     }
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args=connect_args,
-    echo=settings.DEBUG,
-    pool_size=20,
-    max_overflow=30,
-    pool_timeout=30,
-    pool_recycle=3600,
-    pool_pre_ping=True
-)
+
+def create_pooled_engine(
+    url: str,
+    name: str,
+    share: float = SYNC_POOL_SHARE,
+    connect_args: Optional[Dict] = None,
+    max_connections: Optional[int] = None
+) -> Engine:
+    """Create a sync engine sized from the connection budget and register its pool"""
+    pool_size, max_overflow = get_pool_limits(share, max_connections)
+
+    pooled_engine = create_engine(
+        url,
+        connect_args=connect_args if connect_args is not None else _connect_args(url, "ultimateco_planner"),
+        echo=settings.DEBUG,
+        poolclass=MonitoredQueuePool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True
+    )
+    pool_monitor.register_pool(name, pooled_engine.pool)
+    return pooled_engine
+
+
+def create_pooled_async_engine(
+    url: str,
+    name: str,
+    share: float = ASYNC_POOL_SHARE,
+    connect_args: Optional[Dict] = None,
+    max_connections: Optional[int] = None
+) -> AsyncEngine:
+    """Create an async engine sized from the connection budget and register its pool"""
+    pool_size, max_overflow = get_pool_limits(share, max_connections)
+
+    pooled_engine = create_async_engine(
+        url,
+        connect_args=connect_args or {},
+        echo=settings.DEBUG,
+        poolclass=MonitoredAsyncQueuePool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True
+    )
+    pool_monitor.register_pool(name, pooled_engine.sync_engine.pool)
+    return pooled_engine
+
+
+# Synchronous database setup (primary)
+engine = create_pooled_engine(settings.DATABASE_URL, "primary")
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -31,16 +147,8 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
-# Asynchronous database setup (for future use)
-async_engine = create_async_engine(
-    settings.ASYNC_DATABASE_URL,
-    echo=settings.DEBUG,
-    pool_size=20,
-    max_overflow=30,
-    pool_timeout=30,
-    pool_recycle=3600,
-    pool_pre_ping=True
-)
+# Asynchronous database setup
+async_engine = create_pooled_async_engine(settings.ASYNC_DATABASE_URL, "primary_async")
 
 AsyncSessionLocal = sessionmaker(
     async_engine,
@@ -61,4 +169,4 @@ def get_db():
 async def get_async_db():
     """Get async database session"""
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
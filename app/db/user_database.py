@@ -12,8 +12,8 @@ class UserDatabase:
     def __init__(self, db: Session):
         self.db = db
     
-    def create_user(self, user_data: UserCreate) -> User:
-        """Create a new user"""
+    def create_user(self, user_data: UserCreate, hashed_password: Optional[str] = None) -> User:
+        """Create a new user, hashing its password unless the caller already did"""
         # Check if user already exists by email or phone
         if user_data.email:
             existing_user = self.get_user_by_email(user_data.email)
@@ -32,7 +32,8 @@ class UserDatabase:
                 )
         
         # Hash the password
-        hashed_password = get_password_hash(user_data.password)
+        if hashed_password is None:
+            hashed_password = get_password_hash(user_data.password)
         
         # Determine signup method based on provided data
         signup_method = "phone" if user_data.phone_number and not user_data.email else "email"
@@ -104,14 +105,15 @@ class UserDatabase:
         self.db.refresh(user)
         return user
     
+    def get_user_by_identifier(self, identifier: str) -> Optional[User]:
+        """Get user by a login identifier, which is either an email or a phone number"""
+        if "@" in identifier:
+            return self.get_user_by_email(identifier)
+        return self.get_user_by_phone(identifier)
+    
     def authenticate_user(self, identifier: str, password: str) -> Optional[User]:
         """Authenticate user by email/phone and password"""
-        # Try to determine if identifier is email or phone
-        if "@" in identifier:
-            user = self.get_user_by_email(identifier)
-        else:
-            user = self.get_user_by_phone(identifier)
-        
+        user = self.get_user_by_identifier(identifier)
         if not user:
             return None
         if not verify_password(password, user.hashed_password):
@@ -4,8 +4,6 @@ from fastapi.openapi.utils import get_openapi
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 import asyncio
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
 
 from app.api.v1.api_router import api_router
 from app.api.public_routes import router as public_router
@@ -13,8 +11,13 @@ from app.api.health import health_router
 from app.api.tool_chat_dev import router as tool_chat_dev_page_router
 from app.core.config import settings
 from app.services.redis_subscriber import start_redis_listener, stop_redis_listener
+from app.services.email_templates import email_templates
+from app.services.websocket_manager import start_presence_heartbeat, websocket_manager
+from app.services.email_transport import resend_transport
 from app.core.db_optimizations import create_composite_indexes, read_replica_manager
-from app.core.rate_limiter import limiter, rate_limit_exceeded_handler
+from app.core.rate_limiter import (
+    RateLimitExceeded, RateLimitMiddleware, cleanup_redis, rate_limit_exceeded_handler
+)
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -67,8 +70,7 @@ app.add_middleware(
 )
 
 # Rate limiting middleware and handlers
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
 # Custom validation error handler to return simple string messages
@@ -130,6 +132,16 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to start Redis listener: {str(e)}")
     
+    # Keep this worker's WebSocket presence leases alive in Redis
+    asyncio.create_task(start_presence_heartbeat())
+    
+    # Compile email templates once, before the first email is rendered
+    try:
+        compiled = email_templates.compile_all()
+        logger.info(f"Compiled {compiled} email templates")
+    except Exception as e:
+        logger.error(f"Failed to compile email templates: {str(e)}")
+    
     # Create composite indexes
     try:
         create_composite_indexes()
@@ -141,6 +153,7 @@ async def startup_event():
     if hasattr(settings, "READ_REPLICA_URLS") and settings.READ_REPLICA_URLS:
         try:
             read_replica_manager.initialize(settings.READ_REPLICA_URLS)
+            read_replica_manager.start_health_checks()
             logger.info(f"Initialized {len(settings.READ_REPLICA_URLS)} read replicas")
         except Exception as e:
             logger.error(f"Failed to initialize read replicas: {e}")
@@ -163,6 +176,17 @@ async def shutdown_event():
         logger.info("Stopped Redis pub/sub listener")
     except Exception as e:
         logger.error(f"Error stopping Redis listener: {str(e)}")
+    
+    await read_replica_manager.stop_health_checks()
+    
+    # Stop routing WebSocket deliveries to this worker and close its sockets
+    await websocket_manager.presence.withdraw(websocket_manager.get_connected_users())
+    await websocket_manager.close_all()
+    
+    # Close pooled Resend connections
+    await resend_transport.aclose()
+    
+    await cleanup_redis()
 
 if __name__ == "__main__":
     import uvicorn
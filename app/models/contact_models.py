@@ -95,6 +95,7 @@ class ContactInvitation(BaseModel, TimestampMixin):
     # Tracking info
     tracking_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # SMS/Email provider tracking ID
     failure_reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    delivery_job_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)  # Bulk send job that delivers it
     
     # Expiration
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -133,6 +134,7 @@ class ContactInvitation(BaseModel, TimestampMixin):
         Index('idx_contact_invitation_event_status', 'event_id', 'status'),
         Index('idx_contact_invitation_type_status', 'invitation_type', 'status'),
         Index('idx_contact_invitation_method_status', 'delivery_method', 'status'),
+        Index('idx_contact_invitation_job_status', 'delivery_job_id', 'status'),
         Index('idx_contact_invitation_sender_created', 'sender_id', 'created_at'),
         Index('idx_contact_invitation_phone_status', 'recipient_phone', 'status'),
         Index('idx_contact_invitation_email_status', 'recipient_email', 'status'),
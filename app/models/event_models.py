@@ -3,7 +3,7 @@ from sqlalchemy.orm import relationship
 from app.db.base import Base
 from app.models.shared_models import (
     TimestampMixin, SoftDeleteMixin, ActiveMixin, IDMixin,
-    EventType, EventStatus, RSVPStatus, TaskStatus, TaskPriority
+    EventType, EventStatus, RSVPStatus, TaskStatus, TaskPriority, EventAccessRole
 )
 
 # Association table for event collaborators (many-to-many)
@@ -113,6 +113,9 @@ class Event(Base, IDMixin, TimestampMixin, SoftDeleteMixin, ActiveMixin):
         Index('idx_event_city_type', 'venue_city', 'event_type'),
         Index('idx_event_date_status', 'start_datetime', 'status'),
         Index('idx_event_location', 'latitude', 'longitude'),
+        # Keyset pagination of event listings
+        Index('idx_event_start_id', 'start_datetime', 'id'),
+        Index('idx_event_creator_start_id', 'creator_id', 'start_datetime', 'id'),
     )
     
     def __repr__(self):
@@ -155,6 +158,35 @@ class Event(Base, IDMixin, TimestampMixin, SoftDeleteMixin, ActiveMixin):
         
         return categories
 
+class EventAccess(Base):
+    """
+    Materialized access grants: one row per user, event and role.
+    
+    Mirrors creator, collaborator and invitation relationships so listings
+    and access checks use one indexed lookup instead of OR-ing three
+    EXISTS subqueries. Event status and start time are copied in so
+    category filters can be answered from the index. Maintained by
+    EventRepository; rebuilt by scripts/backfill_event_access.py.
+    """
+    __tablename__ = "event_access"
+    
+    user_id = Column(ForeignKey("users.id"), primary_key=True)
+    event_id = Column(ForeignKey("events.id"), primary_key=True)
+    role = Column(String(20), primary_key=True, default=EventAccessRole.INVITEE)
+    
+    # Denormalized from the event and invitation
+    status = Column(String(50), nullable=False)
+    rsvp_status = Column(String(20), nullable=True)
+    start_datetime = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_event_access_user_start', 'user_id', 'start_datetime', 'event_id'),
+        Index('idx_event_access_event_id', 'event_id'),
+    )
+    
+    def __repr__(self):
+        return f"<EventAccess(user_id={self.user_id}, event_id={self.event_id}, role='{self.role}')>"
+
 class EventInvitation(Base, IDMixin, TimestampMixin, SoftDeleteMixin):
     """Event invitation model"""
     __tablename__ = "event_invitations"
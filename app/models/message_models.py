@@ -84,6 +84,8 @@ class Message(BaseModel, TimestampMixin):
         Index('idx_message_event_type', 'event_id', 'message_type'),
         Index('idx_message_event_pinned', 'event_id', 'is_pinned'),
         Index('idx_message_reply_created', 'reply_to_id', 'created_at'),
+        # Keyset pagination of chat history
+        Index('idx_message_event_created_id', 'event_id', 'created_at', 'id'),
     )
     
     def __repr__(self):
@@ -156,7 +158,8 @@ class MessageReadReceipt(BaseModel, TimestampMixin):
         Index('idx_messagereadreceipt_read_at', 'read_at'),
         Index('idx_messagereadreceipt_created_at', 'created_at'),
         # Combined indexes for common queries
-        Index('idx_messagereadreceipt_message_user', 'message_id', 'user_id'),
+        # Unique so receipts can be bulk inserted with ON CONFLICT DO NOTHING
+        Index('idx_messagereadreceipt_message_user', 'message_id', 'user_id', unique=True),
         Index('idx_messagereadreceipt_user_read', 'user_id', 'read_at'),
         Index('idx_messagereadreceipt_message_read', 'message_id', 'read_at'),
     )
@@ -270,7 +273,7 @@ class ChatParticipant(BaseModel, TimestampMixin):
         Index('idx_chatparticipant_push_notifications', 'push_notifications'),
         Index('idx_chatparticipant_created_at', 'created_at'),
         # Combined indexes for common queries
-        Index('idx_chatparticipant_event_user', 'event_id', 'user_id'),
+        Index('idx_chatparticipant_event_user', 'event_id', 'user_id', unique=True),
         Index('idx_chatparticipant_user_last_seen', 'user_id', 'last_seen_at'),
         Index('idx_chatparticipant_event_muted', 'event_id', 'is_muted'),
     )
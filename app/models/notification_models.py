@@ -233,6 +233,8 @@ class NotificationLog(BaseModel, TimestampMixin):
         Index('idx_notificationlog_event_status', 'event_id', 'status'),
         Index('idx_notificationlog_recipient_sent', 'recipient_id', 'sent_at'),
         Index('idx_notificationlog_channel_status', 'channel', 'status'),
+        # Keyset pagination of the in-app feed
+        Index('idx_notificationlog_recipient_channel_created', 'recipient_id', 'channel', 'created_at', 'id'),
     )
     
     def __repr__(self):
@@ -385,6 +387,8 @@ class NotificationQueue(BaseModel, TimestampMixin):
     attempts: Mapped[int] = mapped_column(Integer, default=0)
     max_attempts: Mapped[int] = mapped_column(Integer, default=3)
     last_attempt_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    failed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Additional data
@@ -400,6 +404,12 @@ class NotificationQueue(BaseModel, TimestampMixin):
     event = relationship("Event")
     recipient = relationship("User")
     
+    # Indexes
+    __table_args__ = (
+        # Dispatcher claim: due rows by status, oldest first
+        Index('idx_notificationqueue_status_scheduled', 'status', 'scheduled_for'),
+    )
+    
     def __repr__(self):
         return f"<NotificationQueue(id={self.id}, type='{self.notification_type}', status='{self.status}')>"
     
@@ -52,6 +52,12 @@ class RSVPStatus(str, Enum):
     DECLINED = "declined"
     MAYBE = "maybe"
 
+class EventAccessRole(str, Enum):
+    """Why a user can see an event"""
+    CREATOR = "creator"
+    COLLABORATOR = "collaborator"
+    INVITEE = "invitee"
+
 class TaskStatus(str, Enum):
     """Task status enumeration"""
     TODO = "todo"
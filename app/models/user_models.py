@@ -253,6 +253,8 @@ class UserSession(Base, IDMixin, TimestampMixin):
     
     user_id = Column(ForeignKey("users.id"), nullable=False)
     session_token = Column(String(255), unique=True, nullable=False)
+    # jti of the current refresh token; the token itself for sessions from
+    # before tokens carried a session id
     refresh_token = Column(String(255), unique=True, nullable=True)
     expires_at = Column(DateTime, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
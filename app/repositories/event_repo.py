@@ -1,14 +1,219 @@
 from typing import Optional, List, Dict, Any, Tuple
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import and_, or_, func, desc, asc, select, exists, delete, update, insert, literal, null, case, true
+from sqlalchemy import event as orm_event
+from sqlalchemy.sql import Select
 from datetime import datetime, timedelta
 from app.models.event_models import (
-    Event, EventInvitation, Task, Expense, ExpenseSplit, 
-    Comment, Poll, PollOption, PollVote
+    Event, EventInvitation, EventAccess, Task, Expense, ExpenseSplit, 
+    Comment, Poll, PollOption, PollVote, event_collaborators
 )
 from app.models.user_models import User
-from app.models.shared_models import EventStatus, EventType, RSVPStatus, TaskStatus
+from app.models.shared_models import EventStatus, EventType, RSVPStatus, TaskStatus, EventAccessRole
 from app.schemas.pagination import PaginationParams, SortParams
+from app.core.cache import cached, invalidate_tags
+from app.core.pagination import KeysetPage, apply_keyset, fetch_keyset_page, fetch_keyset_page_async
+
+# Cache tags invalidated by event writes
+PUBLIC_EVENTS_CACHE_TAG = "events:public"
+
+def event_cache_tag(event_id: int) -> str:
+    """Tag for cached results derived from one event"""
+    return f"event:{event_id}"
+
+# Rows whose writes change results cached under an event's tag
+_EVENT_CHILD_MODELS = (EventInvitation, Task, Expense, Comment, Poll)
+
+@orm_event.listens_for(Session, "after_flush")
+def _collect_written_events(session, flush_context):
+    """Remember which events had rows written so their cache entries go stale on commit"""
+    event_ids = session.info.setdefault("written_event_ids", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Event) and instance.id:
+            event_ids.add(instance.id)
+        elif isinstance(instance, _EVENT_CHILD_MODELS) and instance.event_id:
+            event_ids.add(instance.event_id)
+
+@orm_event.listens_for(Session, "after_commit")
+def _invalidate_written_events(session):
+    event_ids = session.info.pop("written_event_ids", None)
+    if event_ids:
+        invalidate_tags(*[event_cache_tag(event_id) for event_id in event_ids])
+
+@orm_event.listens_for(Session, "after_rollback")
+def _discard_written_events(session):
+    session.info.pop("written_event_ids", None)
+
+# Categories accepted by the event listing endpoint
+EVENT_LISTING_CATEGORIES = ("upcoming", "past", "drafts", "hosting", "attending", "public")
+
+# Sort key of event listings; id breaks ties between events starting together
+EVENT_KEYSET = (Event.start_datetime, Event.id)
+
+def listing_sort_descending(category: Optional[str]) -> bool:
+    """Upcoming events are listed soonest first, every other category newest first"""
+    return category != "upcoming"
+
+def _accessible_event_ids(user_id: int, *conditions) -> Select:
+    """IDs of events the user has an event_access grant for, optionally narrowed"""
+    return select(EventAccess.event_id).where(EventAccess.user_id == user_id, *conditions)
+
+def event_access_exists(event_id: int, user_id: int) -> Select:
+    """SELECT EXISTS for any event_access grant of the user on the event"""
+    return select(
+        exists().where(EventAccess.event_id == event_id, EventAccess.user_id == user_id)
+    )
+
+def _user_access_filter(user_id: int, *conditions):
+    """Events the user created, collaborates on, or is invited to"""
+    return Event.id.in_(_accessible_event_ids(user_id, *conditions))
+
+def _search_filter(search_term: str):
+    """Match title, description, or venue against a search term"""
+    return or_(
+        Event.title.ilike(f"%{search_term}%"),
+        Event.description.ilike(f"%{search_term}%"),
+        Event.venue_name.ilike(f"%{search_term}%"),
+        Event.venue_city.ilike(f"%{search_term}%")
+    )
+
+def build_listing_statement(
+    category: Optional[str],
+    user_id: Optional[int],
+    event_type: Optional[str] = None
+) -> Select:
+    """
+    Build the SELECT behind the event listing endpoint.
+    
+    Shared by EventRepository and AsyncEventRepository so both execution
+    paths return identical results. The caller validates the category and
+    authentication beforehand. Results are ordered by EVENT_KEYSET so they
+    can be paged with a cursor.
+    """
+    stmt = select(Event).where(Event.is_deleted == False)
+    now = datetime.utcnow()
+    
+    if category == "public":
+        stmt = stmt.where(Event.is_public == True, Event.status != EventStatus.DRAFT)
+        if user_id:
+            stmt = stmt.where(Event.creator_id != user_id)
+    elif category == "upcoming":
+        stmt = stmt.where(
+            Event.start_datetime >= now,
+            Event.status != EventStatus.DRAFT,
+            _user_access_filter(user_id, EventAccess.start_datetime >= now)
+        )
+    elif category == "past":
+        stmt = stmt.where(
+            Event.end_datetime < now,
+            Event.status != EventStatus.DRAFT,
+            _user_access_filter(user_id)
+        )
+    elif category == "drafts":
+        stmt = stmt.where(
+            Event.status == EventStatus.DRAFT,
+            _user_access_filter(user_id, EventAccess.status == EventStatus.DRAFT)
+        )
+    elif category == "hosting":
+        stmt = stmt.where(Event.creator_id == user_id)
+    elif category == "attending":
+        stmt = stmt.where(
+            Event.creator_id != user_id,
+            _user_access_filter(user_id, EventAccess.role == EventAccessRole.INVITEE),
+            Event.status != EventStatus.DRAFT
+        )
+    else:
+        if user_id:
+            # All accessible events, excluding drafts unless the user created them
+            stmt = stmt.where(
+                _user_access_filter(
+                    user_id,
+                    or_(
+                        EventAccess.role == EventAccessRole.CREATOR,
+                        EventAccess.status != EventStatus.DRAFT
+                    )
+                )
+            )
+        else:
+            stmt = stmt.where(Event.is_public == True, Event.status != EventStatus.DRAFT)
+    
+    if event_type:
+        stmt = stmt.where(Event.event_type == event_type)
+    
+    return apply_keyset(stmt, EVENT_KEYSET, None, listing_sort_descending(category))
+
+def build_search_statement(search_term: str, user_id: Optional[int] = None) -> Select:
+    """Build the SELECT behind event search with access control applied"""
+    stmt = select(Event).where(_search_filter(search_term), Event.is_deleted == False)
+    
+    if user_id:
+        stmt = stmt.where(or_(Event.is_public == True, _user_access_filter(user_id)))
+    else:
+        stmt = stmt.where(Event.is_public == True)
+    
+    return apply_keyset(stmt, EVENT_KEYSET, None)
+
+def _status_counts(status_column, statuses) -> List[Any]:
+    """One conditional count per status value, labelled with the value"""
+    return [
+        func.coalesce(func.sum(case((status_column == status.value, 1), else_=0)), 0).label(status.value)
+        for status in statuses
+    ]
+
+def build_event_statistics_statement(event_id: int) -> Select:
+    """
+    Build one SELECT returning every counter of an event's statistics.
+    
+    Each child table is aggregated in its own grouped subquery, so the
+    tables are scanned once through their event_id indexes and joined as
+    single rows instead of multiplying into a cartesian product.
+    """
+    invitations = select(
+        func.count().label("total"), *_status_counts(EventInvitation.rsvp_status, RSVPStatus)
+    ).where(EventInvitation.event_id == event_id, EventInvitation.is_deleted == False).subquery("invitations")
+    
+    tasks = select(
+        func.count().label("total"), *_status_counts(Task.status, TaskStatus)
+    ).where(Task.event_id == event_id, Task.is_deleted == False).subquery("tasks")
+    
+    expenses = select(
+        func.coalesce(func.sum(Expense.amount), 0).label("total")
+    ).where(Expense.event_id == event_id, Expense.is_deleted == False).subquery("expenses")
+    
+    comments = select(func.count().label("total")).where(
+        Comment.event_id == event_id, Comment.is_deleted == False
+    ).subquery("comments")
+    
+    polls = select(func.count().label("total")).where(
+        Poll.event_id == event_id, Poll.is_deleted == False
+    ).subquery("polls")
+    
+    collaborators = select(func.count().label("total")).where(
+        event_collaborators.c.event_id == event_id
+    ).subquery("collaborators")
+    
+    return (
+        select(
+            Event.total_budget,
+            invitations.c.total.label("invitation_count"),
+            *[invitations.c[status.value].label(f"rsvp_{status.value}") for status in RSVPStatus],
+            tasks.c.total.label("task_count"),
+            *[tasks.c[status.value].label(f"task_{status.value}") for status in TaskStatus],
+            expenses.c.total.label("total_expenses"),
+            comments.c.total.label("comment_count"),
+            polls.c.total.label("poll_count"),
+            collaborators.c.total.label("collaborator_count")
+        )
+        .select_from(Event)
+        .join(invitations, true())
+        .join(tasks, true())
+        .join(expenses, true())
+        .join(comments, true())
+        .join(polls, true())
+        .join(collaborators, true())
+        .where(Event.id == event_id, Event.is_deleted == False)
+    )
 
 class EventRepository:
     """Repository for event data access operations"""
@@ -109,6 +314,46 @@ class EventRepository:
         
         return events, total
     
+    def get_listing(
+        self,
+        category: Optional[str],
+        user_id: Optional[int],
+        limit: int,
+        offset: int = 0,
+        event_type: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Get a page of events for the listing endpoint by category"""
+        return fetch_keyset_page(
+            self.db,
+            build_listing_statement(category, user_id, event_type),
+            EVENT_KEYSET,
+            size=limit,
+            cursor=cursor,
+            offset=offset,
+            descending=listing_sort_descending(category),
+            cache_params={"listing": "events", "category": category, "user_id": user_id, "event_type": event_type}
+        )
+    
+    def search_page(
+        self,
+        search_term: str,
+        user_id: Optional[int],
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Get a page of events matching a search term"""
+        return fetch_keyset_page(
+            self.db,
+            build_search_statement(search_term, user_id),
+            EVENT_KEYSET,
+            size=limit,
+            cursor=cursor,
+            offset=offset,
+            cache_params={"listing": "event_search", "search": search_term, "user_id": user_id}
+        )
+    
     def get_user_events(
         self,
         user_id: int,
@@ -125,23 +370,22 @@ class EventRepository:
                 base_filter
             )
         elif role_filter == 'invited':
-            query = self.db.query(Event).join(EventInvitation).filter(
-                EventInvitation.user_id == user_id,
+            query = self.db.query(Event).filter(
+                _user_access_filter(user_id, EventAccess.role == EventAccessRole.INVITEE),
                 base_filter
             )
         elif role_filter == 'collaborating':
-            query = self.db.query(Event).join(Event.collaborators).filter(
-                Event.collaborators.any(User.id == user_id),
+            # Creators are collaborators on their own events but hold only the creator grant
+            query = self.db.query(Event).filter(
+                _user_access_filter(
+                    user_id, EventAccess.role.in_([EventAccessRole.CREATOR, EventAccessRole.COLLABORATOR])
+                ),
                 base_filter
             )
         else:
             # All events user has access to
             query = self.db.query(Event).filter(
-                or_(
-                    Event.creator_id == user_id,
-                    Event.collaborators.any(User.id == user_id),
-                    Event.invitations.any(EventInvitation.user_id == user_id)
-                ),
+                _user_access_filter(user_id),
                 base_filter
             )
         
@@ -179,13 +423,7 @@ class EventRepository:
         
         # Apply access control
         if user_id:
-            access_filter = or_(
-                Event.is_public == True,
-                Event.creator_id == user_id,
-                Event.collaborators.any(User.id == user_id),
-                Event.invitations.any(EventInvitation.user_id == user_id)
-            )
-            query = query.filter(access_filter)
+            query = query.filter(or_(Event.is_public == True, _user_access_filter(user_id)))
         else:
             query = query.filter(Event.is_public == True)
         
@@ -220,12 +458,11 @@ class EventRepository:
         if user_id:
             access_filter = or_(
                 Event.is_public == True,
-                Event.creator_id == user_id,
-                Event.collaborators.any(User.id == user_id),
-                Event.invitations.any(
-                    and_(
-                        EventInvitation.user_id == user_id,
-                        EventInvitation.rsvp_status == RSVPStatus.ACCEPTED
+                _user_access_filter(
+                    user_id,
+                    or_(
+                        EventAccess.role != EventAccessRole.INVITEE,
+                        EventAccess.rsvp_status == RSVPStatus.ACCEPTED
                     )
                 )
             )
@@ -249,13 +486,7 @@ class EventRepository:
         )
         
         if user_id:
-            access_filter = or_(
-                Event.is_public == True,
-                Event.creator_id == user_id,
-                Event.collaborators.any(User.id == user_id),
-                Event.invitations.any(EventInvitation.user_id == user_id)
-            )
-            query = query.filter(access_filter)
+            query = query.filter(or_(Event.is_public == True, _user_access_filter(user_id)))
         else:
             query = query.filter(Event.is_public == True)
         
@@ -265,8 +496,13 @@ class EventRepository:
         """Create a new event"""
         event = Event(**event_data)
         self.db.add(event)
+        self.db.flush()
+        self.grant_event_access(event, event.creator_id, EventAccessRole.CREATOR)
         self.db.commit()
         self.db.refresh(event)
+        
+        if event.is_public:
+            invalidate_tags(PUBLIC_EVENTS_CACHE_TAG)
         return event
     
     def update(self, event_id: int, update_data: Dict[str, Any]) -> Optional[Event]:
@@ -275,12 +511,21 @@ class EventRepository:
         if not event:
             return None
         
+        was_public = event.is_public
         for field, value in update_data.items():
             if hasattr(event, field):
                 setattr(event, field, value)
         
+        if "status" in update_data or "start_datetime" in update_data:
+            self.refresh_event_access(event)
+        
         self.db.commit()
         self.db.refresh(event)
+        
+        invalidate_tags(
+            event_cache_tag(event_id),
+            PUBLIC_EVENTS_CACHE_TAG if was_public or event.is_public else None
+        )
         return event
     
     def delete(self, event_id: int) -> bool:
@@ -290,69 +535,38 @@ class EventRepository:
             return False
         
         event.soft_delete()
+        self.revoke_event_access(event_id)
         self.db.commit()
+        
+        invalidate_tags(
+            event_cache_tag(event_id),
+            PUBLIC_EVENTS_CACHE_TAG if event.is_public else None
+        )
         return True
     
+    @cached(
+        "event_statistics",
+        key_args=("event_id",),
+        response_type=Dict[str, Any],
+        tags=lambda event_id: [event_cache_tag(event_id)]
+    )
     def get_event_statistics(self, event_id: int) -> Dict[str, Any]:
-        """Get comprehensive statistics for an event"""
-        event = self.get_by_id(event_id, include_relations=True)
-        if not event:
+        """Get comprehensive statistics for an event in a single query"""
+        row = self.db.execute(build_event_statistics_statement(event_id)).mappings().first()
+        if not row:
             return {}
         
-        # RSVP statistics
-        rsvp_stats = self.db.query(
-            EventInvitation.rsvp_status,
-            func.count(EventInvitation.id)
-        ).filter(
-            EventInvitation.event_id == event_id
-        ).group_by(EventInvitation.rsvp_status).all()
-        
-        rsvp_counts = {status.value: 0 for status in RSVPStatus}
-        for status, count in rsvp_stats:
-            rsvp_counts[status] = count
-        
-        # Task statistics
-        task_stats = self.db.query(
-            Task.status,
-            func.count(Task.id)
-        ).filter(
-            Task.event_id == event_id
-        ).group_by(Task.status).all()
-        
-        task_counts = {status.value: 0 for status in TaskStatus}
-        for status, count in task_stats:
-            task_counts[status] = count
-        
-        # Expense statistics
-        expense_total = self.db.query(
-            func.sum(Expense.amount)
-        ).filter(
-            Expense.event_id == event_id
-        ).scalar() or 0
-        
-        # Comment count
-        comment_count = self.db.query(
-            func.count(Comment.id)
-        ).filter(
-            Comment.event_id == event_id
-        ).scalar() or 0
-        
-        # Poll count
-        poll_count = self.db.query(
-            func.count(Poll.id)
-        ).filter(
-            Poll.event_id == event_id
-        ).scalar() or 0
-        
+        expense_total = float(row["total_expenses"] or 0)
         return {
-            "rsvp_counts": rsvp_counts,
-            "task_counts": task_counts,
-            "total_expenses": float(expense_total),
-            "budget_remaining": float(event.total_budget - expense_total) if event.total_budget else None,
-            "comment_count": comment_count,
-            "poll_count": poll_count,
-            "collaborator_count": len(event.collaborators),
-            "invitation_count": len(event.invitations)
+            "rsvp_counts": {status.value: int(row[f"rsvp_{status.value}"]) for status in RSVPStatus},
+            "task_counts": {status.value: int(row[f"task_{status.value}"]) for status in TaskStatus},
+            "total_expenses": expense_total,
+            "budget_remaining": float(row["total_budget"]) - expense_total if row["total_budget"] else None,
+            "invitation_count": row["invitation_count"],
+            "task_count": row["task_count"],
+            "comment_count": row["comment_count"],
+            "poll_count": row["poll_count"],
+            "collaborator_count": row["collaborator_count"]
         }
     
     def get_events_by_location(
@@ -578,6 +792,8 @@ class EventRepository:
         """Create a new event invitation"""
         invitation = EventInvitation(**invitation_data)
         self.db.add(invitation)
+        self.db.flush()
+        self.grant_invitation_access(invitation)
         self.db.commit()
         self.db.refresh(invitation)
         return invitation
@@ -596,10 +812,113 @@ class EventRepository:
             if hasattr(invitation, field):
                 setattr(invitation, field, value)
         
+        if "rsvp_status" in update_data:
+            self.set_event_access_rsvp(invitation.event_id, invitation.user_id, invitation.rsvp_status)
+        
         self.db.commit()
         self.db.refresh(invitation)
         return invitation
     
+    # Access index operations
+    def grant_event_access(
+        self,
+        event: Event,
+        user_id: int,
+        role: EventAccessRole,
+        rsvp_status: Optional[str] = None
+    ) -> EventAccess:
+        """Record (or refresh) a user's access to an event; committed by the caller"""
+        return self.db.merge(EventAccess(
+            user_id=user_id,
+            event_id=event.id,
+            role=EventAccessRole(role).value,
+            status=event.status,
+            rsvp_status=rsvp_status,
+            start_datetime=event.start_datetime
+        ))
+    
+    def grant_invitation_access(self, invitation: EventInvitation) -> EventAccess:
+        """Record the invitee grant for an invitation"""
+        event = invitation.event or self.db.get(Event, invitation.event_id)
+        return self.grant_event_access(
+            event, invitation.user_id, EventAccessRole.INVITEE, invitation.rsvp_status
+        )
+    
+    def set_event_access_rsvp(self, event_id: int, user_id: int, rsvp_status: str):
+        """Copy an invitee's RSVP status onto their grant"""
+        self.db.execute(
+            update(EventAccess)
+            .where(
+                EventAccess.event_id == event_id,
+                EventAccess.user_id == user_id,
+                EventAccess.role == EventAccessRole.INVITEE
+            )
+            .values(rsvp_status=rsvp_status)
+        )
+    
+    def refresh_event_access(self, event: Event):
+        """Copy an event's status and start time onto all of its grants"""
+        self.db.execute(
+            update(EventAccess)
+            .where(EventAccess.event_id == event.id)
+            .values(status=event.status, start_datetime=event.start_datetime)
+        )
+    
+    def revoke_event_access(
+        self,
+        event_id: int,
+        user_id: Optional[int] = None,
+        role: Optional[EventAccessRole] = None
+    ):
+        """Remove grants for an event, optionally only one user's or one role's"""
+        stmt = delete(EventAccess).where(EventAccess.event_id == event_id)
+        if user_id is not None:
+            stmt = stmt.where(EventAccess.user_id == user_id)
+        if role is not None:
+            stmt = stmt.where(EventAccess.role == role)
+        self.db.execute(stmt)
+    
+    def user_has_event_access(self, event_id: int, user_id: int) -> bool:
+        """Whether the user created, collaborates on, or is invited to the event"""
+        return bool(self.db.execute(event_access_exists(event_id, user_id)).scalar())
+    
+    def rebuild_event_access(self, first_event_id: int, last_event_id: int) -> int:
+        """
+        Recompute grants for an inclusive range of event IDs from the creator,
+        collaborator and invitation tables. Returns the number of grants
+        written; committed by the caller.
+        """
+        in_range = and_(Event.id.between(first_event_id, last_event_id), Event.is_deleted == False)
+        sources = [
+            select(
+                Event.creator_id, Event.id, literal(EventAccessRole.CREATOR.value),
+                Event.status, null(), Event.start_datetime
+            ).where(in_range),
+            select(
+                event_collaborators.c.user_id, Event.id, literal(EventAccessRole.COLLABORATOR.value),
+                Event.status, null(), Event.start_datetime
+            ).join(event_collaborators, event_collaborators.c.event_id == Event.id).where(
+                in_range, event_collaborators.c.user_id != Event.creator_id
+            ),
+            select(
+                EventInvitation.user_id, Event.id, literal(EventAccessRole.INVITEE.value),
+                Event.status, func.max(EventInvitation.rsvp_status), Event.start_datetime
+            ).join(EventInvitation, EventInvitation.event_id == Event.id).where(
+                in_range, EventInvitation.is_deleted == False
+            ).group_by(EventInvitation.user_id, Event.id, Event.status, Event.start_datetime),
+        ]
+        
+        self.db.execute(
+            delete(EventAccess).where(EventAccess.event_id.between(first_event_id, last_event_id))
+        )
+        
+        columns = ["user_id", "event_id", "role", "status", "rsvp_status", "start_datetime"]
+        written = 0
+        for source in sources:
+            result = self.db.execute(insert(EventAccess).from_select(columns, source))
+            written += max(result.rowcount or 0, 0)
+        return written
+    
     # Expense operations
     def get_event_expenses(
         self, 
@@ -724,3 +1043,84 @@ class EventRepository:
         self.db.commit()
         self.db.refresh(vote)
         return vote
+
+
+class AsyncEventRepository:
+    """Async repository for the hot event read paths (list, search, detail)"""
+    
+    # Relations serialized by EventSummary / EventResponse; they must be loaded
+    # eagerly because lazy loads are not available on an AsyncSession.
+    SUMMARY_RELATIONS = (Event.invitations,)
+    DETAIL_RELATIONS = (Event.creator, Event.invitations, Event.expenses, Event.tasks)
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_by_id(
+        self,
+        event_id: int,
+        include_relations: bool = False
+    ) -> Optional[Event]:
+        """Get event by ID, eagerly loading the relations EventResponse needs"""
+        stmt = select(Event).where(Event.id == event_id)
+        
+        if include_relations:
+            stmt = stmt.options(*[selectinload(rel) for rel in self.DETAIL_RELATIONS])
+        
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none()
+    
+    async def get_listing(
+        self,
+        category: Optional[str],
+        user_id: Optional[int],
+        limit: int,
+        offset: int = 0,
+        event_type: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Get a page of events for the listing endpoint by category"""
+        stmt = build_listing_statement(category, user_id, event_type)
+        return await self._page(
+            stmt, limit, offset, cursor, listing_sort_descending(category),
+            {"listing": "events", "category": category, "user_id": user_id, "event_type": event_type}
+        )
+    
+    async def search_page(
+        self,
+        search_term: str,
+        user_id: Optional[int],
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Get a page of events matching a search term"""
+        stmt = build_search_statement(search_term, user_id)
+        return await self._page(
+            stmt, limit, offset, cursor, True,
+            {"listing": "event_search", "search": search_term, "user_id": user_id}
+        )
+    
+    async def user_can_access(self, event: Event, user_id: int) -> bool:
+        """Async equivalent of EventService._can_access_event"""
+        if event.is_public or event.creator_id == user_id:
+            return True
+        
+        result = await self.db.execute(event_access_exists(event.id, user_id))
+        return bool(result.scalar())
+    
+    async def _page(
+        self,
+        stmt: Select,
+        limit: int,
+        offset: int,
+        cursor: Optional[str],
+        descending: bool,
+        cache_params: Dict[str, Any]
+    ) -> KeysetPage:
+        """Fetch a keyset page of events with the relations EventSummary needs"""
+        stmt = stmt.options(*[selectinload(rel) for rel in self.SUMMARY_RELATIONS])
+        return await fetch_keyset_page_async(
+            self.db, stmt, EVENT_KEYSET, size=limit, cursor=cursor, offset=offset,
+            descending=descending, cache_params=cache_params
+        )
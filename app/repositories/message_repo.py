@@ -0,0 +1,201 @@
+from typing import List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, func, desc, literal, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.message_models import Message, MessageReaction, MessageReadReceipt, ChatParticipant
+from app.models.event_models import Event
+from app.core.errors import NotFoundError, AuthorizationError
+from app.core.pagination import KeysetPage, fetch_keyset_page, fetch_keyset_page_async
+from app.repositories.event_repo import event_access_exists
+from app.schemas.pagination import CursorParams
+
+# Sort key of chat history; id breaks ties between messages sent together
+MESSAGE_KEYSET = (Message.created_at, Message.id)
+
+def _message_history_statement(event_id: int):
+    """Build the SELECT for an event's chat history"""
+    # Everything MessageResponse serializes must be loaded up front
+    return select(Message).where(Message.event_id == event_id).options(
+        selectinload(Message.sender),
+        selectinload(Message.reactions).selectinload(MessageReaction.user),
+        selectinload(Message.replies)
+    )
+
+def fetch_message_history_page(db: Session, event_id: int, pagination: CursorParams) -> KeysetPage:
+    """
+    Fetch a page of chat history walking back from the newest message.
+    
+    Items are returned oldest first for display; next_cursor continues with
+    older messages. AsyncMessageRepository.get_messages_page is the async
+    equivalent.
+    """
+    page = fetch_keyset_page(
+        db, _message_history_statement(event_id), MESSAGE_KEYSET,
+        size=pagination.size,
+        cursor=pagination.cursor,
+        cache_params={"listing": "messages", "event_id": event_id}
+    )
+    return page._replace(items=page.items[::-1])
+
+def advance_read_watermark(db: Session, event_id: int, user_id: int, message_id: Optional[int]) -> bool:
+    """
+    Move the user's read watermark in an event's chat forward to message_id.
+    
+    Everything up to the watermark counts as read, so marking a page of
+    history costs one statement however many messages it holds: an INSERT
+    of the participant row that, on conflict with the existing row, only
+    updates it when the watermark moves forward. It never moves backwards,
+    so scrolling through older pages is a no-op. Returns whether it moved;
+    committed by the caller.
+    """
+    if not message_id:
+        return False
+    
+    dialect_insert = sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+    now = datetime.utcnow()
+    stmt = dialect_insert(ChatParticipant).values(
+        event_id=event_id, user_id=user_id, last_read_message_id=message_id, last_seen_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["event_id", "user_id"],
+        set_={
+            "last_read_message_id": stmt.excluded.last_read_message_id,
+            "last_seen_at": stmt.excluded.last_seen_at,
+            "updated_at": now
+        },
+        where=or_(
+            ChatParticipant.last_read_message_id.is_(None),
+            ChatParticipant.last_read_message_id < stmt.excluded.last_read_message_id
+        )
+    )
+    return (db.execute(stmt).rowcount or 0) > 0
+
+def record_read_receipts(db: Session, event_id: int, user_id: int, message_ids: List[int]) -> int:
+    """
+    Insert read receipts for the given messages of an event in one statement.
+    
+    Receipts that already exist, and IDs that are not messages of the event,
+    are skipped by INSERT ... SELECT ... ON CONFLICT DO NOTHING. Returns the
+    number of receipts created; committed by the caller.
+    """
+    if not message_ids:
+        return 0
+    
+    dialect_insert = sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+    now = datetime.utcnow()
+    source = select(
+        Message.id, literal(user_id), literal(now), literal(now), literal(now)
+    ).where(Message.event_id == event_id, Message.id.in_(set(message_ids)))
+    
+    stmt = dialect_insert(MessageReadReceipt).from_select(
+        ["message_id", "user_id", "read_at", "created_at", "updated_at"], source
+    ).on_conflict_do_nothing(index_elements=["message_id", "user_id"])
+    return max(db.execute(stmt).rowcount or 0, 0)
+
+def latest_message_id(db: Session, event_id: int, message_ids: List[int]) -> Optional[int]:
+    """Newest of the given IDs that belongs to the event"""
+    if not message_ids:
+        return None
+    return db.execute(
+        select(func.max(Message.id)).where(Message.event_id == event_id, Message.id.in_(set(message_ids)))
+    ).scalar()
+
+def count_unread_messages(db: Session, event_id: int, user_id: int) -> int:
+    """Messages from other participants newer than the user's read watermark"""
+    watermark = select(ChatParticipant.last_read_message_id).where(
+        ChatParticipant.event_id == event_id,
+        ChatParticipant.user_id == user_id
+    ).scalar_subquery()
+    
+    return db.execute(
+        select(func.count(Message.id)).where(
+            Message.event_id == event_id,
+            Message.sender_id != user_id,
+            Message.id > func.coalesce(watermark, 0)
+        )
+    ).scalar() or 0
+
+class AsyncMessageRepository:
+    """Async repository for the chat history read path"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_event_with_access(self, event_id: int, user_id: int) -> Event:
+        """Async equivalent of MessageService._get_event_with_access"""
+        result = await self.db.execute(select(Event).where(Event.id == event_id))
+        event = result.scalar_one_or_none()
+
+        if not event:
+            raise NotFoundError("Event not found")
+
+        if event.creator_id == user_id:
+            return event
+
+        has_access = (await self.db.execute(event_access_exists(event_id, user_id))).scalar()
+
+        if not has_access:
+            raise AuthorizationError("You don't have access to this event")
+
+        return event
+
+    async def get_messages(
+        self,
+        event_id: int,
+        page: int = 1,
+        per_page: int = 50,
+        before_message_id: Optional[int] = None
+    ) -> Tuple[List[Message], int]:
+        """Get a page of messages for an event, oldest first"""
+        stmt = select(Message).where(Message.event_id == event_id)
+
+        if before_message_id:
+            before_created_at = (await self.db.execute(
+                select(Message.created_at).where(Message.id == before_message_id)
+            )).scalar_one_or_none()
+            if before_created_at:
+                stmt = stmt.where(Message.created_at < before_created_at)
+
+        total = (await self.db.execute(
+            select(func.count()).select_from(stmt.subquery())
+        )).scalar() or 0
+
+        # Everything MessageResponse serializes must be loaded up front
+        result = await self.db.execute(
+            stmt.options(
+                selectinload(Message.sender),
+                selectinload(Message.reactions).selectinload(MessageReaction.user),
+                selectinload(Message.replies)
+            )
+            .order_by(desc(Message.created_at))
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+        )
+        messages = list(result.scalars().all())
+
+        # Reverse to show oldest first
+        messages.reverse()
+
+        return messages, total
+
+    async def get_messages_page(self, event_id: int, pagination: CursorParams) -> KeysetPage:
+        """Get a keyset page of messages for an event, oldest first"""
+        page = await fetch_keyset_page_async(
+            self.db, _message_history_statement(event_id), MESSAGE_KEYSET,
+            size=pagination.size,
+            cursor=pagination.cursor,
+            cache_params={"listing": "messages", "event_id": event_id}
+        )
+        return page._replace(items=page.items[::-1])
+
+    async def mark_read_up_to(self, event_id: int, user_id: int, message_id: Optional[int]) -> bool:
+        """Advance the user's read watermark; see advance_read_watermark"""
+        if not message_id:
+            return False
+        moved = await self.db.run_sync(
+            lambda session: advance_read_watermark(session, event_id, user_id, message_id)
+        )
+        await self.db.commit()
+        return moved
@@ -1,6 +1,9 @@
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy import and_, or_, func, desc, asc, select, update, insert
+from sqlalchemy import event as orm_event
+from sqlalchemy.sql import Select
 from datetime import datetime, timedelta
 from app.models.notification_models import (
     SmartReminder, NotificationLog, NotificationPreference, ReminderTemplate,
@@ -9,7 +12,101 @@ from app.models.notification_models import (
 )
 from app.models.user_models import User
 from app.models.event_models import Event, EventInvitation
-from app.schemas.pagination import PaginationParams, SortParams
+from app.schemas.pagination import PaginationParams, SortParams, CursorParams
+from app.core.cache import ReadThroughCache, invalidate_tags
+from app.core.config import settings
+from app.core.pagination import (
+    KeysetPage, count_rows, count_rows_async, fetch_keyset_page, fetch_keyset_page_async
+)
+
+def notification_settings_cache_tag(user_id: int) -> str:
+    """Tag for a user's cached notification preferences and devices"""
+    return f"notification_settings:user:{user_id}"
+
+# Per-user delivery settings read on every queueing and dispatch batch
+_preference_cache = ReadThroughCache(
+    "notification_preferences",
+    ttl_seconds=settings.NOTIFICATION_SETTINGS_CACHE_SECONDS,
+    response_type=Optional[Dict[str, Any]]
+)
+_device_cache = ReadThroughCache(
+    "active_devices",
+    ttl_seconds=settings.NOTIFICATION_SETTINGS_CACHE_SECONDS,
+    response_type=List[Dict[str, Any]]
+)
+
+def mark_notification_settings_written(session: Session, user_id: int):
+    """Invalidate a user's cached notification settings when session commits"""
+    session.info.setdefault("written_notification_user_ids", set()).add(user_id)
+
+@orm_event.listens_for(Session, "after_flush")
+def _collect_written_notification_settings(session, flush_context):
+    """Remember whose preferences or devices changed so their cache entries go stale on commit"""
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, (NotificationPreference, UserDevice)) and instance.user_id:
+            mark_notification_settings_written(session, instance.user_id)
+
+@orm_event.listens_for(Session, "after_commit")
+def _invalidate_written_notification_settings(session):
+    user_ids = session.info.pop("written_notification_user_ids", None)
+    if user_ids:
+        invalidate_tags(*[notification_settings_cache_tag(user_id) for user_id in user_ids])
+
+@orm_event.listens_for(Session, "after_rollback")
+def _discard_written_notification_settings(session):
+    session.info.pop("written_notification_user_ids", None)
+
+def preference_values(preference: NotificationPreference) -> Dict[str, Any]:
+    """Cacheable delivery settings of one preference row"""
+    return {
+        'email_enabled': preference.email_enabled,
+        'sms_enabled': preference.sms_enabled,
+        'push_enabled': preference.push_enabled,
+        'in_app_enabled': preference.in_app_enabled,
+        'advance_notice_hours': preference.advance_notice_hours,
+        'quiet_hours_start': preference.quiet_hours_start,
+        'quiet_hours_end': preference.quiet_hours_end
+    }
+
+# Sort key of the in-app feed; id breaks ties between notifications created together
+NOTIFICATION_KEYSET = (NotificationLog.created_at, NotificationLog.id)
+
+def _in_app_notifications_statement(user_id: int, unread_only: bool = False) -> Select:
+    """Build the SELECT for a user's in-app notification feed"""
+    stmt = select(NotificationLog).where(
+        NotificationLog.recipient_id == user_id,
+        NotificationLog.channel == NotificationChannel.IN_APP
+    )
+    if unread_only:
+        stmt = stmt.where(NotificationLog.read_at.is_(None))
+    return stmt
+
+def fetch_in_app_notifications_page(
+    db: Session,
+    user_id: int,
+    pagination: CursorParams,
+    unread_only: bool = False
+) -> Tuple[KeysetPage, int]:
+    """
+    Fetch a keyset page of a user's in-app feed, newest first, with the
+    unread count. AsyncNotificationRepository.get_in_app_notifications_page
+    is the async equivalent.
+    """
+    page = fetch_keyset_page(
+        db,
+        _in_app_notifications_statement(user_id, unread_only),
+        NOTIFICATION_KEYSET,
+        size=pagination.size,
+        cursor=pagination.cursor,
+        cache_params={"listing": "in_app", "user_id": user_id, "unread_only": unread_only}
+    )
+    # Same freshness as the page total
+    unread_count, _ = count_rows(
+        db,
+        _in_app_notifications_statement(user_id, unread_only=True),
+        cache_params={"listing": "in_app", "user_id": user_id, "unread_only": True}
+    )
+    return page, unread_count
 
 class NotificationRepository:
     """Repository for notification and smart reminder data access operations"""
@@ -223,6 +320,83 @@ class NotificationRepository:
         self.db.refresh(queue_item)
         return queue_item
     
+    def claim_due_notifications(
+        self,
+        limit: int,
+        lease_seconds: int,
+        channel: Optional[NotificationChannel] = None
+    ) -> List[NotificationQueue]:
+        """
+        Claim due queue items for sending and mark them 'processing'.
+        
+        Rows are selected with FOR UPDATE SKIP LOCKED, so concurrent
+        dispatchers claim disjoint batches instead of waiting on or
+        double-sending each other's rows. The claim is committed straight
+        away to keep row locks short; items left 'processing' longer than
+        lease_seconds (e.g. by a crashed worker) become claimable again.
+        Returned items are detached from the session.
+        """
+        now = datetime.utcnow()
+        stmt = select(NotificationQueue).where(
+            NotificationQueue.scheduled_for <= now,
+            or_(
+                NotificationQueue.status == 'queued',
+                and_(
+                    NotificationQueue.status == 'processing',
+                    NotificationQueue.last_attempt_at < now - timedelta(seconds=lease_seconds)
+                )
+            )
+        )
+        if channel:
+            stmt = stmt.where(NotificationQueue.channel == channel)
+        stmt = stmt.order_by(
+            NotificationQueue.priority.asc(),
+            NotificationQueue.scheduled_for.asc()
+        ).limit(limit).with_for_update(skip_locked=True)
+        
+        items = list(self.db.execute(stmt).scalars().all())
+        if items:
+            self.db.execute(
+                update(NotificationQueue)
+                .where(NotificationQueue.id.in_([item.id for item in items]))
+                .values(
+                    status='processing',
+                    last_attempt_at=now,
+                    attempts=NotificationQueue.attempts + 1
+                )
+                .execution_options(synchronize_session=False)
+            )
+            for item in items:
+                self.db.expunge(item)
+                item.status = 'processing'
+                item.last_attempt_at = now
+                item.attempts = (item.attempts or 0) + 1
+        
+        self.db.commit()
+        return items
+    
+    def complete_notifications(
+        self,
+        transitions: List[Dict[str, Any]],
+        logs: List[Dict[str, Any]]
+    ):
+        """
+        Record the outcome of a dispatched batch in one transaction.
+        
+        transitions holds {"id", "status", "error_message"} per queue item plus
+        "sent_at" or "failed_at". Items setting the same columns are applied
+        as one executemany UPDATE (at most two for a batch); logs are bulk
+        inserted.
+        """
+        by_columns: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for transition in transitions:
+            by_columns.setdefault(tuple(sorted(transition)), []).append(transition)
+        for group in by_columns.values():
+            self.db.execute(update(NotificationQueue), group)
+        if logs:
+            self.db.execute(insert(NotificationLog), logs)
+        self.db.commit()
+    
     def get_failed_notifications(self, max_attempts: int = 3) -> List[NotificationQueue]:
         """Get failed notifications for retry"""
         return self.db.query(NotificationQueue).filter(
@@ -305,6 +479,40 @@ class NotificationRepository:
         return query.order_by(desc(NotificationLog.created_at)).limit(limit).all()
 
     
+    def get_in_app_notifications(
+        self,
+        user_id: int,
+        pagination: PaginationParams,
+        unread_only: bool = False
+    ) -> Tuple[List[NotificationLog], int, int]:
+        """Get a page of in-app notifications with total and unread counts"""
+        stmt = _in_app_notifications_statement(user_id, unread_only)
+        
+        total = self.db.execute(
+            select(func.count()).select_from(stmt.subquery())
+        ).scalar() or 0
+        unread_count = self.db.execute(
+            select(func.count()).select_from(
+                _in_app_notifications_statement(user_id, unread_only=True).subquery()
+            )
+        ).scalar() or 0
+        logs = self.db.execute(
+            stmt.order_by(NotificationLog.created_at.desc(), NotificationLog.id.desc())
+            .offset(pagination.offset)
+            .limit(pagination.limit)
+        ).scalars().all()
+        
+        return list(logs), total, unread_count
+    
+    def get_in_app_notifications_page(
+        self,
+        user_id: int,
+        pagination: CursorParams,
+        unread_only: bool = False
+    ) -> Tuple[KeysetPage, int]:
+        """Get a cursor-paginated page of in-app notifications with the unread count"""
+        return fetch_in_app_notifications_page(self.db, user_id, pagination, unread_only)
+    
     def count_user_notifications(self, user_id: int) -> int:
         """Count total notifications for a user"""
         return self.db.query(NotificationLog).filter(
@@ -345,6 +553,9 @@ class NotificationRepository:
     
     def update_user_preferences(self, user_id: int, preferences: List[Dict[str, Any]]) -> List[NotificationPreference]:
         """Update user notification preferences"""
+        # The bulk delete below bypasses the flush listener
+        mark_notification_settings_written(self.db, user_id)
+        
         # Delete existing preferences
         self.db.query(NotificationPreference).filter(
             NotificationPreference.user_id == user_id
@@ -604,6 +815,13 @@ class NotificationRepository:
     
     def get_reminder_targets(self, reminder: SmartReminder) -> List[User]:
         """Get target users for a reminder based on its configuration"""
+        user_ids = self.get_reminder_target_ids(reminder)
+        if not user_ids:
+            return []
+        return self.db.query(User).filter(User.id.in_(user_ids)).all()
+    
+    def get_reminder_target_ids(self, reminder: SmartReminder) -> List[int]:
+        """Get target user ids for a reminder without loading the users"""
         if not reminder.event_id:
             return []
             
@@ -613,32 +831,119 @@ class NotificationRepository:
                 import json
                 user_ids = json.loads(reminder.target_specific_users)
                 if user_ids:
-                    return self.db.query(User).filter(User.id.in_(user_ids)).all()
+                    return [
+                        row[0] for row in
+                        self.db.query(User.id).filter(User.id.in_(user_ids)).all()
+                    ]
             except (ValueError, TypeError):
                 pass
                 
         # Priority 2: RSVP status
         if reminder.target_rsvp_status:
-            invitations = self.db.query(EventInvitation).filter(
-                EventInvitation.event_id == reminder.event_id,
-                EventInvitation.rsvp_status == reminder.target_rsvp_status
-            ).all()
-            user_ids = [inv.user_id for inv in invitations]
+            user_ids = [
+                row[0] for row in self.db.query(EventInvitation.user_id).filter(
+                    EventInvitation.event_id == reminder.event_id,
+                    EventInvitation.rsvp_status == reminder.target_rsvp_status
+                ).distinct().all()
+            ]
             if user_ids:
-                return self.db.query(User).filter(User.id.in_(user_ids)).all()
-                
+                return user_ids
+            
         # Priority 3: All guests
         if reminder.target_all_guests:
             # Get all invited users
-            invitations = self.db.query(EventInvitation).filter(
-                EventInvitation.event_id == reminder.event_id,
-                EventInvitation.rsvp_status != 'declined'
-            ).all()
-            user_ids = [inv.user_id for inv in invitations]
-            if user_ids:
-                return self.db.query(User).filter(User.id.in_(user_ids)).all()
+            return [
+                row[0] for row in self.db.query(EventInvitation.user_id).filter(
+                    EventInvitation.event_id == reminder.event_id,
+                    EventInvitation.rsvp_status != 'declined'
+                ).distinct().all()
+            ]
             
         return []
+    
+    def get_preferences_for_users(
+        self,
+        user_ids: List[int],
+        notification_type: NotificationType
+    ) -> Dict[int, NotificationPreference]:
+        """Get one notification type's preferences for many users, keyed by user id"""
+        if not user_ids:
+            return {}
+        preferences = self.db.query(NotificationPreference).filter(
+            NotificationPreference.user_id.in_(user_ids),
+            NotificationPreference.notification_type == notification_type
+        ).all()
+        return {preference.user_id: preference for preference in preferences}
+    
+    def get_cached_preferences(
+        self,
+        user_ids: List[int],
+        notification_type: NotificationType
+    ) -> Dict[int, Optional[Dict[str, Any]]]:
+        """
+        Delivery preferences of many users for one notification type.
+        
+        Served from the notification settings cache; users that miss are
+        loaded with one query. None means the user has no stored preference.
+        """
+        notification_type = NotificationType(notification_type)
+        
+        def load(missing: List[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+            stored = self.get_preferences_for_users(missing, notification_type)
+            return {
+                user_id: preference_values(stored[user_id]) if user_id in stored else None
+                for user_id in missing
+            }
+        
+        return _preference_cache.get_many_or_load(
+            {user_id: {"user_id": user_id, "type": notification_type.value} for user_id in set(user_ids)},
+            load,
+            tags=lambda user_id: [notification_settings_cache_tag(user_id)]
+        )
+    
+    def get_cached_active_devices(self, user_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """Active push devices of many users, cached, with misses loaded in one query"""
+        def load(missing: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+            devices: Dict[int, List[Dict[str, Any]]] = {user_id: [] for user_id in missing}
+            rows = self.db.query(UserDevice.user_id, UserDevice.device_token, UserDevice.platform).filter(
+                UserDevice.user_id.in_(missing),
+                UserDevice.is_active == True
+            ).all()
+            for user_id, device_token, platform in rows:
+                devices[user_id].append({"device_token": device_token, "platform": DevicePlatform(platform).value})
+            return devices
+        
+        return _device_cache.get_many_or_load(
+            {user_id: {"user_id": user_id} for user_id in set(user_ids)},
+            load,
+            tags=lambda user_id: [notification_settings_cache_tag(user_id)]
+        )
+    
+    def replace_queued_reminder_notifications(
+        self,
+        reminder_id: int,
+        queue_rows: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Swap a reminder's queued notifications for queue_rows in one transaction.
+        
+        Still-queued rows are cancelled and the new rows bulk inserted, so
+        re-running a fan-out (a retried task, an edited reminder) never
+        leaves duplicates behind.
+        """
+        self.db.execute(
+            update(NotificationQueue)
+            .where(
+                NotificationQueue.reminder_id == reminder_id,
+                NotificationQueue.status == 'queued'
+            )
+            .values(status='cancelled')
+            .execution_options(synchronize_session=False)
+        )
+        if queue_rows:
+            self.db.execute(insert(NotificationQueue), queue_rows)
+        self.db.commit()
+        return len(queue_rows)
 
 
     def update_user_preference(self, preference_id: int, update_data: Dict[str, Any]) -> NotificationPreference:
@@ -702,6 +1007,24 @@ class NotificationRepository:
             return True
         return False
 
+    def deactivate_device_tokens(self, tokens_by_user: Dict[int, Iterable[str]]) -> int:
+        """Deactivate devices whose push tokens were rejected; committed by the caller"""
+        deactivated = 0
+        for user_id, tokens in tokens_by_user.items():
+            deactivated += self.db.execute(
+                update(UserDevice)
+                .where(
+                    UserDevice.user_id == user_id,
+                    UserDevice.device_token.in_(list(tokens)),
+                    UserDevice.is_active == True
+                )
+                .values(is_active=False)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            # Bulk updates skip the flush listener
+            mark_notification_settings_written(self.db, user_id)
+        return deactivated
+
     def unregister_device_by_id(self, user_id: int, device_id: int) -> bool:
         """Unregister (deactivate) a device by ID"""
         device = self.db.query(UserDevice).filter(
@@ -727,3 +1050,57 @@ class NotificationRepository:
                 query = query.filter(SmartReminder.creator_id == filters['creator_id'])
         
         return query.count()
+
+
+class AsyncNotificationRepository:
+    """Async repository for the in-app notification feed read path"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_in_app_notifications(
+        self,
+        user_id: int,
+        pagination: PaginationParams,
+        unread_only: bool = False
+    ) -> Tuple[List[NotificationLog], int, int]:
+        """Get a page of in-app notifications with total and unread counts"""
+        stmt = _in_app_notifications_statement(user_id, unread_only)
+        
+        total = (await self.db.execute(
+            select(func.count()).select_from(stmt.subquery())
+        )).scalar() or 0
+        unread_count = (await self.db.execute(
+            select(func.count()).select_from(
+                _in_app_notifications_statement(user_id, unread_only=True).subquery()
+            )
+        )).scalar() or 0
+        result = await self.db.execute(
+            stmt.order_by(NotificationLog.created_at.desc(), NotificationLog.id.desc())
+            .offset(pagination.offset)
+            .limit(pagination.limit)
+        )
+        
+        return list(result.scalars().all()), total, unread_count
+    
+    async def get_in_app_notifications_page(
+        self,
+        user_id: int,
+        pagination: CursorParams,
+        unread_only: bool = False
+    ) -> Tuple[KeysetPage, int]:
+        """Get a cursor-paginated page of in-app notifications with the unread count"""
+        page = await fetch_keyset_page_async(
+            self.db,
+            _in_app_notifications_statement(user_id, unread_only),
+            NOTIFICATION_KEYSET,
+            size=pagination.size,
+            cursor=pagination.cursor,
+            cache_params={"listing": "in_app", "user_id": user_id, "unread_only": unread_only}
+        )
+        unread_count, _ = await count_rows_async(
+            self.db,
+            _in_app_notifications_statement(user_id, unread_only=True),
+            cache_params={"listing": "in_app", "user_id": user_id, "unread_only": True}
+        )
+        return page, unread_count
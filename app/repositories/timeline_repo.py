@@ -9,6 +9,10 @@ from app.models.timeline_models import (
 from app.models.user_models import User
 from app.models.event_models import Event
 from app.schemas.pagination import PaginationParams, SortParams
+from app.core.cache import invalidate_tags
+
+# Cache tag for results listing public templates (e.g. event discovery)
+PUBLIC_TEMPLATES_CACHE_TAG = "timeline_templates:public"
 
 class TimelineRepository:
     """Repository for timeline data access operations"""
@@ -323,6 +327,8 @@ class TimelineRepository:
         self.db.add(template)
         self.db.commit()
         self.db.refresh(template)
+        
+        invalidate_tags(PUBLIC_TEMPLATES_CACHE_TAG)
         return template
     
     def update_template(self, template_id: int, update_data: Dict[str, Any]) -> Optional[TimelineTemplate]:
@@ -337,6 +343,8 @@ class TimelineRepository:
         
         self.db.commit()
         self.db.refresh(template)
+        
+        invalidate_tags(PUBLIC_TEMPLATES_CACHE_TAG)
         return template
     
     def increment_template_usage(self, template_id: int):
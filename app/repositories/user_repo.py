@@ -1,10 +1,172 @@
 from typing import Optional, List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy import and_, or_, func, desc, asc, select, inspect
+from sqlalchemy import event as orm_event
 from app.models.user_models import User, UserProfile, UserSession
 from app.schemas.pagination import PaginationParams, SortParams
+from app.core.auth_state import auth_state
+from app.core.cache import ReadThroughCache, invalidate_tags
+from app.core.config import settings
+from app.core.security import TokenClaims, token_digest
 from datetime import datetime, timedelta
 
+# User columns checked by the auth dependencies, cached per user
+PRINCIPAL_FIELDS = ("id", "is_active", "is_verified", "is_superuser", "signup_method")
+
+# Writes to these also drop the cached principal; a password change ends any
+# grace period a stale entry could give
+_PRINCIPAL_WRITE_FIELDS = ("is_active", "is_verified", "is_superuser", "signup_method", "hashed_password")
+
+def auth_principal_cache_tag(user_id: int) -> str:
+    """Tag for a user's cached authentication principal"""
+    return f"auth_principal:user:{user_id}"
+
+_principal_cache = ReadThroughCache(
+    "auth_principal",
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_SECONDS,
+    response_type=Optional[Dict[str, Any]],
+    versioned=True
+)
+
+def auth_sessions_cache_tag(user_id: int) -> str:
+    """Tag for a user's cached revoked sessions"""
+    return f"auth_sessions:user:{user_id}"
+
+_revocation_cache = ReadThroughCache(
+    "revoked_sessions",
+    ttl_seconds=settings.AUTH_REVOCATION_CACHE_SECONDS,
+    response_type=Dict[str, List[Any]],
+    versioned=True
+)
+
+@orm_event.listens_for(Session, "after_flush")
+def _collect_written_auth_state(session, flush_context):
+    """
+    Remember whose account flags or sessions changed so their cached auth
+    state goes stale on commit, and which sessions ended so their refresh
+    state is dropped from Redis
+    """
+    tags = session.info.setdefault("written_auth_tags", set())
+    ended = session.info.setdefault("ended_auth_sessions", set())
+    for instance in (*session.new, *session.deleted):
+        if isinstance(instance, User) and instance.id:
+            tags.add(auth_principal_cache_tag(instance.id))
+        elif isinstance(instance, UserSession) and instance.user_id and instance in session.deleted:
+            tags.add(auth_sessions_cache_tag(instance.user_id))
+            ended.add(instance.id)
+    for instance in session.dirty:
+        if isinstance(instance, User) and instance.id:
+            attrs = inspect(instance).attrs
+            if any(attrs[field].history.has_changes() for field in _PRINCIPAL_WRITE_FIELDS):
+                tags.add(auth_principal_cache_tag(instance.id))
+        elif isinstance(instance, UserSession) and instance.user_id:
+            if inspect(instance).attrs.is_active.history.has_changes():
+                tags.add(auth_sessions_cache_tag(instance.user_id))
+                if not instance.is_active:
+                    ended.add(instance.id)
+
+@orm_event.listens_for(Session, "after_commit")
+def _invalidate_written_auth_state(session):
+    tags = session.info.pop("written_auth_tags", None)
+    if tags:
+        invalidate_tags(*tags)
+    ended = session.info.pop("ended_auth_sessions", None)
+    if ended:
+        auth_state.revoke_sessions(ended)
+
+@orm_event.listens_for(Session, "after_rollback")
+def _discard_written_auth_state(session):
+    session.info.pop("written_auth_tags", None)
+    session.info.pop("ended_auth_sessions", None)
+
+def _principal_values(row) -> Optional[Dict[str, Any]]:
+    return dict(row._mapping) if row is not None else None
+
+def get_cached_principal(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Account flags of a user as checked on every authenticated request.
+
+    Served from the principal cache; a miss selects just these columns.
+    None means the user does not exist.
+    """
+    def load() -> Optional[Dict[str, Any]]:
+        columns = [getattr(User, field) for field in PRINCIPAL_FIELDS]
+        return _principal_values(db.execute(select(*columns).where(User.id == user_id)).first())
+
+    return _principal_cache.get_or_load(
+        {"user_id": user_id}, load, tags=[auth_principal_cache_tag(user_id)]
+    )
+
+async def get_cached_principal_async(db: AsyncSession, user_id: int) -> Optional[Dict[str, Any]]:
+    """Async equivalent of get_cached_principal"""
+    params = {"user_id": user_id}
+    tags = [auth_principal_cache_tag(user_id)]
+    found, principal = _principal_cache.get(params)
+    if found:
+        return principal
+    generations = _principal_cache.tag_generations(tags)
+    columns = [getattr(User, field) for field in PRINCIPAL_FIELDS]
+    principal = _principal_values((await db.execute(select(*columns).where(User.id == user_id))).first())
+    _principal_cache.set(params, principal, tags, generations)
+    return principal
+
+def _revoked_sessions_query(user_id: int):
+    """Sessions deactivated within the access token lifetime"""
+    cutoff = datetime.utcnow() - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return select(UserSession.id, UserSession.session_token).where(
+        UserSession.user_id == user_id,
+        UserSession.is_active == False,
+        UserSession.updated_at >= cutoff
+    )
+
+def _revoked_sessions_values(rows) -> Dict[str, List[Any]]:
+    return {
+        "session_ids": [session_id for session_id, _ in rows],
+        "token_digests": [token_digest(session_token) for _, session_token in rows]
+    }
+
+def get_revoked_sessions(db: Session, user_id: int) -> Dict[str, List[Any]]:
+    """
+    Sessions of a user whose access tokens may still be unexpired but must be refused.
+    
+    Returns the ids of sessions deactivated within the access token
+    lifetime, and the digests of their current access tokens for tokens
+    issued before access tokens carried a session id. Cached until the
+    user's sessions next change, so requests do not query user_sessions.
+    """
+    def load() -> Dict[str, List[Any]]:
+        return _revoked_sessions_values(db.execute(_revoked_sessions_query(user_id)).all())
+    
+    return _revocation_cache.get_or_load(
+        {"user_id": user_id}, load, tags=[auth_sessions_cache_tag(user_id)]
+    )
+
+async def get_revoked_sessions_async(db: AsyncSession, user_id: int) -> Dict[str, List[Any]]:
+    """Async equivalent of get_revoked_sessions"""
+    params = {"user_id": user_id}
+    tags = [auth_sessions_cache_tag(user_id)]
+    found, revoked = _revocation_cache.get(params)
+    if found:
+        return revoked
+    generations = _revocation_cache.tag_generations(tags)
+    revoked = _revoked_sessions_values((await db.execute(_revoked_sessions_query(user_id))).all())
+    _revocation_cache.set(params, revoked, tags, generations)
+    return revoked
+
+def _matches_revoked(revoked: Dict[str, List[Any]], claims: TokenClaims) -> bool:
+    if claims.session_id is not None:
+        return claims.session_id in revoked["session_ids"]
+    return claims.digest in revoked["token_digests"]
+
+def is_token_revoked(db: Session, claims: TokenClaims) -> bool:
+    """Whether the session behind a verified access token has been logged out"""
+    return _matches_revoked(get_revoked_sessions(db, int(claims.subject)), claims)
+
+async def is_token_revoked_async(db: AsyncSession, claims: TokenClaims) -> bool:
+    """Async equivalent of is_token_revoked"""
+    return _matches_revoked(await get_revoked_sessions_async(db, int(claims.subject)), claims)
+
 class UserRepository:
     """Repository for user data access operations"""
     
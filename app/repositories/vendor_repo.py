@@ -9,6 +9,10 @@ from app.models.vendor_models import (
 )
 from app.models.user_models import User
 from app.schemas.pagination import PaginationParams, SortParams
+from app.core.cache import invalidate_tags
+
+# Cache tag for vendor search results
+VENDOR_SEARCH_CACHE_TAG = "vendors:search"
 
 class VendorRepository:
     """Repository for vendor data access operations"""
@@ -112,6 +116,8 @@ class VendorRepository:
         self.db.add(vendor)
         self.db.commit()
         self.db.refresh(vendor)
+        
+        invalidate_tags(VENDOR_SEARCH_CACHE_TAG)
         return vendor
     
     def update(self, vendor_id: int, update_data: Dict[str, Any]) -> Optional[Vendor]:
@@ -126,6 +132,8 @@ class VendorRepository:
         
         self.db.commit()
         self.db.refresh(vendor)
+        
+        invalidate_tags(VENDOR_SEARCH_CACHE_TAG)
         return vendor
     
     def delete(self, vendor_id: int) -> bool:
@@ -136,6 +144,8 @@ class VendorRepository:
         
         vendor.status = VendorStatus.INACTIVE
         self.db.commit()
+        
+        invalidate_tags(VENDOR_SEARCH_CACHE_TAG)
         return True
     
     # Vendor Service operations
@@ -449,6 +459,9 @@ class VendorRepository:
             vendor.total_reviews = 0
         
         self.db.commit()
+        
+        # Rating drives search ordering
+        invalidate_tags(VENDOR_SEARCH_CACHE_TAG)
     
     def exists_by_email(self, email: str, exclude_vendor_id: Optional[int] = None) -> bool:
         """Check if vendor exists by email"""
@@ -118,14 +118,27 @@ class BulkPhoneInvitationCreate(BaseModel):
 
 
 class BulkPhoneInvitationResponse(BaseModel):
-    """Response from bulk phone invitation request"""
-    sent: List[Dict[str, Any]]
+    """Response from bulk phone invitation request; the SMS are sent by a background job"""
+    job_id: str
+    status: str  # 'queued', 'completed' when no number was valid
+    queued: List[Dict[str, Any]]
     failed: List[Dict[str, Any]]
     total: int
-    success_count: int
+    queued_count: int
     failure_count: int
 
 
+class BulkPhoneInvitationProgress(BaseModel):
+    """Progress of a bulk phone invitation job"""
+    job_id: str
+    status: str  # 'queued', 'in_progress', 'completed'
+    total: int
+    pending: int
+    sent_count: int
+    failure_count: int
+    failed: List[Dict[str, Any]]
+
+
 class BulkEmailInvitationCreate(BaseModel):
     """Schema for sending bulk invitations directly to email addresses
 
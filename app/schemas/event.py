@@ -642,6 +642,8 @@ class EventListResponse(BaseModel):
     total: int
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 class DiscoveryTemplatesResponse(BaseModel):
     templates: List[TimelineTemplateResponse]
@@ -91,6 +91,8 @@ class MessageListResponse(BaseModel):
     per_page: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 # Reaction schemas
 class MessageReactionCreate(BaseModel):
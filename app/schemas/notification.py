@@ -379,6 +379,8 @@ class InAppNotificationListResponse(BaseModel):
     has_next: bool
     has_prev: bool
     unread_count: int
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 class MarkNotificationReadRequest(BaseModel):
     """Schema for marking notifications as read."""
@@ -414,6 +416,7 @@ class NotificationQueueStatus(BaseModel):
     failed_count: int
     next_scheduled: Optional[datetime] = None
     last_processed: Optional[datetime] = None
+    scheduler: Optional[Dict[str, Any]] = None  # Dispatch lag, batch and push stats from the scheduler process
 
 class WebSocketStatsResponse(BaseModel):
     """Schema for WebSocket connection statistics."""
@@ -422,3 +425,4 @@ class WebSocketStatsResponse(BaseModel):
     connections_by_user: Dict[str, int]
     total_messages_sent: int
     uptime_seconds: int
+    workers: int = 1  # Worker processes reporting connections
@@ -19,6 +19,11 @@ class PaginationParams(BaseModel):
         """Get limit for database queries"""
         return self.size
 
+class CursorParams(BaseModel):
+    """Schema for keyset (cursor) pagination parameters"""
+    cursor: Optional[str] = Field(None, description="Opaque cursor from the previous page's next_cursor")
+    size: int = Field(default=20, ge=1, le=100, description="Number of items per page")
+
 class PaginationMeta(BaseModel):
     """Schema for pagination metadata"""
     page: int = Field(..., description="Current page number")
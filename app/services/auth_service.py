@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
 from sqlalchemy.orm import Session
+from app.core.auth_state import auth_state
 from app.core.security import (
-    create_access_token, create_refresh_token, verify_refresh_token,
-    verify_password, get_password_hash
+    create_access_token, create_refresh_token, verify_refresh_token_claims,
+    verify_token_claims, verify_password, get_password_hash, password_hasher
 )
 from app.core.errors import AuthenticationError, ValidationError, NotFoundError
 from app.db.user_database import UserDatabase
@@ -12,10 +13,15 @@ from app.schemas.user import UserLogin, UserRegister, TokenResponse
 from app.core.config import settings
 from app.services.email_service import email_service
 from app.services.otp_service import OTPService
+import calendar
 import secrets
 import string
 import asyncio
 
+def _epoch(value: datetime) -> float:
+    """Seconds since the epoch of a naive UTC datetime"""
+    return calendar.timegm(value.utctimetuple())
+
 class AuthService:
     """Authentication service for handling user auth flows"""
     
@@ -37,12 +43,18 @@ class AuthService:
         alphabet = string.ascii_letters + string.digits + string.punctuation
         return ''.join(secrets.choice(alphabet) for _ in range(length))
     
-    def register_user(self, user_data: UserRegister, skip_verification: bool = False) -> User:
+    def register_user(
+        self,
+        user_data: UserRegister,
+        skip_verification: bool = False,
+        hashed_password: Optional[str] = None
+    ) -> User:
         """Register a new user with email or phone number
         
         Args:
             user_data: User registration data
             skip_verification: If True, skip sending verification OTP (for OAuth users)
+            hashed_password: Password hash computed by the caller, see register_user_async
         """
         # Validate passwords match
         if user_data.password != user_data.confirm_password:
@@ -73,7 +85,7 @@ class AuthService:
                 raise ValidationError("Username is already taken")
         
         # Create new user using the updated create_user method
-        user = self.user_db.create_user(user_data)
+        user = self.user_db.create_user(user_data, hashed_password=hashed_password)
         
         # Send verification OTP based on user's signup method (unless skipped for OAuth)
         if not skip_verification:
@@ -88,6 +100,13 @@ class AuthService:
         
         return user
     
+    async def register_user_async(self, user_data: UserRegister, skip_verification: bool = False) -> User:
+        """register_user with the password hashed off the event loop"""
+        if user_data.password != user_data.confirm_password:
+            raise ValidationError("Passwords do not match")
+        hashed_password = await password_hasher.hash(user_data.password)
+        return self.register_user(user_data, skip_verification, hashed_password=hashed_password)
+    
     def authenticate_user(self, login_data: UserLogin) -> User:
         """Authenticate user with email/phone and password"""
         # Determine identifier (email or phone)
@@ -108,6 +127,35 @@ class AuthService:
         
         return user
     
+    async def authenticate_user_async(self, login_data: UserLogin) -> User:
+        """
+        authenticate_user with the password verified off the event loop.
+        
+        A hash made with outdated parameters is replaced on the user; the
+        session commit in login_async persists it.
+        """
+        identifier = login_data.email if login_data.email else login_data.phone_number
+        
+        if not identifier:
+            raise AuthenticationError("Email or phone number is required")
+        
+        user = self.user_db.get_user_by_identifier(identifier)
+        valid = False
+        if user:
+            valid, new_hash = await password_hasher.verify_and_update(login_data.password, user.hashed_password)
+            if valid and new_hash:
+                user.hashed_password = new_hash
+        if not valid:
+            if login_data.email:
+                raise AuthenticationError("Invalid email or password")
+            else:
+                raise AuthenticationError("Invalid phone number or password")
+        
+        if not user.is_active:
+            raise AuthenticationError("Account is deactivated")
+        
+        return user
+    
     def create_user_session(
         self, 
         user: User, 
@@ -116,24 +164,32 @@ class AuthService:
         device_info: Optional[str] = None
     ) -> Tuple[str, str]:
         """Create user session and return access and refresh tokens"""
-        # Create tokens
-        access_token = create_access_token(subject=user.id)
-        refresh_token = create_refresh_token(subject=user.id)
-        
-        # Create session record
+        # The tokens carry the session id, so the row records an opaque
+        # session token and the jti of the refresh token instead of the
+        # tokens themselves, and is written by a single INSERT
+        refresh_token_id = self._new_refresh_token_id()
         session = UserSession(
             user_id=user.id,
-            session_token=access_token,
-            refresh_token=refresh_token,
+            session_token=self._generate_secure_token(),
+            refresh_token=refresh_token_id,
             expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
             ip_address=ip_address,
             user_agent=user_agent,
             device_info=device_info
         )
-        
         self.db.add(session)
+        self.db.flush()
+        
+        # Create tokens
+        access_token = create_access_token(subject=user.id, session_id=session.id)
+        refresh_token = create_refresh_token(
+            subject=user.id, session_id=session.id, token_id=refresh_token_id
+        )
         self.db.commit()
         
+        # Refreshes rotate the token in Redis and record its jti on the row
+        auth_state.store_session(session.id, user.id, refresh_token, _epoch(session.expires_at))
+        
         return access_token, refresh_token
     
     def login(self, login_data: UserLogin, **session_kwargs) -> TokenResponse:
@@ -152,18 +208,46 @@ class AuthService:
             user=user
         )
     
+    async def login_async(self, login_data: UserLogin, **session_kwargs) -> TokenResponse:
+        """login with password verification off the event loop"""
+        user = await self.authenticate_user_async(login_data)
+        
+        access_token, refresh_token = self.create_user_session(user, **session_kwargs)
+        
+        return TokenResponse(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer",
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            user=user
+        )
+    
     def refresh_token(self, refresh_token: str) -> TokenResponse:
         """Refresh access token using refresh token"""
         # Verify refresh token
-        user_id = verify_refresh_token(refresh_token)
-        if not user_id:
+        claims = verify_refresh_token_claims(refresh_token)
+        if not claims:
             raise AuthenticationError("Invalid refresh token")
-        
-        # Get user session
-        session = self.db.query(UserSession).filter(
-            UserSession.refresh_token == refresh_token,
-            UserSession.is_active == True
-        ).first()
+        user_id = claims.subject
+        
+        if claims.session_id is not None:
+            response = self._refresh_from_auth_state(claims.session_id, user_id, refresh_token)
+            if response is not None:
+                return response
+        
+        # Session not in Redis (created before the move or while Redis was
+        # down) or Redis unavailable: rotate on the session row, which holds
+        # the jti of the current refresh token, so replayed ones are refused
+        query = self.db.query(UserSession).filter(UserSession.is_active == True)
+        if claims.session_id is not None:
+            query = query.filter(
+                UserSession.id == claims.session_id,
+                UserSession.refresh_token == claims.token_id
+            )
+        else:
+            # Issued before tokens carried a session id; the row holds the token
+            query = query.filter(UserSession.refresh_token == refresh_token)
+        session = query.first()
         
         if not session:
             raise AuthenticationError("Session not found or expired")
@@ -180,16 +264,21 @@ class AuthService:
             raise AuthenticationError("User not found or inactive")
         
         # Create new tokens
-        new_access_token = create_access_token(subject=user.id)
-        new_refresh_token = create_refresh_token(subject=user.id)
+        new_refresh_token_id = self._new_refresh_token_id()
+        new_access_token = create_access_token(subject=user.id, session_id=session.id)
+        new_refresh_token = create_refresh_token(
+            subject=user.id, session_id=session.id, token_id=new_refresh_token_id
+        )
         
         # Update session
-        session.session_token = new_access_token
-        session.refresh_token = new_refresh_token
+        session.refresh_token = new_refresh_token_id
         session.expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
         
         self.db.commit()
         
+        # Later refreshes of this session are served from Redis
+        auth_state.store_session(session.id, user.id, new_refresh_token, _epoch(session.expires_at))
+        
         return TokenResponse(
             access_token=new_access_token,
             refresh_token=new_refresh_token,
@@ -198,6 +287,58 @@ class AuthService:
             user=user
         )
     
+    def _refresh_from_auth_state(
+        self, session_id: int, user_id: str, refresh_token: str
+    ) -> Optional[TokenResponse]:
+        """Rotate the refresh token in Redis; None when the session row has to be used"""
+        expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        new_refresh_token_id = self._new_refresh_token_id()
+        new_refresh_token = create_refresh_token(
+            subject=user_id, session_id=session_id, token_id=new_refresh_token_id
+        )
+        
+        rotation = auth_state.rotate_refresh_token(
+            session_id, refresh_token, new_refresh_token, _epoch(expires_at)
+        )
+        if rotation is None or rotation.status == "missing":
+            return None
+        if rotation.status == "mismatch":
+            # Already rotated: a replayed or stolen refresh token
+            raise AuthenticationError("Session not found or expired")
+
+        # Record the new jti on the row, so a refresh that falls back to the
+        # database accepts only the current token. The row is also the
+        # durable logout record; the Redis entry can outlive it when the
+        # delete at logout fails or Redis was being skipped
+        values = {UserSession.refresh_token: new_refresh_token_id}
+        # Keep the row's expiry roughly current for session listings and
+        # for refreshes that fall back to the database
+        sync_expiry = _epoch(expires_at) - rotation.recorded_expires_at >= settings.AUTH_SESSION_SYNC_HOURS * 3600
+        if sync_expiry:
+            values[UserSession.expires_at] = expires_at
+        session_active = self.db.query(UserSession).filter(
+            UserSession.id == session_id,
+            UserSession.is_active == True
+        ).update(values, synchronize_session=False)
+        self.db.commit()
+        if not session_active:
+            auth_state.revoke_sessions([session_id])
+            raise AuthenticationError("Session not found or expired")
+        if sync_expiry:
+            auth_state.record_session_expiry(session_id, _epoch(expires_at))
+
+        user = self.user_db.get_user_by_id(rotation.user_id)
+        if not user or not user.is_active:
+            raise AuthenticationError("User not found or inactive")
+        
+        return TokenResponse(
+            access_token=create_access_token(subject=user.id, session_id=session_id),
+            refresh_token=new_refresh_token,
+            token_type="bearer",
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            user=user
+        )
+    
     def logout(self, user_id: int, session_token: Optional[str] = None) -> bool:
         """Logout user by deactivating session(s)"""
         query = self.db.query(UserSession).filter(
@@ -206,8 +347,13 @@ class AuthService:
         )
         
         if session_token:
-            # Logout specific session
-            query = query.filter(UserSession.session_token == session_token)
+            # Logout specific session; tokens refreshed through Redis are not
+            # written to the row, so match on the session id they carry
+            claims = verify_token_claims(session_token)
+            if claims and claims.session_id is not None:
+                query = query.filter(UserSession.id == claims.session_id)
+            else:
+                query = query.filter(UserSession.session_token == session_token)
         
         sessions = query.all()
         
@@ -508,6 +654,11 @@ class AuthService:
             print(f"Failed to send email verification: {str(e)}")
             return False
     
+    @staticmethod
+    def _new_refresh_token_id() -> str:
+        """jti for a session's refresh token, recorded on the session row"""
+        return secrets.token_hex(16)
+    
     def _generate_secure_token(self, length: int = 32) -> str:
         """Generate a secure random token"""
         alphabet = string.ascii_letters + string.digits
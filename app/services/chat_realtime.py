@@ -0,0 +1,188 @@
+"""
+Real-time chat fan-out.
+
+Chat changes (messages created, edited or deleted, reactions, typing and
+read watermarks) are published to a per-event Redis channel,
+event:{event_id}:chat. Every worker's RedisSubscriber listens on the
+channel pattern and hands the payload to its ConnectionManager, which
+writes it to the sockets subscribed to that event. A change made on one
+gunicorn worker therefore reaches clients connected to any worker, and
+clients no longer need to poll the messages endpoint.
+
+Payloads are serialized once, at publish time, and relayed as-is.
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.cache import cache_backend
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.websocket_manager import websocket_manager
+
+logger = get_logger(__name__)
+
+CHAT_CHANNEL_PATTERN = "event:*:chat"
+
+# Chat event types sent to clients as "chat.<type>"
+MESSAGE_CREATED = "message_created"
+MESSAGE_UPDATED = "message_updated"
+MESSAGE_DELETED = "message_deleted"
+REACTION_ADDED = "reaction_added"
+REACTION_REMOVED = "reaction_removed"
+TYPING = "typing"
+READ_WATERMARK = "read_watermark"
+
+
+def chat_channel(event_id: int) -> str:
+    """Redis channel carrying one event's chat updates"""
+    return f"event:{event_id}:chat"
+
+
+def parse_chat_channel(channel: str) -> Optional[int]:
+    """Event ID of a chat channel name, or None for other channels"""
+    parts = channel.split(":")
+    if len(parts) == 3 and parts[0] == "event" and parts[2] == "chat" and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+
+class TypingCoalescer:
+    """
+    Drops redundant typing indicators.
+
+    Clients send "typing" on every keystroke. A change of state (started or
+    stopped typing) is always broadcast; a repeated "still typing" only once
+    per interval, which is enough for clients to keep the indicator alive.
+    """
+
+    def __init__(self, interval_seconds: float, max_entries: int = 10000):
+        self.interval_seconds = interval_seconds
+        self.max_entries = max_entries
+        self._state: Dict[Tuple[int, int], Tuple[bool, float]] = {}
+        self._lock = threading.Lock()
+
+    def should_publish(self, event_id: int, user_id: int, is_typing: bool) -> bool:
+        key = (event_id, user_id)
+        now = time.monotonic()
+        with self._lock:
+            previous = self._state.get(key)
+            if previous is not None:
+                was_typing, published_at = previous
+                if was_typing == is_typing and (not is_typing or now - published_at < self.interval_seconds):
+                    return False
+
+            if is_typing:
+                self._state[key] = (True, now)
+                if len(self._state) > self.max_entries:
+                    self._evict(now)
+            else:
+                self._state[key] = (False, now)
+            return True
+
+    def _evict(self, now: float):
+        """Forget entries older than the interval; they would publish anyway"""
+        stale = [
+            key for key, (_, published_at) in self._state.items()
+            if now - published_at >= self.interval_seconds
+        ]
+        for key in stale:
+            del self._state[key]
+
+
+class ChatBroadcaster:
+    """Publishes chat updates to the per-event Redis channels"""
+
+    def __init__(self):
+        self.typing = TypingCoalescer(settings.CHAT_TYPING_COALESCE_SECONDS)
+        self._async_client: Optional[aioredis.Redis] = None
+        # Publish tasks in flight; the loop only keeps weak references to tasks
+        self._pending: Set[asyncio.Task] = set()
+        self.published = 0
+        self.coalesced = 0
+        self.local_fallbacks = 0
+
+    def publish(self, event_id: int, event_type: str, data: Dict[str, Any]):
+        """
+        Publish a chat update without blocking the caller.
+
+        Safe to call from sync service code: inside a request it is handed
+        to the event loop, elsewhere (e.g. Celery) it is published with the
+        shared sync Redis client.
+        """
+        payload = json.dumps({
+            "type": f"chat.{event_type}",
+            "event_id": event_id,
+            "data": data,
+            "timestamp": datetime.utcnow().isoformat()
+        }, default=str)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            task = loop.create_task(self._publish_async(event_id, payload))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+        else:
+            self._publish_sync(event_id, payload)
+
+    def publish_typing(self, event_id: int, user_id: int, is_typing: bool) -> bool:
+        """Publish a typing indicator unless it is redundant; returns whether it was sent"""
+        if not self.typing.should_publish(event_id, user_id, is_typing):
+            self.coalesced += 1
+            return False
+        self.publish(event_id, TYPING, {"user_id": user_id, "is_typing": is_typing})
+        return True
+
+    async def _publish_async(self, event_id: int, payload: str):
+        try:
+            if self._async_client is None:
+                self._async_client = aioredis.from_url(
+                    settings.REDIS_URL, decode_responses=True, socket_timeout=1, socket_connect_timeout=1
+                )
+            await self._async_client.publish(chat_channel(event_id), payload)
+            self.published += 1
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Chat publish failed, delivering to this worker only: {e}")
+            self.local_fallbacks += 1
+            await websocket_manager.broadcast_to_event(event_id, payload)
+
+    def _publish_sync(self, event_id: int, payload: str):
+        client = cache_backend.redis
+        if client is not None:
+            try:
+                client.publish(chat_channel(event_id), payload)
+                self.published += 1
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Chat publish failed, delivering to this worker only: {e}")
+                cache_backend.mark_redis_down(e)
+        self.local_fallbacks += 1
+        self._deliver_local_threadsafe(event_id, payload)
+
+    def _deliver_local_threadsafe(self, event_id: int, payload: str):
+        """Hand a payload to this worker's subscribers from outside the event loop"""
+        loop = websocket_manager.loop
+        if loop is None or loop.is_closed():
+            # No socket has connected in this process (e.g. a Celery worker)
+            return
+        asyncio.run_coroutine_threadsafe(websocket_manager.broadcast_to_event(event_id, payload), loop)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "published": self.published,
+            "typing_coalesced": self.coalesced,
+            "local_fallbacks": self.local_fallbacks
+        }
+
+
+chat_broadcaster = ChatBroadcaster()
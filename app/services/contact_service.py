@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc
+from sqlalchemy import and_, or_, desc, asc, func, update
 from datetime import datetime, timedelta
 import uuid
 import re
@@ -14,10 +14,14 @@ from app.models.contact_models import (
 from app.models.user_models import User
 from app.models.event_models import Event, EventInvitation
 from app.models.shared_models import RSVPStatus
+from app.repositories.event_repo import EventRepository
 from app.core.database import get_db
 from app.core.config import settings
 from app.services.sms_service import SMSService
 from app.services.email_service import EmailService
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class ContactService:
@@ -230,7 +234,12 @@ class ContactService:
         message: Optional[str] = None,
         auto_add_to_contacts: bool = False
     ) -> Dict[str, Any]:
-        """Send invitations directly to phone numbers (with or without adding to contacts)
+        """Create invitations for phone numbers and queue their SMS as one delivery job
+        
+        Contacts and existing users for every number are resolved in one
+        query each and the invitations are inserted together. The SMS are
+        sent by a Celery job (deliver_phone_invitations); poll
+        get_phone_invitation_job with the returned job_id for progress.
         
         Args:
             sender_id: User sending the invitations
@@ -240,13 +249,15 @@ class ContactService:
             auto_add_to_contacts: If True, add phone numbers to contacts before inviting
         
         Returns:
-            Dict with success/failure counts and invitation details
+            Dict with the job id, queued invitations and numbers rejected up front
         """
         results = {
-            "sent": [],
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "queued": [],
             "failed": [],
             "total": len(phone_numbers),
-            "success_count": 0,
+            "queued_count": 0,
             "failure_count": 0
         }
         
@@ -257,120 +268,219 @@ class ContactService:
                 detail="Sender not found"
             )
         
-        event = None
-        if event_id:
-            event = self.db.query(Event).filter(Event.id == event_id).first()
-        
+        # Clean and validate every number first; duplicates get one invitation
+        cleaned_numbers: List[str] = []
         for phone_number in phone_numbers:
             try:
-                # Clean and validate phone number
                 cleaned_phone = self._clean_phone_number(phone_number)
-                if not self._is_valid_phone_number(cleaned_phone):
-                    results["failed"].append({
-                        "phone_number": phone_number,
-                        "error": "Invalid phone number format"
-                    })
-                    results["failure_count"] += 1
-                    continue
-                
-                # Check if contact exists or create one (we need a contact_id for FK)
-                contact = self.db.query(UserContact).filter(
-                    and_(
-                        UserContact.user_id == sender_id,
-                        UserContact.phone_number == cleaned_phone
-                    )
-                ).first()
-                
-                if not contact:
-                    # Always create a contact record so contact_id FK is satisfied
-                    contact = UserContact(
-                        user_id=sender_id,
-                        name=cleaned_phone,  # Use phone as name if not provided
-                        phone_number=cleaned_phone,
-                        source=ContactSource.PHONE,
-                        is_favorite=False
-                    )
-                    self.db.add(contact)
-                    self.db.flush()
-                
-                # Generate invitation token
-                invitation_token = str(uuid.uuid4())
-                
-                # Check if phone belongs to an existing user
-                recipient_user = self.db.query(User).filter(
-                    User.phone_number == cleaned_phone
-                ).first()
-                
-                # Create invitation record with required fields populated
-                invitation = ContactInvitation(
-                    sender_id=sender_id,
-                    recipient_id=recipient_user.id if recipient_user else None,
-                    contact_id=contact.id if contact else None,
-                    event_id=event_id,
-                    invitation_token=invitation_token,
-                    message=message,
-                    invitation_type="app_invite" if event_id is None else "event_invite",
-                    delivery_method="sms",
-                    recipient_phone=cleaned_phone,
-                    status=ContactInviteStatus.PENDING
-                )
-                self.db.add(invitation)
-                self.db.flush()
-                
-                # Build SMS message
-                base_url = (settings.DEEP_LINK_BASE_URL or settings.FRONTEND_URL).rstrip("/")
-                if event:
-                    sms_message = f"Hi! {sender.full_name} invited you to '{event.title}' on PlanEtAl. Join here: {base_url}/invite/{invitation_token}"
-                else:
-                    sms_message = f"Hi! {sender.full_name} invited you to join PlanEtAl - the ultimate event planning app! Join here: {base_url}/invite/{invitation_token}"
-                
-                if message:
-                    sms_message += f"\n\nPersonal message: {message}"
-                
-                # Send SMS via Termii (best-effort; do not crash on failure)
-                try:
-                    sms_result = self.sms_service.send_sms(
-                        to_phone=cleaned_phone,
-                        message=sms_message
-                    )
-                except Exception as sms_err:
-                    sms_result = {"status": "failed", "error": str(sms_err)}
-                
-                # Update invitation status based on SMS result
-                sms_status = (
-                    (sms_result.get("status") or "").strip().lower()
-                    if isinstance(sms_result, dict)
-                    else ""
-                )
-                successful_sms_statuses = {"success", "sent", "queued", "accepted"}
-                if sms_status in successful_sms_statuses:
-                    invitation.status = ContactInviteStatus.SENT
-                    results["sent"].append({
-                        "phone_number": cleaned_phone,
-                        "invitation_id": invitation.id,
-                        "sms_status": sms_result
-                    })
-                    results["success_count"] += 1
-                else:
-                    invitation.status = ContactInviteStatus.FAILED
-                    results["failed"].append({
-                        "phone_number": cleaned_phone,
-                        "error": sms_result.get("error") if isinstance(sms_result, dict) else "SMS delivery failed",
-                        "details": sms_result
-                    })
-                    results["failure_count"] += 1
-                
-            except Exception as e:
+            except (NumberParseException, ValueError):
+                cleaned_phone = None
+            if not cleaned_phone or not self._is_valid_phone_number(cleaned_phone):
                 results["failed"].append({
                     "phone_number": phone_number,
-                    "error": str(e)
+                    "error": "Invalid phone number format"
                 })
                 results["failure_count"] += 1
+            elif cleaned_phone not in cleaned_numbers:
+                cleaned_numbers.append(cleaned_phone)
+        
+        if not cleaned_numbers:
+            results["status"] = "completed"
+            return results
+        
+        # Existing contacts and users for all numbers, one query each
+        contacts = {
+            contact.phone_number: contact
+            for contact in self.db.query(UserContact).filter(
+                UserContact.user_id == sender_id,
+                UserContact.phone_number.in_(cleaned_numbers)
+            )
+        }
+        user_ids = dict(
+            self.db.query(User.phone_number, User.id).filter(User.phone_number.in_(cleaned_numbers)).all()
+        )
         
+        # Always create a contact record so contact_id FK is satisfied
+        new_contacts = [
+            UserContact(
+                user_id=sender_id,
+                name=phone,  # Use phone as name if not provided
+                phone_number=phone,
+                source=ContactSource.PHONE,
+                is_favorite=False
+            )
+            for phone in cleaned_numbers if phone not in contacts
+        ]
+        if new_contacts:
+            self.db.add_all(new_contacts)
+            self.db.flush()
+            contacts.update({contact.phone_number: contact for contact in new_contacts})
+        
+        invitations = [
+            ContactInvitation(
+                sender_id=sender_id,
+                recipient_id=user_ids.get(phone),
+                contact_id=contacts[phone].id,
+                event_id=event_id,
+                invitation_token=str(uuid.uuid4()),
+                message=message,
+                invitation_type="app_invite" if event_id is None else "event_invite",
+                delivery_method="sms",
+                recipient_phone=phone,
+                status=ContactInviteStatus.PENDING,
+                delivery_job_id=results["job_id"]
+            )
+            for phone in cleaned_numbers
+        ]
+        self.db.add_all(invitations)
         self.db.commit()
+        
+        results["queued"] = [
+            {"phone_number": invitation.recipient_phone, "invitation_id": invitation.id}
+            for invitation in invitations
+        ]
+        results["queued_count"] = len(invitations)
+        
+        self._enqueue_phone_invitations(results["job_id"])
         return results
+    
+    def _enqueue_phone_invitations(self, job_id: str):
+        """Hand a delivery job to Celery, sending inline when it cannot be enqueued"""
+        if settings.SMS_INVITES_IN_BACKGROUND:
+            try:
+                # Imported here: the task module imports this service
+                from app.tasks.invitations import send_phone_invitations
+                send_phone_invitations.apply_async(args=[job_id], task_id=job_id)
+                return
+            except Exception as e:
+                logger.warning(f"Could not enqueue SMS invitation job {job_id}, sending inline: {e}")
+        
+        self.deliver_phone_invitations(job_id)
+    
+    def deliver_phone_invitations(self, job_id: str, progress_every: int = 10) -> Dict[str, int]:
+        """Send the pending SMS of a delivery job concurrently, recording progress as it goes
+        
+        Outcomes are written back every progress_every results so
+        get_phone_invitation_job reflects the job while it runs.
+        """
+        invitations = self.db.query(ContactInvitation).filter(
+            ContactInvitation.delivery_job_id == job_id,
+            ContactInvitation.status == ContactInviteStatus.PENDING
+        ).all()
+        if not invitations:
+            return {"sent": 0, "failed": 0}
+        
+        first = invitations[0]
+        sender = self.db.query(User).filter(User.id == first.sender_id).first()
+        event = None
+        if first.event_id:
+            event = self.db.query(Event).filter(Event.id == first.event_id).first()
+        
+        base_url = (settings.DEEP_LINK_BASE_URL or settings.FRONTEND_URL).rstrip("/")
+        messages = []
+        for invitation in invitations:
+            # Build SMS message
+            invite_url = f"{base_url}/invite/{invitation.invitation_token}"
+            if event:
+                sms_message = f"Hi! {sender.full_name} invited you to '{event.title}' on PlanEtAl. Join here: {invite_url}"
+            else:
+                sms_message = f"Hi! {sender.full_name} invited you to join PlanEtAl - the ultimate event planning app! Join here: {invite_url}"
+            
+            if invitation.message:
+                sms_message += f"\n\nPersonal message: {invitation.message}"
+            messages.append((invitation.recipient_phone, sms_message))
+        
+        counts = {"sent": 0, "failed": 0}
+        successful_sms_statuses = {"success", "sent", "queued", "accepted"}
+        updates = []
+        for index, sms_result in self.sms_service.send_many(messages):
+            sms_status = (
+                (sms_result.get("status") or "").strip().lower()
+                if isinstance(sms_result, dict)
+                else ""
+            )
+            if sms_status in successful_sms_statuses:
+                counts["sent"] += 1
+                updates.append({
+                    "id": invitations[index].id,
+                    "status": ContactInviteStatus.SENT,
+                    "sent_at": datetime.utcnow(),
+                    "tracking_id": sms_result.get("message_id"),
+                    "failure_reason": None
+                })
+            else:
+                counts["failed"] += 1
+                updates.append({
+                    "id": invitations[index].id,
+                    "status": ContactInviteStatus.FAILED,
+                    "sent_at": None,
+                    "tracking_id": None,
+                    "failure_reason": (
+                        sms_result.get("error") if isinstance(sms_result, dict) else None
+                    ) or "SMS delivery failed"
+                })
+            if len(updates) >= progress_every:
+                self._record_invitation_outcomes(updates)
+                updates = []
+        
+        self._record_invitation_outcomes(updates)
+        logger.info(f"SMS invitation job {job_id}: {counts['sent']} sent, {counts['failed']} failed")
+        return counts
+    
+    def _record_invitation_outcomes(self, updates: List[Dict[str, Any]]):
+        """Write a chunk of delivery outcomes in one statement and commit"""
+        if not updates:
+            return
+        self.db.execute(update(ContactInvitation), updates)
+        self.db.commit()
+    
+    def get_phone_invitation_job(self, sender_id: int, job_id: str) -> Dict[str, Any]:
+        """Progress of a bulk phone invitation job owned by the sender"""
+        counts = dict(
+            self.db.query(ContactInvitation.status, func.count(ContactInvitation.id)).filter(
+                ContactInvitation.delivery_job_id == job_id,
+                ContactInvitation.sender_id == sender_id
+            ).group_by(ContactInvitation.status).all()
+        )
+        if not counts:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Invitation job not found"
+            )
+        
+        total = sum(counts.values())
+        pending = counts.get(ContactInviteStatus.PENDING, 0)
+        failed = counts.get(ContactInviteStatus.FAILED, 0)
+        failures = []
+        if failed:
+            failures = [
+                {"phone_number": phone, "invitation_id": invitation_id, "error": reason}
+                for invitation_id, phone, reason in self.db.query(
+                    ContactInvitation.id, ContactInvitation.recipient_phone, ContactInvitation.failure_reason
+                ).filter(
+                    ContactInvitation.delivery_job_id == job_id,
+                    ContactInvitation.status == ContactInviteStatus.FAILED
+                )
+            ]
+        
+        if pending == total:
+            job_status = "queued"
+        elif pending:
+            job_status = "in_progress"
+        else:
+            job_status = "completed"
+        
+        return {
+            "job_id": job_id,
+            "status": job_status,
+            "total": total,
+            "pending": pending,
+            "sent_count": total - pending - failed,
+            "failure_count": failed,
+            "failed": failures
+        }
 
-    def bulk_send_email_invitations(
+    async def bulk_send_email_invitations(
         self,
         sender_id: int,
         emails: List[str],
@@ -399,6 +509,7 @@ class ContactService:
             event = self.db.query(Event).filter(Event.id == event_id).first()
 
         base_url = (settings.DEEP_LINK_BASE_URL or settings.FRONTEND_URL).rstrip("/")
+        pending = []
 
         for email in emails:
             try:
@@ -447,46 +558,22 @@ class ContactService:
                 self.db.add(invitation)
                 self.db.flush()
 
-                # Build and send invite email (best-effort; do not crash on failure)
-                try:
-                    email_result = self.email_service.send_contact_invite_email_sync(
-                        to_email=email,
-                        inviter_name=sender.full_name,
-                        invitation_token=invitation_token,
-                        invite_url=invite_url,
-                        message=message,
-                        # Event-specific fields — only populated when event exists
-                        event_title=event.title if event else None,
-                        event_description=event.description if event else None,
-                        event_date=event.start_datetime.strftime("%A, %B %d, %Y") if event and event.start_datetime else None,
-                        event_time=event.start_datetime.strftime("%I:%M %p") if event and event.start_datetime else None,
-                        event_venue=event.venue_name if event else None,
-                        event_address=event.venue_address if event else None,
-                    )
-                except Exception as email_err:
-                    email_result = False
-                    results["failed"].append({
-                        "email": email,
-                        "error": str(email_err),
-                    })
-                    results["failure_count"] += 1
-                    continue
-
-                if email_result:
-                    invitation.status = ContactInviteStatus.SENT
-                    results["sent"].append({
-                        "email": email,
-                        "invitation_id": invitation.id,
-                        "invite_url": invite_url,
-                    })
-                    results["success_count"] += 1
-                else:
-                    invitation.status = ContactInviteStatus.FAILED
-                    results["failed"].append({
-                        "email": email,
-                        "error": "Email delivery failed",
-                    })
-                    results["failure_count"] += 1
+                # Render the invite now; every invite goes out in one batch below
+                email_message = self.email_service.contact_invite_email(
+                    to_email=email,
+                    inviter_name=sender.full_name,
+                    invitation_token=invitation_token,
+                    invite_url=invite_url,
+                    message=message,
+                    # Event-specific fields — only populated when event exists
+                    event_title=event.title if event else None,
+                    event_description=event.description if event else None,
+                    event_date=event.start_datetime.strftime("%A, %B %d, %Y") if event and event.start_datetime else None,
+                    event_time=event.start_datetime.strftime("%I:%M %p") if event and event.start_datetime else None,
+                    event_venue=event.venue_name if event else None,
+                    event_address=event.venue_address if event else None,
+                )
+                pending.append((email, invitation, invite_url, email_message))
 
             except Exception as e:
                 results["failed"].append({
@@ -495,6 +582,35 @@ class ContactService:
                 })
                 results["failure_count"] += 1
 
+        # Send every rendered invite through the Resend batch endpoint (best-effort)
+        deliverable = [entry for entry in pending if entry[3] is not None]
+        delivered: List[bool] = []
+        if deliverable and self.email_service.is_configured():
+            try:
+                delivered = await self.email_service.send_batch([entry[3] for entry in deliverable])
+            except Exception as e:
+                logger.error(f"Failed to send bulk invite emails: {e}")
+        else:
+            logger.warning("Email not configured — skipping %d invite emails", len(deliverable))
+        sent_ids = {id(entry[1]) for entry, success in zip(deliverable, delivered) if success}
+
+        for email, invitation, invite_url, _ in pending:
+            if id(invitation) in sent_ids:
+                invitation.status = ContactInviteStatus.SENT
+                results["sent"].append({
+                    "email": email,
+                    "invitation_id": invitation.id,
+                    "invite_url": invite_url,
+                })
+                results["success_count"] += 1
+            else:
+                invitation.status = ContactInviteStatus.FAILED
+                results["failed"].append({
+                    "email": email,
+                    "error": "Email delivery failed",
+                })
+                results["failure_count"] += 1
+
         self.db.commit()
         return results
 
@@ -598,6 +714,8 @@ class ContactService:
                 # Update existing invitation status
                 event_invite.rsvp_status = event_rsvp_status
                 event_invite.responded_at = datetime.utcnow()
+            
+            EventRepository(self.db).grant_invitation_access(event_invite)
         
         self.db.commit()
         self.db.refresh(invitation)
@@ -681,6 +799,8 @@ class ContactService:
                 event_invite.rsvp_status = event_rsvp_status
                 event_invite.responded_at = datetime.utcnow()
 
+            EventRepository(self.db).grant_invitation_access(event_invite)
+
         self.db.commit()
         self.db.refresh(invitation)
         return invitation
@@ -1,11 +1,12 @@
+import asyncio
 import resend
-from typing import List, Optional, Dict, Any
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from typing import List, Optional, Dict, Any, Tuple
 from app.core.config import settings
-from app.core.circuit_breaker import email_circuit_breaker, email_fallback
+from app.core.circuit_breaker import email_batch_fallback, email_circuit_breaker, email_fallback
 from app.models.user_models import User
 from app.models.event_models import Event, EventInvitation
-import os
+from app.services.email_templates import email_templates
+from app.services.email_transport import EmailTransport, resend_transport
 from datetime import datetime
 from app.core.logger import get_logger
 
@@ -18,31 +19,49 @@ resend.api_key = settings.RESEND_API_KEY
 if not settings.RESEND_API_KEY:
     logger.warning("Resend API key not configured. Email functionality will be disabled.")
 
-# Initialize Jinja2 for email templates
-template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates', 'emails')
-env = Environment(
-    loader=FileSystemLoader(template_dir),
-    autoescape=select_autoescape(['html', 'xml'])
-)
-
-# Add custom filter for current year
-def current_year():
-    """Return the current year"""
-    return datetime.now().year
-
-env.globals['current_year'] = current_year
+# Email templates are compiled once per process; see email_templates
+env = email_templates.env
 
 class EmailService:
     """Service for sending emails using Resend."""
     
-    def __init__(self):
+    def __init__(self, transport: Optional[EmailTransport] = None):
         self.from_email = settings.EMAILS_FROM_EMAIL or "noreply@planetal.com"
         self.from_name = settings.EMAILS_FROM_NAME or "Plan et al"
+        self.transport = transport or resend_transport
 
     def is_configured(self) -> bool:
         """Return True when outbound email has the minimum configuration."""
         return bool(settings.RESEND_API_KEY)
     
+    def build_email(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+        reply_to: Optional[str] = None,
+        attachments: Optional[List[Dict]] = None
+    ) -> Dict[str, Any]:
+        """Build the Resend request body for one email."""
+        params = {
+            "from": f"{self.from_name} <{self.from_email}>",
+            "to": [to_email],
+            "subject": subject,
+            "html": html_content,
+        }
+        
+        if text_content:
+            params["text"] = text_content
+        
+        if reply_to:
+            params["reply_to"] = reply_to
+        
+        if attachments:
+            params["attachments"] = attachments
+        
+        return params
+    
     @email_circuit_breaker(fallback=email_fallback)
     async def send_email(
         self,
@@ -55,29 +74,56 @@ class EmailService:
     ) -> bool:
         """Send email using Resend."""
         try:
-            params = {
-                "from": f"{self.from_name} <{self.from_email}>",
-                "to": [to_email],
-                "subject": subject,
-                "html": html_content,
-            }
-            
-            if text_content:
-                params["text"] = text_content
-            
-            if reply_to:
-                params["reply_to"] = reply_to
-            
-            if attachments:
-                params["attachments"] = attachments
-            
-            response = resend.Emails.send(params)
-            return response.get("id") is not None
+            params = self.build_email(
+                to_email, subject, html_content,
+                text_content=text_content, reply_to=reply_to, attachments=attachments
+            )
+            return await self.transport.send(params) is not None
             
         except Exception as e:
-            print(f"Failed to send email: {str(e)}")
+            logger.error(f"Failed to send email to {to_email}: {str(e)}")
             return False
     
+    @email_circuit_breaker(fallback=email_batch_fallback)
+    async def send_batch(self, messages: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Send many emails through the Resend batch endpoint.
+        
+        Args:
+            messages: send_email keyword arguments, one dict per email
+            
+        Returns:
+            Whether each email was accepted, in the order given
+        """
+        params = [self.build_email(**message) for message in messages]
+        results = [False] * len(params)
+        
+        # The batch endpoint does not take attachments; those go one by one
+        single = [index for index, item in enumerate(params) if "attachments" in item]
+        batched = [index for index, item in enumerate(params) if "attachments" not in item]
+        size = settings.EMAIL_BATCH_SIZE
+        chunks = [batched[i:i + size] for i in range(0, len(batched), size)]
+        
+        async def send_chunk(indexes: List[int]):
+            try:
+                if indexes[0] in single:
+                    ids = [await self.transport.send(params[indexes[0]])]
+                else:
+                    ids = await self.transport.send_batch([params[index] for index in indexes])
+            except Exception as e:
+                logger.error(f"Failed to send batch of {len(indexes)} emails: {str(e)}")
+                return
+            for index, message_id in zip(indexes, ids):
+                results[index] = message_id is not None
+        
+        # The transport bounds how many of these run at once
+        await asyncio.gather(*[send_chunk(indexes) for indexes in chunks + [[index] for index in single]])
+        
+        sent = sum(results)
+        if results:
+            logger.info(f"Sent {sent} of {len(results)} emails in {len(chunks) + len(single)} Resend calls")
+        return results
+    
     async def send_bulk_email(
         self,
         recipients: List[str],
@@ -86,20 +132,18 @@ class EmailService:
         text_content: Optional[str] = None
     ) -> Dict[str, bool]:
         """Send bulk emails to multiple recipients."""
-        results = {}
-        
-        for email in recipients:
-            success = await self.send_email(
-                to_email=email,
-                subject=subject,
-                html_content=html_content,
-                text_content=text_content
-            )
-            results[email] = success
-        
-        return results
+        results = await self.send_batch([
+            {
+                "to_email": email,
+                "subject": subject,
+                "html_content": html_content,
+                "text_content": text_content
+            }
+            for email in recipients
+        ])
+        return dict(zip(recipients, results))
     
-    def send_contact_invite_email_sync(
+    def contact_invite_email(
         self,
         to_email: str,
         inviter_name: str,
@@ -114,16 +158,14 @@ class EmailService:
         event_time: Optional[str] = None,
         event_venue: Optional[str] = None,
         event_address: Optional[str] = None,
-    ) -> bool:
-        """Send a contact/app invitation email synchronously.
+    ) -> Optional[Dict[str, Any]]:
+        """Render a contact/app invitation as send_email keyword arguments.
 
         - With event details  → uses event_invitation.html (full date/venue/RSVP)
         - Without event       → uses contact_invite.html (app invite with deeplink)
-        """
-        if not self.is_configured():
-            logger.warning("Email not configured — skipping invite email to %s", to_email)
-            return False
 
+        Returns None when the template cannot be rendered.
+        """
         if not invite_url:
             base_url = (settings.DEEP_LINK_BASE_URL or settings.FRONTEND_URL or "").rstrip("/")
             invite_url = f"{base_url}/invite/{invitation_token}"
@@ -161,16 +203,25 @@ class EmailService:
 
         html_content = self.render_template(template, context)
         if not html_content:
+            return None
+        return {"to_email": to_email, "subject": subject, "html_content": html_content}
+
+    def send_contact_invite_email_sync(self, to_email: str, inviter_name: str, invitation_token: str, **details) -> bool:
+        """Send a contact/app invitation email synchronously.
+
+        Takes the same arguments as contact_invite_email. Bulk invitations
+        use contact_invite_email with send_batch instead.
+        """
+        if not self.is_configured():
+            logger.warning("Email not configured — skipping invite email to %s", to_email)
+            return False
+
+        email = self.contact_invite_email(to_email, inviter_name, invitation_token, **details)
+        if email is None:
             return False
 
         try:
-            params: Dict[str, Any] = {
-                "from": f"{self.from_name} <{self.from_email}>",
-                "to": [to_email],
-                "subject": subject,
-                "html": html_content,
-            }
-            response = resend.Emails.send(params)
+            response = resend.Emails.send(self.build_email(**email))
             return response.get("id") is not None
         except Exception as e:
             logger.error("Failed to send invite email to %s: %s", to_email, e)
@@ -182,9 +233,27 @@ class EmailService:
             template = env.get_template(template_name)
             return template.render(**context)
         except Exception as e: 
-            print(f"Failed to render template {template_name}: {str(e)}")
+            logger.error(f"Failed to render template {template_name}: {str(e)}")
             return ""
     
+    def render_batch(
+        self,
+        template_name: str,
+        contexts: List[Dict[str, Any]],
+        shared_context: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """Render one compiled template for many recipients.
+        
+        Each context holds the recipient's fields and is layered over
+        shared_context. Returns an empty string per recipient on failure,
+        like render_template.
+        """
+        try:
+            return email_templates.render_many(template_name, contexts, shared_context)
+        except Exception as e:
+            logger.error(f"Failed to render template {template_name}: {str(e)}")
+            return ["" for _ in contexts]
+    
     # Authentication emails
     async def send_welcome_email(self, user: User) -> bool:
         """Send welcome email to new user."""
@@ -292,14 +361,14 @@ class EmailService:
         )
     
     # Event-related emails
-    async def send_event_invitation(
+    def event_invitation_email(
         self, 
         event: Event, 
         invitation: EventInvitation, 
         invitee: User,
         inviter: User
-    ) -> bool:
-        """Send event invitation email."""
+    ) -> Dict[str, Any]:
+        """Render an event invitation as send_email keyword arguments."""
         event_url = f"{settings.FRONTEND_URL}/events/{event.id}"
         rsvp_url = f"{settings.FRONTEND_URL}/events/{event.id}/rsvp?token={invitation.id}"
         
@@ -320,12 +389,62 @@ class EmailService:
         
         html_content = self.render_template("event_invitation.html", context)
         
-        return await self.send_email(
-            to_email=invitee.email,
-            subject=f"You're invited to {event.title}!",
-            html_content=html_content,
-            reply_to=inviter.email
-        )
+        return {
+            "to_email": invitee.email,
+            "subject": f"You're invited to {event.title}!",
+            "html_content": html_content,
+            "reply_to": inviter.email
+        }
+    
+    def event_invitation_emails(
+        self,
+        event: Event,
+        inviter: User,
+        invitations: List[Tuple[EventInvitation, User]]
+    ) -> List[Dict[str, Any]]:
+        """Render the invitations to one event as send_email keyword arguments, one per invitee."""
+        event_url = f"{settings.FRONTEND_URL}/events/{event.id}"
+        shared_context = {
+            "inviter_name": inviter.full_name,
+            "event_title": event.title,
+            "event_description": event.description,
+            "event_date": event.start_datetime.strftime("%A, %B %d, %Y"),
+            "event_time": event.start_datetime.strftime("%I:%M %p"),
+            "event_venue": event.venue_name or "TBD",
+            "event_address": event.venue_address or "",
+            "event_url": event_url
+        }
+        contexts = [
+            {
+                "invitee_name": invitee.full_name,
+                "invitation_message": invitation.invitation_message or "",
+                "rsvp_url": f"{settings.FRONTEND_URL}/events/{event.id}/rsvp?token={invitation.id}",
+                "plus_one_allowed": invitation.plus_one_allowed
+            }
+            for invitation, invitee in invitations
+        ]
+        
+        html_contents = self.render_batch("event_invitation.html", contexts, shared_context)
+        
+        return [
+            {
+                "to_email": invitee.email,
+                "subject": f"You're invited to {event.title}!",
+                "html_content": html_content,
+                "reply_to": inviter.email
+            }
+            for (_, invitee), html_content in zip(invitations, html_contents)
+        ]
+    
+    async def send_event_invitation(
+        self, 
+        event: Event, 
+        invitation: EventInvitation, 
+        invitee: User,
+        inviter: User
+    ) -> bool:
+        """Send event invitation email."""
+        return await self.send_email(**self.event_invitation_email(event, invitation, invitee, inviter))
     
     async def send_rsvp_confirmation(
         self, 
@@ -0,0 +1,112 @@
+"""
+Precompiled email templates.
+
+Every template under app/templates/emails is compiled once (compile_all runs
+at startup) and kept for the life of the process; auto_reload is off, so a
+render never stats or re-parses the source. Templates render parts that are
+the same for every recipient through fragment(), which caches the output by
+template and arguments:
+
+    {{ fragment("_event_details.html", event_date=event_date, ...) }}
+
+so a batch of invites for one event renders its details card once.
+render_many renders one template for many recipients with a shared context.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+from markupsafe import Markup
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), '..', 'templates', 'emails')
+
+
+def current_year():
+    """Return the current year"""
+    return datetime.now().year
+
+
+class EmailTemplates:
+    """Compiled email templates plus a bounded cache of rendered fragments"""
+
+    def __init__(self, template_dir: str = TEMPLATE_DIR, fragment_cache_size: Optional[int] = None):
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(['html', 'xml']),
+            auto_reload=False,
+            cache_size=-1
+        )
+        self.env.globals['current_year'] = current_year
+        self.env.globals['fragment'] = self.fragment
+        self.fragment_cache_size = (
+            settings.EMAIL_FRAGMENT_CACHE_SIZE if fragment_cache_size is None else fragment_cache_size
+        )
+        self._fragments: "OrderedDict[Tuple[str, Hashable], Markup]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+
+    def compile_all(self) -> int:
+        """Load and compile every template, returning how many there are"""
+        names = self.env.list_templates(extensions=['html', 'txt'])
+        for name in names:
+            self.env.get_template(name)
+        return len(names)
+
+    def get(self, template_name: str) -> Template:
+        return self.env.get_template(template_name)
+
+    def render(self, template_name: str, context: Dict[str, Any]) -> str:
+        return self.get(template_name).render(**context)
+
+    def render_many(
+        self,
+        template_name: str,
+        contexts: List[Dict[str, Any]],
+        shared_context: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """Render one template per recipient context, each layered over shared_context"""
+        template = self.get(template_name)
+        shared_context = shared_context or {}
+        return [template.render({**shared_context, **context}) for context in contexts]
+
+    def fragment(self, template_name: str, **context) -> Markup:
+        """Render a recipient-independent partial, reusing earlier output for the same arguments"""
+        try:
+            key = (template_name, tuple(sorted(context.items())))
+            hash(key)
+        except TypeError:
+            # Unhashable arguments cannot be cached; render every time
+            return Markup(self.render(template_name, context))
+
+        with self._lock:
+            html = self._fragments.get(key)
+            if html is not None:
+                self._fragments.move_to_end(key)
+                self.fragment_hits += 1
+                return html
+
+        html = Markup(self.render(template_name, context))
+        with self._lock:
+            self.fragment_misses += 1
+            if self.fragment_cache_size > 0:
+                self._fragments[key] = html
+                while len(self._fragments) > self.fragment_cache_size:
+                    self._fragments.popitem(last=False)
+        return html
+
+    def clear_fragments(self):
+        with self._lock:
+            self._fragments.clear()
+
+
+# Shared by every EmailService so templates are compiled once per process
+email_templates = EmailTemplates()
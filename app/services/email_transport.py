@@ -0,0 +1,234 @@
+"""
+Transports that hand outbound email to the provider.
+
+ResendTransport talks to the Resend REST API over a pooled httpx client
+instead of the blocking SDK, so sends never stall the event loop and
+connections are reused across requests. Bulk sends go through
+/emails/batch, up to EMAIL_BATCH_SIZE messages per call. Requests in flight
+are bounded per event loop, and 429, 5xx and transport errors are retried
+with exponential backoff (Retry-After is honoured when Resend sends it).
+Every request carries an Idempotency-Key that stays the same across its
+retries, so a retry after an ambiguous failure (a timeout once the request
+was sent, a 5xx) cannot deliver the same emails twice.
+
+FakeEmailTransport accepts everything locally after a configurable delay;
+tests and scripts/benchmark_email_send.py use it in place of Resend.
+"""
+import asyncio
+import random
+import uuid
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# A message is the Resend request body for one email
+EmailParams = Dict[str, Any]
+
+
+class EmailDeliveryError(Exception):
+    """Resend rejected a request or kept failing after the retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class EmailTransport:
+    """Interface shared by the Resend and fake transports"""
+
+    async def send(self, params: EmailParams) -> Optional[str]:
+        """Send one email, returning the provider's message id"""
+        raise NotImplementedError
+
+    async def send_batch(self, messages: List[EmailParams]) -> List[Optional[str]]:
+        """Send up to EMAIL_BATCH_SIZE emails, returning an id per message"""
+        raise NotImplementedError
+
+    async def aclose(self):
+        """Release pooled connections"""
+
+
+class ResendTransport(EmailTransport):
+    """
+    Resend REST transport over a pooled httpx.AsyncClient.
+
+    Clients and semaphores are bound to an event loop, so one pair is kept
+    per loop: the API loop shares a single pool while Celery tasks that
+    run their own loop get theirs.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        timeout: float = 10.0,
+        http_transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_key = api_key if api_key is not None else settings.RESEND_API_KEY
+        self.base_url = (base_url or settings.RESEND_API_URL).rstrip("/")
+        self.concurrency = max(concurrency or settings.EMAIL_SEND_CONCURRENCY, 1)
+        self.max_retries = settings.EMAIL_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_seconds = (
+            settings.EMAIL_RETRY_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        )
+        self.timeout = timeout
+        self.http_transport = http_transport
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _pool(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                transport=self.http_transport,
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=self.concurrency
+                )
+            )
+            pool = (client, asyncio.Semaphore(self.concurrency))
+            self._pools[loop] = pool
+        return pool
+
+    async def send(self, params: EmailParams) -> Optional[str]:
+        body = await self._post("/emails", params)
+        return body.get("id")
+
+    async def send_batch(self, messages: List[EmailParams]) -> List[Optional[str]]:
+        if not messages:
+            return []
+        if len(messages) > settings.EMAIL_BATCH_SIZE:
+            raise ValueError(f"Resend accepts at most {settings.EMAIL_BATCH_SIZE} emails per batch")
+        try:
+            body = await self._post("/emails/batch", messages)
+        except EmailDeliveryError as e:
+            if e.status_code not in (400, 422):
+                raise
+            # The batch is validated as a whole; send one by one so a single
+            # bad address does not sink the rest
+            logger.warning(f"Resend rejected batch of {len(messages)}, sending individually: {e}")
+            return list(await asyncio.gather(*[self._send_or_none(params) for params in messages]))
+        return [item.get("id") for item in body.get("data", [])]
+
+    async def _send_or_none(self, params: EmailParams) -> Optional[str]:
+        try:
+            return await self.send(params)
+        except EmailDeliveryError as e:
+            logger.error(f"Failed to send email to {params.get('to')}: {e}")
+            return None
+
+    async def _post(self, path: str, payload: Any) -> Dict[str, Any]:
+        """POST to Resend, retrying throttling, server and transport errors"""
+        client, semaphore = self._pool()
+        # Resend replays the original outcome for a repeated key instead of sending again
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        attempt = 0
+        while True:
+            retry_after = None
+            async with semaphore:
+                try:
+                    response = await client.post(path, json=payload, headers=headers)
+                except httpx.TransportError as e:
+                    error = EmailDeliveryError(f"Resend request failed: {e}")
+                else:
+                    if response.status_code < 400:
+                        return response.json()
+                    error = EmailDeliveryError(
+                        f"Resend returned {response.status_code}: {response.text[:200]}",
+                        status_code=response.status_code
+                    )
+                    if response.status_code not in self.RETRY_STATUSES:
+                        raise error
+                    retry_after = response.headers.get("retry-after")
+
+            if attempt >= self.max_retries:
+                raise error
+            # Back off outside the semaphore so waiting does not hold a slot
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+            attempt += 1
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        delay = self.backoff_seconds * (2 ** attempt)
+        return delay + random.uniform(0, delay / 2)
+
+    async def aclose(self):
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool[0].aclose()
+
+
+# Shared by every EmailService so all of a worker's sends use one pool per loop
+resend_transport = ResendTransport()
+
+
+class FakeEmailTransport(EmailTransport):
+    """
+    Local transport that accepts every email after a fixed delay.
+
+    Args:
+        latency: Seconds each provider call takes
+        fail_addresses: Recipients whose emails are reported as not sent
+        concurrency: Calls allowed in flight, like ResendTransport
+    """
+
+    def __init__(self, latency: float = 0.0, fail_addresses: Iterable[str] = (), concurrency: Optional[int] = None):
+        self.latency = latency
+        self.fail_addresses = set(fail_addresses)
+        self.concurrency = max(concurrency or settings.EMAIL_SEND_CONCURRENCY, 1)
+        self.calls: List[List[EmailParams]] = []
+        self.in_flight = 0
+        self.peak = 0
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def sent(self) -> List[EmailParams]:
+        return [
+            params for call in self.calls for params in call
+            if not set(params["to"]) & self.fail_addresses
+        ]
+
+    async def send(self, params: EmailParams) -> Optional[str]:
+        return (await self._call([params]))[0]
+
+    async def send_batch(self, messages: List[EmailParams]) -> List[Optional[str]]:
+        return await self._call(messages)
+
+    async def _call(self, messages: List[EmailParams]) -> List[Optional[str]]:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.setdefault(loop, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                await asyncio.sleep(self.latency)
+            finally:
+                self.in_flight -= 1
+            self.calls.append(messages)
+        start = sum(len(call) for call in self.calls) - len(messages)
+        return [
+            None if set(params["to"]) & self.fail_addresses else f"fake-{start + index}"
+            for index, params in enumerate(messages)
+        ]
@@ -8,7 +8,7 @@ from app.models.event_models import (
     Event, EventInvitation, Task, Expense, ExpenseSplit, Comment, Poll, PollOption, PollVote
 )
 from app.models.user_models import User
-from app.models.shared_models import EventStatus, RSVPStatus, TaskStatus, TaskPriority
+from app.models.shared_models import EventStatus, RSVPStatus, TaskStatus, TaskPriority, EventAccessRole
 from app.schemas.event import (
     EventCreate, EventUpdate, EventInvitationCreate, EventInvitationUpdate,
     TaskCreate, TaskUpdate, TaskUpdateById, TaskCategory, TaskCategoryItem, ExpenseCreate, ExpenseUpdate, CommentCreate,
@@ -130,7 +130,8 @@ class EventService:
         # Create event using repository
         event = self.event_repo.create(event_dict)
         
-        # Automatically add creator as collaborator
+        # Automatically add creator as collaborator; the repository already
+        # recorded their creator grant
         event.collaborators.append(creator)
         self.db.commit()
         
@@ -275,6 +276,8 @@ class EventService:
         # Create the duplicate event
         duplicate_event = Event(**event_data)
         self.db.add(duplicate_event)
+        self.db.flush()
+        self.event_repo.grant_event_access(duplicate_event, user_id, EventAccessRole.CREATOR)
         self.db.commit()
         self.db.refresh(duplicate_event)
         
@@ -363,6 +366,7 @@ class EventService:
             invitation.dietary_restrictions = rsvp_data.dietary_restrictions
             invitation.special_requests = rsvp_data.special_requests
             invitation.responded_at = datetime.utcnow()
+            self.event_repo.set_event_access_rsvp(event_id, user_id, invitation.rsvp_status)
             
             self.db.commit()
             self.db.refresh(invitation)
@@ -385,6 +389,8 @@ class EventService:
                 invited_at=datetime.utcnow() # Self-invited now
             )
             self.db.add(invitation)
+            self.db.flush()
+            self.event_repo.grant_invitation_access(invitation)
             self.db.commit()
             self.db.refresh(invitation)
             
@@ -401,6 +407,7 @@ class EventService:
             raise AuthorizationError("Permission denied to invite users")
         
         invitations = []
+        invitees = []
         for user_id in invitation_data.user_ids:
             # Check if user exists
             user = self.user_service.get_user_by_id(user_id)
@@ -419,22 +426,27 @@ class EventService:
                 user_id=user_id,
                 invitation_message=invitation_data.invitation_message,
                 plus_one_allowed=invitation_data.plus_one_allowed,
+                rsvp_status=RSVPStatus.PENDING,
                 invited_at=datetime.utcnow()
             )
             
             self.db.add(invitation)
+            self.event_repo.grant_invitation_access(invitation)
             invitations.append(invitation)
-            
-            # Send invitation email asynchronously
+            invitees.append(user)
+        
+        self.db.commit()
+        
+        # Send all invitation emails asynchronously, as one Resend batch
+        if invitations:
             try:
                 inviter = self.user_service.get_user_by_id(inviter_id)
-                asyncio.create_task(
-                    email_service.send_event_invitation(event, invitation, user, inviter)
-                )
+                asyncio.create_task(email_service.send_batch(
+                    email_service.event_invitation_emails(event, inviter, list(zip(invitations, invitees)))
+                ))
             except Exception as e:
-                print(f"Failed to send invitation email to {user.email}: {str(e)}")
+                logger.error(f"Failed to send invitation emails for event {event_id}: {str(e)}")
         
-        self.db.commit()
         return invitations
     
     def respond_to_invitation(self, invitation_id: int, response_data: EventInvitationUpdate, user_id: int) -> EventInvitation:
@@ -451,6 +463,7 @@ class EventService:
         invitation.dietary_restrictions = response_data.dietary_restrictions
         invitation.special_requests = response_data.special_requests
         invitation.responded_at = datetime.utcnow()
+        self.event_repo.set_event_access_rsvp(invitation.event_id, user_id, invitation.rsvp_status)
         
         self.db.commit()
         self.db.refresh(invitation)
@@ -539,6 +552,7 @@ class EventService:
         for collaborator in users:
             if collaborator not in event.collaborators:
                 event.collaborators.append(collaborator)
+                self.event_repo.grant_event_access(event, collaborator.id, EventAccessRole.COLLABORATOR)
 
         self.db.commit()
         self.db.refresh(event)
@@ -896,17 +910,12 @@ class EventService:
         if event.is_public:
             return True
         
-        # Check if user is creator, collaborator, or invited
         if event.creator_id == user_id:
             return True
         
-        if any(collab.id == user_id for collab in event.collaborators):
-            return True
-        
-        if any(inv.user_id == user_id for inv in event.invitations):
-            return True
-        
-        return False
+        # Collaborator and invitee checks use the access index rather than
+        # loading the event's collaborator and invitation lists
+        return self.event_repo.user_has_event_access(event.id, user_id)
     
     def _can_edit_event(self, event: Event, user_id: int) -> bool:
         """Check if user can edit event"""
@@ -936,43 +945,22 @@ class EventService:
         if not event:
             raise NotFoundError("Event not found")
         
-        # Count attendees by RSVP status
-        rsvp_counts = {}
-        for status in RSVPStatus:
-            rsvp_counts[status.value] = len([
-                inv for inv in event.invitations 
-                if inv.rsvp_status == status
-            ])
-        
-        # Count tasks by status
-        task_counts = {}
-        for status in TaskStatus:
-            task_counts[status.value] = len([
-                task for task in event.tasks 
-                if task.status == status
-            ])
-        
-        # Calculate aggregate attendee stats
-        total_attendees = sum(rsvp_counts.values())
-        confirmed_attendees = rsvp_counts.get(RSVPStatus.ACCEPTED.value, 0)
-        pending_responses = rsvp_counts.get(RSVPStatus.PENDING.value, 0)
-
-        # Calculate budget info
-        total_expenses = sum(exp.amount for exp in event.expenses)
-        budget_remaining = (event.total_budget - total_expenses) if event.total_budget else None
+        # Counters come from one aggregate query, cached until a child row changes
+        stats = self.event_repo.get_event_statistics(event_id)
+        rsvp_counts = stats["rsvp_counts"]
         
         return {
-            "total_attendees": total_attendees,
-            "confirmed_attendees": confirmed_attendees,
-            "pending_responses": pending_responses,
+            "total_attendees": sum(rsvp_counts.values()),
+            "confirmed_attendees": rsvp_counts.get(RSVPStatus.ACCEPTED.value, 0),
+            "pending_responses": rsvp_counts.get(RSVPStatus.PENDING.value, 0),
             "rsvp_counts": rsvp_counts,
-            "task_counts": task_counts,
-            "total_expenses": total_expenses,
-            "budget_remaining": budget_remaining,
-            "total_invitations": len(event.invitations),
-            "total_tasks": len(event.tasks),
-            "total_comments": len(event.comments),
-            "total_polls": len(event.polls)
+            "task_counts": stats["task_counts"],
+            "total_expenses": stats["total_expenses"],
+            "budget_remaining": stats["budget_remaining"],
+            "total_invitations": stats["invitation_count"],
+            "total_tasks": stats["task_count"],
+            "total_comments": stats["comment_count"],
+            "total_polls": stats["poll_count"]
         }
     
     # Calendar sync methods
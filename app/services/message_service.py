@@ -8,16 +8,28 @@ from app.models.message_models import (
 )
 from app.models.user_models import User
 from app.models.event_models import Event
+from app.repositories.event_repo import EventRepository
 from app.schemas.message import (
     MessageCreate, MessageUpdate, MessageFileUpload, MessageReactionCreate,
     ChatParticipantUpdate, EventChatSettingsCreate, EventChatSettingsUpdate,
-    SystemMessageData, MessageSearchParams
+    SystemMessageData, MessageSearchParams, MessageResponse, MessageReactionResponse
 )
+from app.schemas.pagination import CursorParams
 from app.core.errors import NotFoundError, ValidationError, AuthorizationError
+from app.core.pagination import KeysetPage
+from app.repositories.message_repo import (
+    fetch_message_history_page, advance_read_watermark, record_read_receipts,
+    latest_message_id, count_unread_messages
+)
 from app.services.email_service import email_service
+from app.services import chat_realtime
+from app.services.chat_realtime import chat_broadcaster
+from app.core.logger import get_logger
 import json
 import asyncio
 
+logger = get_logger(__name__)
+
 class MessageService:
     """Service for managing event messages and chat functionality."""
     
@@ -72,6 +84,8 @@ class MessageService:
         # Send notifications
         self._send_message_notifications(message)
         
+        self._publish_message(chat_realtime.MESSAGE_CREATED, message)
+        
         return message
     
     def create_file_message(
@@ -117,6 +131,8 @@ class MessageService:
         # Send notifications
         self._send_message_notifications(message)
         
+        self._publish_message(chat_realtime.MESSAGE_CREATED, message)
+        
         return message
     
     def create_system_message(
@@ -141,6 +157,15 @@ class MessageService:
         self.db.commit()
         self.db.refresh(message)
         
+        # System messages have no sender, so MessageResponse does not apply
+        self._publish_chat_update(event_id, chat_realtime.MESSAGE_CREATED, lambda: {
+            "id": message.id,
+            "content": message.content,
+            "message_type": message.message_type,
+            "event_id": event_id,
+            "created_at": message.created_at
+        })
+        
         return message
     
     def get_message(self, message_id: int, user_id: int) -> Optional[Message]:
@@ -165,7 +190,8 @@ class MessageService:
         user_id: int, 
         page: int = 1, 
         per_page: int = 50,
-        before_message_id: Optional[int] = None
+        before_message_id: Optional[int] = None,
+        mark_as_read: bool = True
     ) -> Tuple[List[Message], int]:
         """Get paginated messages for an event."""
         # Verify access
@@ -197,10 +223,38 @@ class MessageService:
         messages.reverse()
         
         # Mark messages as read for this user
-        self._mark_messages_as_read(event_id, user_id, [msg.id for msg in messages])
+        if mark_as_read and messages:
+            self.mark_read_up_to(event_id, user_id, max(msg.id for msg in messages))
         
         return messages, total
     
+    def get_messages_page(
+        self,
+        event_id: int,
+        user_id: int,
+        pagination: CursorParams,
+        mark_as_read: bool = True
+    ) -> KeysetPage:
+        """Get a cursor-paginated page of messages for an event, oldest first."""
+        self._get_event_with_access(event_id, user_id)
+        
+        page = fetch_message_history_page(self.db, event_id, pagination)
+        
+        if mark_as_read and page.items:
+            self.mark_read_up_to(event_id, user_id, max(msg.id for msg in page.items))
+        
+        return page
+    
+    def mark_read_up_to(self, event_id: int, user_id: int, message_id: Optional[int]):
+        """Advance the user's read watermark, e.g. after serving a page of history."""
+        if advance_read_watermark(self.db, event_id, user_id, message_id):
+            self.db.commit()
+            self.publish_read_watermark(event_id, user_id, message_id)
+    
+    def mark_messages_as_read(self, event_id: int, user_id: int, message_ids: List[int]) -> int:
+        """Record read receipts for specific messages and advance the watermark past them."""
+        return self._mark_messages_as_read(event_id, user_id, message_ids)
+    
     def search_messages(
         self, 
         event_id: int, 
@@ -280,6 +334,8 @@ class MessageService:
         self.db.commit()
         self.db.refresh(message)
         
+        self._publish_message(chat_realtime.MESSAGE_UPDATED, message)
+        
         return message
     
     def delete_message(self, message_id: int, user_id: int) -> bool:
@@ -301,6 +357,10 @@ class MessageService:
         
         self.db.commit()
         
+        self._publish_chat_update(message.event_id, chat_realtime.MESSAGE_DELETED, lambda: {
+            "message_id": message_id
+        })
+        
         return True
     
     def pin_message(self, message_id: int, user_id: int) -> Message:
@@ -384,6 +444,11 @@ class MessageService:
         self.db.commit()
         self.db.refresh(reaction)
         
+        self._publish_chat_update(message.event_id, chat_realtime.REACTION_ADDED, lambda: {
+            "message_id": message_id,
+            "reaction": MessageReactionResponse.model_validate(reaction).model_dump(mode="json")
+        })
+        
         return reaction
     
     def remove_reaction(self, message_id: int, user_id: int, emoji: str) -> bool:
@@ -397,9 +462,16 @@ class MessageService:
         if not reaction:
             raise NotFoundError("Reaction not found")
         
+        event_id = reaction.message.event_id
         self.db.delete(reaction)
         self.db.commit()
         
+        self._publish_chat_update(event_id, chat_realtime.REACTION_REMOVED, lambda: {
+            "message_id": message_id,
+            "user_id": user_id,
+            "emoji": emoji
+        })
+        
         return True
     
     # Chat settings operations
@@ -445,25 +517,14 @@ class MessageService:
     # Helper methods
     def _get_event_with_access(self, event_id: int, user_id: int) -> Event:
         """Get event and verify user has access."""
-        event = self.db.query(Event).options(
-            joinedload(Event.collaborators)
-        ).filter(Event.id == event_id).first()
+        event = self.db.query(Event).filter(Event.id == event_id).first()
         
         if not event:
             raise NotFoundError("Event not found")
         
-        # Check access (creator, collaborator, or invited)
-        if (event.creator_id != user_id and 
-            user_id not in [c.id for c in event.collaborators]):
-            # Check if user is invited
-            from app.models.event_models import EventInvitation
-            invitation = self.db.query(EventInvitation).filter(
-                EventInvitation.event_id == event_id,
-                EventInvitation.user_id == user_id
-            ).first()
-            
-            if not invitation:
-                raise AuthorizationError("You don't have access to this event")
+        # Check access (creator, collaborator, or invited) on the event_access index
+        if event.creator_id != user_id and not EventRepository(self.db).user_has_event_access(event_id, user_id):
+            raise AuthorizationError("You don't have access to this event")
         
         return event
     
@@ -486,23 +547,50 @@ class MessageService:
         
         self.db.commit()
     
-    def _mark_messages_as_read(self, event_id: int, user_id: int, message_ids: List[int]):
-        """Mark messages as read for a user."""
-        for message_id in message_ids:
-            existing_receipt = self.db.query(MessageReadReceipt).filter(
-                MessageReadReceipt.message_id == message_id,
-                MessageReadReceipt.user_id == user_id
-            ).first()
-            
-            if not existing_receipt:
-                receipt = MessageReadReceipt(
-                    message_id=message_id,
-                    user_id=user_id,
-                    read_at=datetime.utcnow()
-                )
-                self.db.add(receipt)
-        
+    def _mark_messages_as_read(self, event_id: int, user_id: int, message_ids: List[int]) -> int:
+        """Mark messages as read for a user, returning how many receipts were new."""
+        created = record_read_receipts(self.db, event_id, user_id, message_ids)
+        latest_id = latest_message_id(self.db, event_id, message_ids)
+        moved = advance_read_watermark(self.db, event_id, user_id, latest_id)
         self.db.commit()
+        
+        if moved:
+            self.publish_read_watermark(event_id, user_id, latest_id)
+        return created
+    
+    def publish_read_watermark(self, event_id: int, user_id: int, message_id: int):
+        """Tell other participants how far a user has read."""
+        self._publish_chat_update(event_id, chat_realtime.READ_WATERMARK, lambda: {
+            "user_id": user_id,
+            "last_read_message_id": message_id
+        })
+    
+    def send_typing_indicator(self, event_id: int, user_id: int, is_typing: bool) -> bool:
+        """Broadcast a typing indicator; repeats within the coalescing window are dropped."""
+        self._get_event_with_access(event_id, user_id)
+        
+        published = chat_broadcaster.publish_typing(event_id, user_id, is_typing)
+        if published and is_typing:
+            self._update_participant_last_seen(event_id, user_id)
+        return published
+    
+    def _publish_message(self, event_type: str, message: Message):
+        self._publish_chat_update(
+            message.event_id, event_type,
+            lambda: MessageResponse.model_validate(message).model_dump(mode="json")
+        )
+    
+    def _publish_chat_update(self, event_id: int, event_type: str, build_data):
+        """Fan a committed chat change out to subscribers; never fails the write."""
+        try:
+            chat_broadcaster.publish(event_id, event_type, build_data())
+        except Exception as e:
+            logger.warning(f"Failed to publish chat update '{event_type}' for event {event_id}: {e}")
+    
+    def get_unread_count(self, event_id: int, user_id: int) -> int:
+        """Count messages newer than the user's read watermark."""
+        self._get_event_with_access(event_id, user_id)
+        return count_unread_messages(self.db, event_id, user_id)
     
     def _process_mentions(self, message: Message):
         """Process @mentions in message content."""
@@ -0,0 +1,176 @@
+"""
+Notification queue dispatcher.
+
+Due rows in notification_queue are claimed in batches with
+SELECT ... FOR UPDATE SKIP LOCKED and flipped to 'processing' in the same
+short transaction, so any number of Celery workers can dispatch at once
+without sending a notification twice. Sends within a batch run
+concurrently, bounded per channel so a slow SMS gateway cannot starve
+push or email, and every outcome of the batch (queue status and delivery
+log) is written back in one commit. Push items of a batch are handed to
+FCM together, one message per recipient device, in send_each calls of up
+to 500 messages.
+
+A worker that dies mid-batch leaves its rows 'processing'; they are
+claimed again once NOTIFICATION_CLAIM_LEASE_SECONDS have passed.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.models.notification_models import NotificationChannel, NotificationStatus
+
+logger = get_logger(__name__)
+
+# Sends a claimed queue item, returning whether it was delivered
+Sender = Callable[[Any], Awaitable[bool]]
+
+
+class DispatchResult(NamedTuple):
+    """Outcome of one dispatch run"""
+    claimed: int
+    sent: int
+    failed: int
+    batches: int
+    duration_seconds: float
+
+
+class NotificationDispatcher:
+    """
+    Claim, send and settle queued notifications for one NotificationService.
+
+    Args:
+        service: NotificationService whose session, repositories and
+            channel senders are used
+        senders: Optional per-channel overrides of the send coroutine, e.g.
+            stub providers in tests and benchmarks
+        channel_limits: Concurrent sends per channel value, defaults to
+            NOTIFICATION_CHANNEL_CONCURRENCY
+        batch_size: Rows claimed per batch
+        metrics: Optional sink whose record_lag(seconds) receives the delay
+            between each item's scheduled_for and its send
+    """
+
+    def __init__(
+        self,
+        service,
+        senders: Optional[Dict[NotificationChannel, Sender]] = None,
+        channel_limits: Optional[Dict[str, int]] = None,
+        batch_size: Optional[int] = None,
+        metrics=None
+    ):
+        self.service = service
+        self.repo = service.notification_repo
+        self.senders = senders or {}
+        self.metrics = metrics
+        self.batch_size = batch_size or settings.NOTIFICATION_DISPATCH_BATCH_SIZE
+        limits = channel_limits or settings.NOTIFICATION_CHANNEL_CONCURRENCY
+        self._semaphores = {
+            channel: asyncio.Semaphore(max(limits.get(channel.value, 10), 1))
+            for channel in NotificationChannel
+        }
+
+    async def dispatch(self, limit: int) -> DispatchResult:
+        """Dispatch up to limit due notifications, batch by batch"""
+        start = time.perf_counter()
+        claimed = sent = failed = batches = 0
+
+        while claimed < limit:
+            batch = self.repo.claim_due_notifications(
+                min(self.batch_size, limit - claimed),
+                settings.NOTIFICATION_CLAIM_LEASE_SECONDS
+            )
+            if not batch:
+                break
+
+            batch_sent = await self.dispatch_batch(batch)
+            claimed += len(batch)
+            sent += batch_sent
+            failed += len(batch) - batch_sent
+            batches += 1
+
+        result = DispatchResult(claimed, sent, failed, batches, time.perf_counter() - start)
+        if claimed:
+            logger.info(
+                f"Dispatched {claimed} notifications in {batches} batches "
+                f"({sent} sent, {failed} failed) in {result.duration_seconds:.2f}s"
+            )
+        return result
+
+    async def dispatch_batch(self, batch: List[Any]) -> int:
+        """Send one claimed batch concurrently and settle it in a single commit"""
+        self.service._prefetch_recipients(
+            {item.recipient_id for item in batch},
+            {item.recipient_id for item in batch if item.channel == NotificationChannel.PUSH}
+        )
+        # Push items go to FCM together unless a test or benchmark overrides the push sender
+        batch_push = NotificationChannel.PUSH not in self.senders
+        push_items = [item for item in batch if batch_push and item.channel == NotificationChannel.PUSH]
+        single_items = [item for item in batch if not (batch_push and item.channel == NotificationChannel.PUSH)]
+        try:
+            push_outcomes, single_outcomes = await asyncio.gather(
+                self._send_push(push_items),
+                asyncio.gather(*[self._send(item) for item in single_items])
+            )
+        finally:
+            self.service._clear_recipients()
+        outcome_by_item = {
+            id(item): outcome
+            for item, outcome in zip(push_items + single_items, list(push_outcomes) + list(single_outcomes))
+        }
+        outcomes = [outcome_by_item[id(item)] for item in batch]
+
+        now = datetime.utcnow()
+        transitions = []
+        logs = []
+        for item, (success, error) in zip(batch, outcomes):
+            if self.metrics is not None:
+                self.metrics.record_lag((now - item.scheduled_for).total_seconds())
+            # Failed rows are re-queued by retry_failed_notifications
+            transition = {"id": item.id, "status": "sent" if success else "failed", "error_message": error}
+            transition["sent_at" if success else "failed_at"] = now
+            transitions.append(transition)
+
+            # The in-app sender stores its own log as the persisted copy
+            if success and item.channel == NotificationChannel.IN_APP:
+                continue
+            logs.append({
+                "reminder_id": item.reminder_id,
+                "event_id": item.event_id,
+                "recipient_id": item.recipient_id,
+                "notification_type": item.notification_type,
+                "channel": item.channel,
+                "subject": item.subject,
+                "message": item.message,
+                "status": NotificationStatus.SENT if success else NotificationStatus.FAILED,
+                "sent_at": now if success else None,
+                "error_message": error
+            })
+
+        self.repo.complete_notifications(transitions, logs)
+        return sum(1 for success, _ in outcomes if success)
+
+    async def _send_push(self, items: List[Any]) -> List[tuple]:
+        """Send every push item of a batch in one FCM batch send"""
+        if not items:
+            return []
+        try:
+            return await self.service._send_push_batch(items)
+        except Exception as e:
+            logger.error(f"Error sending push batch of {len(items)} notifications: {e}")
+            return [(False, str(e))] * len(items)
+
+    async def _send(self, item) -> tuple:
+        """Send one item under its channel's concurrency limit"""
+        sender = self.senders.get(item.channel, self.service._send_notification)
+        async with self._semaphores[item.channel]:
+            try:
+                if await sender(item):
+                    return True, None
+                return False, "Delivery failed"
+            except Exception as e:
+                logger.error(f"Error sending notification {item.id}: {e}")
+                return False, str(e)
@@ -0,0 +1,297 @@
+"""
+Near-real-time scheduler for queued notifications.
+
+Instead of polling notification_queue on a fixed beat, upcoming delivery
+times are kept in a Redis sorted set (notifications:due, scored by epoch
+seconds). Writers add the scheduled_for times of rows they queue and push
+a token onto notifications:wakeup; the scheduler blocks on that list until
+either the earliest indexed time arrives or a writer wakes it because
+something earlier was queued.
+
+When work is due the scheduler drains it through NotificationDispatcher in
+adaptive batches: the batch doubles while claims come back full (a backlog)
+and resets once a claim comes back short (caught up). The database stays
+the source of truth: while Redis is unreachable the next due time is read
+from the (status, scheduled_for) index, and the sorted set is periodically
+re-seeded from the table so nothing queued by another path is missed.
+
+Lag (send time minus scheduled_for) is tracked per notification and
+published to Redis for /notifications/queue-status, together with the
+per-batch FCM latency and success counters of this process.
+"""
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import redis
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_backend
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.models.notification_models import NotificationQueue
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.push_service import push_service
+
+logger = get_logger(__name__)
+
+DUE_INDEX_KEY = "notifications:due"
+WAKEUP_KEY = "notifications:wakeup"
+STATS_KEY = "notifications:scheduler:stats"
+
+
+def _timestamp(value: datetime) -> float:
+    """Epoch seconds for a naive UTC datetime"""
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+class DueIndex:
+    """Redis sorted set of upcoming delivery times"""
+
+    def __init__(self):
+        self._blocking: Optional[redis.Redis] = None
+
+    def add(self, scheduled_times: Iterable[datetime]):
+        """Index delivery times and wake the scheduler"""
+        mapping = {value.isoformat(): _timestamp(value) for value in set(scheduled_times)}
+        client = cache_backend.redis
+        if not mapping or client is None:
+            return
+        try:
+            pipeline = client.pipeline()
+            pipeline.zadd(DUE_INDEX_KEY, mapping)
+            pipeline.lpush(WAKEUP_KEY, 1)
+            pipeline.ltrim(WAKEUP_KEY, 0, 0)
+            pipeline.execute()
+        except redis.RedisError as e:
+            cache_backend.mark_redis_down(e)
+
+    def next_due(self) -> Optional[float]:
+        """Earliest indexed time in epoch seconds, None when empty or unavailable"""
+        client = cache_backend.redis
+        if client is None:
+            return None
+        try:
+            head = client.zrange(DUE_INDEX_KEY, 0, 0, withscores=True)
+        except redis.RedisError as e:
+            cache_backend.mark_redis_down(e)
+            return None
+        return head[0][1] if head else math.inf
+
+    def pop_due(self, now: float):
+        """Drop every indexed time at or before now"""
+        client = cache_backend.redis
+        if client is None:
+            return
+        try:
+            client.zremrangebyscore(DUE_INDEX_KEY, "-inf", now)
+        except redis.RedisError as e:
+            cache_backend.mark_redis_down(e)
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a writer wakes the scheduler or timeout passes"""
+        if cache_backend.redis is not None and timeout >= 0.01:
+            try:
+                return self._blocking_client().blpop([WAKEUP_KEY], timeout=round(timeout, 2)) is not None
+            except redis.RedisError as e:
+                cache_backend.mark_redis_down(e)
+        time.sleep(max(timeout, 0))
+        return False
+
+    def _blocking_client(self) -> redis.Redis:
+        # The shared cache client's 1s socket timeout would cut a BLPOP short
+        if self._blocking is None:
+            self._blocking = redis.Redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=1
+            )
+        return self._blocking
+
+
+due_index = DueIndex()
+
+
+class SchedulerMetrics:
+    """Dispatch lag and throughput counters for one scheduler process"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._lags = deque(maxlen=window)
+        self.drains = 0
+        self.dispatched = 0
+        self.last_batch_size = 0
+        self.last_drain_at: Optional[datetime] = None
+
+    def record_lag(self, seconds: float):
+        with self._lock:
+            self._lags.append(max(seconds, 0.0))
+
+    def record_drain(self, dispatched: int, batch_size: int):
+        with self._lock:
+            self.drains += 1
+            self.dispatched += dispatched
+            self.last_batch_size = batch_size
+            self.last_drain_at = datetime.utcnow()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lags = sorted(self._lags)
+            drains, dispatched = self.drains, self.dispatched
+            last_batch_size, last_drain_at = self.last_batch_size, self.last_drain_at
+
+        def percentile(p: float) -> float:
+            return lags[min(int(p * len(lags)), len(lags) - 1)] if lags else 0.0
+
+        return {
+            "drains": drains,
+            "dispatched": dispatched,
+            "last_batch_size": last_batch_size,
+            "last_drain_at": last_drain_at.isoformat() if last_drain_at else None,
+            "lag_seconds": {
+                "samples": len(lags),
+                "p50": round(percentile(0.5), 3),
+                "p95": round(percentile(0.95), 3),
+                "max": round(lags[-1], 3) if lags else 0.0
+            }
+        }
+
+
+def get_scheduler_stats() -> Optional[Dict[str, Any]]:
+    """Latest stats published by a running scheduler, if any"""
+    client = cache_backend.redis
+    if client is None:
+        return None
+    try:
+        payload = client.get(STATS_KEY)
+    except redis.RedisError as e:
+        cache_backend.mark_redis_down(e)
+        return None
+    return json.loads(payload) if payload else None
+
+
+class NotificationScheduler:
+    """
+    Long-running loop that dispatches notifications as they fall due.
+
+    Args:
+        session_factory: Creates the database session used for each drain
+        min_batch / max_batch: Bounds of the adaptive claim size
+        max_idle_seconds: Longest sleep without re-checking the queue
+        resync_seconds: How often the due index is re-seeded from the table
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        min_batch: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        max_idle_seconds: Optional[float] = None,
+        resync_seconds: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        self.min_batch = min_batch or settings.NOTIFICATION_SCHEDULER_MIN_BATCH
+        self.max_batch = max(max_batch or settings.NOTIFICATION_SCHEDULER_MAX_BATCH, self.min_batch)
+        self.max_idle_seconds = max_idle_seconds or settings.NOTIFICATION_SCHEDULER_MAX_IDLE_SECONDS
+        self.resync_seconds = resync_seconds or settings.NOTIFICATION_SCHEDULER_RESYNC_SECONDS
+        self.metrics = SchedulerMetrics()
+        self._stopped = threading.Event()
+        self._next_resync = 0.0
+        # One loop for the life of the process, reused by every drain
+        self._loop = asyncio.new_event_loop()
+
+    def stop(self):
+        """Finish the current iteration and leave run_forever"""
+        self._stopped.set()
+
+    def run_forever(self):
+        """Sleep until work is due, drain it, repeat until stop() is called"""
+        logger.info("Notification scheduler started")
+        while not self._stopped.is_set():
+            try:
+                if time.monotonic() >= self._next_resync:
+                    self.resync()
+
+                wait = self.seconds_until_due()
+                if wait > 0:
+                    due_index.wait(min(wait, self.max_idle_seconds))
+                else:
+                    self.drain()
+                self.publish_stats()
+            except Exception as e:
+                logger.error(f"Notification scheduler iteration failed: {e}")
+                time.sleep(1)
+        self._loop.close()
+        logger.info("Notification scheduler stopped")
+
+    def seconds_until_due(self) -> float:
+        """Seconds until the earliest queued notification is due, 0 if overdue"""
+        next_due = due_index.next_due()
+        if next_due is None:
+            # Redis unavailable: ask the table, which the claim index covers
+            with self.session_factory() as db:
+                scheduled = db.execute(
+                    select(func.min(NotificationQueue.scheduled_for)).where(
+                        NotificationQueue.status == "queued"
+                    )
+                ).scalar()
+            if scheduled is None:
+                return self.max_idle_seconds
+            next_due = _timestamp(scheduled)
+        return max(next_due - _timestamp(datetime.utcnow()), 0.0)
+
+    def drain(self) -> int:
+        """Dispatch everything currently due in growing batches"""
+        # Clear the index first; times added during the drain survive it
+        due_index.pop_due(_timestamp(datetime.utcnow()))
+        dispatched, batch_size = self._loop.run_until_complete(self._drain())
+        self.metrics.record_drain(dispatched, batch_size)
+        return dispatched
+
+    async def _drain(self):
+        # Imported here: the notification service imports this module
+        from app.services.notification_service import NotificationService
+
+        batch_size = self.min_batch
+        dispatched = 0
+        with self.session_factory() as db:
+            service = NotificationService(db)
+            while not self._stopped.is_set():
+                dispatcher = NotificationDispatcher(service, batch_size=batch_size, metrics=self.metrics)
+                result = await dispatcher.dispatch(batch_size)
+                dispatched += result.claimed
+                if result.claimed < batch_size:
+                    break
+                # A full claim means a backlog: take bigger bites
+                batch_size = min(batch_size * 2, self.max_batch)
+        return dispatched, batch_size
+
+    def resync(self):
+        """Re-seed the due index from queued rows in the table"""
+        self._next_resync = time.monotonic() + self.resync_seconds
+        horizon = datetime.utcnow() + timedelta(seconds=self.resync_seconds * 2)
+        with self.session_factory() as db:
+            scheduled_times = db.execute(
+                select(NotificationQueue.scheduled_for).where(
+                    NotificationQueue.status == "queued",
+                    NotificationQueue.scheduled_for <= horizon
+                ).distinct().limit(10000)
+            ).scalars().all()
+        due_index.add(scheduled_times)
+
+    def publish_stats(self):
+        """Share this process's metrics with the API workers"""
+        client = cache_backend.redis
+        if client is None:
+            return
+        try:
+            stats = {**self.metrics.snapshot(), "push": push_service.metrics.snapshot()}
+            client.set(STATS_KEY, json.dumps(stats), ex=int(self.max_idle_seconds * 4))
+        except redis.RedisError as e:
+            cache_backend.mark_redis_down(e)
@@ -3,20 +3,23 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, time
 import asyncio
 import json
-from app.repositories.notification_repo import NotificationRepository
+from app.repositories.notification_repo import NotificationRepository, preference_values
 from app.repositories.event_repo import EventRepository
 from app.repositories.user_repo import UserRepository
 from app.models.notification_models import (
-    NotificationType, NotificationStatus, NotificationChannel, ReminderFrequency
+    NotificationType, NotificationStatus, NotificationChannel, ReminderFrequency, DevicePlatform
 )
 from app.models.event_models import EventInvitation
 from app.models.user_models import User
 from app.schemas.pagination import PaginationParams
+from app.core.config import settings
 from app.core.errors import NotFoundError, ValidationError, AuthorizationError
 from app.services.email_service import EmailService
 from app.services.sms_service import SMSService
 from app.services.push_service import push_service
 from app.services.websocket_manager import websocket_manager
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.notification_scheduler import due_index
 from app.core.logger import get_logger
 
 # Initialize logger
@@ -34,6 +37,10 @@ class NotificationService:
         # Initialize services for sending notifications
         self.email_service = EmailService()
         self.sms_service = SMSService()
+        
+        # Recipients and their active devices loaded up front for a dispatch batch, by user id
+        self._recipients: Dict[int, User] = {}
+        self._devices: Dict[int, List[Dict[str, Any]]] = {}
     
     # Smart Reminder CRUD operations
     def create_reminder(
@@ -256,44 +263,9 @@ class NotificationService:
     
     # Notification processing
     async def process_pending_notifications(self, limit: int = 50) -> int:
-        """Process pending notifications in the queue."""
-        notifications = self.notification_repo.get_queued_notifications(limit)
-        processed_count = 0
-        
-        for notification in notifications:
-            try:
-                # Send notification based on channel
-                success = await self._send_notification(notification)
-                
-                if success:
-                    # Mark as sent
-                    self.notification_repo.update_notification_queue_status(
-                        notification.id, 'sent'
-                    )
-                    
-                    # Log successful delivery
-                    self._log_notification(notification, NotificationStatus.SENT)
-                else:
-                    # Mark as failed
-                    self.notification_repo.update_notification_queue_status(
-                        notification.id, 'failed', 'Delivery failed'
-                    )
-                    
-                    # Log failed delivery
-                    self._log_notification(notification, NotificationStatus.FAILED)
-                
-                processed_count += 1
-                
-            except Exception as e:
-                # Mark as failed with error
-                self.notification_repo.update_notification_queue_status(
-                    notification.id, 'failed', str(e)
-                )
-                
-                # Log error
-                self._log_notification(notification, NotificationStatus.FAILED)
-        
-        return processed_count
+        """Claim and send due notifications, returning how many were processed."""
+        result = await NotificationDispatcher(self).dispatch(limit)
+        return result.claimed
     
     # Notification preferences
     def get_user_preferences(self, user_id: int) -> List:
@@ -621,38 +593,84 @@ class NotificationService:
         return False
     
     def _queue_reminder_notifications(self, reminder):
-        """Queue notifications for a reminder."""
-        # Get target users
-        target_users = self.notification_repo.get_reminder_targets(reminder)
-        occurrence_times = self._generate_occurrence_times(reminder)
+        """Queue notifications for a reminder, in the background when Celery is reachable."""
+        if settings.NOTIFICATION_FANOUT_IN_BACKGROUND:
+            try:
+                # Imported here: the task module imports this service
+                from app.tasks.notifications import fan_out_reminder_notifications
+                fan_out_reminder_notifications.delay(reminder.id)
+                return
+            except Exception as e:
+                logger.warning(f"Could not enqueue fan-out for reminder {reminder.id}, queueing inline: {e}")
         
-        for user in target_users:
-            # Get user preferences
-            preferences = self._get_user_notification_preferences(
-                user.id, reminder.notification_type
-            )
-            
-            # Queue notifications based on preferences and reminder settings
-            channels_to_send = []
-            
-            if reminder.send_email and preferences.get('email_enabled', True):
-                channels_to_send.append(NotificationChannel.EMAIL)
-            
-            if reminder.send_sms and preferences.get('sms_enabled', False):
-                channels_to_send.append(NotificationChannel.SMS)
-            
-            if reminder.send_push and preferences.get('push_enabled', True):
-                channels_to_send.append(NotificationChannel.PUSH)
-            
-            if reminder.send_in_app and preferences.get('in_app_enabled', True):
-                channels_to_send.append(NotificationChannel.IN_APP)
+        self.fan_out_reminder_notifications(reminder)
+    
+    def fan_out_reminder_notifications(self, reminder) -> int:
+        """
+        Queue every notification a reminder produces with one bulk insert.
+        
+        Preferences for all targets are read in one query. Users sharing a
+        preference profile (most keep the defaults) share one computed set
+        of channels and delivery times, so scheduling work scales with the
+        number of distinct profiles rather than with recipients.
+        """
+        user_ids = self.notification_repo.get_reminder_target_ids(reminder)
+        occurrence_times = self._generate_occurrence_times(reminder)
+        stored_preferences = self.notification_repo.get_cached_preferences(
+            user_ids, reminder.notification_type
+        )
+        priority = self._get_notification_priority(reminder.notification_type)
+        
+        schedules: Dict[Tuple, Tuple[List[NotificationChannel], List[datetime]]] = {}
+        queue_rows = []
+        for user_id in user_ids:
+            preferences = stored_preferences.get(user_id) or self._preference_to_dict(None)
+            profile = tuple(sorted(preferences.items()))
+            if profile not in schedules:
+                schedules[profile] = (
+                    self._get_reminder_channels(reminder, preferences),
+                    [self._apply_delivery_preferences(t, preferences) for t in occurrence_times]
+                )
+            channels, scheduled_times = schedules[profile]
             
-            # Create queue items for each channel and occurrence
-            for scheduled_time in occurrence_times:
-                for channel in channels_to_send:
-                    self._queue_notification(
-                        reminder, user, channel, preferences, scheduled_time=scheduled_time
-                    )
+            for scheduled_time in scheduled_times:
+                for channel in channels:
+                    queue_rows.append({
+                        'reminder_id': reminder.id,
+                        'event_id': reminder.event_id,
+                        'recipient_id': user_id,
+                        'notification_type': reminder.notification_type,
+                        'channel': channel,
+                        'subject': reminder.title,
+                        'message': reminder.message,
+                        'scheduled_for': scheduled_time,
+                        'priority': priority,
+                        'status': 'queued',
+                        'attempts': 0,
+                        'max_attempts': 3
+                    })
+        
+        queued = self.notification_repo.replace_queued_reminder_notifications(reminder.id, queue_rows)
+        due_index.add(row['scheduled_for'] for row in queue_rows)
+        return queued
+    
+    def _get_reminder_channels(self, reminder, preferences: Dict) -> List[NotificationChannel]:
+        """Channels a reminder is sent on for one set of user preferences."""
+        channels = []
+        
+        if reminder.send_email and preferences.get('email_enabled', True):
+            channels.append(NotificationChannel.EMAIL)
+        
+        if reminder.send_sms and preferences.get('sms_enabled', False):
+            channels.append(NotificationChannel.SMS)
+        
+        if reminder.send_push and preferences.get('push_enabled', True):
+            channels.append(NotificationChannel.PUSH)
+        
+        if reminder.send_in_app and preferences.get('in_app_enabled', True):
+            channels.append(NotificationChannel.IN_APP)
+        
+        return channels
     
     def _generate_occurrence_times(self, reminder) -> List[datetime]:
         """Build scheduled times for all occurrences of a reminder."""
@@ -764,17 +782,9 @@ class NotificationService:
     ):
         """Queue a single notification."""
         # Calculate scheduled time based on user preferences
-        scheduled_time = scheduled_time or reminder.scheduled_time
-        
-        # Apply user's advance notice preference
-        advance_notice_hours = preferences.get('advance_notice_hours', 0)
-        if advance_notice_hours > 0:
-            scheduled_time = scheduled_time - timedelta(hours=advance_notice_hours)
-        
-        # Check quiet hours
-        if self._is_quiet_hours(scheduled_time, preferences):
-            # Adjust to next available time
-            scheduled_time = self._adjust_for_quiet_hours(scheduled_time, preferences)
+        scheduled_time = self._apply_delivery_preferences(
+            scheduled_time or reminder.scheduled_time, preferences
+        )
         
         queue_data = {
             'reminder_id': reminder.id,
@@ -790,6 +800,21 @@ class NotificationService:
         }
         
         self.notification_repo.create_notification_queue_item(queue_data)
+        due_index.add([scheduled_time])
+    
+    def _apply_delivery_preferences(self, scheduled_time: datetime, preferences: Dict) -> datetime:
+        """Shift a delivery time by the user's advance notice and out of quiet hours."""
+        # Apply user's advance notice preference
+        advance_notice_hours = preferences.get('advance_notice_hours', 0)
+        if advance_notice_hours > 0:
+            scheduled_time = scheduled_time - timedelta(hours=advance_notice_hours)
+        
+        # Check quiet hours
+        if self._is_quiet_hours(scheduled_time, preferences):
+            # Adjust to next available time
+            scheduled_time = self._adjust_for_quiet_hours(scheduled_time, preferences)
+        
+        return scheduled_time
     
     def _requeue_reminder_notifications(self, reminder):
         """Cancel existing notifications and queue new ones."""
@@ -802,17 +827,12 @@ class NotificationService:
     def _get_user_notification_preferences(self, user_id: int, notification_type: NotificationType) -> Dict:
         """Get user notification preferences for a specific type."""
         preference = self.notification_repo.get_user_preference(user_id, notification_type)
-        
+        return self._preference_to_dict(preference)
+    
+    def _preference_to_dict(self, preference) -> Dict:
+        """Flatten a stored preference, or the defaults when there is none."""
         if preference:
-            return {
-                'email_enabled': preference.email_enabled,
-                'sms_enabled': preference.sms_enabled,
-                'push_enabled': preference.push_enabled,
-                'in_app_enabled': preference.in_app_enabled,
-                'advance_notice_hours': preference.advance_notice_hours,
-                'quiet_hours_start': preference.quiet_hours_start,
-                'quiet_hours_end': preference.quiet_hours_end
-            }
+            return preference_values(preference)
         
         # Return default preferences
         return {
@@ -881,6 +901,32 @@ class NotificationService:
         
         return adjusted
     
+    def _prefetch_recipients(self, user_ids, push_user_ids=()):
+        """Load a dispatch batch's recipients, and devices of its push recipients, one query each at most."""
+        if user_ids:
+            users = self.db.query(User).filter(User.id.in_(list(user_ids))).all()
+            self._recipients.update({user.id: user for user in users})
+        if push_user_ids:
+            self._devices.update(self.notification_repo.get_cached_active_devices(list(push_user_ids)))
+    
+    def _clear_recipients(self):
+        """Forget recipients prefetched for a dispatch batch."""
+        self._recipients = {}
+        self._devices = {}
+    
+    def _get_active_devices(self, user_id: int) -> List[Dict[str, Any]]:
+        """Active push devices of a recipient, preferring the prefetched batch."""
+        if user_id in self._devices:
+            return self._devices[user_id]
+        return self.notification_repo.get_cached_active_devices([user_id]).get(user_id, [])
+    
+    def _get_recipient(self, user_id: int) -> Optional[User]:
+        """Get a notification recipient, preferring the prefetched batch."""
+        recipient = self._recipients.get(user_id)
+        if recipient is None:
+            recipient = self.user_repo.get_by_id(user_id)
+        return recipient
+    
     async def _send_notification(self, notification) -> bool:
         """Send a notification based on its channel."""
         try:
@@ -903,7 +949,7 @@ class NotificationService:
         """Send email notification."""
         try:
             # Get recipient user
-            user = self.user_repo.get_by_id(notification.recipient_id)
+            user = self._get_recipient(notification.recipient_id)
             
             if not user or not user.email:
                 return False
@@ -926,7 +972,7 @@ class NotificationService:
         """Send SMS notification using Termii SMS service."""
         try:
             # Get recipient user
-            recipient = self.user_repo.get_by_id(notification.recipient_id)
+            recipient = self._get_recipient(notification.recipient_id)
             if not recipient or not recipient.phone_number:
                 return False
             
@@ -935,8 +981,9 @@ class NotificationService:
                 logger.warning("SMS service not configured, skipping SMS notification")
                 return False
             
-            # Send SMS
-            result = self.sms_service.send_sms(
+            # Send SMS off the event loop; the Termii client is blocking
+            result = await asyncio.to_thread(
+                self.sms_service.send_sms,
                 to_phone=recipient.phone_number,
                 message=f"{notification.subject}\n\n{notification.message}"
             )
@@ -950,65 +997,97 @@ class NotificationService:
     
     async def _send_push_notification(self, notification) -> bool:
         """Send push notification using Firebase Cloud Messaging."""
-        try:
-            # Get active device tokens using the repository method
-            active_devices = self.notification_repo.get_user_devices(notification.recipient_id, active_only=True)
-            
-            if not active_devices:
-                return False
-            
-            device_tokens = [device.device_token for device in active_devices]
-            
-            # Prepare notification data
-            data = {}
-            if hasattr(notification, 'extra_data') and notification.extra_data:
-                try:
-                    import json
-                    data = json.loads(notification.extra_data)
-                except:
-                    pass
-            
-            # Add event and notification IDs to data
-            data.update({
-                'event_id': str(notification.event_id),
-                'notification_id': str(notification.id) if hasattr(notification, 'id') else None,
-                'click_action': 'FLUTTER_NOTIFICATION_CLICK'  # For Flutter apps
-            })
-            
-            # Send to multiple devices
-            if len(device_tokens) == 1:
-                # Single device
-                platform = active_devices[0].platform if active_devices else None
-                success = await push_service.send_notification(
-                    device_token=device_tokens[0],
-                    title=notification.subject or "New Notification",
-                    body=notification.message,
-                    data=data,
-                    notification_type=notification.notification_type,
-                    platform=platform
-                )
-                return success
+        success, _ = (await self._send_push_batch([notification]))[0]
+        # Outside a dispatch batch nothing else commits the pruned devices
+        self.db.commit()
+        return success
+    
+    async def _send_push_batch(self, notifications) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Send a dispatch batch's push notifications through one FCM batch send.
+        
+        Every notification is expanded to one message per active device of its
+        recipient, and devices whose tokens FCM reports as invalid are
+        deactivated, committed with the rest of the batch by the caller.
+        Returns a (success, error) pair per notification.
+        """
+        outcomes = [(False, "No active devices")] * len(notifications)
+        messages = []
+        owners = []
+        
+        for index, notification in enumerate(notifications):
+            try:
+                # Get active device tokens from the batch or the settings cache
+                active_devices = self._get_active_devices(notification.recipient_id)
+                if not active_devices:
+                    continue
+                data = self._push_data(notification)
+                for device in active_devices:
+                    messages.append(push_service.build_message(
+                        device['device_token'],
+                        notification.subject or "New Notification",
+                        notification.message,
+                        data=data,
+                        notification_type=notification.notification_type,
+                        platform=DevicePlatform(device['platform'])
+                    ))
+                    owners.append((index, notification.recipient_id, device['device_token']))
+            except Exception as e:
+                # Log error but don't raise to avoid breaking notification flow
+                logger.error(f"Error preparing push notification: {str(e)}")
+                outcomes[index] = (False, str(e))
+        
+        results = await push_service.send_each(messages)
+        
+        delivered = set()
+        errors = {}
+        invalid_tokens: Dict[int, set] = {}
+        for (index, user_id, token), result in zip(owners, results):
+            if result['success']:
+                delivered.add(index)
             else:
-                # Multiple devices
-                result = await push_service.send_multicast_notification(
-                    device_tokens=device_tokens,
-                    title=notification.subject or "New Notification",
-                    body=notification.message,
-                    data=data,
-                    notification_type=notification.notification_type
-                )
-                return result['success_count'] > 0
-                
-        except Exception as e:
-            # Log error but don't raise to avoid breaking notification flow
-            logger.error(f"Error sending push notification: {str(e)}")
-            return False
+                errors.setdefault(index, result['error'])
+            if result['invalid_token']:
+                invalid_tokens.setdefault(user_id, set()).add(token)
+        
+        for index in {index for index, _, _ in owners}:
+            outcomes[index] = (True, None) if index in delivered else (False, errors.get(index))
+        
+        if invalid_tokens:
+            pruned = self.notification_repo.deactivate_device_tokens(invalid_tokens)
+            push_service.metrics.record_pruned(pruned)
+            # Later sends in this batch must not reuse the pruned tokens
+            for user_id, tokens in invalid_tokens.items():
+                if user_id in self._devices:
+                    self._devices[user_id] = [
+                        device for device in self._devices[user_id] if device['device_token'] not in tokens
+                    ]
+            logger.info(f"Deactivated {pruned} push devices with invalid tokens")
+        
+        return outcomes
+    
+    def _push_data(self, notification) -> Dict[str, Any]:
+        """Data payload of a push notification."""
+        data = {}
+        if hasattr(notification, 'extra_data') and notification.extra_data:
+            try:
+                data = json.loads(notification.extra_data)
+            except (TypeError, ValueError):
+                pass
+        
+        # Add event and notification IDs to data
+        data.update({
+            'event_id': str(notification.event_id),
+            'notification_id': str(notification.id) if hasattr(notification, 'id') else None,
+            'click_action': 'FLUTTER_NOTIFICATION_CLICK'  # For Flutter apps
+        })
+        return data
     
     async def _send_in_app_notification(self, notification) -> bool:
         """Send in-app notification via WebSocket and store for offline users."""
         try:
             # Get recipient user
-            recipient = self.user_repo.get_by_id(notification.recipient_id)
+            recipient = self._get_recipient(notification.recipient_id)
             if not recipient:
                 return False
             
@@ -3,6 +3,7 @@ import string
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
 from sqlalchemy.orm import Session
+from app.core.auth_state import OTPCheck, auth_state
 from app.models.user_models import User
 from app.core.errors import ValidationError, AuthenticationError
 from app.services.email_service import email_service
@@ -23,6 +24,84 @@ class OTPService:
         """Generate a 6-digit OTP."""
         return ''.join(secrets.choice(string.digits) for _ in range(self.otp_length))
     
+    def _store_otp(self, user: User, otp: str) -> None:
+        """Store a new OTP in Redis, or on the user row while Redis is unavailable."""
+        if auth_state.issue_otp(user.id, otp, self.otp_expiry_minutes * 60):
+            # Drop a code issued before the move to Redis so it cannot be used as well
+            if user.email_verification_otp:
+                self._clear_row_otp(user)
+                self.db.commit()
+            return
+        
+        user.email_verification_otp = otp
+        user.otp_expires_at = datetime.utcnow() + timedelta(minutes=self.otp_expiry_minutes)
+        user.otp_attempts = 0  # Reset attempts
+        self.db.commit()
+    
+    def _check_otp(self, user: User, provided_otp: str, consume: bool) -> OTPCheck:
+        """Count an attempt against the pending OTP.
+        
+        Codes still stored on the user row (issued while Redis was down or
+        before the move to Redis) are checked there.
+        """
+        result = auth_state.check_otp(user.id, provided_otp, self.max_attempts, consume)
+        if result is not None and (result.status != "missing" or not user.email_verification_otp):
+            return result
+        return self._check_row_otp(user, provided_otp, consume)
+    
+    def _check_row_otp(self, user: User, provided_otp: str, consume: bool) -> OTPCheck:
+        """Attempt counting against the user row columns."""
+        # Check if user has an OTP
+        if not user.email_verification_otp:
+            return OTPCheck("missing", 0)
+        
+        # Check if OTP has expired
+        if user.otp_expires_at and datetime.utcnow() > user.otp_expires_at:
+            self._clear_row_otp(user)
+            self.db.commit()
+            return OTPCheck("expired", 0)
+        
+        # Check attempt limit
+        if user.otp_attempts >= self.max_attempts:
+            attempts = user.otp_attempts
+            self._clear_row_otp(user)
+            self.db.commit()
+            return OTPCheck("locked", attempts)
+        
+        # Increment attempt count
+        user.otp_attempts += 1
+        attempts = user.otp_attempts
+        
+        if user.email_verification_otp == provided_otp:
+            if consume:
+                self._clear_row_otp(user)
+            self.db.commit()
+            return OTPCheck("ok", attempts)
+        
+        # Clear OTP after max attempts reached
+        if attempts >= self.max_attempts:
+            self._clear_row_otp(user)
+            self.db.commit()
+            return OTPCheck("locked", attempts)
+        
+        self.db.commit()
+        return OTPCheck("invalid", attempts)
+    
+    @staticmethod
+    def _clear_row_otp(user: User) -> None:
+        user.email_verification_otp = None
+        user.otp_expires_at = None
+        user.otp_attempts = 0
+    
+    def _pending_otp(self, user: User) -> Optional[Tuple[datetime, int]]:
+        """Expiry and attempt count of the pending OTP, if any."""
+        status = auth_state.get_otp(user.id)
+        if status is not None:
+            return datetime.utcfromtimestamp(status.expires_at), status.attempts
+        if user.email_verification_otp:
+            return user.otp_expires_at, user.otp_attempts
+        return None
+    
     def send_verification_otp(self, user: User, method: str = "email") -> bool:
         """Generate and send OTP for verification via email or SMS.
         
@@ -33,14 +112,7 @@ class OTPService:
         try:
             # Generate new OTP
             otp = self.generate_otp()
-            expires_at = datetime.utcnow() + timedelta(minutes=self.otp_expiry_minutes)
-            
-            # Update user with OTP details
-            user.email_verification_otp = otp
-            user.otp_expires_at = expires_at
-            user.otp_attempts = 0  # Reset attempts
-            
-            self.db.commit()
+            self._store_otp(user, otp)
             
             success = True
             
@@ -76,53 +148,21 @@ class OTPService:
             Tuple[bool, str]: (success, message)
         """
         try:
-            # Check if user has an OTP
-            if not user.email_verification_otp:
-                return False, "No OTP found. Please request a new verification code."
-            
-            # Check if OTP has expired
-            if user.otp_expires_at and datetime.utcnow() > user.otp_expires_at:
-                # Clear expired OTP
-                user.email_verification_otp = None
-                user.otp_expires_at = None
-                user.otp_attempts = 0
-                self.db.commit()
-                return False, "OTP has expired. Please request a new verification code."
-            
-            # Check attempt limit
-            if user.otp_attempts >= self.max_attempts:
-                # Clear OTP after max attempts
-                user.email_verification_otp = None
-                user.otp_expires_at = None
-                user.otp_attempts = 0
-                self.db.commit()
-                return False, "Too many failed attempts. Please request a new verification code."
+            result = self._check_otp(user, provided_otp, consume=True)
             
-            # Increment attempt count
-            user.otp_attempts += 1
-            
-            # Verify OTP
-            if user.email_verification_otp == provided_otp:
-                # OTP is correct - verify user and clear OTP
+            if result.status == "ok":
+                # OTP is correct - verify user
                 user.is_verified = True
-                user.email_verification_otp = None
-                user.otp_expires_at = None
-                user.otp_attempts = 0
                 self.db.commit()
                 return True, "Email verified successfully!"
-            else:
-                # OTP is incorrect
-                self.db.commit()
-                remaining_attempts = self.max_attempts - user.otp_attempts
-                if remaining_attempts > 0:
-                    return False, f"Invalid OTP. {remaining_attempts} attempts remaining."
-                else:
-                    # Clear OTP after max attempts reached
-                    user.email_verification_otp = None
-                    user.otp_expires_at = None
-                    user.otp_attempts = 0
-                    self.db.commit()
-                    return False, "Too many failed attempts. Please request a new verification code."
+            if result.status == "missing":
+                return False, "No OTP found. Please request a new verification code."
+            if result.status == "expired":
+                return False, "OTP has expired. Please request a new verification code."
+            if result.status == "locked":
+                return False, "Too many failed attempts. Please request a new verification code."
+            remaining_attempts = self.max_attempts - result.attempts
+            return False, f"Invalid OTP. {remaining_attempts} attempts remaining."
                     
         except Exception as e:
             self.db.rollback()
@@ -145,9 +185,11 @@ class OTPService:
                 return False, "Email is already verified."
             
             # Check rate limiting (prevent spam)
-            if (user.otp_expires_at and 
-                datetime.utcnow() < user.otp_expires_at - timedelta(minutes=self.otp_expiry_minutes - 2)):
-                remaining_time = (user.otp_expires_at - timedelta(minutes=self.otp_expiry_minutes - 2) - datetime.utcnow()).seconds // 60
+            pending = self._pending_otp(user)
+            expires_at = pending[0] if pending else None
+            if (expires_at and 
+                datetime.utcnow() < expires_at - timedelta(minutes=self.otp_expiry_minutes - 2)):
+                remaining_time = (expires_at - timedelta(minutes=self.otp_expiry_minutes - 2) - datetime.utcnow()).seconds // 60
                 return False, f"Please wait {remaining_time + 1} minutes before requesting a new OTP."
             
             # Generate and send new OTP
@@ -175,16 +217,9 @@ class OTPService:
             method: Verification method - "email", "sms", or "both"
         """
         try:
-            # Generate new OTP
+            # Generate new OTP (shares the verification OTP slot)
             otp = self.generate_otp()
-            expires_at = datetime.utcnow() + timedelta(minutes=self.otp_expiry_minutes)
-            
-            # Store OTP in user record (reusing email verification fields)
-            user.email_verification_otp = otp
-            user.otp_expires_at = expires_at
-            user.otp_attempts = 0
-            
-            self.db.commit()
+            self._store_otp(user, otp)
             
             success = True
             
@@ -220,49 +255,19 @@ class OTPService:
             Tuple[bool, str]: (success, message)
         """
         try:
-            # Check if user has an OTP
-            if not user.email_verification_otp:
-                return False, "No verification code found. Please request password reset again."
+            # OTP is not consumed here, it is cleared when the password is reset
+            result = self._check_otp(user, provided_otp, consume=False)
             
-            # Check if OTP has expired
-            if user.otp_expires_at and datetime.utcnow() > user.otp_expires_at:
-                # Clear expired OTP
-                user.email_verification_otp = None
-                user.otp_expires_at = None
-                user.otp_attempts = 0
-                self.db.commit()
+            if result.status == "ok":
+                return True, "Verification code confirmed. You can now reset your password."
+            if result.status == "missing":
+                return False, "No verification code found. Please request password reset again."
+            if result.status == "expired":
                 return False, "Verification code has expired. Please request password reset again."
-            
-            # Check attempt limit
-            if user.otp_attempts >= self.max_attempts:
-                # Clear OTP after max attempts
-                user.email_verification_otp = None
-                user.otp_expires_at = None
-                user.otp_attempts = 0
-                self.db.commit()
+            if result.status == "locked":
                 return False, "Too many failed attempts. Please request password reset again."
-            
-            # Increment attempt count
-            user.otp_attempts += 1
-            
-            # Verify OTP
-            if user.email_verification_otp == provided_otp:
-                # OTP is correct - don't clear it yet, it will be cleared when password is reset
-                self.db.commit()
-                return True, "Verification code confirmed. You can now reset your password."
-            else:
-                # OTP is incorrect
-                self.db.commit()
-                remaining_attempts = self.max_attempts - user.otp_attempts
-                if remaining_attempts > 0:
-                    return False, f"Invalid verification code. {remaining_attempts} attempts remaining."
-                else:
-                    # Clear OTP after max attempts reached
-                    user.email_verification_otp = None
-                    user.otp_expires_at = None
-                    user.otp_attempts = 0
-                    self.db.commit()
-                    return False, "Too many failed attempts. Please request password reset again."
+            remaining_attempts = self.max_attempts - result.attempts
+            return False, f"Invalid verification code. {remaining_attempts} attempts remaining."
                     
         except Exception as e:
             self.db.rollback()
@@ -270,11 +275,12 @@ class OTPService:
             return False, "Verification failed. Please try again."
     
     def clear_otp(self, user: User) -> None:
-        """Clear OTP data from user record."""
+        """Clear the pending OTP from Redis and the user record."""
+        auth_state.clear_otp(user.id)
+        if not user.email_verification_otp:
+            return
         try:
-            user.email_verification_otp = None
-            user.otp_expires_at = None
-            user.otp_attempts = 0
+            self._clear_row_otp(user)
             self.db.commit()
         except Exception as e:
             self.db.rollback()
@@ -282,7 +288,8 @@ class OTPService:
     
     def get_otp_status(self, user: User) -> dict:
         """Get current OTP status for user."""
-        if not user.email_verification_otp:
+        pending = self._pending_otp(user)
+        if pending is None:
             return {
                 "has_otp": False,
                 "is_expired": False,
@@ -290,12 +297,13 @@ class OTPService:
                 "expires_at": None
             }
         
-        is_expired = (user.otp_expires_at and 
-                     datetime.utcnow() > user.otp_expires_at)
+        expires_at, attempts = pending
+        is_expired = (expires_at and 
+                     datetime.utcnow() > expires_at)
         
         return {
             "has_otp": True,
             "is_expired": is_expired,
-            "attempts_remaining": max(0, self.max_attempts - user.otp_attempts),
-            "expires_at": user.otp_expires_at.isoformat() if user.otp_expires_at else None
+            "attempts_remaining": max(0, self.max_attempts - attempts),
+            "expires_at": expires_at.isoformat() if expires_at else None
         }
\ No newline at end of file
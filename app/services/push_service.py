@@ -1,19 +1,91 @@
 """
 Firebase Cloud Messaging (FCM) Push Notification Service
+
+The Admin SDK is blocking, so every call to FCM runs on a small thread
+pool instead of the event loop. Batch sends go through send_each, at most
+FCM_BATCH_LIMIT messages per call and each call guarded by the firebase
+circuit breaker, and report which tokens FCM rejected as unregistered so
+callers can deactivate them.
 """
+import asyncio
 import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from threading import Lock
 from typing import List, Dict, Any, Optional
 from firebase_admin import messaging, credentials, initialize_app
-from firebase_admin.exceptions import FirebaseError
+from firebase_admin.exceptions import FirebaseError, InvalidArgumentError
 from app.core.config import settings
-from app.core.circuit_breaker import firebase_circuit_breaker, firebase_fallback
+from app.core.circuit_breaker import firebase_breaker, firebase_circuit_breaker, firebase_fallback
 from app.models.notification_models import DevicePlatform, NotificationType
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Most messages FCM accepts in one send_each / send_each_for_multicast call
+FCM_BATCH_LIMIT = 500
+
+def is_invalid_token_error(exception: Optional[Exception]) -> bool:
+    """Whether FCM rejected the registration token itself, so the device should be dropped."""
+    if isinstance(exception, (messaging.UnregisteredError, messaging.SenderIdMismatchError)):
+        return True
+    # INVALID_ARGUMENT also covers malformed payloads; only the token variant is prunable
+    return (
+        isinstance(exception, InvalidArgumentError)
+        and 'registration token' in str(exception).lower()
+    )
+
+class PushMetrics:
+    """Latency and outcome counters for batch push sends in this process."""
+    
+    def __init__(self, window: int = 500):
+        self._lock = Lock()
+        self._latencies = deque(maxlen=window)
+        self.batches = 0
+        self.calls = 0
+        self.sent = 0
+        self.failed = 0
+        self.pruned_tokens = 0
+    
+    def record_batch(self, calls: int, sent: int, failed: int, seconds: float):
+        with self._lock:
+            self.batches += 1
+            self.calls += calls
+            self.sent += sent
+            self.failed += failed
+            self._latencies.append(seconds)
+    
+    def record_pruned(self, count: int):
+        with self._lock:
+            self.pruned_tokens += count
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            sent, failed = self.sent, self.failed
+            snapshot = {
+                'batches': self.batches,
+                'fcm_calls': self.calls,
+                'sent': sent,
+                'failed': failed,
+                'pruned_tokens': self.pruned_tokens,
+            }
+        
+        def percentile(p: float) -> float:
+            return latencies[min(int(p * len(latencies)), len(latencies) - 1)] if latencies else 0.0
+        
+        snapshot['success_rate'] = round(sent / (sent + failed), 4) if sent + failed else None
+        snapshot['batch_latency_seconds'] = {
+            'samples': len(latencies),
+            'p50': round(percentile(0.5), 3),
+            'p95': round(percentile(0.95), 3),
+            'max': round(latencies[-1], 3) if latencies else 0.0
+        }
+        return snapshot
+
 class PushNotificationService:
     """Service for sending push notifications via Firebase Cloud Messaging."""
     
@@ -23,6 +95,11 @@ class PushNotificationService:
         self._devices: Dict[int, List[Dict[str, Any]]] = {}
         self._device_lock = Lock()
         self._device_seq = 1
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.PUSH_SEND_THREADS,
+            thread_name_prefix="fcm-send"
+        )
+        self.metrics = PushMetrics()
         self._initialize_firebase()
     
     def _initialize_firebase(self):
@@ -58,6 +135,11 @@ class PushNotificationService:
             logger.error(f"Failed to initialize Firebase: {str(e)}")
             self._app = None
     
+    async def _run(self, func, *args):
+        """Run a blocking Admin SDK call on the push thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+    
     def is_available(self) -> bool:
         """Check if push notification service is available."""
         return self._app is not None
@@ -117,6 +199,74 @@ class PushNotificationService:
                     return True
         return False
     
+    def build_message(
+        self,
+        device_token: str,
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None,
+        notification_type: Optional[NotificationType] = None,
+        platform: Optional[DevicePlatform] = None
+    ) -> messaging.Message:
+        """Build the FCM message for one device, with platform-specific config."""
+        # Prepare notification payload
+        notification = messaging.Notification(
+            title=title,
+            body=body
+        )
+        
+        # Prepare data payload
+        data_payload = dict(data or {})
+        if notification_type:
+            data_payload['notification_type'] = notification_type.value
+        
+        # Platform-specific configuration
+        android_config = None
+        apns_config = None
+        webpush_config = None
+        
+        if platform == DevicePlatform.ANDROID:
+            android_config = messaging.AndroidConfig(
+                priority='high',
+                notification=messaging.AndroidNotification(
+                    title=title,
+                    body=body,
+                    icon='ic_notification',
+                    color='#FF6B35',
+                    sound='default'
+                )
+            )
+        elif platform == DevicePlatform.IOS:
+            apns_config = messaging.APNSConfig(
+                payload=messaging.APNSPayload(
+                    aps=messaging.Aps(
+                        alert=messaging.ApsAlert(
+                            title=title,
+                            body=body
+                        ),
+                        badge=1,
+                        sound='default'
+                    )
+                )
+            )
+        elif platform == DevicePlatform.WEB:
+            webpush_config = messaging.WebpushConfig(
+                notification=messaging.WebpushNotification(
+                    title=title,
+                    body=body,
+                    icon='/icon-192x192.png'
+                )
+            )
+        
+        return messaging.Message(
+            notification=notification,
+            data={k: str(v) for k, v in data_payload.items()},  # FCM requires string values
+            token=device_token,
+            android=android_config,
+            apns=apns_config,
+            webpush=webpush_config
+        )
+    
     @firebase_circuit_breaker(fallback=firebase_fallback)
     async def send_notification(
         self,
@@ -146,67 +296,13 @@ class PushNotificationService:
             return False
         
         try:
-            # Prepare notification payload
-            notification = messaging.Notification(
-                title=title,
-                body=body
+            message = self.build_message(
+                device_token, title, body, data=data,
+                notification_type=notification_type, platform=platform
             )
             
-            # Prepare data payload
-            data_payload = data or {}
-            if notification_type:
-                data_payload['notification_type'] = notification_type.value
-            
-            # Platform-specific configuration
-            android_config = None
-            apns_config = None
-            webpush_config = None
-            
-            if platform == DevicePlatform.ANDROID:
-                android_config = messaging.AndroidConfig(
-                    priority='high',
-                    notification=messaging.AndroidNotification(
-                        title=title,
-                        body=body,
-                        icon='ic_notification',
-                        color='#FF6B35',
-                        sound='default'
-                    )
-                )
-            elif platform == DevicePlatform.IOS:
-                apns_config = messaging.APNSConfig(
-                    payload=messaging.APNSPayload(
-                        aps=messaging.Aps(
-                            alert=messaging.ApsAlert(
-                                title=title,
-                                body=body
-                            ),
-                            badge=1,
-                            sound='default'
-                        )
-                    )
-                )
-            elif platform == DevicePlatform.WEB:
-                webpush_config = messaging.WebpushConfig(
-                    notification=messaging.WebpushNotification(
-                        title=title,
-                        body=body,
-                        icon='/icon-192x192.png'
-                    )
-                )
-            
-            # Create message
-            message = messaging.Message(
-                notification=notification,
-                data={k: str(v) for k, v in data_payload.items()},  # FCM requires string values
-                token=device_token,
-                android=android_config,
-                apns=apns_config,
-                webpush=webpush_config
-            )
-            
-            # Send message
-            response = messaging.send(message)
+            # Send message off the event loop
+            response = await self._run(messaging.send, message)
             logger.info(f"Successfully sent push notification: {response}")
             return True
             
@@ -217,6 +313,66 @@ class PushNotificationService:
             logger.error(f"Unexpected error sending push notification: {str(e)}")
             return False
     
+    async def send_each(self, messages: List[messaging.Message]) -> List[Dict[str, Any]]:
+        """
+        Send many single-device messages in as few FCM calls as possible.
+        
+        Messages are split into chunks of FCM_BATCH_LIMIT and each chunk is
+        one send_each call on the push thread pool. Calls go through the
+        firebase circuit breaker, which admits one at a time; send_each itself
+        posts a chunk's messages concurrently. A call that fails as a whole
+        (auth, transport) counts against the breaker, and while it is open
+        chunks fail without reaching FCM.
+        
+        Args:
+            messages: Messages built with build_message
+            
+        Returns:
+            One dict per message, in order, with success, error and
+            invalid_token (FCM rejected the token and it should be pruned)
+        """
+        if not messages:
+            return []
+        if not self.is_available():
+            logger.warning("Push notification service not available")
+            return [
+                {'success': False, 'error': 'Push service not available', 'invalid_token': False}
+                for _ in messages
+            ]
+        
+        chunks = [messages[i:i + FCM_BATCH_LIMIT] for i in range(0, len(messages), FCM_BATCH_LIMIT)]
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *[self._run(firebase_breaker.call, messaging.send_each, chunk) for chunk in chunks],
+            return_exceptions=True
+        )
+        
+        results = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, Exception):
+                # The whole call failed, e.g. auth or transport; no token is at fault
+                logger.error(f"Firebase error sending push batch: {str(response)}")
+                results.extend(
+                    {'success': False, 'error': str(response), 'invalid_token': False}
+                    for _ in chunk
+                )
+                continue
+            for resp in response.responses:
+                results.append({
+                    'success': resp.success,
+                    'error': None if resp.success else str(resp.exception),
+                    'invalid_token': not resp.success and is_invalid_token_error(resp.exception)
+                })
+        
+        sent = sum(1 for result in results if result['success'])
+        elapsed = time.perf_counter() - start
+        self.metrics.record_batch(len(chunks), sent, len(results) - sent, elapsed)
+        logger.info(
+            f"Push batch sent in {len(chunks)} FCM calls. "
+            f"Success: {sent}, Failed: {len(results) - sent}, {elapsed:.2f}s"
+        )
+        return results
+    
     @firebase_circuit_breaker(fallback=firebase_fallback)
     async def send_multicast_notification(
         self,
@@ -266,29 +422,41 @@ class PushNotificationService:
             if notification_type:
                 data_payload['notification_type'] = notification_type.value
             
-            # Create multicast message
-            message = messaging.MulticastMessage(
-                notification=notification,
-                data={k: str(v) for k, v in data_payload.items()},
-                tokens=device_tokens
-            )
-            
-            # Send multicast message
-            response = messaging.send_multicast(message)
+            # One multicast call per FCM_BATCH_LIMIT tokens, sent concurrently off-loop
+            chunks = [
+                device_tokens[i:i + FCM_BATCH_LIMIT]
+                for i in range(0, len(device_tokens), FCM_BATCH_LIMIT)
+            ]
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[
+                self._run(messaging.send_each_for_multicast, messaging.MulticastMessage(
+                    notification=notification,
+                    data={k: str(v) for k, v in data_payload.items()},
+                    tokens=chunk
+                ))
+                for chunk in chunks
+            ])
+            results = [resp for response in responses for resp in response.responses]
             
             # Process results
             failed_tokens = []
-            for idx, resp in enumerate(response.responses):
+            invalid_tokens = []
+            for token, resp in zip(device_tokens, results):
                 if not resp.success:
-                    failed_tokens.append(device_tokens[idx])
-                    logger.warning(f"Failed to send to token {device_tokens[idx]}: {resp.exception}")
+                    failed_tokens.append(token)
+                    if is_invalid_token_error(resp.exception):
+                        invalid_tokens.append(token)
+                    logger.warning(f"Failed to send to token {token}: {resp.exception}")
             
-            logger.info(f"Multicast notification sent. Success: {response.success_count}, Failed: {response.failure_count}")
+            success_count = len(device_tokens) - len(failed_tokens)
+            self.metrics.record_batch(len(chunks), success_count, len(failed_tokens), time.perf_counter() - start)
+            logger.info(f"Multicast notification sent. Success: {success_count}, Failed: {len(failed_tokens)}")
             
             return {
-                'success_count': response.success_count,
-                'failure_count': response.failure_count,
-                'failed_tokens': failed_tokens
+                'success_count': success_count,
+                'failure_count': len(failed_tokens),
+                'failed_tokens': failed_tokens,
+                'invalid_tokens': invalid_tokens
             }
             
         except FirebaseError as e:
@@ -352,7 +520,7 @@ class PushNotificationService:
             )
             
             # Send message
-            response = messaging.send(message)
+            response = await self._run(messaging.send, message)
             logger.info(f"Successfully sent topic notification to {topic}: {response}")
             return True
             
@@ -379,7 +547,7 @@ class PushNotificationService:
             return {'success_count': 0, 'failure_count': len(device_tokens)}
         
         try:
-            response = messaging.subscribe_to_topic(device_tokens, topic)
+            response = await self._run(messaging.subscribe_to_topic, device_tokens, topic)
             logger.info(f"Topic subscription result for {topic}: Success: {response.success_count}, Failed: {response.failure_count}")
             return {
                 'success_count': response.success_count,
@@ -408,7 +576,7 @@ class PushNotificationService:
             return {'success_count': 0, 'failure_count': len(device_tokens)}
         
         try:
-            response = messaging.unsubscribe_from_topic(device_tokens, topic)
+            response = await self._run(messaging.unsubscribe_from_topic, device_tokens, topic)
             logger.info(f"Topic unsubscription result for {topic}: Success: {response.success_count}, Failed: {response.failure_count}")
             return {
                 'success_count': response.success_count,
@@ -9,6 +9,7 @@ import redis.asyncio as redis
 from app.core.config import settings
 from app.services.websocket_manager import websocket_manager
 from app.services.push_service import push_service
+from app.services.chat_realtime import CHAT_CHANNEL_PATTERN, parse_chat_channel
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -80,6 +81,10 @@ class RedisSubscriber:
         try:
             # Subscribe to all user payment channels using pattern
             await self.subscribe_pattern("user:*:payments")
+            # Per-event chat updates published by any worker
+            await self.subscribe_pattern(CHAT_CHANNEL_PATTERN)
+            # Notifications other workers route to sockets held by this one
+            await self.pubsub.subscribe(websocket_manager.presence.channel)
             
             async for message in self.pubsub.listen():
                 if not self.is_running:
@@ -105,6 +110,16 @@ class RedisSubscriber:
     
     async def _handle_message(self, channel: str, data: str):
         """Handle a message from Redis and relay to WebSocket clients."""
+        if channel == websocket_manager.presence.channel:
+            await self._deliver_routed(data)
+            return
+        
+        chat_event_id = parse_chat_channel(channel)
+        if chat_event_id is not None:
+            # Chat payloads are already serialized for clients; relay as-is
+            await websocket_manager.broadcast_to_event(chat_event_id, data)
+            return
+        
         try:
             # Parse channel to get user_id
             # Channel format: user:{user_id}:payments
@@ -126,8 +141,9 @@ class RedisSubscriber:
                     "channel": channel
                 }
                 
-                # Send to all WebSocket connections for this user (web/active mobile)
-                sent = await websocket_manager.send_user_notification(user_id, notification)
+                # Every worker receives this channel, so each sends to its own
+                # WebSocket connections for the user (web/active mobile)
+                sent = await websocket_manager.send_local_user_notification(user_id, notification)
                 
                 if sent:
                     logger.info(f"Relayed message from {channel} to user {user_id} via WebSocket")
@@ -161,6 +177,16 @@ class RedisSubscriber:
         except Exception as e:
             logger.error(f"Error handling Redis message from {channel}: {str(e)}")
 
+    
+    async def _deliver_routed(self, data: str):
+        """Write a notification routed by another worker to this worker's sockets."""
+        try:
+            message = json.loads(data)
+            for user_id in message["user_ids"]:
+                await websocket_manager.deliver_local(int(user_id), message["payload"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid routed WebSocket message: {str(e)}")
+
 
 # Global Redis subscriber instance
 redis_subscriber = RedisSubscriber()
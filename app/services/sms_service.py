@@ -1,21 +1,108 @@
-from typing import Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+import redis
 import requests
+from requests.adapters import HTTPAdapter
 from fastapi import HTTPException, status
 import phonenumbers
 from phonenumbers import NumberParseException
 from app.core.config import get_settings
+from app.core.cache import cache_backend
 from app.core.circuit_breaker import sms_circuit_breaker, sms_fallback
+from app.core.rate_limiter import GCRA_SCRIPT
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+class TermiiRateLimiter:
+    """
+    GCRA bucket shared by every send to Termii.
+
+    With use_redis the bucket lives in Redis under KEY and is charged
+    through the rate limiter's GCRA script, so API and Celery workers
+    together stay within the rate. While Redis is unreachable each process
+    falls back to an in-memory bucket of its own.
+    """
+
+    KEY = "rate_limit:termii"
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None, use_redis: bool = False):
+        self.rate = max(rate_per_second, 0.1)
+        self.capacity = burst or max(self.rate, 1.0)
+        self.use_redis = use_redis
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._script = None
+
+    def acquire(self):
+        """Block until a send is allowed"""
+        while True:
+            wait = self._acquire_shared() if self.use_redis else None
+            if wait is None:
+                wait = self._acquire_local()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _acquire_shared(self) -> Optional[float]:
+        """Seconds to wait per the Redis bucket (0 when admitted), None without Redis"""
+        client = cache_backend.redis
+        if client is None:
+            return None
+        interval = 1 / self.rate
+        period = self.capacity * interval
+        try:
+            if self._script is None or self._script.registered_client is not client:
+                self._script = client.register_script(GCRA_SCRIPT)
+            allowed, remaining = self._script(keys=[self.KEY], args=[interval, period, 0, 1])
+        except redis.RedisError as e:
+            cache_backend.mark_redis_down(e)
+            return None
+        if int(allowed):
+            return 0
+        return float(remaining) + interval - period
+
+    def _acquire_local(self) -> float:
+        """Seconds to wait per this process' bucket, taking a token when 0"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+
+_session_lock = threading.Lock()
+_termii_session: Optional[requests.Session] = None
+termii_rate_limiter = TermiiRateLimiter(get_settings().TERMII_RATE_LIMIT_PER_SECOND, use_redis=True)
+
+
+def get_termii_session() -> requests.Session:
+    """Keep-alive session pooling connections to Termii across SMSService instances"""
+    global _termii_session
+    with _session_lock:
+        if _termii_session is None:
+            pool_size = get_settings().SMS_SEND_CONCURRENCY
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            _termii_session = session
+        return _termii_session
+
+
 class SMSService:
     def __init__(self):
         self.settings = get_settings()
         self.api_key = self.settings.TERMII_API_KEY
         self.sender_id = self.settings.TERMII_SENDER_ID
         self.base_url = self.settings.TERMII_BASE_URL
+        self.session = get_termii_session()
         
         if not all([self.api_key, self.sender_id]):
             logger.warning("Termii credentials not configured. SMS functionality will be disabled.")
@@ -57,7 +144,7 @@ class SMSService:
             }
             
             # Send request to Termii API
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/sms/send",
                 json=payload,
                 headers={"Content-Type": "application/json"},
@@ -112,7 +199,7 @@ class SMSService:
             }
             
             # Send request to Termii API
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/sms/send",
                 json=payload,
                 headers={"Content-Type": "application/json"},
@@ -164,6 +251,36 @@ class SMSService:
                 detail="Failed to send SMS due to internal error"
             )
 
+    def send_many(
+        self,
+        messages: List[Tuple[str, str]],
+        concurrency: Optional[int] = None
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Send many SMS concurrently, yielding (index, send_sms result) as each finishes
+        
+        Sends share the pooled Termii session and the Redis-backed rate
+        limiter, so all workers together stay within TERMII_RATE_LIMIT_PER_SECOND.
+        
+        Args:
+            messages: (to_phone, message) pairs
+            concurrency: Sends in flight, defaults to SMS_SEND_CONCURRENCY
+        """
+        def send(to_phone: str, message: str) -> Dict[str, Any]:
+            termii_rate_limiter.acquire()
+            try:
+                return self.send_sms(to_phone=to_phone, message=message)
+            except Exception as e:
+                return {"status": "failed", "error": str(e)}
+        
+        workers = max(concurrency or self.settings.SMS_SEND_CONCURRENCY, 1)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="termii-send") as executor:
+            futures = {
+                executor.submit(send, to_phone, message): index
+                for index, (to_phone, message) in enumerate(messages)
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
     def send_transactional_sms(
         self,
         to_phone: str,
@@ -365,7 +482,7 @@ class SMSService:
             )
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/get-balance",
                 params={"api_key": self.api_key},
                 timeout=30
@@ -413,7 +530,7 @@ class SMSService:
                 "pin_type": pin_type
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/sms/otp/send",
                 json=payload,
                 headers={"Content-Type": "application/json"},
@@ -452,7 +569,7 @@ class SMSService:
                 "pin": pin_code
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/sms/otp/verify",
                 json=payload,
                 headers={"Content-Type": "application/json"},
@@ -8,7 +8,7 @@ from app.schemas.user import (
 )
 from app.schemas.pagination import PaginationParams
 from app.core.errors import NotFoundError, ValidationError, ConflictError
-from app.core.security import verify_password, get_password_hash
+from app.core.security import verify_password, get_password_hash, password_hasher
 from app.repositories.user_repo import UserRepository
 
 class UserService:
@@ -119,6 +119,23 @@ class UserService:
         
         return True
     
+    async def update_user_password_async(self, user_id: int, password_data: UserPasswordUpdate) -> bool:
+        """update_user_password with bcrypt run off the event loop"""
+        user = self.get_user_by_id(user_id)
+        if not user:
+            raise NotFoundError("User not found")
+        
+        if password_data.new_password != password_data.confirm_new_password:
+            raise ValidationError("New passwords do not match")
+        
+        if not await password_hasher.verify(password_data.current_password, user.hashed_password):
+            raise ValidationError("Current password is incorrect")
+        
+        user.hashed_password = await password_hasher.hash(password_data.new_password)
+        self.db.commit()
+        
+        return True
+    
     def deactivate_user(self, user_id: int) -> User:
         """Deactivate user account"""
         user = self.user_db.deactivate_user(user_id)
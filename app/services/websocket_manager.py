@@ -1,42 +1,121 @@
 """
 WebSocket Connection Manager for Real-time Notifications
+
+Each worker manages its own sockets. Presence in Redis (see
+websocket_presence) tells it which other workers hold a user's sockets, so
+notifications and online checks cover the whole fleet.
+
+Every socket has a bounded outbound queue drained by its own writer task.
+Sending only enqueues an already serialized payload, so a broadcast costs
+one json.dumps and never waits on a slow client. A client whose queue fills
+up, or whose write does not finish within WEBSOCKET_SEND_TIMEOUT_SECONDS,
+is evicted and has to reconnect.
 """
 import json
-from typing import Dict, List, Set, Optional, Any
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Set, Optional, Any
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
 import asyncio
+from app.core.config import settings
 from app.core.logger import get_logger
+from app.services.websocket_presence import PresenceRegistry
 
 logger = get_logger(__name__)
 
+# Close code telling an evicted client to reconnect later
+WS_TRY_AGAIN_LATER = 1013
+
+
+class ConnectionWriter:
+    """Bounded outbound queue for one socket, drained by its own task."""
+    
+    def __init__(self, websocket: WebSocket, on_failure: Callable[[WebSocket, Exception], None]):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WEBSOCKET_SEND_QUEUE_SIZE)
+        self._on_failure = on_failure
+        self.task = asyncio.get_running_loop().create_task(self._run())
+    
+    def offer(self, payload: str) -> bool:
+        """Queue a payload; False when the client is too far behind."""
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    async def _run(self):
+        while True:
+            payload = await self.queue.get()
+            try:
+                if payload is None:
+                    return
+                await asyncio.wait_for(
+                    self.websocket.send_text(payload), settings.WEBSOCKET_SEND_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                self._on_failure(self.websocket, e)
+                return
+            finally:
+                self.queue.task_done()
+    
+    def close(self):
+        """Stop writing and drop anything still queued."""
+        self._drain()
+        # The sentinel stops the writer even if wait_for swallows the cancellation
+        self.queue.put_nowait(None)
+        self.task.add_done_callback(lambda _: self._drain())
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+    
+    def _drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time notifications."""
     
-    def __init__(self):
+    def __init__(self, presence: Optional[PresenceRegistry] = None):
         # Store active connections by user_id
         self.active_connections: Dict[int, Set[WebSocket]] = {}
         # Store connection metadata
         self.connection_metadata: Dict[WebSocket, Dict[str, Any]] = {}
+        # Connections subscribed to each event's chat channel
+        self.event_subscribers: Dict[int, Set[WebSocket]] = {}
+        # Outbound queue and writer task of each connection
+        self.writers: Dict[WebSocket, ConnectionWriter] = {}
+        # Which workers hold each user's sockets
+        self.presence = presence or PresenceRegistry()
+        # Event loop the connections' writers run on, for hand-offs from other threads
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.started_at = time.monotonic()
+        self.messages_sent = 0
+        self.evictions = 0
         
     async def connect(self, websocket: WebSocket, user_id: int, device_info: Optional[Dict[str, Any]] = None):
         """Accept a WebSocket connection and register it for a user."""
         await websocket.accept()
+        self.loop = asyncio.get_running_loop()
         
         # Initialize user connections if not exists
         if user_id not in self.active_connections:
             self.active_connections[user_id] = set()
+            await self.presence.register(user_id)
         
         # Add connection to user's set
         self.active_connections[user_id].add(websocket)
+        self.writers[websocket] = ConnectionWriter(websocket, self._on_write_failure)
         
         # Store connection metadata
         self.connection_metadata[websocket] = {
             'user_id': user_id,
             'connected_at': datetime.utcnow(),
             'device_info': device_info or {},
-            'last_ping': datetime.utcnow()
+            'last_ping': datetime.utcnow(),
+            'event_ids': set()
         }
         
         logger.info(f"WebSocket connected for user {user_id}. Total connections: {len(self.active_connections[user_id])}")
@@ -60,63 +139,155 @@ class ConnectionManager:
                 # Clean up empty user entries
                 if not self.active_connections[user_id]:
                     del self.active_connections[user_id]
+                    self._release_presence(user_id)
+            
+            for event_id in list(self.connection_metadata[websocket]['event_ids']):
+                self.unsubscribe_from_event(websocket, event_id)
             
             # Remove metadata
             del self.connection_metadata[websocket]
             
+            writer = self.writers.pop(websocket, None)
+            if writer is not None:
+                writer.close()
+            
             logger.info(f"WebSocket disconnected for user {user_id}")
     
-    async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
-        """Send a message to a specific WebSocket connection."""
+    def _release_presence(self, user_id: int):
+        """Drop this worker's presence lease for a user without blocking the caller"""
         try:
-            await websocket.send_text(json.dumps(message))
-        except Exception as e:
-            logger.error(f"Error sending message to WebSocket: {str(e)}")
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to release on; the lease lapses after its TTL
+            return
+        loop.create_task(self.presence.unregister(user_id))
+    
+    def _on_write_failure(self, websocket: WebSocket, error: Exception):
+        if isinstance(error, asyncio.TimeoutError):
+            self._evict(websocket, "write timed out")
+        else:
+            logger.error(f"Error sending message to WebSocket: {str(error)}")
             # Connection might be closed, remove it
             self.disconnect(websocket)
     
-    async def send_user_notification(self, user_id: int, notification: Dict[str, Any]) -> bool:
-        """Send a notification to all active connections for a user."""
-        if user_id not in self.active_connections:
-            logger.info(f"No active WebSocket connections for user {user_id}")
+    def _evict(self, websocket: WebSocket, reason: str):
+        """Drop a client that cannot keep up and close its socket."""
+        user_id = self.connection_metadata.get(websocket, {}).get('user_id')
+        logger.warning(f"Evicting slow WebSocket client for user {user_id}: {reason}")
+        self.evictions += 1
+        self.disconnect(websocket)
+        asyncio.get_running_loop().create_task(self._close_quietly(websocket))
+    
+    async def _close_quietly(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=WS_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+    
+    def _enqueue(self, websocket: WebSocket, payload: str) -> bool:
+        """Queue a serialized message for one connection, evicting it if its queue is full."""
+        writer = self.writers.get(websocket)
+        if writer is None:
             return False
-        
-        connections = self.active_connections[user_id].copy()  # Copy to avoid modification during iteration
-        sent_count = 0
-        failed_connections = []
-        
-        for websocket in connections:
-            try:
-                await websocket.send_text(json.dumps(notification))
-                sent_count += 1
-            except Exception as e:
-                logger.error(f"Failed to send notification via WebSocket: {str(e)}")
-                failed_connections.append(websocket)
-        
-        # Clean up failed connections
-        for websocket in failed_connections:
+        if not writer.offer(payload):
+            self._evict(websocket, "send queue full")
+            return False
+        self.messages_sent += 1
+        return True
+    
+    async def flush(self):
+        """Wait until every queued message has been written or dropped."""
+        await asyncio.gather(*(writer.queue.join() for writer in list(self.writers.values())))
+    
+    async def close_all(self):
+        """Stop every writer and close every socket, e.g. on shutdown."""
+        tasks = [writer.task for writer in self.writers.values()]
+        for websocket in list(self.connection_metadata):
             self.disconnect(websocket)
+            await self._close_quietly(websocket)
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
+        """Send a message to a specific WebSocket connection."""
+        self._enqueue(websocket, json.dumps(message))
+    
+    async def send_user_notification(self, user_id: int, notification: Dict[str, Any]) -> bool:
+        """Send a notification to all of a user's connections, on any worker."""
+        results = await self.broadcast_to_users([user_id], notification)
+        return results[user_id]
+    
+    async def send_local_user_notification(self, user_id: int, notification: Dict[str, Any]) -> bool:
+        """Send a notification to the user's connections on this worker only.
         
-        logger.info(f"Sent notification to {sent_count} WebSocket connections for user {user_id}")
-        return sent_count > 0
+        For messages every worker already receives, such as pattern
+        subscriptions relayed by RedisSubscriber.
+        """
+        return await self.deliver_local(user_id, json.dumps(notification)) > 0
+    
+    async def deliver_local(self, user_id: int, payload: str) -> int:
+        """Queue a serialized message for the user's connections on this worker."""
+        # Copy: eviction modifies the set
+        connections = list(self.active_connections.get(user_id, ()))
+        return sum(self._enqueue(websocket, payload) for websocket in connections)
     
     async def broadcast_to_users(self, user_ids: List[int], notification: Dict[str, Any]) -> Dict[int, bool]:
-        """Send a notification to multiple users."""
+        """Send a notification to multiple users, routing to whichever workers hold their sockets."""
+        payload = json.dumps(notification)
         results = {}
         
         for user_id in user_ids:
-            results[user_id] = await self.send_user_notification(user_id, notification)
+            results[user_id] = await self.deliver_local(user_id, payload) > 0
+        
+        # One routed message per other worker, carrying all of its users
+        remote = defaultdict(list)
+        for user_id, worker_ids in ((await self.presence.workers_for(user_ids)) or {}).items():
+            for worker_id in worker_ids:
+                if worker_id != self.presence.worker_id:
+                    remote[worker_id].append(user_id)
+        
+        published = await asyncio.gather(*(
+            self.presence.publish(worker_id, worker_user_ids, payload)
+            for worker_id, worker_user_ids in remote.items()
+        ))
+        for worker_user_ids, listeners in zip(remote.values(), published):
+            if listeners:
+                for user_id in worker_user_ids:
+                    results[user_id] = True
         
+        for user_id, delivered in results.items():
+            if not delivered:
+                logger.info(f"No active WebSocket connections for user {user_id}")
         return results
     
     async def send_event_notification(self, event_id: int, participant_ids: List[int], notification: Dict[str, Any]) -> Dict[int, bool]:
         """Send event-related notification to all participants."""
         # Add event context to notification
-        notification['event_id'] = event_id
-        notification['type'] = 'event_notification'
+        notification = {**notification, 'event_id': event_id, 'type': 'event_notification'}
         
         return await self.broadcast_to_users(participant_ids, notification)
     
+    def subscribe_to_event(self, websocket: WebSocket, event_id: int):
+        """Deliver an event's chat updates to this connection (access checked by the caller)."""
+        if websocket not in self.connection_metadata:
+            return
+        self.event_subscribers.setdefault(event_id, set()).add(websocket)
+        self.connection_metadata[websocket]['event_ids'].add(event_id)
+    
+    def unsubscribe_from_event(self, websocket: WebSocket, event_id: int):
+        """Stop delivering an event's chat updates to this connection."""
+        subscribers = self.event_subscribers.get(event_id)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.event_subscribers[event_id]
+        if websocket in self.connection_metadata:
+            self.connection_metadata[websocket]['event_ids'].discard(event_id)
+    
+    async def broadcast_to_event(self, event_id: int, payload: str) -> int:
+        """Queue an already serialized chat update for this worker's subscribers of an event."""
+        connections = list(self.event_subscribers.get(event_id, ()))
+        return sum(self._enqueue(websocket, payload) for websocket in connections)
+    
     def get_user_connection_count(self, user_id: int) -> int:
         """Get the number of active connections for a user."""
         return len(self.active_connections.get(user_id, set()))
@@ -137,43 +308,73 @@ class ConnectionManager:
         """Backward-compatible alias used by API routes."""
         return self.is_user_online(user_id)
     
+    async def is_user_online_anywhere(self, user_id: int) -> bool:
+        """Check if a user has active WebSocket connections on any worker."""
+        if self.is_user_online(user_id):
+            return True
+        return bool(await self.presence.is_online(user_id))
+    
     async def ping_connections(self):
         """Send ping to all connections to keep them alive."""
-        ping_message = {
+        ping_message = json.dumps({
             'type': 'ping',
             'timestamp': datetime.utcnow().isoformat()
-        }
-        
-        all_connections = []
-        for connections in self.active_connections.values():
-            all_connections.extend(connections)
-        
-        failed_connections = []
+        })
+        now = datetime.utcnow()
         
-        for websocket in all_connections:
-            try:
-                await websocket.send_text(json.dumps(ping_message))
+        for websocket in list(self.writers):
+            if self._enqueue(websocket, ping_message):
                 # Update last ping time
-                if websocket in self.connection_metadata:
-                    self.connection_metadata[websocket]['last_ping'] = datetime.utcnow()
-            except Exception as e:
-                logger.error(f"Failed to ping WebSocket connection: {str(e)}")
-                failed_connections.append(websocket)
-        
-        # Clean up failed connections
-        for websocket in failed_connections:
-            self.disconnect(websocket)
+                self.connection_metadata[websocket]['last_ping'] = now
     
     def get_connection_stats(self) -> Dict[str, Any]:
-        """Get statistics about WebSocket connections."""
+        """Get statistics about this worker's WebSocket connections."""
         return {
+            'worker_id': self.presence.worker_id,
             'total_connections': self.get_total_connections(),
             'connected_users': len(self.get_connected_users()),
+            'chat_channels': len(self.event_subscribers),
+            'messages_sent': self.messages_sent,
+            'slow_consumer_evictions': self.evictions,
+            'uptime_seconds': int(time.monotonic() - self.started_at),
             'users_with_connections': {
                 user_id: len(connections) 
                 for user_id, connections in self.active_connections.items()
             }
         }
+    
+    async def get_fleet_stats(self) -> Dict[str, Any]:
+        """Get connection statistics summed over every live worker.
+        
+        Falls back to this worker's numbers when Redis is unavailable.
+        """
+        reports = await self.presence.fleet_stats()
+        local = self.get_connection_stats()
+        # Replace this worker's last heartbeat with its current numbers
+        reports = [report for report in reports or [] if report['worker_id'] != local['worker_id']]
+        reports.append(local)
+        
+        connections_by_user: Dict[str, int] = defaultdict(int)
+        for report in reports:
+            for user_id, count in report['users_with_connections'].items():
+                connections_by_user[str(user_id)] += count
+        
+        total_connections = sum(report['total_connections'] for report in reports)
+        return {
+            'workers': len(reports),
+            'total_connections': total_connections,
+            'active_connections': total_connections,
+            'connected_users': len(connections_by_user),
+            'chat_channels': sum(report['chat_channels'] for report in reports),
+            'total_messages_sent': sum(report['messages_sent'] for report in reports),
+            'slow_consumer_evictions': sum(report.get('slow_consumer_evictions', 0) for report in reports),
+            'uptime_seconds': max(report['uptime_seconds'] for report in reports),
+            'connections_by_user': dict(connections_by_user)
+        }
+    
+    async def heartbeat(self):
+        """Renew this worker's presence leases and report its connection counts."""
+        await self.presence.heartbeat(self.get_connected_users(), self.get_connection_stats())
 
 
 # Global connection manager instance
@@ -188,4 +389,14 @@ async def start_ping_task():
             await asyncio.sleep(30)  # Ping every 30 seconds
         except Exception as e:
             logger.error(f"Error in ping task: {str(e)}")
-            await asyncio.sleep(30)
\ No newline at end of file
+            await asyncio.sleep(30)
+
+
+async def start_presence_heartbeat():
+    """Background task renewing this worker's presence in Redis."""
+    while True:
+        try:
+            await websocket_manager.heartbeat()
+        except Exception as e:
+            logger.error(f"Error in presence heartbeat: {str(e)}")
+        await asyncio.sleep(settings.WEBSOCKET_PRESENCE_HEARTBEAT_SECONDS)
@@ -0,0 +1,188 @@
+"""
+Cross-worker WebSocket presence.
+
+Every worker process has its own ConnectionManager, which only knows the
+sockets connected to that process. PresenceRegistry records in Redis which
+workers hold sockets for each user:
+
+    ws:presence:{user_id}   sorted set of worker ids, scored by lease expiry
+    ws:worker:{worker_id}   the worker's connection counts, with a TTL
+    ws:workers              ids of workers that have reported counts
+
+Leases are renewed by a heartbeat every WEBSOCKET_PRESENCE_HEARTBEAT_SECONDS
+and lapse after WEBSOCKET_PRESENCE_TTL_SECONDS, so a worker that dies stops
+being routed to without any cleanup.
+
+Each worker also listens on its own delivery channel, ws:deliver:{worker_id}.
+A notification for a user connected to other workers is published to those
+workers' channels, and their RedisSubscriber writes it to the local sockets.
+
+When Redis is unreachable every call degrades to this worker's own view.
+"""
+import json
+import os
+import socket
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.cache import REDIS_RETRY_INTERVAL
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+WORKERS_KEY = "ws:workers"
+
+
+def presence_key(user_id: int) -> str:
+    return f"ws:presence:{user_id}"
+
+
+def worker_key(worker_id: str) -> str:
+    return f"ws:worker:{worker_id}"
+
+
+def worker_channel(worker_id: str) -> str:
+    """Redis channel a worker receives routed deliveries on"""
+    return f"ws:deliver:{worker_id}"
+
+
+class PresenceRegistry:
+    """Redis-backed record of which workers hold each user's sockets"""
+
+    def __init__(self, worker_id: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.ttl_seconds = ttl_seconds or settings.WEBSOCKET_PRESENCE_TTL_SECONDS
+        self._client: Optional[aioredis.Redis] = None
+        self._retry_at = 0.0
+
+    @property
+    def channel(self) -> str:
+        return worker_channel(self.worker_id)
+
+    def _redis(self) -> Optional[aioredis.Redis]:
+        """Async Redis client, or None while Redis is known to be unreachable"""
+        if time.monotonic() < self._retry_at:
+            return None
+        if self._client is None:
+            self._client = aioredis.from_url(
+                settings.REDIS_URL, decode_responses=True, socket_timeout=1, socket_connect_timeout=1
+            )
+        return self._client
+
+    def _mark_down(self, error: Exception):
+        logger.warning(f"WebSocket presence unavailable, using this worker's connections only: {error}")
+        self._retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    async def register(self, user_id: int):
+        """Lease this worker as holding sockets for the user"""
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.zadd(presence_key(user_id), {self.worker_id: time.time() + self.ttl_seconds})
+                pipe.expire(presence_key(user_id), self.ttl_seconds)
+                await pipe.execute()
+        except (redis.RedisError, OSError) as e:
+            self._mark_down(e)
+
+    async def unregister(self, user_id: int):
+        """Release this worker's lease for the user"""
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            await client.zrem(presence_key(user_id), self.worker_id)
+        except (redis.RedisError, OSError) as e:
+            self._mark_down(e)
+
+    async def heartbeat(self, user_ids: Iterable[int], stats: Dict[str, Any]):
+        """Renew the leases of every locally connected user and publish this worker's counts"""
+        client = self._redis()
+        if client is None:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.zadd(presence_key(user_id), {self.worker_id: expires_at})
+                    pipe.expire(presence_key(user_id), self.ttl_seconds)
+                pipe.set(worker_key(self.worker_id), json.dumps(stats), ex=self.ttl_seconds)
+                pipe.sadd(WORKERS_KEY, self.worker_id)
+                await pipe.execute()
+        except (redis.RedisError, OSError) as e:
+            self._mark_down(e)
+
+    async def withdraw(self, user_ids: Iterable[int]):
+        """Drop all of this worker's leases and counts, e.g. on shutdown"""
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.zrem(presence_key(user_id), self.worker_id)
+                pipe.delete(worker_key(self.worker_id))
+                pipe.srem(WORKERS_KEY, self.worker_id)
+                await pipe.execute()
+        except (redis.RedisError, OSError) as e:
+            self._mark_down(e)
+
+    async def workers_for(self, user_ids: List[int]) -> Optional[Dict[int, List[str]]]:
+        """Workers with a live lease for each user, or None if Redis is unavailable"""
+        client = self._redis()
+        if client is None:
+            return None
+        now = time.time()
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.zrangebyscore(presence_key(user_id), now, "+inf")
+                results = await pipe.execute()
+        except (redis.RedisError, OSError) as e:
+            self._mark_down(e)
+            return None
+        return dict(zip(user_ids, results))
+
+    async def is_online(self, user_id: int) -> Optional[bool]:
+        """Whether any worker holds sockets for the user, or None if Redis is unavailable"""
+        workers = await self.workers_for([user_id])
+        if workers is None:
+            return None
+        return bool(workers[user_id])
+
+    async def publish(self, worker_id: str, user_ids: List[int], payload: str) -> int:
+        """Route a serialized message to another worker; returns how many listeners got it"""
+        client = self._redis()
+        if client is None:
+            return 0
+        try:
+            return await client.publish(
+                worker_channel(worker_id), json.dumps({"user_ids": user_ids, "payload": payload})
+            )
+        except (redis.RedisError, OSError) as e:
+            self._mark_down(e)
+            return 0
+
+    async def fleet_stats(self) -> Optional[List[Dict[str, Any]]]:
+        """Connection counts reported by every live worker, or None if Redis is unavailable"""
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            worker_ids = sorted(await client.smembers(WORKERS_KEY))
+            if not worker_ids:
+                return []
+            reports = await client.mget([worker_key(worker_id) for worker_id in worker_ids])
+            expired = [worker_id for worker_id, report in zip(worker_ids, reports) if report is None]
+            if expired:
+                await client.srem(WORKERS_KEY, *expired)
+        except (redis.RedisError, OSError) as e:
+            self._mark_down(e)
+            return None
+        return [json.loads(report) for report in reports if report is not None]
@@ -16,6 +16,7 @@ celery_app = Celery(
         "app.tasks.payments",
         "app.tasks.cleanup_qr_codes",
         "app.tasks.notifications",
+        "app.tasks.invitations",
     ]  # Auto-discover tasks
 )
 
@@ -44,7 +45,7 @@ celery_app.conf.beat_schedule = {
     },
     "process-due-notifications": {
         "task": "app.tasks.notifications.process_due_notifications",
-        "schedule": crontab(minute="*/5"),  # every 5 minutes
+        "schedule": crontab(minute="*/5"),  # fallback sweep; the notification-scheduler service sends on time
     },
 }
 
@@ -0,0 +1,18 @@
+"""
+Celery task that delivers bulk phone invitations.
+The API records the invitations and returns a job id; the SMS are sent here.
+"""
+from app.tasks.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.services.contact_service import ContactService
+
+
+# Sends are rate limited per provider, so large jobs outlast the default 5 minute limit
+@celery_app.task(name="app.tasks.invitations.send_phone_invitations", time_limit=3600)
+def send_phone_invitations(job_id: str):
+    """Send the pending SMS of a bulk phone invitation job."""
+    db = SessionLocal()
+    try:
+        return ContactService(db).deliver_phone_invitations(job_id)
+    finally:
+        db.close()
@@ -0,0 +1,33 @@
+"""
+Entry point for the notification scheduler process.
+
+Run one or more alongside the Celery workers:
+
+    python -m app.tasks.notification_scheduler
+
+Replicas are safe: each drain claims rows with FOR UPDATE SKIP LOCKED.
+The Celery beat process-due-notifications sweep stays on as a fallback.
+"""
+import signal
+
+from app.core.database import SessionLocal
+from app.core.logger import get_logger
+from app.services.notification_scheduler import NotificationScheduler
+
+logger = get_logger(__name__)
+
+
+def main():
+    scheduler = NotificationScheduler(SessionLocal)
+
+    def shutdown(signum, frame):
+        logger.info(f"Received signal {signum}, stopping notification scheduler")
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -19,3 +19,17 @@ def process_due_notifications(limit: int = 100):
         return {"processed": processed}
     finally:
         db.close()
+
+
+@celery_app.task(name="app.tasks.notifications.fan_out_reminder_notifications")
+def fan_out_reminder_notifications(reminder_id: int):
+    """Queue the notifications of a newly created or edited reminder."""
+    db = SessionLocal()
+    try:
+        service = NotificationService(db)
+        reminder = service.notification_repo.get_reminder_by_id(reminder_id)
+        if not reminder or not reminder.is_active:
+            return {"queued": 0}
+        return {"queued": service.fan_out_reminder_notifications(reminder)}
+    finally:
+        db.close()
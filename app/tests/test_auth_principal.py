@@ -0,0 +1,84 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from app.core.cache import cache_backend
+from app.core.deps import CurrentUser, get_current_user
+from app.db.base import Base
+from app.models.user_models import User
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__])
+    session = Session(engine)
+    session.add(User(id=1, email="host@example.com", full_name="Host", hashed_password="x", is_verified=True))
+    session.commit()
+    cache_backend.local.clear()
+    yield session
+    session.close()
+    cache_backend.local.clear()
+
+
+def _statements(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestPrincipalCache:
+    """Test cases for the cached principal behind get_current_user."""
+
+    def test_repeat_requests_skip_the_users_table(self, db):
+        get_current_user(db, "1")
+        statements = _statements(db)
+
+        user = get_current_user(db, "1")
+
+        assert isinstance(user, CurrentUser)
+        assert user.id == 1 and user.is_verified is True
+        assert statements == []
+
+    def test_other_attributes_load_the_row_once(self, db):
+        user = get_current_user(db, "1")
+        statements = _statements(db)
+
+        assert user.email == "host@example.com"
+        assert user.full_name == "Host"
+        assert len(statements) == 1
+        assert user == db.get(User, 1)
+
+    def test_writes_go_to_the_loaded_row(self, db):
+        user = get_current_user(db, "1")
+
+        user.avatar_url = "https://example.com/a.png"
+        db.commit()
+        db.refresh(user)
+
+        assert db.get(User, 1).avatar_url == "https://example.com/a.png"
+
+    def test_deactivation_invalidates_principal(self, db):
+        get_current_user(db, "1")
+
+        db.get(User, 1).is_active = False
+        db.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_user(db, "1")
+        assert exc_info.value.status_code == 403
+
+    def test_unrelated_writes_keep_principal(self, db):
+        get_current_user(db, "1")
+        db.get(User, 1).bio = "Planner"
+        db.commit()
+        statements = _statements(db)
+
+        get_current_user(db, "1")
+
+        assert statements == []
+
+    def test_unknown_user_is_rejected(self, db):
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_user(db, "99")
+        assert exc_info.value.status_code == 401
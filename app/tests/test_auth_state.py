@@ -0,0 +1,224 @@
+import time
+import pytest
+from unittest.mock import patch
+from sqlalchemy import event
+from app.core.auth_state import AuthStateStore, OTPCheck, OTPStatus, RefreshRotation, _digest
+from app.core.security import verify_refresh_token_claims
+from app.models.user_models import UserSession
+from app.schemas.user import UserLogin
+from app.services.otp_service import OTPService
+
+CODE = "123456"
+
+
+class _MemoryAuthState(AuthStateStore):
+    """In-memory stand-in for the Redis keys and scripts"""
+
+    def __init__(self):
+        super().__init__()
+        self.otps = {}
+        self.sessions = {}
+
+    def issue_otp(self, user_id, code, ttl_seconds, attempts=0):
+        self.otps[user_id] = {"code": _digest(f"{user_id}:{code}"), "attempts": attempts,
+                              "expires_at": time.time() + ttl_seconds}
+        return True
+
+    def check_otp(self, user_id, code, max_attempts, consume):
+        entry = self.otps.get(user_id)
+        if entry is None:
+            return OTPCheck("missing", 0)
+        if entry["expires_at"] <= time.time():
+            del self.otps[user_id]
+            return OTPCheck("expired", 0)
+        entry["attempts"] += 1
+        if entry["code"] == _digest(f"{user_id}:{code}"):
+            if consume:
+                del self.otps[user_id]
+            return OTPCheck("ok", entry["attempts"])
+        if entry["attempts"] >= max_attempts:
+            del self.otps[user_id]
+            return OTPCheck("locked", entry["attempts"])
+        return OTPCheck("invalid", entry["attempts"])
+
+    def get_otp(self, user_id):
+        entry = self.otps.get(user_id)
+        return OTPStatus(entry["attempts"], entry["expires_at"]) if entry else None
+
+    def clear_otp(self, user_id):
+        self.otps.pop(user_id, None)
+        return True
+
+    def store_session(self, session_id, user_id, refresh_token, expires_at):
+        self.sessions[session_id] = {"user_id": user_id, "refresh": _digest(refresh_token), "expires_at": expires_at}
+        return True
+
+    def rotate_refresh_token(self, session_id, refresh_token, new_refresh_token, expires_at):
+        entry = self.sessions.get(session_id)
+        if entry is None:
+            return RefreshRotation("missing", 0, 0)
+        if entry["refresh"] != _digest(refresh_token):
+            return RefreshRotation("mismatch", 0, 0)
+        entry["refresh"] = _digest(new_refresh_token)
+        return RefreshRotation("ok", entry["user_id"], entry["expires_at"])
+
+    def record_session_expiry(self, session_id, expires_at):
+        self.sessions[session_id]["expires_at"] = expires_at
+        return True
+
+    def revoke_sessions(self, session_ids):
+        for session_id in session_ids:
+            self.sessions.pop(session_id, None)
+        return True
+
+
+@pytest.fixture
+def store():
+    store = _MemoryAuthState()
+    with patch("app.services.otp_service.auth_state", store), \
+         patch("app.services.auth_service.auth_state", store), \
+         patch("app.repositories.user_repo.auth_state", store):
+        yield store
+
+
+@pytest.fixture
+def redis_down():
+    store = AuthStateStore()
+    store._redis = lambda: None
+    with patch("app.services.otp_service.auth_state", store), \
+         patch("app.services.auth_service.auth_state", store), \
+         patch("app.repositories.user_repo.auth_state", store):
+        yield store
+
+
+@pytest.fixture
+def otp_service(db_session):
+    with patch.object(OTPService, "generate_otp", return_value=CODE):
+        yield OTPService(db_session)
+
+
+class TestOTPState:
+    """Test cases for OTPs kept out of the users table."""
+
+    def test_otp_is_not_written_to_user_row(self, store, otp_service, test_user):
+        assert otp_service.send_verification_otp(test_user, method="sms") is True
+
+        assert test_user.email_verification_otp is None
+        assert otp_service.get_otp_status(test_user)["has_otp"] is True
+        assert otp_service.verify_otp(test_user, CODE) == (True, "Email verified successfully!")
+        assert test_user.is_verified is True
+        assert test_user.id not in store.otps
+
+    def test_failed_attempts_lock_the_code(self, store, otp_service, test_user):
+        otp_service.send_verification_otp(test_user, method="sms")
+
+        for _ in range(otp_service.max_attempts - 1):
+            success, message = otp_service.verify_otp(test_user, "000000")
+            assert not success and "attempts remaining" in message
+        success, message = otp_service.verify_otp(test_user, "000000")
+
+        assert not success and message.startswith("Too many failed attempts")
+        assert otp_service.verify_otp(test_user, CODE)[1].startswith("No OTP found")
+
+    def test_reset_code_survives_check_until_cleared(self, store, otp_service, test_user):
+        otp_service.send_password_reset_otp(test_user, method="sms")
+
+        assert otp_service.verify_password_reset_otp(test_user, CODE)[0] is True
+        assert otp_service.verify_password_reset_otp(test_user, CODE)[0] is True
+        otp_service.clear_otp(test_user)
+        assert otp_service.get_otp_status(test_user)["has_otp"] is False
+
+    def test_code_left_on_user_row_is_still_accepted(self, store, otp_service, test_user, db_session):
+        # Issued before pending codes moved to Redis
+        store.otps.clear()
+        test_user.email_verification_otp = CODE
+        test_user.otp_expires_at = None
+        db_session.commit()
+
+        assert otp_service.verify_otp(test_user, CODE)[0] is True
+        assert test_user.email_verification_otp is None
+
+    def test_redis_down_falls_back_to_user_row(self, redis_down, otp_service, test_user):
+        otp_service.send_verification_otp(test_user, method="sms")
+
+        assert test_user.email_verification_otp == CODE
+        assert otp_service.verify_otp(test_user, CODE)[0] is True
+        assert test_user.email_verification_otp is None
+
+
+class TestSessionState:
+    """Test cases for refresh token rotation in the auth state store."""
+
+    def _login(self, auth_service, test_user_data):
+        return auth_service.login(UserLogin(email=test_user_data["email"], password=test_user_data["password"]))
+
+    def test_login_is_a_single_insert(self, store, auth_service, test_user, test_user_data, db_session):
+        statements = []
+        event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        self._login(auth_service, test_user_data)
+
+        writes = [sql for sql in statements if "user_sessions" in sql and not sql.lstrip().upper().startswith("SELECT")]
+        assert len(writes) == 1 and writes[0].lstrip().upper().startswith("INSERT")
+
+    def test_session_row_records_current_refresh_token_id(self, store, auth_service, test_user, test_user_data, db_session):
+        tokens = self._login(auth_service, test_user_data)
+        session = db_session.query(UserSession).filter(UserSession.user_id == test_user.id).one()
+        assert session.refresh_token == verify_refresh_token_claims(tokens.refresh_token).token_id
+
+        refreshed = auth_service.refresh_token(tokens.refresh_token)
+        again = auth_service.refresh_token(refreshed.refresh_token)
+
+        db_session.refresh(session)
+        assert session.refresh_token == verify_refresh_token_claims(again.refresh_token).token_id
+        assert session.session_token not in (tokens.access_token, refreshed.access_token, again.access_token)
+
+    def test_redis_down_after_rotation_refuses_replayed_token(self, store, auth_service, test_user, test_user_data):
+        tokens = self._login(auth_service, test_user_data)
+        refreshed = auth_service.refresh_token(tokens.refresh_token)
+
+        with patch.object(store, "rotate_refresh_token", return_value=None), \
+             patch.object(store, "store_session", return_value=None):
+            with pytest.raises(Exception, match="Session not found or expired"):
+                auth_service.refresh_token(tokens.refresh_token)
+            assert auth_service.refresh_token(refreshed.refresh_token).access_token
+
+    def test_rotated_refresh_token_cannot_be_replayed(self, store, auth_service, test_user, test_user_data):
+        tokens = self._login(auth_service, test_user_data)
+        auth_service.refresh_token(tokens.refresh_token)
+
+        with pytest.raises(Exception, match="Session not found or expired"):
+            auth_service.refresh_token(tokens.refresh_token)
+
+    def test_logout_drops_session_from_store(self, store, auth_service, test_user, test_user_data):
+        tokens = self._login(auth_service, test_user_data)
+        refreshed = auth_service.refresh_token(tokens.refresh_token)
+
+        assert auth_service.logout(test_user.id, refreshed.access_token) is True
+
+        assert store.sessions == {}
+        with pytest.raises(Exception):
+            auth_service.refresh_token(refreshed.refresh_token)
+
+    def test_session_missing_from_store_is_refreshed_from_row(self, store, auth_service, test_user, test_user_data):
+        tokens = self._login(auth_service, test_user_data)
+        store.sessions.clear()
+
+        refreshed = auth_service.refresh_token(tokens.refresh_token)
+
+        assert refreshed.access_token
+        assert len(store.sessions) == 1
+        assert auth_service.refresh_token(refreshed.refresh_token).access_token
+
+    def test_logout_missed_by_store_still_ends_refresh(self, store, auth_service, test_user, test_user_data):
+        tokens = self._login(auth_service, test_user_data)
+        refreshed = auth_service.refresh_token(tokens.refresh_token)
+
+        # Redis was being skipped when the logout committed
+        with patch.object(store, "revoke_sessions", return_value=None):
+            assert auth_service.logout(test_user.id, refreshed.access_token) is True
+        assert len(store.sessions) == 1
+
+        with pytest.raises(Exception, match="Session not found or expired"):
+            auth_service.refresh_token(refreshed.refresh_token)
+        assert store.sessions == {}
@@ -2,10 +2,9 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.main import app
+from app.core import rate_limiter
 from app.core.deps import get_current_user
 from app.core.database import get_db
 from app.models.user_models import User
@@ -17,11 +16,8 @@ ENDPOINT = "/api/v1/contacts/invitations/bulk-email"
 @pytest.fixture(autouse=True)
 def use_memory_rate_limiter():
     """Replace Redis-backed limiter with in-memory for all tests in this module."""
-    memory_limiter = Limiter(key_func=get_remote_address, storage_uri="memory://")
-    original = app.state.limiter
-    app.state.limiter = memory_limiter
-    yield
-    app.state.limiter = original
+    with patch.object(rate_limiter, "limiter", rate_limiter.RateLimiter(use_redis=False)):
+        yield
 
 
 def _make_user():
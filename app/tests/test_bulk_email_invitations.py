@@ -1,6 +1,6 @@
 """Tests for bulk email invitation feature."""
 from types import SimpleNamespace
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 
 import pytest
 from fastapi import HTTPException
@@ -56,33 +56,32 @@ def _make_db_with_sender(sender):
     return db
 
 
+def _make_service(db, delivered):
+    """ContactService whose email service renders invites and reports batch results."""
+    service = ContactService.__new__(ContactService)
+    service.db = db
+    service.sms_service = Mock()
+    service.email_service = Mock()
+    service.email_service.is_configured.return_value = True
+    service.email_service.contact_invite_email.side_effect = lambda to_email, **kwargs: {
+        "to_email": to_email, "subject": "Invite", "html_content": "<p>invite</p>"
+    }
+    service.email_service.send_batch = AsyncMock(side_effect=lambda messages: delivered[:len(messages)])
+    return service
+
+
 class TestBulkSendEmailInvitations:
 
-    def test_successful_send(self):
+    @pytest.mark.asyncio
+    async def test_successful_send(self):
         sender = _make_sender()
         db = _make_db_with_sender(sender)
+        service = _make_service(db, [True, True])
 
-        with patch.object(
-            ContactService,
-            "__init__",
-            lambda self, db: (
-                setattr(self, "db", db),
-                setattr(self, "sms_service", Mock()),
-                setattr(self, "email_service", Mock(
-                    send_contact_invite_email_sync=Mock(return_value=True)
-                )),
-            ) and None,
-        ):
-            service = ContactService.__new__(ContactService)
-            service.db = db
-            service.sms_service = Mock()
-            service.email_service = Mock()
-            service.email_service.send_contact_invite_email_sync = Mock(return_value=True)
-
-            result = service.bulk_send_email_invitations(
-                sender_id=1,
-                emails=["bob@example.com", "carol@example.com"],
-            )
+        result = await service.bulk_send_email_invitations(
+            sender_id=1,
+            emails=["bob@example.com", "carol@example.com"],
+        )
 
         assert result["total"] == 2
         assert result["success_count"] == 2
@@ -92,17 +91,28 @@ class TestBulkSendEmailInvitations:
         assert result["sent"][0]["email"] == "bob@example.com"
         assert result["sent"][1]["email"] == "carol@example.com"
 
-    def test_email_delivery_failure_marks_failed(self):
+    @pytest.mark.asyncio
+    async def test_invites_are_sent_in_one_batch(self):
         sender = _make_sender()
         db = _make_db_with_sender(sender)
+        service = _make_service(db, [True] * 3)
 
-        service = ContactService.__new__(ContactService)
-        service.db = db
-        service.sms_service = Mock()
-        service.email_service = Mock()
-        service.email_service.send_contact_invite_email_sync = Mock(return_value=False)
+        await service.bulk_send_email_invitations(
+            sender_id=1,
+            emails=["a@example.com", "b@example.com", "c@example.com"],
+        )
 
-        result = service.bulk_send_email_invitations(
+        service.email_service.send_batch.assert_awaited_once()
+        messages = service.email_service.send_batch.call_args.args[0]
+        assert [message["to_email"] for message in messages] == ["a@example.com", "b@example.com", "c@example.com"]
+
+    @pytest.mark.asyncio
+    async def test_email_delivery_failure_marks_failed(self):
+        sender = _make_sender()
+        db = _make_db_with_sender(sender)
+        service = _make_service(db, [False])
+
+        result = await service.bulk_send_email_invitations(
             sender_id=1,
             emails=["bob@example.com"],
         )
@@ -112,7 +122,8 @@ class TestBulkSendEmailInvitations:
         assert result["failed"][0]["email"] == "bob@example.com"
         assert "failed" in result["failed"][0]["error"].lower()
 
-    def test_sender_not_found_raises_404(self):
+    @pytest.mark.asyncio
+    async def test_sender_not_found_raises_404(self):
         db = Mock(spec=Session)
         q = Mock()
         q.filter.return_value.first.return_value = None
@@ -124,28 +135,18 @@ class TestBulkSendEmailInvitations:
         service.email_service = Mock()
 
         with pytest.raises(HTTPException) as exc:
-            service.bulk_send_email_invitations(sender_id=999, emails=["x@example.com"])
+            await service.bulk_send_email_invitations(sender_id=999, emails=["x@example.com"])
 
         assert exc.value.status_code == 404
 
-    def test_partial_failure_continues(self):
+    @pytest.mark.asyncio
+    async def test_partial_failure_continues(self):
         """One email fails to send, but others still succeed."""
         sender = _make_sender()
         db = _make_db_with_sender(sender)
+        service = _make_service(db, [True, False])
 
-        call_count = {"n": 0}
-
-        def alternating_send(**kwargs):
-            call_count["n"] += 1
-            return call_count["n"] % 2 == 1  # True for 1st, False for 2nd
-
-        service = ContactService.__new__(ContactService)
-        service.db = db
-        service.sms_service = Mock()
-        service.email_service = Mock()
-        service.email_service.send_contact_invite_email_sync = Mock(side_effect=alternating_send)
-
-        result = service.bulk_send_email_invitations(
+        result = await service.bulk_send_email_invitations(
             sender_id=1,
             emails=["good@example.com", "bad@example.com"],
         )
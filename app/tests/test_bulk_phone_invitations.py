@@ -0,0 +1,140 @@
+"""Tests for bulk phone invitation jobs."""
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.contact_models import ContactInvitation, ContactInviteStatus, UserContact
+from app.models.user_models import User
+from app.services import sms_service as sms_module
+from app.services.contact_service import ContactService
+from app.services.sms_service import SMSService, TermiiRateLimiter
+
+TABLES = [User.__table__, UserContact.__table__, ContactInvitation.__table__]
+NUMBERS = ["+2348012345678", "+2348012345679", "+2348012345680"]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLES)
+    session = Session(engine)
+    session.add_all([
+        User(id=1, email="alice@example.com", full_name="Alice Smith", hashed_password="x"),
+        User(id=2, email="bob@example.com", full_name="Bob", hashed_password="x", phone_number=NUMBERS[1])
+    ])
+    session.add(UserContact(user_id=1, name="Carol", phone_number=NUMBERS[0]))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _make_service(db, failing=()):
+    """ContactService whose SMS sends succeed except for the failing numbers."""
+    service = ContactService(db)
+    service.sms_service = Mock()
+    service.sms_service.send_many.side_effect = lambda messages: (
+        (index, {"status": "failed", "error": "Rejected"} if phone in failing
+         else {"status": "success", "message_id": f"msg-{index}"})
+        for index, (phone, _) in enumerate(messages)
+    )
+    return service
+
+
+class TestBulkPhoneInvitations:
+    """Test cases for queuing and delivering bulk phone invitations."""
+
+    def test_invitations_are_created_in_bulk_and_enqueued(self, db):
+        service = _make_service(db)
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        with patch("app.tasks.invitations.send_phone_invitations.apply_async") as apply_async:
+            result = service.bulk_send_phone_invitations(1, NUMBERS + [NUMBERS[0], "not-a-number"])
+
+        assert result["queued_count"] == 3
+        assert result["failure_count"] == 1
+        apply_async.assert_called_once_with(args=[result["job_id"]], task_id=result["job_id"])
+        service.sms_service.send_many.assert_not_called()
+        # One lookup each for existing contacts and users, whatever the list size
+        assert sum("FROM user_contacts" in sql for sql in statements) == 1
+        assert sum("FROM users" in sql and "phone_number IN" in sql for sql in statements) == 1
+
+        invitations = db.query(ContactInvitation).all()
+        assert {i.status for i in invitations} == {ContactInviteStatus.PENDING}
+        assert {i.recipient_id for i in invitations} == {None, 2}
+        assert db.query(UserContact).count() == 3
+
+    def test_delivery_records_progress(self, db):
+        service = _make_service(db, failing={NUMBERS[2]})
+
+        with patch.object(ContactService, "_enqueue_phone_invitations"):
+            job_id = service.bulk_send_phone_invitations(1, NUMBERS, message="Come!")["job_id"]
+        assert service.get_phone_invitation_job(1, job_id)["status"] == "queued"
+
+        assert service.deliver_phone_invitations(job_id) == {"sent": 2, "failed": 1}
+
+        progress = service.get_phone_invitation_job(1, job_id)
+        assert progress["status"] == "completed"
+        assert (progress["sent_count"], progress["failure_count"], progress["pending"]) == (2, 1, 0)
+        assert progress["failed"][0]["phone_number"] == NUMBERS[2]
+        messages = service.sms_service.send_many.call_args.args[0]
+        assert "Alice Smith invited you" in messages[0][1] and "Personal message: Come!" in messages[0][1]
+
+    def test_delivery_runs_inline_when_enqueue_fails(self, db):
+        service = _make_service(db)
+
+        with patch("app.tasks.invitations.send_phone_invitations.apply_async", side_effect=ConnectionError):
+            job_id = service.bulk_send_phone_invitations(1, NUMBERS[:1])["job_id"]
+
+        assert service.get_phone_invitation_job(1, job_id)["sent_count"] == 1
+
+    def test_progress_is_private_to_sender(self, db):
+        service = _make_service(db)
+        with patch.object(ContactService, "_enqueue_phone_invitations"):
+            job_id = service.bulk_send_phone_invitations(1, NUMBERS)["job_id"]
+
+        with pytest.raises(HTTPException) as exc:
+            service.get_phone_invitation_job(2, job_id)
+        assert exc.value.status_code == 404
+
+
+class TestTermiiSending:
+    """Test cases for concurrent, rate limited Termii sends."""
+
+    def test_rate_limiter_spaces_out_sends(self):
+        limiter = TermiiRateLimiter(rate_per_second=100, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        assert time.monotonic() - start >= 0.045
+
+    def test_workers_share_the_redis_bucket(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        # Two processes' limiters, each with its own connection to the same Redis
+        limiters = [TermiiRateLimiter(rate_per_second=100, burst=1, use_redis=True) for _ in range(2)]
+        clients = [fakeredis.FakeRedis(server=server, decode_responses=True) for _ in limiters]
+
+        start = time.monotonic()
+        with patch.object(sms_module.cache_backend, "_redis_retry_at", 0):
+            for _ in range(3):
+                for limiter, client in zip(limiters, clients):
+                    with patch.object(sms_module.cache_backend, "_redis", client):
+                        limiter.acquire()
+
+        # Six sends at 100/s need ~50ms in total, not ~20ms per process
+        assert time.monotonic() - start >= 0.045
+        assert all(limiter._tokens == limiter.capacity for limiter in limiters)
+
+    def test_send_many_yields_every_result(self):
+        service = SMSService()
+        with patch.object(SMSService, "send_sms", side_effect=lambda to_phone, message: {"status": "success", "to": to_phone}), \
+                patch.object(sms_module, "termii_rate_limiter", TermiiRateLimiter(rate_per_second=1000)):
+            results = dict(service.send_many([(number, "hi") for number in NUMBERS], concurrency=3))
+
+        assert [results[i]["to"] for i in range(3)] == NUMBERS
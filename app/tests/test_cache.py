@@ -0,0 +1,214 @@
+import pytest
+from datetime import datetime
+from typing import Any, Dict, List
+from unittest.mock import patch
+from pydantic import BaseModel
+from app.core import cache as cache_module
+from app.core.cache import (
+    CacheBackend, LocalLRUCache, ReadThroughCache, build_cache_key, cached
+)
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the Redis commands the cache uses."""
+
+    def __init__(self):
+        self.values: Dict[str, str] = {}
+        self.sets: Dict[str, set] = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.results: List[Any] = []
+
+    def set(self, key, value, ex=None):
+        self.client.values[key] = value
+        self.results.append(True)
+
+    def sadd(self, key, member):
+        self.client.sets.setdefault(key, set()).add(member)
+        self.results.append(1)
+
+    def expire(self, key, seconds):
+        self.results.append(True)
+
+    def incr(self, key):
+        self.client.values[key] = str(int(self.client.values.get(key, 0)) + 1)
+        self.results.append(int(self.client.values[key]))
+
+    def smembers(self, key):
+        self.results.append(self.client.smembers(key))
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    created_at: datetime
+
+
+@pytest.fixture
+def backend():
+    backend = CacheBackend()
+    backend._redis = FakeRedis()
+    with patch.object(cache_module, "cache_backend", backend):
+        yield backend
+
+
+class TestCacheKeys:
+    """Test cases for cache key derivation."""
+
+    def test_key_independent_of_argument_order(self):
+        assert build_cache_key("ns", {"a": 1, "b": 2}) == build_cache_key("ns", {"b": 2, "a": 1})
+
+    def test_key_changes_with_values(self):
+        assert build_cache_key("ns", {"a": 1}) != build_cache_key("ns", {"a": 2})
+
+
+class TestReadThroughCache:
+    """Test cases for the two-tier read-through cache."""
+
+    def test_schema_round_trip_and_counters(self, backend):
+        cache = ReadThroughCache("items", response_type=List[Item])
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return [Item(id=1, name="a", created_at=datetime(2024, 1, 1))]
+
+        first = cache.get_or_load({"page": 1}, loader)
+        second = cache.get_or_load({"page": 1}, loader)
+
+        assert len(calls) == 1
+        assert second == first
+        assert isinstance(second[0], Item)
+        stats = backend.stats.snapshot()["items"]
+        assert stats["misses"] == 1
+        assert stats["local_hits"] == 1
+
+    def test_redis_tier_used_when_local_empty(self, backend):
+        cache = ReadThroughCache("items", response_type=Dict[str, int])
+        cache.get_or_load({"id": 1}, lambda: {"count": 3}, tags=["event:1"])
+        backend.local.clear()
+
+        assert cache.get_or_load({"id": 1}, lambda: {"count": 99}) == {"count": 3}
+        assert backend.stats.snapshot()["items"]["redis_hits"] == 1
+
+    def test_tag_invalidation_clears_both_tiers(self, backend):
+        cache = ReadThroughCache("items", response_type=Dict[str, int])
+        cache.get_or_load({"id": 1}, lambda: {"count": 3}, tags=["event:1"])
+
+        backend.invalidate_tags("event:1")
+
+        assert cache.get_or_load({"id": 1}, lambda: {"count": 4}, tags=["event:1"]) == {"count": 4}
+
+    def test_redis_outage_falls_back_to_loader(self, backend):
+        import redis
+
+        class BrokenRedis(FakeRedis):
+            def get(self, key):
+                raise redis.ConnectionError("down")
+
+        backend._redis = BrokenRedis()
+        cache = ReadThroughCache("items", local_ttl_seconds=0)
+
+        assert cache.get_or_load({"id": 1}, lambda: {"ok": True}) == {"ok": True}
+        # Redis is skipped until the retry interval passes
+        assert backend.redis is None
+
+
+class TestVersionedCache:
+    """Test cases for fills racing a tag invalidation."""
+
+    @pytest.fixture
+    def shared(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        backend = CacheBackend()
+        backend._redis = fakeredis.FakeRedis(decode_responses=True)
+        with patch.object(cache_module, "cache_backend", backend):
+            yield backend
+
+    def test_value_loaded_across_an_invalidation_is_not_stored(self, shared):
+        cache = ReadThroughCache("principal", response_type=Dict[str, bool], versioned=True)
+
+        def loader():
+            # The row was read, then a concurrent logout committed
+            shared.invalidate_tags("user:1")
+            return {"is_active": True}
+
+        assert cache.get_or_load({"id": 1}, loader, tags=["user:1"]) == {"is_active": True}
+
+        assert cache.get({"id": 1}) == (False, None)
+        assert shared.redis.keys("cache:principal:*") == []
+
+    def test_set_checks_generations_read_before_the_load(self, shared):
+        cache = ReadThroughCache("principal", response_type=Dict[str, bool], versioned=True)
+        generations = cache.tag_generations(["user:1"])
+        shared.invalidate_tags("user:1")
+
+        cache.set({"id": 1}, {"is_active": True}, ["user:1"], generations)
+
+        assert cache.get({"id": 1}) == (False, None)
+
+    def test_undisturbed_fill_is_cached_and_invalidated(self, shared):
+        cache = ReadThroughCache("principal", response_type=Dict[str, bool], versioned=True)
+        cache.get_or_load({"id": 1}, lambda: {"is_active": True}, tags=["user:1"])
+        shared.local.clear()
+
+        assert cache.get({"id": 1}) == (True, {"is_active": True})
+        shared.invalidate_tags("user:1")
+        assert cache.get({"id": 1}) == (False, None)
+
+
+class TestCachedDecorator:
+    """Test cases for the @cached decorator."""
+
+    def test_key_uses_only_named_arguments(self, backend):
+        calls = []
+
+        class Repo:
+            def __init__(self, db):
+                self.db = db
+
+            @cached("stats", key_args=("event_id",), tags=lambda event_id: [f"event:{event_id}"])
+            def get_stats(self, event_id: int):
+                calls.append(event_id)
+                return {"event_id": event_id}
+
+        # Different instances (and sessions) share entries
+        assert Repo(object()).get_stats(5) == {"event_id": 5}
+        assert Repo(object()).get_stats(5) == {"event_id": 5}
+        assert calls == [5]
+
+
+class TestLocalLRUCache:
+    """Test cases for the in-process tier."""
+
+    def test_evicts_least_recently_used(self):
+        lru = LocalLRUCache(max_entries=2)
+        lru.set("a", "1", 60)
+        lru.set("b", "2", 60)
+        lru.get("a")
+        lru.set("c", "3", 60)
+
+        assert lru.get("a") == "1"
+        assert lru.get("b") is None
+        assert lru.get("c") == "3"
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import redis
+from app.services import chat_realtime
+from app.services.chat_realtime import (
+    ChatBroadcaster, TypingCoalescer, chat_channel, parse_chat_channel
+)
+from app.services.websocket_manager import ConnectionManager
+
+
+def _socket() -> MagicMock:
+    websocket = MagicMock()
+    websocket.accept = AsyncMock()
+    websocket.send_text = AsyncMock()
+    return websocket
+
+
+class TestTypingCoalescer:
+    """Test cases for server-side typing coalescing."""
+
+    def test_repeated_typing_is_dropped_within_interval(self):
+        coalescer = TypingCoalescer(interval_seconds=60)
+
+        assert coalescer.should_publish(1, 7, True) is True
+        assert coalescer.should_publish(1, 7, True) is False
+        assert coalescer.should_publish(1, 8, True) is True
+
+    def test_state_change_is_always_published(self):
+        coalescer = TypingCoalescer(interval_seconds=60)
+        coalescer.should_publish(1, 7, True)
+
+        assert coalescer.should_publish(1, 7, False) is True
+        assert coalescer.should_publish(1, 7, False) is False
+        assert coalescer.should_publish(1, 7, True) is True
+
+    def test_typing_is_refreshed_after_interval(self):
+        coalescer = TypingCoalescer(interval_seconds=0)
+        coalescer.should_publish(1, 7, True)
+
+        assert coalescer.should_publish(1, 7, True) is True
+
+
+class TestChatChannels:
+    """Test cases for chat channel naming."""
+
+    def test_round_trip(self):
+        assert parse_chat_channel(chat_channel(42)) == 42
+
+    def test_other_channels_are_ignored(self):
+        assert parse_chat_channel("user:5:payments") is None
+
+
+class TestEventFanOut:
+    """Test cases for ConnectionManager chat subscriptions."""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_reaches_only_subscribers(self):
+        manager = ConnectionManager()
+        subscribed, other = _socket(), _socket()
+        await manager.connect(subscribed, 1)
+        await manager.connect(other, 2)
+        manager.subscribe_to_event(subscribed, 10)
+
+        sent = await manager.broadcast_to_event(10, '{"type": "chat.typing"}')
+        await manager.flush()
+
+        assert sent == 1
+        subscribed.send_text.assert_awaited_with('{"type": "chat.typing"}')
+        assert other.send_text.await_count == 1  # connection_established only
+        await manager.close_all()
+
+    @pytest.mark.asyncio
+    async def test_failed_socket_is_dropped(self):
+        manager = ConnectionManager()
+        broken = _socket()
+        await manager.connect(broken, 1)
+        manager.subscribe_to_event(broken, 10)
+        broken.send_text.side_effect = Exception("closed")
+
+        await manager.broadcast_to_event(10, "{}")
+        await manager.flush()
+
+        assert 10 not in manager.event_subscribers
+        assert broken not in manager.connection_metadata
+
+
+class TestChatBroadcaster:
+    """Test cases for publishing chat updates."""
+
+    def test_publish_without_loop_uses_sync_client(self):
+        client = MagicMock()
+        broadcaster = ChatBroadcaster()
+
+        with patch.object(chat_realtime.cache_backend, "_redis", client), \
+                patch.object(chat_realtime.cache_backend, "_redis_retry_at", 0):
+            broadcaster.publish(3, chat_realtime.MESSAGE_DELETED, {"message_id": 9})
+
+        channel, payload = client.publish.call_args[0]
+        assert channel == "event:3:chat"
+        assert json.loads(payload)["type"] == "chat.message_deleted"
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_falls_back_to_local_delivery(self):
+        broadcaster = ChatBroadcaster()
+        broadcaster._async_client = MagicMock()
+        broadcaster._async_client.publish = AsyncMock(side_effect=redis.ConnectionError("down"))
+
+        with patch.object(chat_realtime.websocket_manager, "broadcast_to_event", AsyncMock()) as local:
+            await broadcaster._publish_async(3, "{}")
+
+        local.assert_awaited_once_with(3, "{}")
+        assert broadcaster.local_fallbacks == 1
+
+    @pytest.mark.asyncio
+    async def test_sync_publish_without_redis_delivers_locally(self):
+        broadcaster = ChatBroadcaster()
+
+        with patch.object(chat_realtime.cache_backend, "_redis_retry_at", float("inf")), \
+                patch.object(chat_realtime.websocket_manager, "loop", asyncio.get_running_loop()), \
+                patch.object(chat_realtime.websocket_manager, "broadcast_to_event", AsyncMock()) as local:
+            # Sync service code runs on a threadpool worker, off the event loop
+            await asyncio.to_thread(broadcaster._publish_sync, 3, "{}")
+            await asyncio.sleep(0)
+
+        local.assert_awaited_once_with(3, "{}")
+        assert broadcaster.local_fallbacks == 1
+
+    @pytest.mark.asyncio
+    async def test_publish_keeps_task_until_done(self):
+        broadcaster = ChatBroadcaster()
+        broadcaster._async_client = MagicMock()
+        broadcaster._async_client.publish = AsyncMock()
+
+        broadcaster.publish(3, chat_realtime.TYPING, {"user_id": 1, "is_typing": True})
+        assert len(broadcaster._pending) == 1
+
+        await asyncio.gather(*broadcaster._pending)
+        assert not broadcaster._pending
+        assert broadcaster.published == 1
@@ -0,0 +1,68 @@
+from unittest.mock import patch
+from sqlalchemy import create_engine, text
+from app.core.database_performance import ConnectionPoolMonitor
+from app.db import session as db_session_module
+from app.db.session import MonitoredQueuePool, get_pool_limits
+
+
+class TestPoolLimits:
+    """Test cases for pool sizing from the connection budget."""
+
+    def test_budget_divided_across_workers(self):
+        with patch.object(db_session_module.settings, "DB_MAX_CONNECTIONS", 200), \
+             patch.object(db_session_module.settings, "WEB_CONCURRENCY", 4):
+            pool_size, max_overflow = get_pool_limits(0.5)
+
+        assert pool_size + max_overflow == 25
+
+    def test_replica_budget_replaces_primary_budget(self):
+        with patch.object(db_session_module.settings, "DB_MAX_CONNECTIONS", 200), \
+             patch.object(db_session_module.settings, "WEB_CONCURRENCY", 4):
+            sync_limits = get_pool_limits(db_session_module.SYNC_POOL_SHARE, max_connections=80)
+            async_limits = get_pool_limits(db_session_module.ASYNC_POOL_SHARE, max_connections=80)
+
+        assert sum(sync_limits) + sum(async_limits) == 20
+
+    def test_per_worker_settings_without_budget(self):
+        with patch.object(db_session_module.settings, "DB_MAX_CONNECTIONS", None), \
+             patch.object(db_session_module.settings, "DB_CONNECTION_POOL_SIZE", 10), \
+             patch.object(db_session_module.settings, "DB_MAX_OVERFLOW", 20):
+            assert get_pool_limits(1.0) == (10, 20)
+
+
+class TestConnectionPoolMonitor:
+    """Test cases for ConnectionPoolMonitor."""
+
+    def test_checkout_wait_histogram(self):
+        monitor = ConnectionPoolMonitor()
+        monitor.record_checkout_wait("primary", 0.0005)
+        monitor.record_checkout_wait("primary", 0.2)
+        monitor.record_checkout_wait("primary", 30, timed_out=True)
+
+        wait = monitor.get_pool_report()["primary"]["checkout_wait_ms"]
+        assert wait["count"] == 3
+        assert wait["timeouts"] == 1
+        assert wait["buckets"]["le_1"] == 1
+        assert wait["buckets"]["le_250"] == 1
+        assert wait["buckets"]["le_inf"] == 1
+
+    def test_update_stats_from_registered_pool(self, tmp_path):
+        monitor = ConnectionPoolMonitor()
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=MonitoredQueuePool,
+            pool_logging_name="primary",
+            pool_size=2,
+            max_overflow=2
+        )
+        monitor.register_pool("primary", engine.pool)
+
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            monitor.refresh()
+            stats = monitor.get_pool_report()["primary"]
+
+        assert stats["pool_size"] == 2
+        assert stats["capacity"] == 4
+        assert stats["checked_out_connections"] == 1
+        assert monitor.is_pool_healthy()
@@ -1,6 +1,12 @@
+import json
+import httpx
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
+from pybreaker import CircuitBreakerError
+from app.core.circuit_breaker import email_breaker
 from app.services.email_service import EmailService, email_service
+from app.services.email_templates import EmailTemplates
+from app.services.email_transport import FakeEmailTransport, ResendTransport
 from app.models.user_models import User
 from app.models.event_models import Event, EventInvitation
 from app.tests.conftest import UserFactory, EventFactory
@@ -19,10 +25,10 @@ class TestEmailService:
         self.mock_user.username = "testuser"
     
     @pytest.mark.asyncio
-    @patch('resend.Emails.send')
-    async def test_send_email_success(self, mock_resend_send):
+    async def test_send_email_success(self):
         """Test successful email sending."""
-        mock_resend_send.return_value = {"id": "email_123"}
+        transport = FakeEmailTransport()
+        self.email_service.transport = transport
         
         result = await self.email_service.send_email(
             to_email="test@example.com",
@@ -31,17 +37,16 @@ class TestEmailService:
         )
         
         assert result is True
-        mock_resend_send.assert_called_once()
-        call_args = mock_resend_send.call_args[0][0]
+        assert len(transport.calls) == 1
+        call_args = transport.calls[0][0]
         assert call_args["to"] == ["test@example.com"]
         assert call_args["subject"] == "Test Subject"
         assert call_args["html"] == "<h1>Test Content</h1>"
     
     @pytest.mark.asyncio
-    @patch('resend.Emails.send')
-    async def test_send_email_failure(self, mock_resend_send):
+    async def test_send_email_failure(self):
         """Test email sending failure."""
-        mock_resend_send.side_effect = Exception("API Error")
+        self.email_service.transport = Mock(send=AsyncMock(side_effect=Exception("API Error")))
         
         result = await self.email_service.send_email(
             to_email="test@example.com",
@@ -52,10 +57,10 @@ class TestEmailService:
         assert result is False
     
     @pytest.mark.asyncio
-    @patch('resend.Emails.send')
-    async def test_send_bulk_email(self, mock_resend_send):
+    async def test_send_bulk_email(self):
         """Test bulk email sending."""
-        mock_resend_send.return_value = {"id": "email_123"}
+        transport = FakeEmailTransport(fail_addresses={"user2@example.com"})
+        self.email_service.transport = transport
         
         recipients = ["user1@example.com", "user2@example.com", "user3@example.com"]
         results = await self.email_service.send_bulk_email(
@@ -64,9 +69,13 @@ class TestEmailService:
             html_content="<h1>Bulk Content</h1>"
         )
         
-        assert len(results) == 3
-        assert all(results.values())
-        assert mock_resend_send.call_count == 3
+        assert results == {
+            "user1@example.com": True,
+            "user2@example.com": False,
+            "user3@example.com": True
+        }
+        # One batch call for all recipients
+        assert len(transport.calls) == 1
     
     @patch('app.services.email_service.env.get_template')
     def test_render_template_success(self, mock_get_template):
@@ -424,11 +433,10 @@ class TestEmailService:
         invitation.dietary_restrictions = None
         return invitation
     
-    @patch('resend.Emails.send')
-    async def test_send_email_success(self, mock_resend_send, email_service_instance):
+    async def test_send_email_success(self, email_service_instance):
         """Test successful email sending."""
-        # Mock successful response
-        mock_resend_send.return_value = {"id": "email_123"}
+        transport = FakeEmailTransport()
+        email_service_instance.transport = transport
         
         result = await email_service_instance.send_email(
             to_email="test@example.com",
@@ -437,19 +445,18 @@ class TestEmailService:
         )
         
         assert result is True
-        mock_resend_send.assert_called_once()
+        assert len(transport.calls) == 1
         
         # Verify the call arguments
-        call_args = mock_resend_send.call_args[0][0]
+        call_args = transport.calls[0][0]
         assert call_args["to"] == ["test@example.com"]
         assert call_args["subject"] == "Test Subject"
         assert call_args["html"] == "<h1>Test Content</h1>"
     
-    @patch('resend.Emails.send')
-    async def test_send_email_failure(self, mock_resend_send, email_service_instance):
+    async def test_send_email_failure(self, email_service_instance):
         """Test email sending failure."""
         # Mock failure response
-        mock_resend_send.side_effect = Exception("Email sending failed")
+        email_service_instance.transport = Mock(send=AsyncMock(side_effect=Exception("Email sending failed")))
         
         result = await email_service_instance.send_email(
             to_email="test@example.com",
@@ -459,11 +466,10 @@ class TestEmailService:
         
         assert result is False
     
-    @patch('resend.Emails.send')
-    async def test_send_bulk_email(self, mock_resend_send, email_service_instance):
+    async def test_send_bulk_email(self, email_service_instance):
         """Test bulk email sending."""
-        # Mock successful responses
-        mock_resend_send.return_value = {"id": "email_123"}
+        transport = FakeEmailTransport()
+        email_service_instance.transport = transport
         
         recipients = ["user1@example.com", "user2@example.com", "user3@example.com"]
         
@@ -475,7 +481,7 @@ class TestEmailService:
         
         assert len(results) == 3
         assert all(results.values())  # All should be True
-        assert mock_resend_send.call_count == 3
+        assert [len(call) for call in transport.calls] == [3]
     
     @patch.object(EmailService, 'render_template')
     @patch.object(EmailService, 'send_email')
@@ -775,10 +781,9 @@ class TestEmailServiceErrorHandling:
     def email_service_instance(self):
         return EmailService()
     
-    @patch('resend.Emails.send')
-    async def test_send_email_with_invalid_recipient(self, mock_resend_send, email_service_instance):
+    async def test_send_email_with_invalid_recipient(self, email_service_instance):
         """Test email sending with invalid recipient."""
-        mock_resend_send.side_effect = Exception("Invalid email address")
+        email_service_instance.transport = Mock(send=AsyncMock(side_effect=Exception("Invalid email address")))
         
         result = await email_service_instance.send_email(
             to_email="invalid-email",
@@ -788,10 +793,9 @@ class TestEmailServiceErrorHandling:
         
         assert result is False
     
-    @patch('resend.Emails.send')
-    async def test_send_email_with_empty_content(self, mock_resend_send, email_service_instance):
+    async def test_send_email_with_empty_content(self, email_service_instance):
         """Test email sending with empty content."""
-        mock_resend_send.return_value = {"id": "email_123"}
+        email_service_instance.transport = FakeEmailTransport()
         
         result = await email_service_instance.send_email(
             to_email="test@example.com",
@@ -803,16 +807,185 @@ class TestEmailServiceErrorHandling:
     
     async def test_bulk_email_partial_failure(self, email_service_instance):
         """Test bulk email with some failures."""
-        with patch.object(email_service_instance, 'send_email') as mock_send:
-            # Mock some successes and some failures
-            mock_send.side_effect = [True, False, True]
-            
-            recipients = ["user1@example.com", "user2@example.com", "user3@example.com"]
-            results = await email_service_instance.send_bulk_email(
-                recipients, "Test", "Content"
-            )
-            
-            assert results["user1@example.com"] is True
-            assert results["user2@example.com"] is False
-            assert results["user3@example.com"] is True
-            assert mock_send.call_count == 3
\ No newline at end of file
+        # One batch call reports the second recipient as rejected
+        transport = FakeEmailTransport(fail_addresses={"user2@example.com"})
+        email_service_instance.transport = transport
+        
+        recipients = ["user1@example.com", "user2@example.com", "user3@example.com"]
+        results = await email_service_instance.send_bulk_email(
+            recipients, "Test", "Content"
+        )
+        
+        assert results["user1@example.com"] is True
+        assert results["user2@example.com"] is False
+        assert results["user3@example.com"] is True
+        assert len(transport.calls) == 1
+
+
+class TestEmailBatching:
+    """Test cases for batched sends through the transport."""
+    
+    @pytest.mark.asyncio
+    async def test_send_batch_splits_at_batch_size(self):
+        """Test batches are capped at the provider limit."""
+        transport = FakeEmailTransport()
+        service = EmailService(transport=transport)
+        
+        results = await service.send_batch([
+            {"to_email": f"user{i}@example.com", "subject": "Hi", "html_content": "<p>Hi</p>"}
+            for i in range(250)
+        ])
+        
+        assert all(results) and len(results) == 250
+        assert sorted(len(call) for call in transport.calls) == [50, 100, 100]
+    
+    @pytest.mark.asyncio
+    async def test_attachments_are_sent_individually(self):
+        """Test emails with attachments skip the batch endpoint."""
+        transport = FakeEmailTransport()
+        service = EmailService(transport=transport)
+        
+        results = await service.send_batch([
+            {"to_email": "a@example.com", "subject": "Hi", "html_content": "<p>Hi</p>"},
+            {"to_email": "b@example.com", "subject": "Hi", "html_content": "<p>Hi</p>",
+             "attachments": [{"filename": "invite.ics", "content": "x"}]}
+        ])
+        
+        assert results == [True, True]
+        assert sorted(len(call) for call in transport.calls) == [1, 1]
+    
+    @pytest.mark.asyncio
+    async def test_failed_batch_marks_every_email_failed(self):
+        """Test a batch call that errors does not raise."""
+        service = EmailService(transport=Mock(send_batch=AsyncMock(side_effect=Exception("Resend down"))))
+        
+        results = await service.send_bulk_email(
+            ["user1@example.com", "user2@example.com"], "Test", "Content"
+        )
+        
+        assert results == {"user1@example.com": False, "user2@example.com": False}
+    
+    @pytest.mark.asyncio
+    async def test_open_breaker_skips_the_batch(self):
+        """Test batches go through the email circuit breaker like single sends."""
+        transport = FakeEmailTransport()
+        service = EmailService(transport=transport)
+        
+        with patch.object(email_breaker, "call", side_effect=CircuitBreakerError("open")):
+            results = await service.send_batch([
+                {"to_email": "a@example.com", "subject": "Hi", "html_content": "<p>Hi</p>"},
+                {"to_email": "b@example.com", "subject": "Hi", "html_content": "<p>Hi</p>"}
+            ])
+        
+        assert results == [False, False]
+        assert transport.calls == []
+
+
+class TestResendTransport:
+    """Test cases for the Resend HTTP transport."""
+    
+    @pytest.mark.asyncio
+    async def test_retries_server_errors_with_backoff(self):
+        """Test 5xx responses are retried before giving up."""
+        statuses = [503, 503, 200]
+        paths = []
+        
+        def handler(request):
+            paths.append(request.url.path)
+            status = statuses.pop(0)
+            return httpx.Response(status, json={"id": "email_1"} if status == 200 else {"message": "busy"})
+        
+        transport = ResendTransport(api_key="re_test", backoff_seconds=0, http_transport=httpx.MockTransport(handler))
+        try:
+            assert await transport.send({"to": ["a@example.com"]}) == "email_1"
+        finally:
+            await transport.aclose()
+        
+        assert paths == ["/emails"] * 3
+    
+    @pytest.mark.asyncio
+    async def test_retries_reuse_the_idempotency_key(self):
+        """Test a retried batch is sent with the key of its first attempt."""
+        keys = []
+        
+        def handler(request):
+            keys.append(request.headers.get("idempotency-key"))
+            if len(keys) == 1:
+                raise httpx.ReadTimeout("timed out", request=request)
+            return httpx.Response(200, json={"data": [{"id": "email_1"}]})
+        
+        transport = ResendTransport(api_key="re_test", backoff_seconds=0, http_transport=httpx.MockTransport(handler))
+        try:
+            assert await transport.send_batch([{"to": ["a@example.com"]}]) == ["email_1"]
+            await transport.send({"to": ["b@example.com"]})
+        finally:
+            await transport.aclose()
+        
+        assert keys[0] and keys[0] == keys[1]
+        assert keys[2] != keys[0]
+    
+    @pytest.mark.asyncio
+    async def test_rejected_batch_falls_back_to_single_sends(self):
+        """Test a batch failing validation is retried one email at a time."""
+        def handler(request):
+            if request.url.path == "/emails/batch":
+                return httpx.Response(422, json={"message": "invalid `to` field"})
+            recipient = json.loads(request.content)["to"][0]
+            if recipient == "bad":
+                return httpx.Response(422, json={"message": "invalid `to` field"})
+            return httpx.Response(200, json={"id": f"id-{recipient}"})
+        
+        transport = ResendTransport(api_key="re_test", backoff_seconds=0, http_transport=httpx.MockTransport(handler))
+        try:
+            ids = await transport.send_batch([{"to": ["a@example.com"]}, {"to": ["bad"]}])
+        finally:
+            await transport.aclose()
+        
+        assert ids == ["id-a@example.com", None]
+
+
+class TestEmailTemplates:
+    """Test cases for precompiled templates and cached fragments."""
+    
+    def _event_invitations(self, count):
+        event = Mock(
+            id=7, title="Launch Party", description="Drinks", venue_name="Hall", venue_address="1 Main St",
+            start_datetime=datetime(2030, 5, 1, 19, 0)
+        )
+        inviter = Mock(full_name="Alice", email="alice@example.com")
+        invitations = [
+            (Mock(id=i, invitation_message="", plus_one_allowed=False), Mock(full_name=f"Guest {i}", email=f"guest{i}@example.com"))
+            for i in range(count)
+        ]
+        return event, inviter, invitations
+    
+    def test_compile_all_loads_every_template_once(self):
+        """Test templates are not re-read after startup compilation."""
+        templates = EmailTemplates()
+        compiled = templates.compile_all()
+        
+        assert compiled == len(templates.env.list_templates(extensions=['html', 'txt']))
+        with patch.object(templates.env.loader, "get_source", side_effect=AssertionError("template re-read")):
+            templates.render("contact_invite.html", {"app_name": "Plan et al", "inviter_name": "Alice", "invite_url": "x"})
+    
+    def test_event_details_render_once_per_batch(self):
+        """Test recipient-independent fragments are rendered once for a batch."""
+        templates = EmailTemplates()
+        event, inviter, invitations = self._event_invitations(5)
+        
+        with patch("app.services.email_service.email_templates", templates):
+            emails = EmailService(transport=FakeEmailTransport()).event_invitation_emails(event, inviter, invitations)
+        
+        assert [email["to_email"] for email in emails] == [f"guest{i}@example.com" for i in range(5)]
+        assert all("1 Main St" in email["html_content"] for email in emails)
+        assert "Hi Guest 3" in emails[3]["html_content"]
+        assert (templates.fragment_misses, templates.fragment_hits) == (1, 4)
+    
+    def test_fragment_cache_is_bounded(self):
+        """Test the least recently used fragments are evicted."""
+        templates = EmailTemplates(fragment_cache_size=2)
+        for day in ["Mon", "Tue", "Wed", "Mon"]:
+            templates.fragment("_event_details.html", event_date=day, event_time="7pm", event_venue="", event_address="")
+        
+        assert templates.fragment_misses == 4
+        assert len(templates._fragments) == 2
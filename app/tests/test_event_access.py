@@ -0,0 +1,169 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from app.db.base import Base
+from app.models.event_models import Event, EventAccess, EventInvitation, event_collaborators
+from app.models.shared_models import EventAccessRole, EventStatus, RSVPStatus
+from app.models.user_models import User
+from app.repositories.event_repo import EventRepository, build_listing_statement
+from app.repositories.message_repo import AsyncMessageRepository
+from app.schemas.pagination import PaginationParams
+
+TABLES = [User.__table__, Event.__table__, event_collaborators, EventInvitation.__table__, EventAccess.__table__]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLES)
+    session = Session(engine)
+    session.add_all([
+        User(id=i, email=f"user{i}@example.com", hashed_password="x", full_name=f"User {i}")
+        for i in range(1, 5)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def _create_event(repo: EventRepository, creator_id: int = 1, **overrides) -> Event:
+    data = {
+        "title": "Party",
+        "creator_id": creator_id,
+        "start_datetime": datetime.utcnow() + timedelta(days=3),
+        "status": EventStatus.CONFIRMED,
+    }
+    data.update(overrides)
+    return repo.create(data)
+
+
+def _grants(db: Session, event_id: int):
+    return {
+        (row.user_id, row.role, row.rsvp_status)
+        for row in db.execute(select(EventAccess).where(EventAccess.event_id == event_id)).scalars()
+    }
+
+
+def _listing_ids(db: Session, category: str, user_id: int):
+    return [event.id for event in db.execute(build_listing_statement(category, user_id)).scalars()]
+
+
+class TestAccessMaintenance:
+    """Test cases for keeping event_access in step with its sources."""
+
+    def test_create_grants_creator(self, db):
+        repo = EventRepository(db)
+        event = _create_event(repo)
+
+        assert _grants(db, event.id) == {(1, EventAccessRole.CREATOR.value, None)}
+
+    def test_invitation_and_rsvp_are_mirrored(self, db):
+        repo = EventRepository(db)
+        event = _create_event(repo)
+        invitation = repo.create_invitation({"event_id": event.id, "user_id": 2})
+
+        repo.update_invitation(invitation.id, {"rsvp_status": RSVPStatus.ACCEPTED})
+        db.commit()
+
+        assert (2, EventAccessRole.INVITEE.value, RSVPStatus.ACCEPTED.value) in _grants(db, event.id)
+
+    def test_status_change_is_copied_to_grants(self, db):
+        repo = EventRepository(db)
+        event = _create_event(repo)
+        repo.create_invitation({"event_id": event.id, "user_id": 2})
+
+        repo.update(event.id, {"status": EventStatus.CANCELLED})
+
+        statuses = db.execute(
+            select(EventAccess.status).where(EventAccess.event_id == event.id)
+        ).scalars().all()
+        assert set(statuses) == {EventStatus.CANCELLED.value}
+
+    def test_delete_revokes_grants(self, db):
+        repo = EventRepository(db)
+        event = _create_event(repo)
+
+        repo.delete(event.id)
+
+        assert _grants(db, event.id) == set()
+        assert repo.user_has_event_access(event.id, 1) is False
+
+    def test_rebuild_matches_source_tables(self, db):
+        repo = EventRepository(db)
+        event = _create_event(repo)
+        db.execute(event_collaborators.insert().values(event_id=event.id, user_id=1))
+        db.execute(event_collaborators.insert().values(event_id=event.id, user_id=3))
+        db.add(EventInvitation(event_id=event.id, user_id=2, rsvp_status=RSVPStatus.MAYBE))
+        db.execute(EventAccess.__table__.delete())
+        db.commit()
+
+        written = repo.rebuild_event_access(event.id, event.id)
+        db.commit()
+
+        assert written == 3
+        assert _grants(db, event.id) == {
+            (1, EventAccessRole.CREATOR.value, None),
+            (3, EventAccessRole.COLLABORATOR.value, None),
+            (2, EventAccessRole.INVITEE.value, RSVPStatus.MAYBE.value),
+        }
+
+
+class TestAccessListings:
+    """Test cases for listings answered from event_access."""
+
+    def test_upcoming_includes_invitees_but_not_strangers(self, db):
+        repo = EventRepository(db)
+        event = _create_event(repo)
+        repo.create_invitation({"event_id": event.id, "user_id": 2})
+
+        assert _listing_ids(db, "upcoming", 2) == [event.id]
+        assert _listing_ids(db, "upcoming", 4) == []
+
+    def test_drafts_only_for_grantees(self, db):
+        repo = EventRepository(db)
+        draft = _create_event(repo, status=EventStatus.DRAFT)
+        _create_event(repo)
+
+        assert _listing_ids(db, "drafts", 1) == [draft.id]
+
+    def test_past_events_leave_upcoming(self, db):
+        repo = EventRepository(db)
+        event = _create_event(repo)
+
+        repo.update(event.id, {"start_datetime": datetime.utcnow() - timedelta(days=1)})
+
+        assert _listing_ids(db, "upcoming", 1) == []
+
+    def test_collaborating_includes_own_events(self, db):
+        repo = EventRepository(db)
+        own = _create_event(repo)
+        shared = _create_event(repo, creator_id=2)
+        repo.grant_event_access(shared, 1, EventAccessRole.COLLABORATOR)
+        _create_event(repo, creator_id=3)
+        db.commit()
+
+        events, total = repo.get_user_events(1, PaginationParams(), role_filter="collaborating")
+
+        assert total == 2
+        assert {event.id for event in events} == {own.id, shared.id}
+
+
+class TestChatAccess:
+    """Test cases for the async chat path's access check."""
+
+    @pytest.mark.asyncio
+    async def test_access_is_read_from_event_access(self):
+        event = MagicMock(creator_id=1)
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            MagicMock(scalar_one_or_none=MagicMock(return_value=event)),
+            MagicMock(scalar=MagicMock(return_value=True)),
+        ])
+
+        assert await AsyncMessageRepository(db).get_event_with_access(5, 2) is event
+
+        access_sql = str(db.execute.await_args_list[1].args[0])
+        assert "event_access" in access_sql
+        assert "event_collaborators" not in access_sql
@@ -15,16 +15,14 @@ import re
 import pytest
 from datetime import datetime, timedelta
 from types import SimpleNamespace
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, patch
 
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
-from limits.storage import MemoryStorage
-from limits.strategies import FixedWindowRateLimiter
 
 from app.main import app
 from app.core.deps import get_db, get_current_active_user
-from app.core.rate_limiter import limiter
+from app.core import rate_limiter
 from app.models.event_models import Event, EventInvitation
 from app.models.shared_models import EventStatus, RSVPStatus
 
@@ -32,14 +30,8 @@ from app.models.shared_models import EventStatus, RSVPStatus
 @pytest.fixture(autouse=True)
 def use_memory_rate_limiter():
     """Swap Redis rate-limiter storage for in-memory so tests don't need Redis."""
-    original_storage = limiter._storage
-    original_limiter = limiter._limiter
-    mem = MemoryStorage()
-    limiter._storage = mem
-    limiter._limiter = FixedWindowRateLimiter(mem)
-    yield
-    limiter._storage = original_storage
-    limiter._limiter = original_limiter
+    with patch.object(rate_limiter, "limiter", rate_limiter.RateLimiter(use_redis=False)):
+        yield
 
 
 # ---------------------------------------------------------------------------
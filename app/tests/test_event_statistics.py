@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from app.core.cache import cache_backend
+from app.db.base import Base
+from app.models.event_models import (
+    Comment, Event, EventAccess, EventInvitation, Expense, Poll, Task, event_collaborators
+)
+from app.models.shared_models import RSVPStatus, TaskStatus
+from app.models.user_models import User
+from app.repositories.event_repo import EventRepository
+
+TABLES = [
+    User.__table__, Event.__table__, event_collaborators, EventAccess.__table__,
+    EventInvitation.__table__, Task.__table__, Expense.__table__, Comment.__table__, Poll.__table__
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLES)
+    session = Session(engine)
+    session.add_all([
+        User(id=i, email=f"user{i}@example.com", hashed_password="x", full_name=f"User {i}")
+        for i in range(1, 6)
+    ])
+    session.add(Event(
+        id=1, title="Party", creator_id=1, total_budget=500.0,
+        start_datetime=datetime.utcnow() + timedelta(days=2)
+    ))
+    session.add_all([
+        EventInvitation(event_id=1, user_id=2, rsvp_status=RSVPStatus.ACCEPTED),
+        EventInvitation(event_id=1, user_id=3, rsvp_status=RSVPStatus.ACCEPTED),
+        EventInvitation(event_id=1, user_id=4, rsvp_status=RSVPStatus.PENDING),
+        EventInvitation(event_id=1, user_id=5, rsvp_status=RSVPStatus.DECLINED, is_deleted=True),
+        Task(event_id=1, creator_id=1, title="Cake", status=TaskStatus.COMPLETED),
+        Task(event_id=1, creator_id=1, title="Music", status=TaskStatus.TODO),
+        Expense(event_id=1, paid_by_user_id=1, title="Venue", amount=120.0, expense_date=datetime.utcnow()),
+        Comment(event_id=1, author_id=2, content="See you there"),
+    ])
+    session.execute(event_collaborators.insert().values(event_id=1, user_id=1))
+    session.commit()
+    cache_backend.local.clear()
+    yield session
+    session.close()
+    cache_backend.local.clear()
+
+
+class TestEventStatistics:
+    """Test cases for the single-query event statistics."""
+
+    def test_counters_match_child_rows(self, db):
+        stats = EventRepository(db).get_event_statistics(1)
+
+        assert stats["rsvp_counts"] == {"pending": 1, "accepted": 2, "declined": 0, "maybe": 0}
+        assert stats["task_counts"]["completed"] == 1
+        assert stats["task_counts"]["todo"] == 1
+        assert stats["invitation_count"] == 3
+        assert stats["total_expenses"] == 120.0
+        assert stats["budget_remaining"] == 380.0
+        assert stats["comment_count"] == 1
+        assert stats["poll_count"] == 0
+        assert stats["collaborator_count"] == 1
+
+    def test_single_round_trip(self, db):
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        EventRepository(db).get_event_statistics(1)
+
+        assert len(statements) == 1
+
+    def test_missing_event_returns_empty(self, db):
+        assert EventRepository(db).get_event_statistics(99) == {}
+
+    def test_child_write_invalidates_cached_stats(self, db):
+        repo = EventRepository(db)
+        assert repo.get_event_statistics(1)["invitation_count"] == 3
+
+        db.add(EventInvitation(event_id=1, user_id=5, rsvp_status=RSVPStatus.MAYBE))
+        db.commit()
+
+        stats = repo.get_event_statistics(1)
+        assert stats["invitation_count"] == 4
+        assert stats["rsvp_counts"]["maybe"] == 1
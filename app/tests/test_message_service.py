@@ -250,7 +250,7 @@ class TestMessageService:
         self.mock_db.query.return_value = mock_query
         
         with patch.object(self.message_service, '_get_event_with_access', return_value=self.mock_event), \
-             patch.object(self.message_service, '_mark_messages_as_read'):
+             patch.object(self.message_service, 'mark_read_up_to'):
             
             messages, total = self.message_service.get_messages(1, 1, page=1, per_page=50)
             
@@ -477,54 +477,55 @@ class TestMessageService:
         """Test event access check for creator."""
         self.mock_event.creator_id = 1
         
-        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = self.mock_event
+        self.mock_db.query.return_value.filter.return_value.first.return_value = self.mock_event
         
-        result = self.message_service._get_event_with_access(1, 1)
+        with patch('app.services.message_service.EventRepository') as mock_repo_class:
+            result = self.message_service._get_event_with_access(1, 1)
         
         assert result == self.mock_event
+        mock_repo_class.return_value.user_has_event_access.assert_not_called()
     
     def test_get_event_with_access_collaborator(self):
         """Test event access check for collaborator."""
-        mock_collaborator = Mock()
-        mock_collaborator.id = 1
-        
         self.mock_event.creator_id = 2
-        self.mock_event.collaborators = [mock_collaborator]
         
-        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = self.mock_event
+        self.mock_db.query.return_value.filter.return_value.first.return_value = self.mock_event
         
-        result = self.message_service._get_event_with_access(1, 1)
+        with patch('app.services.message_service.EventRepository') as mock_repo_class:
+            mock_repo_class.return_value.user_has_event_access.return_value = True
+            result = self.message_service._get_event_with_access(1, 1)
         
         assert result == self.mock_event
+        mock_repo_class.return_value.user_has_event_access.assert_called_once_with(1, 1)
     
     def test_get_event_with_access_invited_user(self):
         """Test event access check for invited user."""
         self.mock_event.creator_id = 2
-        self.mock_event.collaborators = []
-        
-        mock_invitation = Mock(spec=EventInvitation)
         
-        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = self.mock_event
-        self.mock_db.query.return_value.filter.return_value.first.return_value = mock_invitation
+        self.mock_db.query.return_value.filter.return_value.first.return_value = self.mock_event
         
-        result = self.message_service._get_event_with_access(1, 1)
+        with patch('app.services.message_service.EventRepository') as mock_repo_class:
+            # Invitees hold an event_access grant like collaborators
+            mock_repo_class.return_value.user_has_event_access.return_value = True
+            result = self.message_service._get_event_with_access(1, 3)
         
         assert result == self.mock_event
+        mock_repo_class.return_value.user_has_event_access.assert_called_once_with(1, 3)
     
     def test_get_event_with_access_denied(self):
         """Test event access check when access is denied."""
         self.mock_event.creator_id = 2
-        self.mock_event.collaborators = []
         
-        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = self.mock_event
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None  # No invitation
+        self.mock_db.query.return_value.filter.return_value.first.return_value = self.mock_event
         
-        with pytest.raises(AuthorizationError, match="You don't have access to this event"):
-            self.message_service._get_event_with_access(1, 1)
+        with patch('app.services.message_service.EventRepository') as mock_repo_class:
+            mock_repo_class.return_value.user_has_event_access.return_value = False
+            with pytest.raises(AuthorizationError, match="You don't have access to this event"):
+                self.message_service._get_event_with_access(1, 1)
     
     def test_get_event_with_access_not_found(self):
         """Test event access check when event doesn't exist."""
-        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = None
+        self.mock_db.query.return_value.filter.return_value.first.return_value = None
         
         with pytest.raises(NotFoundError, match="Event not found"):
             self.message_service._get_event_with_access(999, 1)
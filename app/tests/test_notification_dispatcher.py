@@ -0,0 +1,315 @@
+import asyncio
+import threading
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+import pybreaker
+from firebase_admin import messaging
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+from app.core.cache import cache_backend
+from app.db.base import Base
+from app.models.notification_models import (
+    DevicePlatform, NotificationChannel, NotificationLog, NotificationQueue, NotificationType, UserDevice
+)
+from app.models.user_models import User
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.notification_service import NotificationService
+from app.services.push_service import FCM_BATCH_LIMIT, push_service
+
+TABLES = [User.__table__, UserDevice.__table__, NotificationQueue.__table__, NotificationLog.__table__]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLES)
+    session = Session(engine)
+    session.add(User(id=1, email="guest@example.com", full_name="Guest", hashed_password="x"))
+    session.commit()
+    cache_backend.local.clear()
+    yield session
+    session.close()
+    cache_backend.local.clear()
+
+
+def _queue(db, count, channel=NotificationChannel.EMAIL, **overrides):
+    due = datetime.utcnow() - timedelta(minutes=1)
+    db.add_all([
+        NotificationQueue(
+            notification_type=NotificationType.EVENT_REMINDER,
+            channel=channel,
+            subject="Reminder",
+            message=f"message {i}",
+            scheduled_for=overrides.get("scheduled_for", due),
+            status=overrides.get("status", "queued"),
+            attempts=0,
+            max_attempts=3,
+            last_attempt_at=overrides.get("last_attempt_at"),
+            event_id=1,
+            recipient_id=1
+        )
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def _statuses(db):
+    rows = db.execute(
+        select(NotificationQueue.status, func.count()).group_by(NotificationQueue.status)
+    ).all()
+    return dict(rows)
+
+
+class _StubProvider:
+    """Stub sender that records its peak concurrency"""
+
+    def __init__(self, delay=0.01, fail_ids=()):
+        self.delay = delay
+        self.fail_ids = set(fail_ids)
+        self.in_flight = 0
+        self.peak = 0
+        self.sent = []
+
+    async def __call__(self, notification):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        self.sent.append(notification.id)
+        return notification.id not in self.fail_ids
+
+
+class _FakeFCM:
+    """Patches messaging.send_each, recording calls and rejecting some tokens"""
+
+    def __init__(self, invalid_tokens=()):
+        self.invalid_tokens = set(invalid_tokens)
+        self.calls = []
+        self.threads = set()
+
+    @property
+    def messages(self):
+        return [message for call in self.calls for message in call]
+
+    def send_each(self, messages):
+        self.calls.append(messages)
+        self.threads.add(threading.current_thread().name)
+        return SimpleNamespace(responses=[
+            SimpleNamespace(success=False, exception=messaging.UnregisteredError("Token not registered"))
+            if message.token in self.invalid_tokens else SimpleNamespace(success=True, exception=None)
+            for message in messages
+        ])
+
+    def __enter__(self):
+        self._patches = [
+            patch.object(messaging, "send_each", self.send_each),
+            patch.object(push_service, "_app", object())
+        ]
+        for p in self._patches:
+            p.start()
+        return self
+
+    def __exit__(self, *exc):
+        for p in self._patches:
+            p.stop()
+
+
+class TestClaiming:
+    """Test cases for claiming queue rows."""
+
+    def test_claim_marks_rows_processing(self, db):
+        _queue(db, 5)
+        repo = NotificationService(db).notification_repo
+
+        claimed = repo.claim_due_notifications(3, lease_seconds=300)
+
+        assert len(claimed) == 3
+        assert all(item.status == "processing" and item.attempts == 1 for item in claimed)
+        assert _statuses(db) == {"processing": 3, "queued": 2}
+
+    def test_claimed_and_future_rows_are_skipped(self, db):
+        _queue(db, 2)
+        _queue(db, 2, scheduled_for=datetime.utcnow() + timedelta(hours=1))
+        repo = NotificationService(db).notification_repo
+
+        assert len(repo.claim_due_notifications(10, lease_seconds=300)) == 2
+        assert repo.claim_due_notifications(10, lease_seconds=300) == []
+
+    def test_expired_lease_is_reclaimed(self, db):
+        _queue(db, 1, status="processing", last_attempt_at=datetime.utcnow() - timedelta(hours=1))
+        _queue(db, 1, status="processing", last_attempt_at=datetime.utcnow())
+        repo = NotificationService(db).notification_repo
+
+        assert len(repo.claim_due_notifications(10, lease_seconds=300)) == 1
+
+
+class TestDispatch:
+    """Test cases for concurrent dispatch and bulk settlement."""
+
+    @pytest.mark.asyncio
+    async def test_dispatch_respects_channel_limits(self, db):
+        _queue(db, 12, NotificationChannel.EMAIL)
+        _queue(db, 12, NotificationChannel.SMS)
+        email, sms = _StubProvider(), _StubProvider()
+        dispatcher = NotificationDispatcher(
+            NotificationService(db),
+            senders={NotificationChannel.EMAIL: email, NotificationChannel.SMS: sms},
+            channel_limits={"email": 4, "sms": 2}
+        )
+
+        result = await dispatcher.dispatch(limit=100)
+
+        assert result.claimed == 24 and result.sent == 24
+        assert email.peak == 4
+        assert sms.peak == 2
+        assert _statuses(db) == {"sent": 24}
+
+    @pytest.mark.asyncio
+    async def test_batch_is_settled_in_one_commit(self, db):
+        _queue(db, 10)
+        provider = _StubProvider(delay=0, fail_ids={2, 5})
+        dispatcher = NotificationDispatcher(
+            NotificationService(db), senders={NotificationChannel.EMAIL: provider}, batch_size=10
+        )
+        commits = []
+        event.listen(db, "after_commit", lambda session: commits.append(1))
+
+        result = await dispatcher.dispatch(limit=10)
+
+        # One commit claims the batch, one settles it
+        assert len(commits) == 2
+        assert (result.sent, result.failed) == (8, 2)
+        assert _statuses(db) == {"sent": 8, "failed": 2}
+        failed_logs = db.execute(
+            select(func.count()).select_from(NotificationLog).where(NotificationLog.error_message.isnot(None))
+        ).scalar()
+        assert failed_logs == 2
+
+    @pytest.mark.asyncio
+    async def test_settled_rows_record_delivery_times(self, db):
+        _queue(db, 4)
+        provider = _StubProvider(delay=0, fail_ids={3})
+        dispatcher = NotificationDispatcher(
+            NotificationService(db), senders={NotificationChannel.EMAIL: provider}
+        )
+
+        await dispatcher.dispatch(limit=10)
+
+        rows = db.execute(
+            select(NotificationQueue.status, NotificationQueue.sent_at, NotificationQueue.failed_at)
+        ).all()
+        assert all(sent_at is not None and failed_at is None for status, sent_at, failed_at in rows if status == "sent")
+        assert [(sent_at, failed_at is not None) for status, sent_at, failed_at in rows if status == "failed"] == [(None, True)]
+
+    @pytest.mark.asyncio
+    async def test_dispatch_stops_at_limit(self, db):
+        _queue(db, 7)
+        provider = _StubProvider(delay=0)
+        dispatcher = NotificationDispatcher(
+            NotificationService(db), senders={NotificationChannel.EMAIL: provider}, batch_size=3
+        )
+
+        result = await dispatcher.dispatch(limit=5)
+
+        assert result.claimed == 5
+        assert result.batches == 2
+        assert _statuses(db) == {"sent": 5, "queued": 2}
+
+
+class TestBatchLookups:
+    """Test cases for batch-loaded recipients and cached devices."""
+
+    @pytest.mark.asyncio
+    async def test_push_batch_loads_devices_once(self, db):
+        db.add(UserDevice(user_id=1, device_token="token-1", platform=DevicePlatform.ANDROID, is_active=True))
+        db.commit()
+        _queue(db, 6, NotificationChannel.PUSH)
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        with _FakeFCM() as fcm:
+            result = await NotificationDispatcher(NotificationService(db)).dispatch(limit=10)
+
+        assert result.sent == 6
+        assert {message.token for message in fcm.messages} == {"token-1"}
+        assert sum("FROM notification_devices" in sql for sql in statements) == 1
+
+    def test_device_changes_invalidate_cache(self, db):
+        repo = NotificationService(db).notification_repo
+        assert repo.get_cached_active_devices([1]) == {1: []}
+
+        repo.register_device({"user_id": 1, "device_token": "token-2", "platform": DevicePlatform.IOS})
+        assert repo.get_cached_active_devices([1])[1] == [{"device_token": "token-2", "platform": "ios"}]
+
+        repo.unregister_device(1, "token-2")
+        assert repo.get_cached_active_devices([1]) == {1: []}
+
+
+class TestPushBatching:
+    """Test cases for batched FCM sends."""
+
+    @pytest.mark.asyncio
+    async def test_batch_push_is_one_send_each_off_loop(self, db):
+        db.add_all([
+            UserDevice(user_id=1, device_token="token-1", platform=DevicePlatform.ANDROID, is_active=True),
+            UserDevice(user_id=1, device_token="token-2", platform=DevicePlatform.IOS, is_active=True)
+        ])
+        db.commit()
+        _queue(db, 5, NotificationChannel.PUSH)
+
+        with _FakeFCM() as fcm:
+            result = await NotificationDispatcher(NotificationService(db)).dispatch(limit=10)
+
+        assert result.sent == 5
+        assert len(fcm.calls) == 1 and len(fcm.messages) == 10
+        assert all(name.startswith("fcm-send") for name in fcm.threads)
+
+    @pytest.mark.asyncio
+    async def test_invalid_tokens_are_pruned(self, db):
+        db.add_all([
+            UserDevice(user_id=1, device_token="token-1", platform=DevicePlatform.ANDROID, is_active=True),
+            UserDevice(user_id=1, device_token="stale", platform=DevicePlatform.ANDROID, is_active=True)
+        ])
+        db.commit()
+        _queue(db, 3, NotificationChannel.PUSH)
+        pruned_before = push_service.metrics.pruned_tokens
+        commits = []
+        event.listen(db, "after_commit", lambda session: commits.append(1))
+
+        with _FakeFCM(invalid_tokens={"stale"}):
+            result = await NotificationDispatcher(NotificationService(db)).dispatch(limit=3)
+
+        # Delivered to the remaining device, the stale one is switched off
+        assert result.sent == 3
+        # One commit claims the batch; pruning is settled with it, not separately
+        assert len(commits) == 2
+        assert push_service.metrics.pruned_tokens - pruned_before == 1
+        repo = NotificationService(db).notification_repo
+        assert repo.get_cached_active_devices([1])[1] == [{"device_token": "token-1", "platform": "android"}]
+
+    @pytest.mark.asyncio
+    async def test_send_each_chunks_at_fcm_limit(self):
+        messages = [push_service.build_message(f"token-{i}", "Title", "Body") for i in range(FCM_BATCH_LIMIT * 2 + 1)]
+        batches_before = push_service.metrics.batches
+
+        with _FakeFCM(invalid_tokens={"token-3"}) as fcm:
+            results = await push_service.send_each(messages)
+
+        assert [len(call) for call in fcm.calls] == [FCM_BATCH_LIMIT, FCM_BATCH_LIMIT, 1]
+        assert sum(result["success"] for result in results) == len(messages) - 1
+        assert results[3]["invalid_token"] is True
+        assert push_service.metrics.batches == batches_before + 1
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_fails_chunks_without_calling_fcm(self):
+        breaker = pybreaker.CircuitBreaker(fail_max=1, reset_timeout=60)
+        breaker.open()
+        messages = [push_service.build_message(f"token-{i}", "Title", "Body") for i in range(3)]
+
+        with _FakeFCM() as fcm, patch("app.services.push_service.firebase_breaker", breaker):
+            results = await push_service.send_each(messages)
+
+        assert fcm.calls == []
+        assert not any(result["success"] or result["invalid_token"] for result in results)
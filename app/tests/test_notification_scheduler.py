@@ -0,0 +1,112 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.cache import cache_backend
+from app.db.base import Base
+from app.models.notification_models import (
+    NotificationChannel, NotificationLog, NotificationQueue, NotificationType, UserDevice
+)
+from app.models.user_models import User
+from app.services import notification_scheduler
+from app.services.notification_scheduler import (
+    DUE_INDEX_KEY, DueIndex, NotificationScheduler, SchedulerMetrics
+)
+from app.services.notification_service import NotificationService
+
+TABLES = [User.__table__, UserDevice.__table__, NotificationQueue.__table__, NotificationLog.__table__]
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=TABLES)
+    return sessionmaker(bind=engine)
+
+
+def _queue(session_factory, count, scheduled_for):
+    with session_factory() as db:
+        db.add_all([
+            NotificationQueue(
+                notification_type=NotificationType.EVENT_REMINDER,
+                channel=NotificationChannel.EMAIL,
+                subject="Reminder",
+                message=f"message {i}",
+                scheduled_for=scheduled_for,
+                status="queued",
+                attempts=0,
+                max_attempts=3,
+                event_id=1,
+                recipient_id=1
+            )
+            for i in range(count)
+        ])
+        db.commit()
+
+
+class TestNotificationScheduler:
+    """Test cases for the due-notification scheduler."""
+
+    def test_drain_grows_batches_until_backlog_clears(self, session_factory):
+        _queue(session_factory, 130, datetime.utcnow() - timedelta(minutes=5))
+        scheduler = NotificationScheduler(session_factory, min_batch=10, max_batch=40)
+
+        with patch.object(NotificationService, "_send_notification", new_callable=AsyncMock, return_value=True), \
+                patch.object(notification_scheduler.due_index, "pop_due"):
+            dispatched = scheduler.drain()
+
+        assert dispatched == 130
+        assert scheduler.metrics.last_batch_size == 40
+        with session_factory() as db:
+            sent = db.execute(
+                select(func.count()).select_from(NotificationQueue).where(NotificationQueue.status == "sent")
+            ).scalar()
+        assert sent == 130
+
+        lag = scheduler.metrics.snapshot()["lag_seconds"]
+        assert lag["samples"] == 130
+        assert lag["p50"] >= 300
+
+    def test_next_due_falls_back_to_table_without_redis(self, session_factory):
+        _queue(session_factory, 1, datetime.utcnow() + timedelta(seconds=60))
+        scheduler = NotificationScheduler(session_factory, max_idle_seconds=30)
+
+        with patch.object(notification_scheduler.due_index, "next_due", return_value=None):
+            assert 55 < scheduler.seconds_until_due() <= 60
+
+    def test_empty_queue_sleeps_for_max_idle(self, session_factory):
+        scheduler = NotificationScheduler(session_factory, max_idle_seconds=30)
+
+        with patch.object(notification_scheduler.due_index, "next_due", return_value=None):
+            assert scheduler.seconds_until_due() == 30
+
+
+class TestDueIndex:
+    """Test cases for the Redis due index."""
+
+    def test_add_dedupes_times_and_wakes_scheduler(self):
+        client = MagicMock()
+        pipeline = client.pipeline.return_value
+        due = datetime(2030, 1, 1, 9, 0)
+
+        with patch.object(cache_backend, "_redis", client), patch.object(cache_backend, "_redis_retry_at", 0.0):
+            DueIndex().add([due, due, due + timedelta(hours=1)])
+
+        key, mapping = pipeline.zadd.call_args.args
+        assert key == DUE_INDEX_KEY
+        assert len(mapping) == 2
+        pipeline.lpush.assert_called_once()
+
+    def test_metrics_percentiles(self):
+        metrics = SchedulerMetrics()
+        for seconds in range(1, 101):
+            metrics.record_lag(seconds)
+
+        lag = metrics.snapshot()["lag_seconds"]
+        assert lag["p50"] == 51
+        assert lag["p95"] == 96
+        assert lag["max"] == 100
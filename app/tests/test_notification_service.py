@@ -460,25 +460,25 @@ class TestNotificationService:
             notif.status = "queued"
             notif.attempts = 0
         
-        mock_query = Mock()
-        mock_query.filter.return_value = mock_query
-        mock_query.order_by.return_value = mock_query
-        mock_query.limit.return_value = mock_query
-        mock_query.all.return_value = mock_notifications
+        for notif in mock_notifications:
+            notif.channel = NotificationChannel.EMAIL
+        mock_db.query.return_value.filter.return_value.all.return_value = []
+        repo = notification_service.notification_repo
         
-        mock_db.query.return_value = mock_query
-        mock_db.commit = Mock()
-        
-        with patch.object(notification_service, '_send_notification', new_callable=AsyncMock) as mock_send:
-            with patch.object(notification_service, '_log_notification'):
-                mock_send.return_value = True
-                
-                # Execute
-                result = await notification_service.process_pending_notifications()
-                
-                # Assert
-                assert result == 3
-                assert mock_send.call_count == 3
+        with patch.object(notification_service, '_send_notification', new_callable=AsyncMock) as mock_send, \
+                patch.object(repo, 'claim_due_notifications', side_effect=[mock_notifications, []]), \
+                patch.object(repo, 'complete_notifications') as mock_complete:
+            mock_send.return_value = True
+            
+            # Execute
+            result = await notification_service.process_pending_notifications()
+            
+            # Assert
+            assert result == 3
+            assert mock_send.call_count == 3
+            transitions, logs = mock_complete.call_args.args
+            assert [t["status"] for t in transitions] == ["sent"] * 3
+            assert len(logs) == 3
     
     # Notification preferences tests
     def test_get_user_preferences_success(self, notification_service, mock_db):
@@ -640,26 +640,33 @@ class TestNotificationService:
     def test_queue_reminder_notifications_success(self, notification_service, mock_db, mock_reminder):
         """Test successful reminder notifications queueing."""
         # Setup
-        mock_users = [Mock(spec=User) for _ in range(3)]
-        for i, user in enumerate(mock_users):
-            user.id = i + 1
-        
-        with patch.object(notification_service, '_get_reminder_targets', return_value=mock_users):
-            with patch.object(notification_service, '_get_user_notification_preferences') as mock_prefs:
-                with patch.object(notification_service, '_queue_notification') as mock_queue:
-                    mock_prefs.return_value = {
-                        'email_enabled': True,
-                        'sms_enabled': False,
-                        'push_enabled': True,
-                        'in_app_enabled': True
-                    }
-                    
-                    # Execute
-                    notification_service._queue_reminder_notifications(mock_reminder)
-                    
-                    # Assert
-                    # Should queue 3 channels (email, push, in_app) for 3 users = 9 notifications
-                    assert mock_queue.call_count == 9
+        mock_reminder.frequency = ReminderFrequency.ONCE
+        mock_reminder.recurrence_count = 1
+        repo = notification_service.notification_repo
+        
+        with patch.object(repo, 'get_reminder_target_ids', return_value=[1, 2, 3]), \
+                patch.object(repo, 'get_cached_preferences', return_value={}) as mock_prefs, \
+                patch.object(repo, 'replace_queued_reminder_notifications', side_effect=lambda _, rows: len(rows)) as mock_replace:
+            # Execute
+            result = notification_service.fan_out_reminder_notifications(mock_reminder)
+        
+        # Assert
+        # Should queue 3 channels (email, push, in_app) for 3 users = 9 notifications
+        assert result == 9
+        mock_prefs.assert_called_once()
+        mock_replace.assert_called_once()
+    
+    def test_queue_reminder_notifications_in_background(self, notification_service, mock_reminder):
+        """Reminder fan-out is handed to Celery, falling back inline when it cannot be enqueued."""
+        with patch('app.tasks.notifications.fan_out_reminder_notifications') as mock_task, \
+                patch.object(notification_service, 'fan_out_reminder_notifications') as mock_inline:
+            notification_service._queue_reminder_notifications(mock_reminder)
+            mock_task.delay.assert_called_once_with(mock_reminder.id)
+            mock_inline.assert_not_called()
+            
+            mock_task.delay.side_effect = ConnectionError("broker down")
+            notification_service._queue_reminder_notifications(mock_reminder)
+            mock_inline.assert_called_once_with(mock_reminder)
     
     def test_get_reminder_targets_all_guests(self, notification_service, mock_db, mock_reminder):
         """Test getting reminder targets for all guests."""
@@ -939,24 +946,29 @@ class TestNotificationService:
         reminder.send_push = False
         reminder.send_in_app = True
 
-        users = [Mock(spec=User), Mock(spec=User)]
-        users[0].id = 1
-        users[1].id = 2
-
-        with patch.object(notification_service.notification_repo, 'get_reminder_targets', return_value=users):
-            with patch.object(notification_service, '_get_user_notification_preferences', return_value={
-                'email_enabled': True,
-                'sms_enabled': False,
-                'push_enabled': False,
-                'in_app_enabled': True,
-                'advance_notice_hours': 0,
-                'quiet_hours_start': None,
-                'quiet_hours_end': None
-            }):
-                with patch.object(notification_service, '_queue_notification') as mock_queue:
-                    notification_service._queue_reminder_notifications(reminder)
-
-        assert mock_queue.call_count == 8
+        preference = {
+            'email_enabled': False,
+            'sms_enabled': False,
+            'push_enabled': False,
+            'in_app_enabled': True,
+            'advance_notice_hours': 0,
+            'quiet_hours_start': None,
+            'quiet_hours_end': None
+        }
+        repo = notification_service.notification_repo
+
+        with patch.object(repo, 'get_reminder_target_ids', return_value=[1, 2]), \
+                patch.object(repo, 'get_cached_preferences', return_value={1: None, 2: preference}), \
+                patch.object(repo, 'replace_queued_reminder_notifications', return_value=0) as mock_replace:
+            notification_service.fan_out_reminder_notifications(reminder)
+
+        reminder_id, rows = mock_replace.call_args.args
+        assert reminder_id == 101
+        # User 1 (defaults): email + in-app, user 2: in-app only, two occurrences each
+        assert len(rows) == 6
+        assert sorted({row['scheduled_for'] for row in rows if row['recipient_id'] == 2}) == [
+            reminder.scheduled_time, reminder.scheduled_time + timedelta(days=1)
+        ]
     
     # Integration-style tests
     def test_notification_workflow_integration(self, notification_service, mock_db, mock_event):
@@ -0,0 +1,136 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime, timedelta
+from sqlalchemy import Column, DateTime, Integer, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+from app.core.errors import ValidationError
+from app.core.pagination import (
+    _total_cache, count_rows, count_rows_async, decode_cursor, encode_cursor, fetch_keyset_page
+)
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "keyset_rows"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+
+KEYSET = (Row.created_at, Row.id)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    start = datetime(2026, 1, 1)
+    # Pairs of rows share a timestamp so the id tiebreaker is exercised
+    session.add_all([
+        Row(id=i, created_at=start + timedelta(minutes=i // 2)) for i in range(1, 26)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+class TestCursorEncoding:
+    """Test cases for opaque cursor encoding."""
+
+    def test_round_trip_preserves_datetimes(self):
+        created_at = datetime(2026, 3, 4, 5, 6, 7, 890)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    def test_garbage_cursor_is_rejected(self):
+        with pytest.raises(ValidationError):
+            decode_cursor("not-a-cursor")
+
+    def test_wrong_shape_is_rejected(self):
+        with pytest.raises(ValidationError):
+            decode_cursor(encode_cursor(1, 2, 3), size=2)
+
+
+class TestKeysetPages:
+    """Test cases for fetch_keyset_page."""
+
+    def test_walks_every_row_once(self, db):
+        seen, cursor = [], None
+        while True:
+            page = fetch_keyset_page(db, select(Row), KEYSET, size=7, cursor=cursor)
+            seen.extend(row.id for row in page.items)
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+
+        assert seen == list(range(25, 0, -1))
+
+    def test_ascending_order(self, db):
+        page = fetch_keyset_page(db, select(Row), KEYSET, size=5, descending=False)
+        following = fetch_keyset_page(
+            db, select(Row), KEYSET, size=5, cursor=page.next_cursor, descending=False
+        )
+
+        assert [row.id for row in page.items] == [1, 2, 3, 4, 5]
+        assert [row.id for row in following.items] == [6, 7, 8, 9, 10]
+
+    def test_offset_applies_without_cursor(self, db):
+        page = fetch_keyset_page(db, select(Row), KEYSET, size=5, offset=20)
+
+        assert [row.id for row in page.items] == [5, 4, 3, 2, 1]
+        assert page.next_cursor is None
+        assert page.total == 25
+        assert page.total_is_estimate is False
+
+    def test_cursor_pages_use_cached_total(self, db):
+        first = fetch_keyset_page(db, select(Row), KEYSET, size=5)
+        second = fetch_keyset_page(
+            db, select(Row), KEYSET, size=5, cursor=first.next_cursor,
+            cache_params={"listing": "test_rows"}
+        )
+
+        assert second.total == 25
+        assert second.total_is_estimate is True
+
+    def test_first_page_uses_cached_total(self, db, monkeypatch):
+        monkeypatch.setattr(_total_cache, "get_or_load", MagicMock(return_value=40))
+
+        page = fetch_keyset_page(db, select(Row), KEYSET, size=5, cache_params={"listing": "first_rows"})
+
+        assert (page.total, page.total_is_estimate) == (40, True)
+        assert len(page.items) == 5
+
+
+class TestCountRows:
+    """Test cases for count_rows modes."""
+
+    def test_estimate_falls_back_to_exact_off_postgres(self, db):
+        assert count_rows(db, select(Row), mode="estimated") == (25, False)
+
+    def test_cached_requires_params(self, db):
+        assert count_rows(db, select(Row), mode="cached") == (25, False)
+
+
+class TestCountRowsAsync:
+    """Test cases for count_rows_async."""
+
+    @pytest.mark.asyncio
+    async def test_cached_total_skips_the_query(self, monkeypatch):
+        monkeypatch.setattr(_total_cache, "get", MagicMock(return_value=(True, 40)))
+        db = MagicMock()
+        db.execute = AsyncMock()
+
+        assert await count_rows_async(db, select(Row), {"listing": "async_rows"}, mode="cached") == (40, True)
+        db.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_cache_miss_counts_and_stores(self, monkeypatch):
+        store = MagicMock()
+        monkeypatch.setattr(_total_cache, "get", MagicMock(return_value=(False, None)))
+        monkeypatch.setattr(_total_cache, "set", store)
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(scalar=MagicMock(return_value=7)))
+
+        assert await count_rows_async(db, select(Row), {"listing": "async_rows"}, mode="cached") == (7, True)
+        store.assert_called_once_with({"listing": "async_rows"}, 7)
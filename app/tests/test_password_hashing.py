@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from passlib.context import CryptContext
+from app.core.security import PasswordHasher, pwd_context
+from app.schemas.user import UserLogin
+
+
+class TestPasswordHasher:
+    """Test cases for bcrypt run off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify(self):
+        hasher = PasswordHasher(CryptContext(schemes=["bcrypt_sha256"], bcrypt_sha256__rounds=4), max_workers=2)
+
+        hashed = await hasher.hash("secret-password")
+
+        assert await hasher.verify("secret-password", hashed) is True
+        assert await hasher.verify("wrong-password", hashed) is False
+        assert hasher.snapshot()["completed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_outdated_cost_is_rehashed(self):
+        old = CryptContext(schemes=["bcrypt_sha256"], bcrypt_sha256__rounds=4).hash("secret-password")
+        hasher = PasswordHasher(
+            CryptContext(schemes=["bcrypt_sha256"], bcrypt_sha256__rounds=5, bcrypt_sha256__min_rounds=5),
+            max_workers=1
+        )
+
+        valid, new_hash = await hasher.verify_and_update("secret-password", old)
+
+        assert valid is True
+        assert new_hash is not None and "r=5" in new_hash
+        assert await hasher.verify_and_update("secret-password", new_hash) == (True, None)
+        assert hasher.snapshot()["rehashed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_event_loop_keeps_running_while_hashing(self):
+        hasher = PasswordHasher(CryptContext(schemes=["bcrypt_sha256"], bcrypt_sha256__rounds=10), max_workers=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(*(hasher.hash("secret-password") for _ in range(4)))
+        task.cancel()
+
+        assert ticks > 10
+
+
+class TestLoginRehash:
+    """Test cases for upgrading stored hashes on login."""
+
+    @pytest.mark.asyncio
+    async def test_login_replaces_outdated_hash(self, auth_service, test_user, test_user_data, db_session):
+        old_hash = CryptContext(schemes=["bcrypt_sha256"], bcrypt_sha256__rounds=4).hash(test_user_data["password"])
+        test_user.hashed_password = old_hash
+        db_session.commit()
+
+        response = await auth_service.login_async(
+            UserLogin(email=test_user_data["email"], password=test_user_data["password"])
+        )
+
+        db_session.refresh(test_user)
+        assert response.access_token
+        assert test_user.hashed_password != old_hash
+        assert not pwd_context.needs_update(test_user.hashed_password)
+
+    @pytest.mark.asyncio
+    async def test_wrong_password_is_rejected(self, auth_service, test_user, test_user_data):
+        with pytest.raises(Exception, match="Invalid email or password"):
+            await auth_service.login_async(UserLogin(email=test_user_data["email"], password="not-the-password"))
@@ -0,0 +1,112 @@
+import random
+import threading
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.deps import get_current_superuser
+from app.core.database_performance import (
+    DurationSketch, QueryPerformanceMonitor, fingerprint_statement
+)
+
+
+class TestFingerprintStatement:
+    """Test cases for SQL statement fingerprinting."""
+
+    def test_literals_and_parameters_normalized(self):
+        first = fingerprint_statement("SELECT * FROM users WHERE id = %(id_1)s AND name = 'ann'")
+        second = fingerprint_statement("SELECT *  FROM users\nWHERE id = 42 AND name = 'bob'")
+        assert first == second == "SELECT * FROM users WHERE id = ? AND name = ?"
+
+    def test_in_lists_collapse(self):
+        short = fingerprint_statement("SELECT 1 FROM t WHERE id IN (%(a)s, %(b)s)")
+        long = fingerprint_statement("SELECT 1 FROM t WHERE id IN (1, 2, 3, 4, 5)")
+        assert short == long
+
+    def test_casts_preserved(self):
+        assert "::text" in fingerprint_statement("SELECT x::text FROM t")
+
+
+class TestQueryPerformanceMonitor:
+    """Test cases for the bounded query statistics aggregator."""
+
+    def test_aggregates_per_fingerprint(self):
+        monitor = QueryPerformanceMonitor(slow_query_threshold=10)
+        for i in range(1000):
+            monitor.log_query(f"SELECT * FROM events WHERE id = {i}", 0.001 * (i % 10 + 1))
+
+        stats = monitor.get_query_stats()
+        assert list(stats) == ["SELECT * FROM events WHERE id = ?"]
+        entry = stats["SELECT * FROM events WHERE id = ?"]
+        assert entry["count"] == 1000
+        assert entry["min_duration"] <= entry["p50_duration"] <= entry["p99_duration"] <= entry["max_duration"]
+
+    def test_fingerprints_are_bounded(self):
+        monitor = QueryPerformanceMonitor(slow_query_threshold=10, max_fingerprints=5)
+        for i in range(50):
+            monitor.log_query(f"SELECT * FROM table_{chr(97 + i % 26)}{chr(97 + i // 26)}", 0.001)
+
+        stats = monitor.get_query_stats()
+        assert len(stats) <= 6
+        assert stats[QueryPerformanceMonitor.OVERFLOW_FINGERPRINT]["count"] == 45
+
+    def test_bound_holds_across_shards_under_concurrency(self):
+        monitor = QueryPerformanceMonitor(slow_query_threshold=10, max_fingerprints=8)
+
+        def log(worker):
+            for i in range(200):
+                monitor.log_query(f"SELECT * FROM t{worker}_{i}", 0.001)
+
+        threads = [threading.Thread(target=log, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = monitor.get_query_stats()
+        assert monitor.get_fingerprint_count() == 8
+        assert len(stats) == 9
+        assert sum(entry["count"] for entry in stats.values()) == 1600
+
+    def test_slow_query_params_sampled(self):
+        monitor = QueryPerformanceMonitor(slow_query_threshold=0.1, param_sample_rate=0.0)
+        monitor.log_query("SELECT 1", 0.5, {"email": "a@example.com"})
+
+        slow = monitor.get_slow_queries()
+        assert len(slow) == 1
+        assert slow[0]["params"] is None
+
+
+class TestDurationSketch:
+    """Test cases for the streaming percentile sketch."""
+
+    def test_quantiles_within_relative_accuracy(self):
+        sketch = DurationSketch(relative_accuracy=0.02)
+        samples = sorted(random.uniform(0.001, 1.0) for _ in range(5000))
+        for sample in samples:
+            sketch.add(sample)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = samples[int(q * (len(samples) - 1))]
+            assert abs(sketch.quantile(q) - exact) / exact < 0.05
+
+
+def test_db_stats_endpoint():
+    app.dependency_overrides[get_current_superuser] = lambda: SimpleNamespace(id=1, is_superuser=True)
+    try:
+        with TestClient(app) as client:
+            response = client.get("/health/db-stats", params={"limit": 5})
+    finally:
+        app.dependency_overrides.pop(get_current_superuser, None)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert "queries" in body
+    assert "tracked_fingerprints" in body
+    assert len(body["slow_queries"]) <= 5
+
+
+def test_db_stats_requires_authentication():
+    with TestClient(app) as client:
+        response = client.get("/health/db-stats")
+
+    assert response.status_code == 401
@@ -0,0 +1,201 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+from fastapi import Request
+from app.core.rate_limiter import (
+    GCRA_SCRIPT, Rate, RateLimiter, RateLimitExceeded, create_rate_limit_decorator, get_identifier,
+    parse_rates, route_cost
+)
+from app.core.config import settings
+from app.core.security import create_access_token
+
+
+class _SharedBuckets:
+    """In-memory stand-in for the Redis keys and GCRA script shared by workers"""
+
+    def __init__(self):
+        self.tats = {}
+        self.calls = 0
+
+    async def __call__(self, keys, args):
+        self.calls += 1
+        interval, period, pending, cost = (float(arg) for arg in args)
+        now = time.monotonic()
+        tat = max(self.tats.get(keys[0], now), now)
+        tat = min(tat + pending * interval, now + period)
+        allowed = 0
+        if tat + cost * interval - now <= period:
+            tat += cost * interval
+            allowed = 1
+        self.tats[keys[0]] = tat
+        return [allowed, str(tat - now)]
+
+
+def _worker(shared: _SharedBuckets, **kwargs) -> RateLimiter:
+    limiter = RateLimiter(**kwargs)
+    limiter._redis = lambda: True
+    limiter._script = shared
+    return limiter
+
+
+def _request(headers=None, host="10.0.0.1") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": (host, 1234),
+    })
+
+
+class TestParseRates:
+    """Test cases for limit strings."""
+
+    def test_parses_single_and_multiple_rates(self):
+        assert parse_rates("5/minute") == [Rate(5, 60)]
+        assert parse_rates("100 per 10 seconds; 1000/hour") == [Rate(100, 10), Rate(1000, 3600)]
+
+    def test_rejects_garbage(self):
+        with pytest.raises(ValueError):
+            parse_rates("lots/minute")
+
+
+class TestLocalBuckets:
+    """Test cases for the per-worker GCRA buckets."""
+
+    @pytest.mark.asyncio
+    async def test_admits_burst_then_limits(self):
+        limiter = RateLimiter(use_redis=False)
+        rate = Rate(3, 60)
+
+        results = [await limiter.hit("k", rate) for _ in range(4)]
+
+        assert results[:3] == [None, None, None]
+        assert 19 < results[3] <= 20
+        assert limiter.snapshot()["limited"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cost_uses_more_of_the_limit(self):
+        limiter = RateLimiter(use_redis=False)
+        rate = Rate(20, 60)
+
+        assert await limiter.hit("k", rate, cost=10) is None
+        assert await limiter.hit("k", rate, cost=10) is None
+        assert await limiter.hit("k", rate, cost=1) is not None
+        assert await limiter.hit("other", rate, cost=1) is None
+
+    @pytest.mark.asyncio
+    async def test_buckets_are_bounded(self):
+        limiter = RateLimiter(use_redis=False, max_keys=2)
+        for key in range(5):
+            await limiter.hit(str(key), Rate(10, 60))
+
+        assert limiter.snapshot()["buckets"] == 2
+
+
+class TestSharedBuckets:
+    """Test cases for merging worker buckets through Redis."""
+
+    @pytest.mark.asyncio
+    async def test_tight_limit_is_shared_across_workers(self):
+        shared = _SharedBuckets()
+        workers = [_worker(shared), _worker(shared)]
+        rate = Rate(5, 60)
+
+        results = [await workers[i % 2].hit("login", rate) for i in range(8)]
+
+        assert results.count(None) == 5
+        assert shared.calls >= 6
+
+    @pytest.mark.asyncio
+    async def test_loose_limit_syncs_periodically(self):
+        shared = _SharedBuckets()
+        limiter = _worker(shared, sync_interval=60, local_share=0.1)
+        rate = Rate(1000, 60)
+
+        for _ in range(50):
+            assert await limiter.hit("api", rate) is None
+
+        assert shared.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_locally_admitted_cost_reaches_redis(self):
+        shared = _SharedBuckets()
+        first = _worker(shared, sync_interval=60, local_share=0.5)
+        second = _worker(shared, sync_interval=60, local_share=0.5)
+        rate = Rate(10, 60)
+
+        # The seventh hit pushes the six admitted locally to Redis
+        for _ in range(7):
+            assert await first.hit("api", rate) is None
+
+        admitted = [await second.hit("api", rate) for _ in range(10)]
+        assert admitted.count(None) == 3
+
+    @pytest.mark.asyncio
+    async def test_gcra_script_in_redis(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        server = fakeredis.FakeServer()
+        workers = []
+        for _ in range(2):
+            client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+            worker = RateLimiter(sync_interval=60, local_share=0.5)
+            worker._redis = lambda client=client: client
+            worker._script = client.register_script(GCRA_SCRIPT)
+            workers.append(worker)
+        rate = Rate(4, 60)
+
+        # The fourth hit reports the two admitted locally since the first
+        assert [await workers[0].hit("api", rate) for _ in range(4)] == [None] * 4
+
+        assert await workers[1].hit("api", rate) == pytest.approx(15, abs=1)
+        assert 0 < await client.pttl("rate_limit:api") <= 60000
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_fall_back_to_local_buckets(self):
+        limiter = RateLimiter()
+        limiter._redis = lambda: True
+        limiter._script = MagicMock(side_effect=OSError("down"))
+
+        assert await limiter.hit("k", Rate(1, 60)) is None
+        assert await limiter.hit("k", Rate(1, 60)) is not None
+
+
+class TestIdentificationAndCosts:
+    """Test cases for request keys and route weights."""
+
+    def test_identifies_by_token_subject(self):
+        token = create_access_token(subject=42)
+
+        assert get_identifier(_request({"Authorization": f"Bearer {token}"})) == "user:42"
+        assert get_identifier(_request({"Authorization": "Bearer not-a-jwt"})) == "10.0.0.1"
+        assert get_identifier(_request()) == "10.0.0.1"
+
+    def test_ai_routes_cost_more(self):
+        assert route_cost(f"{settings.API_V1_STR}/ai-chat/ai-chat/message") == settings.RATE_LIMIT_AI_COST
+        assert route_cost(f"{settings.API_V1_STR}/events") == 1
+
+    @pytest.mark.asyncio
+    async def test_decorator_raises_when_limited(self, monkeypatch):
+        from app.core import rate_limiter as rate_limiter_module
+        monkeypatch.setattr(rate_limiter_module, "limiter", RateLimiter(use_redis=False))
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+        @create_rate_limit_decorator("1/minute")
+        async def endpoint(request: Request):
+            return "ok"
+
+        assert await endpoint(request=_request()) == "ok"
+        with pytest.raises(RateLimitExceeded) as exc:
+            await endpoint(_request())
+        assert exc.value.retry_after == 60
+
+    def test_decorator_requires_a_request_parameter(self):
+        class ChecklistRequest:
+            pass
+
+        with pytest.raises(TypeError, match="needs a Request parameter"):
+            @create_rate_limit_decorator("1/minute")
+            async def endpoint(request: ChecklistRequest):
+                return "ok"
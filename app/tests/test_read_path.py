@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+from app.core.pagination import KeysetPage
+from app.repositories.event_repo import (
+    AsyncEventRepository, build_listing_statement, build_search_statement
+)
+
+
+def _compile(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestListingStatements:
+    """Test cases for the shared event listing/search statements."""
+
+    def test_public_listing_excludes_own_events(self):
+        sql = _compile(build_listing_statement("public", user_id=7))
+        assert "events.is_public" in sql
+        assert "events.creator_id !=" in sql
+
+    def test_upcoming_listing_applies_access_filter(self):
+        sql = _compile(build_listing_statement("upcoming", user_id=7))
+        assert "event_access" in sql
+        assert "event_invitations" not in sql
+        assert "event_collaborators" not in sql
+        assert "ORDER BY events.start_datetime ASC, events.id ASC" in sql
+
+    def test_event_type_filter(self):
+        sql = _compile(build_listing_statement("hosting", user_id=7, event_type="party"))
+        assert "events.event_type" in sql
+
+    def test_anonymous_search_only_public(self):
+        sql = _compile(build_search_statement("party"))
+        assert "events.is_public" in sql
+        assert "event_invitations" not in sql
+
+
+class TestAsyncEventRepository:
+    """Test cases for AsyncEventRepository."""
+
+    @pytest.mark.asyncio
+    async def test_get_listing_returns_keyset_page(self, monkeypatch):
+        page = KeysetPage([MagicMock(), MagicMock()], "next", 12)
+
+        fetch = AsyncMock(return_value=page)
+        monkeypatch.setattr("app.repositories.event_repo.fetch_keyset_page_async", fetch)
+
+        repo = AsyncEventRepository(MagicMock())
+        result = await repo.get_listing("hosting", user_id=1, limit=2, cursor="abc")
+
+        assert result == page
+        fetch.assert_awaited_once()
+        assert fetch.await_args.kwargs["cursor"] == "abc"
+
+    @pytest.mark.asyncio
+    async def test_creator_can_access(self):
+        repo = AsyncEventRepository(MagicMock())
+        event = MagicMock(creator_id=5, is_public=False)
+
+        assert await repo.user_can_access(event, 5) is True
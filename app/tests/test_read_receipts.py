@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+from app.db.base import Base
+from app.models.message_models import ChatParticipant, Message, MessageReadReceipt
+from app.repositories.message_repo import (
+    advance_read_watermark, count_unread_messages, record_read_receipts
+)
+
+TABLES = [Message.__table__, MessageReadReceipt.__table__, ChatParticipant.__table__]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLES)
+    session = Session(engine)
+    start = datetime(2026, 1, 1)
+    # Messages 1-10 in event 1 alternate between users 1 and 2; 11 is in event 2
+    session.add_all([
+        Message(id=i, event_id=1, sender_id=1 + i % 2, content=f"m{i}", created_at=start + timedelta(minutes=i))
+        for i in range(1, 11)
+    ])
+    session.add(Message(id=11, event_id=2, sender_id=2, content="other", created_at=start))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _watermark(db, user_id=1):
+    return db.execute(
+        select(ChatParticipant.last_read_message_id).where(
+            ChatParticipant.event_id == 1, ChatParticipant.user_id == user_id
+        )
+    ).scalar()
+
+
+class TestReadReceipts:
+    """Test cases for bulk read receipts."""
+
+    def test_bulk_insert_skips_existing_and_foreign_ids(self, db):
+        assert record_read_receipts(db, 1, 1, [1, 2, 3]) == 3
+        assert record_read_receipts(db, 1, 1, [2, 3, 4, 11]) == 1
+        db.commit()
+
+        count = db.execute(select(func.count()).select_from(MessageReadReceipt)).scalar()
+        assert count == 4
+
+    def test_bulk_insert_is_one_statement(self, db):
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        record_read_receipts(db, 1, 1, list(range(1, 11)))
+
+        assert len(statements) == 1
+
+
+class TestReadWatermark:
+    """Test cases for the per-participant read watermark."""
+
+    def test_watermark_creates_participant(self, db):
+        assert advance_read_watermark(db, 1, 1, 5) is True
+        db.commit()
+
+        assert _watermark(db) == 5
+
+    def test_watermark_never_moves_back(self, db):
+        advance_read_watermark(db, 1, 1, 8)
+        db.commit()
+
+        assert advance_read_watermark(db, 1, 1, 3) is False
+        assert _watermark(db) == 8
+
+    def test_watermark_keeps_one_row_per_participant(self, db):
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        assert advance_read_watermark(db, 1, 1, 3) is True
+        assert advance_read_watermark(db, 1, 1, 7) is True
+        assert len(statements) == 2
+        db.commit()
+
+        rows = db.execute(select(func.count()).select_from(ChatParticipant)).scalar()
+        assert rows == 1
+        assert _watermark(db) == 7
+
+    def test_unread_count_follows_watermark(self, db):
+        # User 1 has not read anything; user 2 sent messages 1, 3, 5, 7, 9
+        assert count_unread_messages(db, 1, 1) == 5
+
+        advance_read_watermark(db, 1, 1, 6)
+        db.commit()
+
+        assert count_unread_messages(db, 1, 1) == 2
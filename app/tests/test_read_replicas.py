@@ -0,0 +1,114 @@
+import time
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from app.core import db_optimizations
+from app.core.db_optimizations import (
+    ReadReplicaManager, ReplicaState, WriteTracker, write_session_for
+)
+
+
+def _replica(name: str, latency: float = 0.01) -> ReplicaState:
+    replica = ReplicaState(name, create_engine("sqlite://"))
+    replica.record_latency(latency)
+    return replica
+
+
+def _manager(*replicas: ReplicaState) -> ReadReplicaManager:
+    manager = ReadReplicaManager()
+    manager.replicas = list(replicas)
+    manager.initialized = True
+    return manager
+
+
+class TestReplicaSelection:
+    """Test cases for replica selection and the read-your-writes guard."""
+
+    def test_unhealthy_replicas_are_skipped(self):
+        healthy, down = _replica("replica_0"), _replica("replica_1")
+        down.healthy = False
+        manager = _manager(healthy, down)
+
+        assert all(manager.choose_replica() is healthy for _ in range(50))
+
+    def test_falls_back_to_primary_without_healthy_replicas(self):
+        down = _replica("replica_0")
+        down.healthy = False
+        manager = _manager(down)
+
+        assert manager.choose_replica() is None
+        session = manager.get_read_session()
+        assert "replica" not in session.info
+        session.close()
+
+    def test_faster_replica_gets_more_traffic(self):
+        fast, slow = _replica("fast", latency=0.001), _replica("slow", latency=0.1)
+        manager = _manager(fast, slow)
+
+        picks = [manager.choose_replica().name for _ in range(500)]
+        assert picks.count("fast") > picks.count("slow") * 5
+
+    def test_recent_writer_reads_from_primary(self):
+        manager = _manager(_replica("replica_0"))
+        tracker = WriteTracker()
+        tracker.record_write(42)
+
+        with patch.object(db_optimizations, "write_tracker", tracker), \
+                patch.object(db_optimizations.cache_backend, "_redis_retry_at", time.monotonic() + 60):
+            assert manager.choose_replica(user_id=42) is None
+            assert manager.choose_replica(user_id=7) is not None
+
+    def test_replica_session_is_tagged(self):
+        manager = _manager(_replica("replica_0"))
+        session = manager.get_read_session()
+
+        assert session.info["replica"] == "replica_0"
+        session.close()
+
+
+class TestReplicaHealth:
+    """Test cases for replica health checks and metrics."""
+
+    def test_failed_check_marks_replica_unhealthy(self):
+        replica = _replica("replica_0")
+        replica.engine = MagicMock()
+        replica.engine.connect.side_effect = Exception("connection refused")
+        manager = _manager(replica)
+
+        manager.check_health()
+
+        assert replica.healthy is False
+        assert replica.consecutive_failures == 1
+        assert manager.get_report()["replica_0"]["last_error"] == "connection refused"
+
+    def test_successful_check_restores_replica(self):
+        replica = _replica("replica_0")
+        replica.healthy = False
+        manager = _manager(replica)
+
+        manager.check_health()
+
+        assert replica.healthy is True
+        assert replica.lag_seconds == 0.0
+
+    def test_queries_record_latency(self):
+        replica = ReplicaState("replica_0", create_engine("sqlite://"))
+        with replica.engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+
+        report = replica.report()
+        assert report["query_count"] == 1
+        assert report["latency_ms"]["ewma"] > 0
+
+
+class TestWriteSession:
+    """Test cases for routing writes made during read requests."""
+
+    def test_primary_session_is_reused(self):
+        session = MagicMock(info={})
+        with write_session_for(session) as write_db:
+            assert write_db is session
+
+    def test_replica_session_writes_go_to_primary(self):
+        session = MagicMock(info={"replica": "replica_0"})
+        with write_session_for(session) as write_db:
+            assert write_db is not session
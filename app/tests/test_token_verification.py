@@ -0,0 +1,131 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+from app.core.cache import cache_backend
+from app.core.deps import get_current_user_token, get_current_user_token_async
+from app.core.security import TokenVerifier, create_access_token, jwt
+from app.models.user_models import UserSession
+from app.schemas.user import UserLogin
+
+
+@pytest.fixture(autouse=True)
+def clear_local_cache():
+    cache_backend.local.clear()
+    yield
+    cache_backend.local.clear()
+
+
+class TestTokenVerifier:
+    """Test cases for the decoded-token LRU."""
+
+    def test_repeat_verification_skips_decode(self):
+        verifier = TokenVerifier(max_entries=10)
+        token = create_access_token(subject=7, session_id=3)
+
+        with patch.object(jwt, "decode", wraps=jwt.decode) as decode:
+            first = verifier.verify(token)
+            second = verifier.verify(token)
+
+        assert first == second
+        assert (first.subject, first.session_id) == ("7", 3)
+        assert decode.call_count == 1
+        assert verifier.snapshot()["hits"] == 1
+
+    def test_entry_is_dropped_at_token_expiry(self):
+        verifier = TokenVerifier(max_entries=10)
+        token = create_access_token(subject=7)
+        claims = verifier.verify(token)
+        verifier._entries[claims.digest] = claims._replace(subject="stale", expires_at=0)
+
+        assert verifier.verify(token).subject == "7"
+
+    def test_invalid_tokens_are_not_cached(self):
+        verifier = TokenVerifier(max_entries=10)
+
+        assert verifier.verify(create_access_token(subject=7, expires_delta=timedelta(minutes=-1))) is None
+        assert verifier.verify("not-a-jwt") is None
+        assert verifier.snapshot()["entries"] == 0
+
+    def test_cache_is_bounded(self):
+        verifier = TokenVerifier(max_entries=2)
+        for user_id in range(5):
+            verifier.verify(create_access_token(subject=user_id))
+
+        assert verifier.snapshot()["entries"] == 2
+
+
+class TestSessionRevocation:
+    """Test cases for refusing tokens of logged-out sessions."""
+
+    def _login(self, auth_service, test_user_data):
+        return auth_service.login(UserLogin(email=test_user_data["email"], password=test_user_data["password"]))
+
+    def test_active_session_token_is_accepted(self, auth_service, test_user, test_user_data, db_session):
+        tokens = self._login(auth_service, test_user_data)
+
+        assert get_current_user_token(tokens.access_token, db_session) == str(test_user.id)
+
+    def test_logout_revokes_access_token(self, auth_service, test_user, test_user_data, db_session):
+        tokens = self._login(auth_service, test_user_data)
+        get_current_user_token(tokens.access_token, db_session)
+
+        auth_service.logout(test_user.id, tokens.access_token)
+
+        with pytest.raises(HTTPException):
+            get_current_user_token(tokens.access_token, db_session)
+
+    def test_logout_all_revokes_tokens_replaced_by_refresh(self, auth_service, test_user, test_user_data, db_session):
+        tokens = self._login(auth_service, test_user_data)
+        refreshed = auth_service.refresh_token(tokens.refresh_token)
+
+        auth_service.logout_all_sessions(test_user.id)
+
+        for token in (tokens.access_token, refreshed.access_token):
+            with pytest.raises(HTTPException):
+                get_current_user_token(token, db_session)
+
+    def test_tokens_without_session_id_are_revoked_by_digest(self, auth_service, test_user, test_user_data, db_session):
+        tokens = self._login(auth_service, test_user_data)
+        legacy_token = create_access_token(subject=test_user.id)
+        session = db_session.query(UserSession).filter(UserSession.user_id == test_user.id).one()
+        session.session_token = legacy_token
+        db_session.commit()
+        assert get_current_user_token(legacy_token, db_session) == str(test_user.id)
+
+        auth_service.logout(test_user.id, legacy_token)
+
+        with pytest.raises(HTTPException):
+            get_current_user_token(legacy_token, db_session)
+
+
+class TestAsyncSessionRevocation:
+    """Test cases for the revocation check behind the async user dependencies."""
+
+    def _db(self, rows):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=rows)))
+        return db
+
+    @pytest.mark.asyncio
+    async def test_active_session_token_is_accepted(self):
+        db = self._db([])
+
+        assert await get_current_user_token_async(create_access_token(subject=7, session_id=3), db) == "7"
+        db.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_revoked_session_token_is_refused(self):
+        token = create_access_token(subject=7, session_id=3)
+        db = self._db([(3, token)])
+
+        with pytest.raises(HTTPException):
+            await get_current_user_token_async(token, db)
+
+    @pytest.mark.asyncio
+    async def test_revocations_are_cached(self):
+        db = self._db([])
+        await get_current_user_token_async(create_access_token(subject=7, session_id=3), db)
+
+        assert await get_current_user_token_async(create_access_token(subject=7, session_id=4), db) == "7"
+        db.execute.assert_awaited_once()
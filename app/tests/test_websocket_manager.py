@@ -0,0 +1,94 @@
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.core.config import settings
+from app.services import websocket_manager as websocket_module
+from app.services.websocket_manager import WS_TRY_AGAIN_LATER, ConnectionManager
+from app.services.websocket_presence import PresenceRegistry
+
+
+def _socket(delay: float = 0) -> MagicMock:
+    websocket = MagicMock()
+    websocket.accept = AsyncMock()
+    websocket.close = AsyncMock()
+
+    async def send_text(payload):
+        await asyncio.sleep(delay)
+
+    websocket.send_text = AsyncMock(side_effect=send_text)
+    return websocket
+
+
+@pytest_asyncio.fixture
+async def manager():
+    presence = PresenceRegistry(worker_id="local")
+    presence._retry_at = float("inf")  # No Redis: this worker only
+    manager = ConnectionManager(presence=presence)
+    yield manager
+    await manager.close_all()
+
+
+class TestSendQueues:
+    """Test cases for per-connection outbound queues."""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_serializes_once(self, manager):
+        for user_id in range(50):
+            await manager.connect(_socket(), user_id)
+
+        with patch.object(websocket_module.json, "dumps", wraps=json.dumps) as dumps:
+            results = await manager.broadcast_to_users(list(range(50)), {"type": "notification"})
+
+        assert all(results.values())
+        assert dumps.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_delay_others(self, manager):
+        slow, fast = _socket(delay=60), _socket()
+        await manager.connect(slow, 1)
+        await manager.connect(fast, 2)
+
+        await manager.broadcast_to_users([1, 2], {"type": "notification"})
+        await asyncio.sleep(0.01)
+
+        fast.send_text.assert_awaited_with('{"type": "notification"}')
+        assert slow.send_text.await_count == 1  # Still writing connection_established
+
+    @pytest.mark.asyncio
+    async def test_full_queue_evicts_client(self, manager):
+        slow = _socket(delay=60)
+        with patch.object(settings, "WEBSOCKET_SEND_QUEUE_SIZE", 2):
+            await manager.connect(slow, 1)
+        await asyncio.sleep(0)  # Writer picks up connection_established and stalls
+
+        sent = [await manager.send_user_notification(1, {"n": n}) for n in range(4)]
+        await asyncio.sleep(0)
+
+        assert sent == [True, True, False, False]
+        assert manager.evictions == 1
+        assert not manager.is_user_online(1)
+        slow.close.assert_awaited_once_with(code=WS_TRY_AGAIN_LATER)
+
+    @pytest.mark.asyncio
+    async def test_write_timeout_evicts_client(self, manager):
+        stuck = _socket(delay=60)
+        with patch.object(settings, "WEBSOCKET_SEND_TIMEOUT_SECONDS", 0.01):
+            await manager.connect(stuck, 1)
+            await manager.flush()
+
+        assert manager.evictions == 1
+        assert stuck not in manager.writers
+
+    @pytest.mark.asyncio
+    async def test_ping_reaches_every_connection(self, manager):
+        sockets = [_socket() for _ in range(5)]
+        for user_id, websocket in enumerate(sockets):
+            await manager.connect(websocket, user_id % 2)
+
+        await manager.ping_connections()
+        await manager.flush()
+
+        for websocket in sockets:
+            assert json.loads(websocket.send_text.await_args.args[0])["type"] == "ping"
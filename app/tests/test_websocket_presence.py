@@ -0,0 +1,158 @@
+import json
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+import redis
+from app.services.redis_subscriber import RedisSubscriber
+from app.services import redis_subscriber
+from app.services.websocket_manager import ConnectionManager
+from app.services.websocket_presence import PresenceRegistry
+
+
+def _socket() -> MagicMock:
+    websocket = MagicMock()
+    websocket.accept = AsyncMock()
+    websocket.send_text = AsyncMock()
+    return websocket
+
+
+class _Fleet:
+    """In-memory stand-in for the Redis presence keys shared by several workers"""
+
+    def __init__(self):
+        self.leases = {}
+        self.reports = {}
+        self.managers = {}
+
+    def worker(self, worker_id: str) -> ConnectionManager:
+        manager = ConnectionManager(presence=_FleetPresence(self, worker_id))
+        self.managers[worker_id] = manager
+        return manager
+
+    async def close(self):
+        for manager in self.managers.values():
+            await manager.close_all()
+
+
+@pytest_asyncio.fixture
+async def fleet():
+    fleet = _Fleet()
+    yield fleet
+    await fleet.close()
+
+
+class _FleetPresence(PresenceRegistry):
+    def __init__(self, fleet: _Fleet, worker_id: str):
+        super().__init__(worker_id=worker_id)
+        self.fleet = fleet
+        self.published = []
+
+    async def register(self, user_id):
+        self.fleet.leases.setdefault(user_id, set()).add(self.worker_id)
+
+    async def unregister(self, user_id):
+        self.fleet.leases.get(user_id, set()).discard(self.worker_id)
+
+    async def heartbeat(self, user_ids, stats):
+        self.fleet.reports[self.worker_id] = json.loads(json.dumps(stats))
+
+    async def workers_for(self, user_ids):
+        return {user_id: sorted(self.fleet.leases.get(user_id, ())) for user_id in user_ids}
+
+    async def publish(self, worker_id, user_ids, payload):
+        # What the target worker's RedisSubscriber does with the message
+        self.published.append((worker_id, user_ids))
+        for user_id in user_ids:
+            await self.fleet.managers[worker_id].deliver_local(user_id, payload)
+        return 1
+
+    async def fleet_stats(self):
+        return list(self.fleet.reports.values())
+
+
+class TestCrossWorkerDelivery:
+    """Test cases for routing notifications to the worker holding a socket."""
+
+    @pytest.mark.asyncio
+    async def test_notification_reaches_socket_on_other_worker(self, fleet):
+        worker_a, worker_b = fleet.worker("a"), fleet.worker("b")
+        websocket = _socket()
+        await worker_b.connect(websocket, 7)
+
+        assert worker_a.is_user_online(7) is False
+        assert await worker_a.is_user_online_anywhere(7) is True
+        assert await worker_a.send_user_notification(7, {"type": "notification"}) is True
+        await worker_b.flush()
+        websocket.send_text.assert_awaited_with('{"type": "notification"}')
+
+    @pytest.mark.asyncio
+    async def test_broadcast_sends_one_message_per_worker(self, fleet):
+        worker_a, worker_b = fleet.worker("a"), fleet.worker("b")
+        for user_id in (1, 2, 3):
+            await worker_b.connect(_socket(), user_id)
+        await worker_a.connect(_socket(), 4)
+
+        results = await worker_a.broadcast_to_users([1, 2, 3, 4, 5], {"type": "notification"})
+
+        assert results == {1: True, 2: True, 3: True, 4: True, 5: False}
+        assert worker_a.presence.published == [("b", [1, 2, 3])]
+
+    @pytest.mark.asyncio
+    async def test_disconnect_releases_presence(self, fleet):
+        worker_a, worker_b = fleet.worker("a"), fleet.worker("b")
+        websocket = _socket()
+        await worker_b.connect(websocket, 7)
+
+        worker_b.disconnect(websocket)
+        await worker_b.presence.unregister(7)  # Scheduled by disconnect
+
+        assert await worker_a.is_user_online_anywhere(7) is False
+
+    @pytest.mark.asyncio
+    async def test_fleet_stats_sum_every_worker(self, fleet):
+        worker_a, worker_b = fleet.worker("a"), fleet.worker("b")
+        await worker_a.connect(_socket(), 1)
+        await worker_b.connect(_socket(), 1)
+        await worker_b.connect(_socket(), 2)
+        await worker_b.heartbeat()
+
+        stats = await worker_a.get_fleet_stats()
+
+        assert stats["workers"] == 2
+        assert stats["total_connections"] == 3
+        assert stats["connections_by_user"] == {"1": 2, "2": 1}
+
+
+class TestPresenceRegistry:
+    """Test cases for the Redis presence registry."""
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_degrades_to_local_view(self):
+        registry = PresenceRegistry(worker_id="a")
+        client = MagicMock()
+        client.publish = AsyncMock(side_effect=redis.ConnectionError("down"))
+        registry._client = client
+        manager = ConnectionManager(presence=registry)
+
+        assert await registry.publish("b", [1], "{}") == 0
+        # Marked down: later calls skip Redis instead of waiting on it
+        assert await registry.workers_for([1]) is None
+        assert await manager.is_user_online_anywhere(1) is False
+        assert (await manager.get_fleet_stats())["workers"] == 1
+        await manager.close_all()
+
+    @pytest.mark.asyncio
+    async def test_routed_message_is_delivered_locally(self):
+        manager = ConnectionManager(presence=PresenceRegistry(worker_id="b"))
+        manager.presence._retry_at = float("inf")
+        websocket = _socket()
+        await manager.connect(websocket, 7)
+        subscriber = RedisSubscriber()
+        with patch.object(redis_subscriber, "websocket_manager", manager):
+            await subscriber._handle_message(
+                manager.presence.channel, json.dumps({"user_ids": [7], "payload": '{"type": "notification"}'})
+            )
+        await manager.flush()
+
+        websocket.send_text.assert_awaited_with('{"type": "notification"}')
+        await manager.close_all()
@@ -0,0 +1,54 @@
+"""
+Rebuild the event_access table from creators, collaborators and invitations.
+
+Run once after the migration that creates the table, and again whenever
+grants are suspected to have drifted. Events are processed in ID ranges,
+one transaction per batch, so it can run against a live database:
+
+    python scripts/backfill_event_access.py --batch-size 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal
+from app.models.event_models import Event
+from app.repositories.event_repo import EventRepository
+
+
+def backfill(batch_size: int, start_id: int = 0) -> int:
+    db = SessionLocal()
+    try:
+        max_id = db.execute(select(func.max(Event.id))).scalar() or 0
+        repo = EventRepository(db)
+        total = 0
+        started = time.perf_counter()
+        
+        for first_id in range(start_id, max_id + 1, batch_size):
+            last_id = min(first_id + batch_size - 1, max_id)
+            written = repo.rebuild_event_access(first_id, last_id)
+            db.commit()
+            total += written
+            print(f"events {first_id}-{last_id}: {written} grants")
+        
+        print(f"Wrote {total} grants for events up to id {max_id} in {time.perf_counter() - started:.1f}s")
+        return total
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Events per transaction")
+    parser.add_argument("--start-id", type=int, default=0, help="Resume from this event id")
+    args = parser.parse_args()
+    backfill(args.batch_size, args.start_id)
+
+
+if __name__ == "__main__":
+    main()
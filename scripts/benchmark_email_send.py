@@ -0,0 +1,76 @@
+"""
+Bulk email benchmark
+
+Sends the same invitation to N recipients through FakeEmailTransport, which
+sleeps for a fixed latency per provider call, so the numbers reflect how
+many round trips each strategy makes rather than Resend itself:
+
+    sequential  the previous send_bulk_email: one awaited request per
+                recipient
+    batched     EmailService.send_batch: EMAIL_BATCH_SIZE recipients per
+                call, calls running EMAIL_SEND_CONCURRENCY at a time
+
+Usage:
+    python scripts/benchmark_email_send.py --recipients 1000 --latency 0.15
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.email_service import EmailService
+from app.services.email_transport import FakeEmailTransport
+
+
+def messages(recipients: int):
+    return [
+        {
+            "to_email": f"guest{i}@example.com",
+            "subject": "You're invited!",
+            "html_content": f"<p>Hello guest {i}</p>"
+        }
+        for i in range(recipients)
+    ]
+
+
+async def sequential(service: EmailService, recipients: int) -> int:
+    sent = 0
+    for message in messages(recipients):
+        sent += await service.send_email(**message)
+    return sent
+
+
+async def batched(service: EmailService, recipients: int) -> int:
+    return sum(await service.send_batch(messages(recipients)))
+
+
+def run(label: str, strategy, args: argparse.Namespace):
+    transport = FakeEmailTransport(latency=args.latency, concurrency=args.concurrency)
+    service = EmailService(transport=transport)
+    start = time.perf_counter()
+    sent = asyncio.run(strategy(service, args.recipients))
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {label:<12} sent={sent:6d} provider_calls={len(transport.calls):5d} "
+        f"elapsed={elapsed:7.2f}s throughput={sent / elapsed:9.1f}/s"
+    )
+
+
+def main(args: argparse.Namespace):
+    print(f"{args.recipients} recipients, {args.latency * 1000:.0f}ms per provider call, "
+          f"concurrency {args.concurrency}")
+    run("sequential", sequential, argparse.Namespace(**{**vars(args), "recipients": min(args.recipients, args.sequential_limit)}))
+    run("batched", batched, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bulk email sending")
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.15, help="Seconds per simulated Resend call")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sequential-limit", type=int, default=100,
+                        help="Recipients sent by the sequential loop; it is too slow to run on the full list")
+    main(parser.parse_args())
@@ -0,0 +1,158 @@
+"""
+Event statistics benchmark
+
+Seeds one event with many invitations, tasks, expenses and comments into a
+scratch database and compares three ways of computing its statistics:
+
+    legacy     load the event's child collections and count in Python
+    aggregate  the single grouped query behind EventRepository.get_event_statistics
+    cached     get_event_statistics served from the read-through cache
+
+Usage:
+    # Throwaway PostgreSQL database (tables are created, then dropped):
+    python scripts/benchmark_event_stats.py --database-url postgresql://u:p@localhost/bench
+    # Quick run against in-memory SQLite:
+    python scripts/benchmark_event_stats.py --invitations 5000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event as orm_event
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.event_models import (
+    Comment, Event, EventAccess, EventInvitation, Expense, Poll, Task, event_collaborators
+)
+from app.models.shared_models import RSVPStatus, TaskStatus
+from app.models.user_models import User
+from app.repositories.event_repo import EventRepository, build_event_statistics_statement
+
+TABLES = [
+    User.__table__, Event.__table__, event_collaborators, EventAccess.__table__,
+    EventInvitation.__table__, Task.__table__, Expense.__table__, Comment.__table__, Poll.__table__
+]
+
+
+def seed(db: Session, invitations: int) -> int:
+    """Create one event with `invitations` invitees and proportional child rows"""
+    users = [
+        {"email": f"bench{i}@example.com", "hashed_password": "x", "full_name": f"Bench {i}"}
+        for i in range(invitations + 1)
+    ]
+    db.bulk_insert_mappings(User, users)
+    db.flush()
+    creator_id = db.query(User.id).order_by(User.id).first()[0]
+
+    event = Event(
+        title="Benchmark event",
+        creator_id=creator_id,
+        start_datetime=datetime.utcnow() + timedelta(days=30),
+        total_budget=100000.0
+    )
+    db.add(event)
+    db.flush()
+
+    statuses = list(RSVPStatus)
+    db.bulk_insert_mappings(EventInvitation, [
+        {"event_id": event.id, "user_id": creator_id + 1 + i, "rsvp_status": statuses[i % len(statuses)].value}
+        for i in range(invitations)
+    ])
+    task_statuses = list(TaskStatus)
+    db.bulk_insert_mappings(Task, [
+        {"event_id": event.id, "creator_id": creator_id, "title": f"Task {i}",
+         "status": task_statuses[i % len(task_statuses)].value}
+        for i in range(invitations // 10)
+    ])
+    db.bulk_insert_mappings(Expense, [
+        {"event_id": event.id, "paid_by_user_id": creator_id, "title": f"Expense {i}", "amount": 10.0,
+         "expense_date": datetime.utcnow()}
+        for i in range(invitations // 20)
+    ])
+    db.bulk_insert_mappings(Comment, [
+        {"event_id": event.id, "author_id": creator_id, "content": f"Comment {i}"}
+        for i in range(invitations // 5)
+    ])
+    db.commit()
+    return event.id
+
+
+def legacy_stats(db: Session, event_id: int) -> Dict:
+    """The previous service implementation: lazy-load every collection and count in Python"""
+    event = db.get(Event, event_id)
+    rsvp_counts = {
+        status.value: len([inv for inv in event.invitations if inv.rsvp_status == status])
+        for status in RSVPStatus
+    }
+    task_counts = {
+        status.value: len([task for task in event.tasks if task.status == status])
+        for status in TaskStatus
+    }
+    return {
+        "rsvp_counts": rsvp_counts,
+        "task_counts": task_counts,
+        "total_expenses": sum(expense.amount for expense in event.expenses),
+        "total_comments": len(event.comments),
+        "total_polls": len(event.polls),
+    }
+
+
+def measure(engine, label: str, runs: int, fn: Callable[[Session], object]) -> None:
+    queries = 0
+
+    def count_query(*_):
+        nonlocal queries
+        queries += 1
+
+    orm_event.listen(engine, "before_cursor_execute", count_query)
+    timings: List[float] = []
+    try:
+        for _ in range(runs):
+            with Session(engine) as db:
+                start = time.perf_counter()
+                fn(db)
+                timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        orm_event.remove(engine, "before_cursor_execute", count_query)
+
+    ordered = sorted(timings)
+    p95 = ordered[max(0, int(round(0.95 * len(ordered))) - 1)]
+    print(
+        f"  {label:<10} mean={statistics.fmean(timings):8.2f}ms p95={p95:8.2f}ms "
+        f"queries/call={queries / runs:.1f}"
+    )
+
+
+def main(args: argparse.Namespace):
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine, tables=TABLES)
+    try:
+        with Session(engine) as db:
+            event_id = seed(db, args.invitations)
+
+        print(f"event {event_id}: {args.invitations} invitations, runs={args.runs}")
+        measure(engine, "legacy", args.runs, lambda db: legacy_stats(db, event_id))
+        measure(
+            engine, "aggregate", args.runs,
+            lambda db: db.execute(build_event_statistics_statement(event_id)).first()
+        )
+        with Session(engine) as db:
+            EventRepository(db).get_event_statistics(event_id)
+        measure(engine, "cached", args.runs, lambda db: EventRepository(db).get_event_statistics(event_id))
+    finally:
+        Base.metadata.drop_all(engine, tables=list(reversed(TABLES)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark event statistics queries")
+    parser.add_argument("--database-url", default="sqlite://", help="Scratch database; tables are dropped afterwards")
+    parser.add_argument("--invitations", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=50)
+    main(parser.parse_args())
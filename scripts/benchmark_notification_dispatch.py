@@ -0,0 +1,193 @@
+"""
+Notification dispatch benchmark
+
+Seeds due rows into notification_queue across every channel and drains
+them with stub providers that sleep for a fixed per-channel latency, so
+the numbers reflect dispatch overhead and concurrency rather than real
+gateways. Two strategies are compared:
+
+    legacy      the previous loop: send one row at a time, then commit its
+                status and its delivery log individually
+    dispatcher  NotificationDispatcher: SKIP LOCKED batches, concurrent
+                sends bounded per channel, one commit per batch
+
+--workers runs several dispatchers, each with its own session, against the
+same queue to show claims stay disjoint; on PostgreSQL this exercises
+FOR UPDATE SKIP LOCKED for real.
+
+Usage:
+    # Throwaway PostgreSQL database (tables are created, then dropped):
+    python scripts/benchmark_notification_dispatch.py --database-url postgresql://u:p@localhost/bench --workers 4
+    # Quick run against in-memory SQLite:
+    python scripts/benchmark_notification_dispatch.py --notifications 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.notification_models import (
+    NotificationChannel, NotificationLog, NotificationQueue, NotificationStatus, NotificationType,
+    UserDevice
+)
+from app.models.user_models import User
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.notification_service import NotificationService
+
+TABLES = [User.__table__, UserDevice.__table__, NotificationQueue.__table__, NotificationLog.__table__]
+
+# Simulated provider round trip per channel, in seconds
+PROVIDER_LATENCY = {
+    NotificationChannel.EMAIL: 0.05,
+    NotificationChannel.SMS: 0.2,
+    NotificationChannel.PUSH: 0.03,
+    NotificationChannel.IN_APP: 0.002,
+}
+
+
+class StubProvider:
+    """Stand-in for a delivery provider with fixed latency"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def __call__(self, notification) -> bool:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return True
+
+
+def stub_senders() -> Dict[NotificationChannel, StubProvider]:
+    return {channel: StubProvider(latency) for channel, latency in PROVIDER_LATENCY.items()}
+
+
+def seed(db: Session, notifications: int, recipients: int):
+    """Reset the queue and fill it with due notifications spread over channels"""
+    db.query(NotificationLog).delete()
+    db.query(NotificationQueue).delete()
+    if not db.query(User.id).first():
+        db.bulk_insert_mappings(User, [
+            {"email": f"bench{i}@example.com", "hashed_password": "x", "full_name": f"Bench {i}"}
+            for i in range(recipients)
+        ])
+        db.flush()
+    user_ids = [row[0] for row in db.query(User.id).order_by(User.id)]
+
+    channels = list(NotificationChannel)
+    due = datetime.utcnow() - timedelta(minutes=1)
+    db.bulk_insert_mappings(NotificationQueue, [
+        {
+            "notification_type": NotificationType.EVENT_REMINDER,
+            "channel": channels[i % len(channels)],
+            "subject": "Reminder",
+            "message": f"Benchmark notification {i}",
+            "scheduled_for": due,
+            "priority": 5,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": 3,
+            "event_id": 1,
+            "recipient_id": user_ids[i % len(user_ids)],
+        }
+        for i in range(notifications)
+    ])
+    db.commit()
+
+
+async def legacy_dispatch(db: Session, limit: int) -> int:
+    """The previous process_pending_notifications loop, with stub providers"""
+    service = NotificationService(db)
+    repo = service.notification_repo
+    senders = stub_senders()
+    processed = 0
+    for notification in repo.get_queued_notifications(limit):
+        success = await senders[notification.channel](notification)
+        repo.update_notification_queue_status(notification.id, "sent" if success else "failed")
+        service._log_notification(
+            notification, NotificationStatus.SENT if success else NotificationStatus.FAILED
+        )
+        processed += 1
+    return processed
+
+
+async def dispatcher_workers(engine, workers: int, limit: int, batch_size: int) -> int:
+    """Run several dispatchers, each with its own session, until the queue drains"""
+    sessions = [Session(engine) for _ in range(workers)]
+    try:
+        results = await asyncio.gather(*[
+            NotificationDispatcher(
+                NotificationService(db), senders=stub_senders(), batch_size=batch_size
+            ).dispatch(limit)
+            for db in sessions
+        ])
+    finally:
+        for db in sessions:
+            db.close()
+    return sum(result.claimed for result in results)
+
+
+def report(engine, label: str, processed: int, elapsed: float):
+    with Session(engine) as db:
+        sent = db.execute(
+            select(func.count()).select_from(NotificationQueue).where(NotificationQueue.status == "sent")
+        ).scalar()
+    print(
+        f"  {label:<22} processed={processed:6d} sent={sent:6d} "
+        f"elapsed={elapsed:7.2f}s throughput={processed / elapsed:8.1f}/s"
+    )
+
+
+def main(args: argparse.Namespace):
+    if args.database_url.startswith("sqlite"):
+        # One shared in-memory database for every session
+        engine = create_engine(
+            args.database_url, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+    else:
+        engine = create_engine(args.database_url, pool_size=args.workers + 1)
+    Base.metadata.create_all(engine, tables=TABLES)
+    try:
+        print(f"{args.notifications} notifications, latency per channel: "
+              + ", ".join(f"{channel.value}={latency * 1000:.0f}ms" for channel, latency in PROVIDER_LATENCY.items()))
+
+        legacy_count = min(args.notifications, args.legacy_limit)
+        with Session(engine) as db:
+            seed(db, legacy_count, args.recipients)
+        with Session(engine) as db:
+            start = time.perf_counter()
+            processed = asyncio.run(legacy_dispatch(db, legacy_count))
+        report(engine, "legacy", processed, time.perf_counter() - start)
+
+        for workers in sorted({1, args.workers}):
+            with Session(engine) as db:
+                seed(db, args.notifications, args.recipients)
+            start = time.perf_counter()
+            processed = asyncio.run(
+                dispatcher_workers(engine, workers, args.notifications, args.batch_size)
+            )
+            report(engine, f"dispatcher x{workers}", processed, time.perf_counter() - start)
+    finally:
+        Base.metadata.drop_all(engine, tables=list(reversed(TABLES)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark notification queue dispatch")
+    parser.add_argument("--database-url", default="sqlite://", help="Scratch database; tables are dropped afterwards")
+    parser.add_argument("--notifications", type=int, default=2000)
+    parser.add_argument("--recipients", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent dispatchers sharing the queue")
+    parser.add_argument("--legacy-limit", type=int, default=200,
+                        help="Rows drained by the sequential loop; it is too slow to run on the full queue")
+    main(parser.parse_args())
@@ -0,0 +1,67 @@
+"""
+Rate limiter overhead benchmark
+
+Times RateLimiter.check for the API-wide limit, the check every request
+pays in RateLimitMiddleware, across a pool of clients:
+
+    local       in-memory buckets only (no Redis configured)
+    per-request a Redis round trip on every request, as the slowapi limiter
+                made (sync interval 0)
+    synced      the default: local buckets reported to Redis every
+                RATE_LIMIT_SYNC_SECONDS or RATE_LIMIT_LOCAL_SHARE of the limit
+
+The Redis modes need REDIS_URL to point at a running Redis.
+
+Usage:
+    python scripts/benchmark_rate_limiter.py --requests 20000 --clients 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.rate_limiter import RateLimitConfig, RateLimiter, parse_rates
+
+
+async def run(label: str, limiter: RateLimiter, requests: int, clients: int):
+    rates = parse_rates(RateLimitConfig.API)
+    identifiers = [f"user:{i}" for i in range(clients)]
+    latencies = []
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        identifier = random.choice(identifiers)
+        began = time.perf_counter()
+        await limiter.check(f"bench:{label}", rates, identifier)
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(int(0.99 * len(latencies)), len(latencies) - 1)]
+    stats = limiter.snapshot()
+    print(f"  {label:<12} mean={elapsed / requests * 1e6:8.1f}us p50={p50 * 1e6:8.1f}us p99={p99 * 1e6:8.1f}us "
+          f"redis_syncs={stats['syncs']:6d} limited={stats['limited']}")
+    await limiter.close()
+
+
+async def main(args: argparse.Namespace):
+    print(f"{args.requests} requests from {args.clients} clients against {RateLimitConfig.API}")
+    await run("local", RateLimiter(use_redis=False), args.requests, args.clients)
+    if args.skip_redis:
+        return
+    await run("per-request", RateLimiter(sync_interval=0, local_share=0), args.requests, args.clients)
+    await run("synced", RateLimiter(), args.requests, args.clients)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter overhead per request")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--skip-redis", action="store_true", help=f"Only time local buckets, not {settings.REDIS_URL}")
+    asyncio.run(main(parser.parse_args()))
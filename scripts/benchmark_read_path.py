@@ -0,0 +1,100 @@
+"""
+Read path load benchmark
+
+Fires concurrent GET requests at the hot read endpoints of a running API and
+reports latency percentiles, so the sync (psycopg2) and async (asyncpg) read
+paths can be compared under the same load.
+
+Usage:
+    # Start the API with DB_ASYNC_READ_PATH_ENABLED=false, then:
+    python scripts/benchmark_read_path.py --token <JWT> --event-id 1 --label sync
+    # Restart with DB_ASYNC_READ_PATH_ENABLED=true, then:
+    python scripts/benchmark_read_path.py --token <JWT> --event-id 1 --label async
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    path: str,
+    total_requests: int,
+    concurrency: int
+) -> Dict[str, float]:
+    """Issue total_requests GETs against path with bounded concurrency"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one_request():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total_requests,
+        "errors": errors,
+        "throughput_rps": total_requests / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+    }
+
+
+async def main(args: argparse.Namespace):
+    paths = [
+        "/api/v1/events/?limit=20",
+        "/api/v1/events/search?q=party&limit=20",
+        f"/api/v1/events/{args.event_id}",
+        f"/api/v1/messages/events/{args.event_id}/messages?per_page=50",
+        "/api/v1/notifications/in-app?per_page=20",
+    ]
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=30) as client:
+        print(f"[{args.label}] concurrency={args.concurrency} requests/endpoint={args.requests}")
+        for path in paths:
+            result = await run_endpoint(client, path, args.requests, args.concurrency)
+            print(
+                f"  {path:<55} rps={result['throughput_rps']:8.1f} "
+                f"p50={result['p50_ms']:7.1f}ms p95={result['p95_ms']:7.1f}ms "
+                f"p99={result['p99_ms']:7.1f}ms errors={result['errors']}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the hot read endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Bearer token of a verified user")
+    parser.add_argument("--event-id", type=int, required=True, help="Event the user can access")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--label", default="run", help="Label printed with the results")
+    asyncio.run(main(parser.parse_args()))
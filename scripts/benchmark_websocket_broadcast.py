@@ -0,0 +1,125 @@
+"""
+WebSocket broadcast benchmark
+
+Connects N simulated sockets to a ConnectionManager and broadcasts one
+notification to all of them. Each socket's send_text sleeps for a fixed
+latency; a fraction of them are slow clients that take far longer, like a
+mobile client on a bad network. Two strategies are compared:
+
+    sequential  the previous broadcast_to_users: json.dumps and an awaited
+                send_text per socket, one after the other
+    queued      ConnectionManager: serialize once, enqueue on every
+                socket's bounded queue, writer tasks send concurrently
+
+For each, the time until the broadcast call returns and until every
+healthy client has received the message are reported. Redis is not used;
+all sockets are on this worker.
+
+Usage:
+    python scripts/benchmark_websocket_broadcast.py --sockets 10000 --slow-fraction 0.01
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.websocket_manager import ConnectionManager
+from app.services.websocket_presence import PresenceRegistry
+
+
+class SimulatedSocket:
+    """Stand-in for a WebSocket with a fixed write latency"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.received = 0
+        self.received_at = None
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, payload: str):
+        await asyncio.sleep(self.latency)
+        self.received += 1
+        self.received_at = time.perf_counter()
+
+
+def make_sockets(args: argparse.Namespace):
+    slow_every = int(1 / args.slow_fraction) if args.slow_fraction else 0
+    return [
+        SimulatedSocket(args.slow_latency if slow_every and i % slow_every == 0 else args.latency)
+        for i in range(args.sockets)
+    ]
+
+
+def healthy_delivery(sockets, start: float, latency: float) -> str:
+    healthy = [s for s in sockets if s.latency == latency]
+    times = [s.received_at - start for s in healthy if s.received_at]
+    if len(times) < len(healthy):
+        return f"healthy_delivered={len(times)}/{len(healthy)}"
+    return f"all_healthy_by={max(times):7.3f}s"
+
+
+async def sequential(args: argparse.Namespace):
+    sockets = make_sockets(argparse.Namespace(**{**vars(args), "sockets": args.sequential_limit}))
+    notification = {"type": "notification", "title": "Benchmark", "message": "x" * 200}
+    start = time.perf_counter()
+    for websocket in sockets:
+        await websocket.send_text(json.dumps(notification))
+    returned = time.perf_counter() - start
+    print(f"  {'sequential':<11} sockets={len(sockets):6d} returned_after={returned:7.3f}s "
+          f"{healthy_delivery(sockets, start, args.latency)}")
+
+
+async def queued(args: argparse.Namespace):
+    presence = PresenceRegistry(worker_id="benchmark")
+    presence._retry_at = float("inf")  # No Redis: every socket is on this worker
+    manager = ConnectionManager(presence=presence)
+    sockets = make_sockets(args)
+    for user_id, websocket in enumerate(sockets):
+        await manager.connect(websocket, user_id)
+    await asyncio.sleep(args.slow_latency + 0.1)  # Let connection_established go out
+
+    notification = {"type": "notification", "title": "Benchmark", "message": "x" * 200}
+    start = time.perf_counter()
+    await manager.broadcast_to_users(list(range(len(sockets))), notification)
+    returned = time.perf_counter() - start
+    while any(s.received < 2 and s.latency == args.latency for s in sockets):
+        await asyncio.sleep(0.001)
+    print(f"  {'queued':<11} sockets={len(sockets):6d} returned_after={returned:7.3f}s "
+          f"{healthy_delivery(sockets, start, args.latency)}")
+
+    start = time.perf_counter()
+    await manager.ping_connections()
+    ping_returned = time.perf_counter() - start
+    await manager.flush()
+    print(f"  {'ping sweep':<11} sockets={len(sockets):6d} returned_after={ping_returned:7.3f}s "
+          f"all_written_by={time.perf_counter() - start:7.3f}s evictions={manager.evictions}")
+    await manager.close_all()
+
+
+def main(args: argparse.Namespace):
+    print(f"{args.sockets} sockets, {args.latency * 1000:.1f}ms per write, "
+          f"{args.slow_fraction:.1%} slow clients at {args.slow_latency * 1000:.0f}ms, "
+          f"queue size {settings.WEBSOCKET_SEND_QUEUE_SIZE}")
+    asyncio.run(sequential(args))
+    asyncio.run(queued(args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket broadcast fan-out")
+    parser.add_argument("--sockets", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.001, help="Seconds per write for healthy clients")
+    parser.add_argument("--slow-fraction", type=float, default=0.01)
+    parser.add_argument("--slow-latency", type=float, default=0.5, help="Seconds per write for slow clients")
+    parser.add_argument("--sequential-limit", type=int, default=1000,
+                        help="Sockets written by the sequential loop; it is too slow to run on all of them")
+    main(parser.parse_args())
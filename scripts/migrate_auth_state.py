@@ -0,0 +1,68 @@
+"""
+Move pending OTPs from the users table into the Redis auth state store.
+
+OTPs issued before the move keep working without this, since they are
+checked against the user row until replaced; running it once after
+deploying empties those columns. Sessions need no migration: refresh
+tokens issued before the move carry no session id and are rotated on the
+session row once, after which the session lives in Redis. Users are
+processed in ID ranges, one transaction per batch:
+
+    python scripts/migrate_auth_state.py --batch-size 2000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from app.core.auth_state import auth_state
+from app.db.session import SessionLocal
+from app.models.user_models import User
+
+
+def migrate_otps(db, batch_size: int) -> int:
+    max_id = db.execute(select(func.max(User.id))).scalar() or 0
+    now = datetime.utcnow()
+    total = 0
+    
+    for first_id in range(0, max_id + 1, batch_size):
+        users = db.query(User).filter(
+            User.id.between(first_id, first_id + batch_size - 1),
+            User.email_verification_otp.isnot(None)
+        ).all()
+        for user in users:
+            ttl = int((user.otp_expires_at - now).total_seconds()) if user.otp_expires_at else 0
+            if ttl > 0:
+                if not auth_state.issue_otp(user.id, user.email_verification_otp, ttl, user.otp_attempts):
+                    raise SystemExit("Redis unavailable, stopping before clearing any more rows")
+                total += 1
+            user.email_verification_otp = None
+            user.otp_expires_at = None
+            user.otp_attempts = 0
+        db.commit()
+    
+    print(f"Moved {total} pending OTPs for users up to id {max_id}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Users per transaction")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        migrate_otps(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()